@@ -6,13 +6,32 @@ client credentials flow to access SharePoint resources.
 """
 
 import os
+import json
 import time
-from typing import Optional, Dict, Any
+import random
+import base64
+import hashlib
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import logging
 import requests
-from requests.exceptions import RequestException
+from requests.exceptions import (
+    RequestException, ConnectionError as RequestsConnectionError, ConnectTimeout, Timeout
+)
+from cryptography.fernet import Fernet, InvalidToken
+
+from auth.http_pool import create_session, get_pool_stats
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to unlocked (still atomic) writes
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +44,400 @@ class TokenInfo:
     token_type: str = "Bearer"
     scope: str = ""
 
+    def is_valid(self) -> bool:
+        """Check whether the token has not yet reached its (buffered) expiry."""
+        return datetime.now() < self.expires_at
+
+
+class TokenCache(ABC):
+    """
+    Base class for token caches shared between GraphAuthClient instances.
+
+    Implementations store tokens encrypted at rest so that every gunicorn
+    worker and MCP subprocess can reuse a token fetched by another process
+    instead of requesting its own from Azure AD.
+    """
+
+    def __init__(self, secret: Optional[str] = None):
+        """
+        Initialize the token cache.
+
+        Args:
+            secret: Secret used to derive the encryption key (defaults to
+                the client secret of the GraphAuthClient using the cache)
+        """
+        self._fernet: Optional[Fernet] = None
+        if secret:
+            self.set_secret(secret)
+
+    def set_secret(self, secret: str):
+        """
+        Derive the encryption key from a secret.
+
+        Args:
+            secret: Secret shared by all processes allowed to read the cache
+        """
+        digest = hashlib.sha256(f"dcri-graph-token-cache:{secret}".encode()).digest()
+        self._fernet = Fernet(base64.urlsafe_b64encode(digest))
+
+    def _encrypt(self, token_info: TokenInfo) -> bytes:
+        """Serialize and encrypt a token."""
+        if self._fernet is None:
+            raise ValueError("Token cache secret has not been configured")
+        payload = json.dumps({
+            'access_token': token_info.access_token,
+            'expires_at': token_info.expires_at.timestamp(),
+            'token_type': token_info.token_type,
+            'scope': token_info.scope
+        })
+        return self._fernet.encrypt(payload.encode())
+
+    def _decrypt(self, blob: bytes) -> Optional[TokenInfo]:
+        """Decrypt and deserialize a token, returning None if unreadable."""
+        if self._fernet is None or not blob:
+            return None
+        try:
+            data = json.loads(self._fernet.decrypt(blob))
+            return TokenInfo(
+                access_token=data['access_token'],
+                expires_at=datetime.fromtimestamp(data['expires_at']),
+                token_type=data.get('token_type', 'Bearer'),
+                scope=data.get('scope', '')
+            )
+        except (InvalidToken, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable cached token: {e}")
+            return None
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[TokenInfo]:
+        """
+        Load a token from the cache.
+
+        Args:
+            key: Cache key identifying tenant, client and scope
+
+        Returns:
+            TokenInfo or None if not cached
+        """
+
+    @abstractmethod
+    def save(self, key: str, token_info: TokenInfo):
+        """
+        Store a token in the cache.
+
+        Args:
+            key: Cache key identifying tenant, client and scope
+            token_info: Token to store
+        """
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """
+        Hold an exclusive lock while a token is being refreshed.
+
+        Only one process requests a new token; the others wait and then
+        pick up the refreshed token from the cache.
+
+        Args:
+            key: Cache key identifying tenant, client and scope
+        """
+        yield
+
+
+class FileTokenCache(TokenCache):
+    """
+    Token cache stored in encrypted files guarded by advisory file locks.
+
+    Suitable for processes on the same host, such as gunicorn workers and
+    MCP subprocesses spawned by the same server.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, secret: Optional[str] = None):
+        """
+        Initialize the file token cache.
+
+        Args:
+            cache_dir: Directory for cache files (defaults to env var
+                GRAPH_TOKEN_CACHE_DIR or a directory under the system temp dir)
+            secret: Secret used to derive the encryption key
+        """
+        super().__init__(secret)
+        self.cache_dir = cache_dir or os.getenv(
+            'GRAPH_TOKEN_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'dcri_graph_tokens')
+        )
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        """Build the path of a cache file."""
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def load(self, key: str) -> Optional[TokenInfo]:
+        """Load a token from its cache file."""
+        try:
+            with open(self._path(key, '.token'), 'rb') as f:
+                return self._decrypt(f.read())
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read token cache: {e}")
+            return None
+
+    def save(self, key: str, token_info: TokenInfo):
+        """Atomically replace the cache file with a new token."""
+        blob = self._encrypt(token_info)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key}.")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, self._path(key, '.token'))
+        except OSError as e:
+            logger.warning(f"Failed to write token cache: {e}")
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Hold an exclusive advisory lock on the key's lock file."""
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(key, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class RedisTokenCache(TokenCache):
+    """
+    Token cache backed by the Redis CacheManager.
+
+    Shares tokens across hosts, e.g. between App Service instances.
+    """
+
+    NAMESPACE = "token"
+    LOCK_TIMEOUT = 60  # seconds
+
+    def __init__(self, cache_manager=None, secret: Optional[str] = None):
+        """
+        Initialize the Redis token cache.
+
+        Args:
+            cache_manager: CacheManager instance (defaults to the shared cache)
+            secret: Secret used to derive the encryption key
+        """
+        super().__init__(secret)
+        if cache_manager is None:
+            from cache.redis_cache import get_default_cache
+            cache_manager = get_default_cache()
+        if cache_manager is None:
+            raise ValueError("Redis is not available for the token cache")
+        self.cache_manager = cache_manager
+
+    def load(self, key: str) -> Optional[TokenInfo]:
+        """Load a token from Redis."""
+        entry = self.cache_manager.get(key, namespace=self.NAMESPACE)
+        if not isinstance(entry, dict):
+            return None
+        return self._decrypt(entry.get('ciphertext'))
+
+    def save(self, key: str, token_info: TokenInfo):
+        """Store a token in Redis until it expires."""
+        ttl = int((token_info.expires_at - datetime.now()).total_seconds())
+        if ttl <= 0:
+            return
+        self.cache_manager.set(
+            key,
+            {'ciphertext': self._encrypt(token_info)},
+            ttl=ttl,
+            namespace=self.NAMESPACE
+        )
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Hold a Redis lock while the token is refreshed."""
+        lock_name = self.cache_manager._generate_key(self.NAMESPACE, f"{key}:lock")
+        with self.cache_manager.client.lock(
+            lock_name,
+            timeout=self.LOCK_TIMEOUT,
+            blocking_timeout=self.LOCK_TIMEOUT
+        ):
+            yield
+
+
+def get_default_token_cache() -> Optional[TokenCache]:
+    """
+    Create the token cache selected by the GRAPH_TOKEN_CACHE env var.
+
+    Supported values are 'file' and 'redis'; anything else disables
+    cross-process token sharing.
+
+    Returns:
+        TokenCache instance or None
+    """
+    backend = os.getenv('GRAPH_TOKEN_CACHE', '').lower()
+
+    if backend == 'file':
+        return FileTokenCache()
+    if backend == 'redis':
+        try:
+            return RedisTokenCache()
+        except ValueError as e:
+            logger.warning(f"Falling back to file token cache: {e}")
+            return FileTokenCache()
+    return None
+
+
+class AdaptiveThrottle:
+    """
+    Client-side rate and concurrency limiter shared by Graph requests.
+
+    Combines a token bucket with a concurrency limit. Both shrink
+    multiplicatively when Graph throttles us and grow back additively as
+    requests succeed, so bulk jobs settle at the highest sustainable rate.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        min_rate: float = 0.5,
+        max_rate: float = 100.0,
+        concurrency: int = 8,
+        max_concurrency: int = 32,
+        rate_increase: float = 0.5
+    ):
+        """
+        Initialize the throttle.
+
+        Args:
+            rate: Initial requests per second
+            min_rate: Lower bound for the rate after repeated throttling
+            max_rate: Upper bound for the rate
+            concurrency: Initial number of requests allowed in flight
+            max_concurrency: Upper bound for requests in flight
+            rate_increase: Requests per second added after each success
+        """
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.rate_increase = rate_increase
+
+        self._cond = threading.Condition()
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._successes = 0
+        self.throttled_count = 0
+
+    def _refill(self, now: float):
+        """Add tokens earned since the last refill (burst of one second)."""
+        capacity = max(1.0, self.rate)
+        self._tokens = min(capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight >= self.concurrency:
+                    wait = None
+                elif self._tokens < 1.0:
+                    wait = (1.0 - self._tokens) / self.rate
+                else:
+                    self._tokens -= 1.0
+                    self._in_flight += 1
+                    return
+
+                self._cond.wait(wait)
+
+    def release(self):
+        """Mark an in-flight request as finished."""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold a request slot for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self):
+        """Grow the rate and, every few successes, the concurrency."""
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.rate_increase)
+            self._successes += 1
+            if self._successes >= self.concurrency and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._successes = 0
+            self._cond.notify_all()
+
+    def on_throttle(self, retry_after: float = 0.0):
+        """
+        Back off after a throttled response.
+
+        Args:
+            retry_after: Seconds every request should pause
+        """
+        with self._cond:
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.concurrency = max(1, self.concurrency // 2)
+            self._successes = 0
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the current throttle state.
+
+        Returns:
+            Dictionary with rate, concurrency and throttle counters
+        """
+        with self._cond:
+            return {
+                'rate': round(self.rate, 2),
+                'concurrency': self.concurrency,
+                'in_flight': self._in_flight,
+                'throttled_count': self.throttled_count
+            }
+
+
+# Shared by every GraphAuthClient in the process
+_default_throttle: Optional[AdaptiveThrottle] = None
+_default_throttle_lock = threading.Lock()
+
+
+def get_default_throttle() -> AdaptiveThrottle:
+    """
+    Get or create the process-wide Graph throttle.
+
+    Returns:
+        AdaptiveThrottle instance
+    """
+    global _default_throttle
+
+    with _default_throttle_lock:
+        if _default_throttle is None:
+            _default_throttle = AdaptiveThrottle(
+                rate=float(os.getenv('GRAPH_INITIAL_RATE', 10.0)),
+                max_rate=float(os.getenv('GRAPH_MAX_RATE', 100.0)),
+                concurrency=int(os.getenv('GRAPH_INITIAL_CONCURRENCY', 8)),
+                max_concurrency=int(os.getenv('GRAPH_MAX_CONCURRENCY', 32))
+            )
+    return _default_throttle
+
 
 class GraphAuthClient:
     """
@@ -36,13 +449,21 @@ class GraphAuthClient:
     
     DEFAULT_SCOPE = "https://graph.microsoft.com/.default"
     TOKEN_ENDPOINT_TEMPLATE = "https://login.microsoftonline.com/{}/oauth2/v2.0/token"
+    RETRY_STATUS_CODES = (429, 503, 504)
+    # Methods that may be sent again after a connection error mid-request
+    IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+    MAX_RETRIES = 5
+    BACKOFF_BASE = 1.0  # seconds
+    BACKOFF_MAX = 60.0  # seconds
     
     def __init__(
         self, 
         tenant_id: Optional[str] = None,
         client_id: Optional[str] = None,
         client_secret: Optional[str] = None,
-        scope: Optional[str] = None
+        scope: Optional[str] = None,
+        token_cache: Optional[TokenCache] = None,
+        throttle: Optional[AdaptiveThrottle] = None
     ):
         """
         Initialize the Graph authentication client.
@@ -52,6 +473,10 @@ class GraphAuthClient:
             client_id: Application client ID (defaults to env var AZURE_CLIENT_ID)
             client_secret: Application client secret (defaults to env var AZURE_CLIENT_SECRET)
             scope: OAuth scope (defaults to Microsoft Graph default scope)
+            token_cache: Cache shared with other processes (defaults to the
+                backend selected by env var GRAPH_TOKEN_CACHE)
+            throttle: Rate limiter for Graph requests (defaults to the
+                process-wide shared throttle)
         """
         self.tenant_id = tenant_id or os.getenv('AZURE_TENANT_ID')
         self.client_id = client_id or os.getenv('AZURE_CLIENT_ID')
@@ -66,8 +491,16 @@ class GraphAuthClient:
         
         self.token_endpoint = self.TOKEN_ENDPOINT_TEMPLATE.format(self.tenant_id)
         self._token_info: Optional[TokenInfo] = None
-        self._session = requests.Session()
-        
+        self._session = create_session()
+        self.throttle = throttle or get_default_throttle()
+
+        self.token_cache = token_cache if token_cache is not None else get_default_token_cache()
+        if self.token_cache is not None and self.token_cache._fernet is None:
+            self.token_cache.set_secret(self.client_secret)
+        self._cache_key = hashlib.sha256(
+            f"{self.tenant_id}|{self.client_id}|{self.scope}".encode()
+        ).hexdigest()
+
     def _request_token(self) -> TokenInfo:
         """
         Request a new access token from Azure AD.
@@ -129,10 +562,48 @@ class GraphAuthClient:
         """
         # Check if we need a new token
         if force_refresh or self._token_info is None or datetime.now() >= self._token_info.expires_at:
-            logger.info("Refreshing access token...")
-            self._token_info = self._request_token()
+            if self.token_cache is None:
+                logger.info("Refreshing access token...")
+                self._token_info = self._request_token()
+            else:
+                self._token_info = self._get_shared_token(force_refresh)
             
         return self._token_info.access_token
+
+    def _get_shared_token(self, force_refresh: bool) -> TokenInfo:
+        """
+        Get a token through the shared cache, requesting one only if needed.
+
+        Args:
+            force_refresh: Whether the current token was rejected
+
+        Returns:
+            TokenInfo from the cache or freshly requested from Azure AD
+        """
+        stale_token = self._token_info.access_token if self._token_info else None
+
+        def usable(token_info: Optional[TokenInfo]) -> bool:
+            if token_info is None or not token_info.is_valid():
+                return False
+            # After a 401 only accept a token another process refreshed
+            return not force_refresh or token_info.access_token != stale_token
+
+        cached = self.token_cache.load(self._cache_key)
+        if usable(cached):
+            logger.debug("Reusing access token from shared cache")
+            return cached
+
+        with self.token_cache.lock(self._cache_key):
+            # Another process may have refreshed while we waited for the lock
+            cached = self.token_cache.load(self._cache_key)
+            if usable(cached):
+                logger.debug("Reusing access token refreshed by another process")
+                return cached
+
+            logger.info("Refreshing access token...")
+            token_info = self._request_token()
+            self.token_cache.save(self._cache_key, token_info)
+            return token_info
     
     def get_authorization_header(self, force_refresh: bool = False) -> Dict[str, str]:
         """
@@ -158,7 +629,12 @@ class GraphAuthClient:
         Make an authenticated request to the Microsoft Graph API.
         
         Automatically includes authentication header and handles token refresh
-        on 401 responses.
+        on 401 responses. Throttled (429/503/504) responses are retried with
+        jittered exponential backoff that honours Retry-After, and every
+        attempt goes through the shared throttle. Connection errors and
+        timeouts are retried only when resending is safe: idempotent methods
+        with a replayable body, or any request whose connection was never
+        established (see _can_resend).
         
         Args:
             method: HTTP method (GET, POST, etc.)
@@ -179,28 +655,86 @@ class GraphAuthClient:
         else:
             headers = auth_header
             
-        # Make initial request
-        response = self._session.request(
-            method=method,
-            url=url,
-            headers=headers,
-            **kwargs
-        )
+        token_refreshed = False
+        attempt = 0
         
-        # Handle token expiration
-        if response.status_code == 401:
-            logger.info("Received 401, refreshing token and retrying...")
-            auth_header = self.get_authorization_header(force_refresh=True)
-            headers.update(auth_header)
+        while True:
+            try:
+                with self.throttle.slot():
+                    response = self._session.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        **kwargs
+                    )
+            except (RequestsConnectionError, Timeout) as e:
+                if attempt >= self.MAX_RETRIES or not self._can_resend(method, kwargs, e):
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Graph request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
             
-            response = self._session.request(
-                method=method,
-                url=url,
-                headers=headers,
-                **kwargs
-            )
+            # Handle token expiration
+            if response.status_code == 401 and not token_refreshed:
+                logger.info("Received 401, refreshing token and retrying...")
+                auth_header = self.get_authorization_header(force_refresh=True)
+                headers.update(auth_header)
+                token_refreshed = True
+                continue
             
-        return response
+            if response.status_code in self.RETRY_STATUS_CODES and attempt < self.MAX_RETRIES:
+                delay = self._retry_delay(response, attempt)
+                self.throttle.on_throttle(delay)
+                logger.warning(
+                    f"Graph returned {response.status_code}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.MAX_RETRIES})"
+                )
+                time.sleep(delay)
+                attempt += 1
+                continue
+            
+            if response.status_code not in self.RETRY_STATUS_CODES:
+                self.throttle.on_success()
+            return response
+    
+    def _can_resend(self, method: str, kwargs: Dict[str, Any], error: Exception) -> bool:
+        """
+        Whether a request that failed with a connection error may be sent again.
+        
+        A connect timeout means nothing reached the server, so any request
+        can be resent. Otherwise the server may already have acted on it, so
+        only idempotent methods are resent, and only when their body can be
+        sent again (not a stream or generator that was partly consumed).
+        """
+        if isinstance(error, ConnectTimeout):
+            return True
+        if method.upper() not in self.IDEMPOTENT_METHODS:
+            return False
+        body = kwargs.get('data')
+        return body is None or isinstance(body, (bytes, bytearray, str, dict, list, tuple))
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** attempt)))
+    
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        """
+        Work out how long to wait before retrying a throttled response.
+        
+        Args:
+            response: The throttled response
+            attempt: Zero-based retry attempt
+            
+        Returns:
+            Delay in seconds, honouring Retry-After when present
+        """
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            # Small jitter so workers released together do not collide again
+            return min(self.BACKOFF_MAX, retry_after + random.uniform(0, 0.1 * retry_after))
+        return self._backoff_delay(attempt)
     
     def test_connection(self) -> bool:
         """
@@ -235,6 +769,15 @@ class GraphAuthClient:
             logger.error(f"Authentication test failed: {str(e)}")
             return False
     
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool statistics for Graph requests.
+        
+        Returns:
+            Dictionary with connection reuse counters
+        """
+        return get_pool_stats(self._session)
+    
     def close(self):
         """Close the session and clean up resources."""
         if self._session:
@@ -249,6 +792,29 @@ class GraphAuthClient:
         self.close()
 
 
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given as seconds or an HTTP date.
+    
+    Args:
+        value: Header value
+        
+    Returns:
+        Delay in seconds, or None if absent or unparseable
+    """
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
 # Singleton instance for module-level usage
 _default_client: Optional[GraphAuthClient] = None
 
@@ -0,0 +1,238 @@
+"""
+Pooled HTTP sessions for Microsoft Graph and SharePoint transfers.
+
+Builds requests sessions with sized connection pools and TCP keep-alive so
+bulk operations reuse connections instead of paying a TCP+TLS handshake
+per request, and reports pool statistics. An HTTP/2 transport backed by
+httpx is used when GRAPH_HTTP2=1 and httpx[http2] is installed.
+"""
+
+import os
+import socket
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connection import HTTPConnection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10  # distinct hosts kept alive
+DEFAULT_POOL_MAXSIZE = 32  # connections per host, matches max Graph concurrency
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive on pooled connections."""
+
+    SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Create the pool manager with keep-alive socket options."""
+        kwargs.setdefault('socket_options', self.SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+class _HTTPXStream:
+    """File-like view over an httpx streaming response for requests."""
+
+    def __init__(self, httpx_response):
+        self._response = httpx_response
+        self._iterator = httpx_response.iter_bytes()
+        self._buffer = b''
+
+    def read(self, amt: Optional[int] = None, **kwargs) -> bytes:
+        while amt is None or len(self._buffer) < amt:
+            try:
+                self._buffer += next(self._iterator)
+            except StopIteration:
+                break
+        if amt is None:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def stream(self, amt: int = 65536, decode_content: bool = True):
+        while True:
+            data = self.read(amt)
+            if not data:
+                break
+            yield data
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self.close()
+
+
+class HTTP2Adapter(HTTPAdapter):
+    """
+    Transport adapter that sends requests through an HTTP/2 httpx client.
+
+    Lets the rest of the code keep using the requests API while multiple
+    requests share one multiplexed connection per host.
+    """
+
+    def __init__(self, pool_maxsize: int = DEFAULT_POOL_MAXSIZE, **kwargs):
+        super().__init__(**kwargs)
+        import httpx
+        self._httpx = httpx
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        )
+        self._requests_sent = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """Send a prepared requests.PreparedRequest over httpx."""
+        if isinstance(timeout, tuple):
+            timeout = self._httpx.Timeout(timeout[1], connect=timeout[0])
+        httpx_request = self._client.build_request(
+            request.method,
+            request.url,
+            headers=dict(request.headers),
+            content=request.body,
+            timeout=timeout
+        )
+        try:
+            httpx_response = self._client.send(httpx_request, stream=True)
+        except self._httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e), request=request)
+        except self._httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e), request=request)
+        self._requests_sent += 1
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.raw = _HTTPXStream(httpx_response)
+        response.url = request.url
+        response.request = request
+        response.reason = httpx_response.reason_phrase
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.connection = self
+        if not stream:
+            response.content  # read body so the stream can be released
+            httpx_response.close()
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Report requests sent over the HTTP/2 client."""
+        return {'transport': 'http2', 'requests': self._requests_sent}
+
+    def close(self):
+        """Close the httpx client."""
+        self._client.close()
+        super().close()
+
+
+def _http2_enabled(http2: Optional[bool]) -> bool:
+    """Check whether the HTTP/2 transport was requested and is available."""
+    if http2 is None:
+        http2 = os.getenv('GRAPH_HTTP2', '').lower() in ('1', 'true', 'yes')
+    if not http2:
+        return False
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP/2 requested but httpx[http2] is not installed; using HTTP/1.1 pool")
+        return False
+
+
+def create_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    http2: Optional[bool] = None
+) -> requests.Session:
+    """
+    Create a requests session with tuned, keep-alive connection pools.
+
+    Args:
+        pool_connections: Number of per-host pools to keep
+        pool_maxsize: Maximum connections kept per host
+        http2: Use the HTTP/2 transport (defaults to env var GRAPH_HTTP2)
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    if _http2_enabled(http2):
+        adapter = HTTP2Adapter(pool_maxsize=pool_maxsize)
+    else:
+        adapter = KeepAliveHTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=False
+        )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_pool_stats(session: requests.Session) -> Dict[str, Any]:
+    """
+    Summarize connection reuse for a session.
+
+    Args:
+        session: Session created by create_session
+
+    Returns:
+        Dictionary with host pools, connections opened, requests sent,
+        idle connections and the connection reuse ratio
+    """
+    stats = {'transport': 'http1.1', 'hosts': 0, 'connections_opened': 0, 'requests': 0, 'idle_connections': 0}
+    seen = set()
+
+    for adapter in getattr(session, 'adapters', {}).values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+
+        if isinstance(adapter, HTTP2Adapter):
+            return adapter.get_stats()
+
+        poolmanager = getattr(adapter, 'poolmanager', None)
+        if poolmanager is None:
+            continue
+        for key in list(poolmanager.pools.keys()):
+            pool = poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            stats['hosts'] += 1
+            stats['connections_opened'] += pool.num_connections
+            stats['requests'] += pool.num_requests
+            stats['idle_connections'] += pool.pool.qsize() if pool.pool else 0
+
+    stats['reuse_ratio'] = (
+        round(1 - stats['connections_opened'] / stats['requests'], 3)
+        if stats['requests'] else None
+    )
+    return stats
+
+
+# Shared session for pre-authenticated download and upload-session URLs
+_transfer_session: Optional[requests.Session] = None
+_transfer_session_lock = threading.Lock()
+
+
+def get_transfer_session() -> requests.Session:
+    """
+    Get the process-wide session for pre-authenticated transfer URLs.
+
+    Returns:
+        Pooled requests.Session shared by all SharePoint clients
+    """
+    global _transfer_session
+
+    with _transfer_session_lock:
+        if _transfer_session is None:
+            _transfer_session = create_session()
+    return _transfer_session
@@ -0,0 +1,601 @@
+"""
+Scaled benchmarks for every tool's ``run()``.
+
+Each tool is driven at several input sizes, measured in its own process
+(wall time, peak RSS, output size) and compared against a JSON baseline
+kept in the repo so slowdowns show up as regressions.
+
+Inputs are built without network access:
+
+* Tools with synthetic data builders (EDC, labs, SAEs, audit trail, coding,
+  diary, queries, compliance) start from a generated study (lib.synthetic).
+* Every other tool starts from the largest working example in its tests.
+
+The seed input is then scaled to N records by tiling its largest record
+field (a list, CSV text or, failing those, free text), with ID fields made
+unique on each copy. Tools whose inputs have nothing to scale are measured
+once.
+"""
+
+import os
+import ast
+import csv
+import gc
+import sys
+import json
+import time
+import glob
+import platform
+import resource
+import multiprocessing
+from io import StringIO
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE_PATH = str(REPO_ROOT / "data" / "benchmarks" / "baseline.json")
+DEFAULT_SIZES = [100, 10_000, 100_000]
+FORMAT_VERSION = 1
+
+# Tools that call Azure OpenAI (not available offline) or exist for smoke testing
+EXCLUDED_TOOLS = {"test_echo", "schedule_converter_azure", "clinical_text_summarizer"}
+
+# Tools whose seed input comes from the synthetic study generator
+SYNTHETIC_TOOLS = {
+    "edc_data_validator", "lab_range_validator", "sae_reconciliation", "audit_trail_reviewer",
+    "adverse_event_coder", "concomitant_med_coder", "patient_diary_checker", "query_response_analyzer",
+    "compliance_knowledge_base",
+}
+
+# Tools whose size is a count parameter rather than a list of records
+SCALE_FIELDS = {
+    "randomization_generator": (("n_subjects",), "count"),
+}
+
+# Keys whose values identify a record and are made unique when records are tiled
+ID_SUFFIXES = ("id", "_number", "_code")
+
+
+def list_tools(tools_dir: Optional[str] = None) -> List[str]:
+    """
+    Names of the tools that can be benchmarked.
+
+    Args:
+        tools_dir: Directory of tool modules (default: the repo's tools/).
+
+    Returns:
+        Sorted tool module names, without the excluded ones.
+    """
+    tools_dir = tools_dir or str(REPO_ROOT / "tools")
+    names = (os.path.splitext(os.path.basename(path))[0] for path in glob.glob(os.path.join(tools_dir, "*.py")))
+    return sorted(name for name in names if not name.startswith("_") and name not in EXCLUDED_TOOLS)
+
+
+# --- Seed inputs ---------------------------------------------------------------
+
+def _synthetic_inputs(subjects: int = 60) -> Dict[str, Dict[str, Any]]:
+    """Seed inputs for the tools covered by the synthetic study generator."""
+    from lib.synthetic import generate_study
+
+    study = generate_study(subjects=subjects, sites=6, seed=0)
+    inputs = study.tool_inputs()
+    visits_by_subject: Dict[str, List[Dict[str, Any]]] = {}
+    for visit in study.visits:
+        visits_by_subject.setdefault(visit["subject_id"], []).append(visit)
+    inputs["compliance_knowledge_base"] = {
+        "schema_type": "generic",
+        "schedules": [
+            {
+                "study_id": study.study_id,
+                "schedule_id": subject_id,
+                "schedule_data": {"visits": [
+                    {"id": visit["visit_name"], "date": visit["visit_date"], "site": visit["site_id"],
+                     "type": visit["visit_name"], "procedures": ["vital_signs", "blood_draw"]}
+                    for visit in visits
+                ]}
+            }
+            for subject_id, visits in visits_by_subject.items()
+        ],
+        "max_findings_per_study": 10,
+    }
+    return inputs
+
+
+def examples_from_tests(tool: str, tests_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Literal inputs passed to ``run()`` in a tool's tests.
+
+    Handles ``run({...})`` anywhere in a test (including ``result = run(...)``)
+    and ``run(name)`` where name is assigned a literal dict in the same test
+    or at module level.
+
+    Args:
+        tool: Tool module name.
+        tests_dir: Directory of test files (default: the repo's tests/).
+
+    Returns:
+        Example inputs in the order they appear.
+    """
+    from server_demo import _extract_dict_from_ast, _is_run_call
+
+    path = os.path.join(tests_dir or str(REPO_ROOT / "tests"), f"test_{tool}.py")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    module_vars = {
+        target.id: node.value
+        for node in tree.body if isinstance(node, ast.Assign)
+        for target in node.targets if isinstance(target, ast.Name)
+    }
+    functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+
+    examples = []
+    for function in functions:
+        local_vars = dict(module_vars)
+        for node in ast.walk(function):
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        local_vars[target.id] = node.value
+        for node in ast.walk(function):
+            if not (_is_run_call(node) and node.args):
+                continue
+            argument = node.args[0]
+            if isinstance(argument, ast.Name):
+                argument = local_vars.get(argument.id)
+            if isinstance(argument, ast.Dict):
+                example = _extract_dict_from_ast(argument, local_vars)
+                if example:
+                    examples.append(example)
+    return examples
+
+
+def seed_inputs(tool: str) -> List[Dict[str, Any]]:
+    """
+    Candidate seed inputs for a tool, best first.
+
+    Args:
+        tool: Tool module name.
+
+    Returns:
+        The synthetic input if the tool has one, otherwise its test examples
+        with the most records first.
+    """
+    if tool in SYNTHETIC_TOOLS:
+        return [_synthetic_inputs()[tool]]
+    examples = examples_from_tests(tool)
+    return sorted(examples, key=lambda example: -_record_count(example))
+
+
+# --- Scaling -------------------------------------------------------------------
+
+def _is_csv(value: Any) -> bool:
+    return isinstance(value, str) and "\n" in value.strip() and "," in value.split("\n", 1)[0]
+
+
+def _candidates(input_data: Dict[str, Any]) -> List[Tuple[int, int, Tuple[str, ...], str]]:
+    """
+    (rank, records, path, kind) for every scalable field, searching one level of nested dicts.
+
+    Lists of records and CSV rank first, then numeric lists, then long text,
+    then lists of strings (usually options such as check types).
+    """
+    found = []
+    for key, value in input_data.items():
+        nested = value.items() if isinstance(value, dict) else []
+        for path, item in [((key,), value)] + [((key, inner), inner_value) for inner, inner_value in nested]:
+            if isinstance(item, list) and item:
+                if isinstance(item[0], (dict, list)):
+                    rank = 0
+                elif isinstance(item[0], (int, float)):
+                    rank = 1
+                else:
+                    rank = 3
+                found.append((rank, len(item), path, "list"))
+            elif _is_csv(item):
+                found.append((0, len(item.strip().splitlines()) - 1, path, "csv"))
+            elif isinstance(item, str) and len(item) >= 40 and len(path) == 1:
+                found.append((2, 1, path, "text"))
+    return found
+
+
+def _record_count(input_data: Dict[str, Any]) -> int:
+    return max((records for rank, records, _, kind in _candidates(input_data) if kind != "text"), default=0)
+
+
+def record_field(input_data: Dict[str, Any], tool: Optional[str] = None) -> Optional[Tuple[Tuple[str, ...], str]]:
+    """
+    The field that scaling grows.
+
+    Args:
+        input_data: Seed input.
+        tool: Tool name, for tools listed in SCALE_FIELDS.
+
+    Returns:
+        (path of keys, kind) with kind "list", "csv", "text" or "count", or
+        None if nothing in the input can be scaled.
+    """
+    if tool in SCALE_FIELDS:
+        return SCALE_FIELDS[tool]
+    candidates = _candidates(input_data)
+    if not candidates:
+        return None
+    # Best rank, then most records (longest text for text fields)
+    _, _, path, kind = min(
+        candidates,
+        key=lambda c: (c[0], -c[1] if c[3] != "text" else -len(input_data[c[2][0]]))
+    )
+    return path, kind
+
+
+def _unique(record: Any, copy: int) -> Any:
+    """A tiled copy of a record with its ID fields suffixed."""
+    if copy == 0 or not isinstance(record, dict):
+        return record
+    return {
+        key: f"{value}-{copy}" if isinstance(value, str) and key.lower().endswith(ID_SUFFIXES) else value
+        for key, value in record.items()
+    }
+
+
+def _tile(records: List[Any], size: int) -> List[Any]:
+    return [_unique(records[index % len(records)], index // len(records)) for index in range(size)]
+
+
+def _tile_csv(text: str, size: int) -> str:
+    reader = csv.DictReader(StringIO(text.strip()))
+    rows = _tile(list(reader), size)
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=reader.fieldnames, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def scale_input(input_data: Dict[str, Any], size: int, tool: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Scale a seed input to size records.
+
+    Other top-level lists of records grow by the same factor as the scaled
+    field, so linked inputs (EDC and safety database SAEs, diary entries and
+    patients) keep matching IDs.
+
+    Args:
+        input_data: Seed input.
+        size: Number of records (list items, CSV rows, text copies or the
+            count itself).
+        tool: Tool name, for tools listed in SCALE_FIELDS.
+
+    Returns:
+        (scaled input, kind of field scaled), with kind None when the input
+        has nothing to scale and is returned unchanged.
+    """
+    field = record_field(input_data, tool)
+    if field is None:
+        return input_data, None
+    path, kind = field
+
+    scaled = json.loads(json.dumps(input_data))
+    parent = scaled
+    for key in path[:-1]:
+        parent = parent[key]
+    value = parent.get(path[-1])
+
+    if kind == "count":
+        parent[path[-1]] = size
+    elif kind == "text":
+        parent[path[-1]] = "\n\n".join([value] * size)
+    else:
+        records = len(value) if kind == "list" else len(value.strip().splitlines()) - 1
+        for key, other in input_data.items():
+            if (key,) != path and isinstance(other, list) and other and isinstance(other[0], dict):
+                scaled[key] = _tile(other, max(1, round(len(other) * size / records)))
+        parent[path[-1]] = _tile(value, size) if kind == "list" else _tile_csv(value, size)
+    return scaled, kind
+
+
+# --- Measurement ---------------------------------------------------------------
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _failed(result: Any) -> Optional[str]:
+    """Error message if a tool reported failure."""
+    if not isinstance(result, dict):
+        return None
+    if result.get("error"):
+        return str(result["error"])[:200]
+    if result.get("success") is False and result.get("errors"):
+        return str(result["errors"][0])[:200]
+    return None
+
+
+def _measure_in_process(tool: str, size: int, repeats: int) -> Dict[str, Any]:
+    """Build the input, run the tool and measure it (runs inside the worker process)."""
+    import importlib
+
+    module = importlib.import_module(f"tools.{tool}")
+    candidates = seed_inputs(tool)
+    if not candidates:
+        return {"status": "no_input"}
+
+    # Use the first seed input the tool accepts at its own size
+    seed, failure = None, None
+    for candidate in candidates:
+        try:
+            failure = _failed(module.run(json.loads(json.dumps(candidate))))
+        except Exception as e:
+            failure = f"{type(e).__name__}: {e}"
+        if failure is None:
+            seed = candidate
+            break
+    if seed is None:
+        return {"status": "error", "error": failure}
+
+    input_data, kind = scale_input(seed, size, tool)
+    input_bytes = len(json.dumps(input_data, default=str))
+    gc.collect()
+    rss_before = _peak_rss_mb()
+
+    timings = []
+    result = None
+    for _ in range(max(1, repeats)):
+        started = time.perf_counter()
+        try:
+            result = module.run(input_data)
+        except Exception as e:
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"[:200], "scaled": kind}
+        timings.append(time.perf_counter() - started)
+        # One run is enough once it takes a noticeable time
+        if timings[-1] > 1.0:
+            break
+
+    failure = _failed(result)
+    measurement = {
+        "status": "error" if failure else "ok",
+        "scaled": kind,
+        "records": size if kind else None,
+        "seconds": round(min(timings), 6),
+        "runs": len(timings),
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+        "input_bytes": input_bytes,
+        "output_bytes": len(json.dumps(result, default=str)),
+    }
+    if failure:
+        measurement["error"] = failure
+    return measurement
+
+
+def _worker(queue, tool: str, size: int, repeats: int) -> None:
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    os.chdir(REPO_ROOT)
+    try:
+        queue.put(_measure_in_process(tool, size, repeats))
+    except BaseException as e:
+        queue.put({"status": "error", "error": f"{type(e).__name__}: {e}"[:200]})
+
+
+def measure(tool: str, size: int, timeout: float = 60.0, repeats: int = 3) -> Dict[str, Any]:
+    """
+    Measure one tool at one size in a fresh process.
+
+    Args:
+        tool: Tool module name.
+        size: Number of records to scale the seed input to.
+        timeout: Seconds before the process is killed.
+        repeats: Maximum runs for timing (the fastest is reported).
+
+    Returns:
+        Measurement with status "ok", "error", "timeout" or "no_input", and
+        for completed runs seconds, peak_rss_mb, rss_growth_mb, input_bytes
+        and output_bytes.
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_worker, args=(queue, tool, size, repeats), daemon=True)
+    process.start()
+    try:
+        return queue.get(timeout=timeout)
+    except Exception:
+        return {"status": "timeout", "seconds": timeout}
+    finally:
+        process.join(1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+
+def run_suite(
+    tools: Optional[List[str]] = None,
+    sizes: Optional[List[int]] = None,
+    timeout: float = 60.0,
+    repeats: int = 3,
+    progress: Optional[Callable[[str, int, Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Benchmark tools at each size.
+
+    Larger sizes are skipped for a tool once a size times out or fails, and
+    tools with nothing to scale are measured once.
+
+    Args:
+        tools: Tool names (default: every tool).
+        sizes: Record counts (default: DEFAULT_SIZES).
+        timeout: Seconds allowed per measurement.
+        repeats: Maximum timing runs per measurement.
+        progress: Called with (tool, size, measurement) after each one.
+
+    Returns:
+        Results document with environment, settings and results keyed by
+        tool and then size.
+    """
+    tools = tools or list_tools()
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    results: Dict[str, Dict[str, Any]] = {}
+    for tool in tools:
+        results[tool] = {}
+        for size in sizes:
+            measurement = measure(tool, size, timeout, repeats)
+            results[tool][str(size)] = measurement
+            if progress:
+                progress(tool, size, measurement)
+            if measurement["status"] != "ok" or measurement.get("scaled") is None:
+                break
+
+    return {
+        "format_version": FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {"sizes": sizes, "timeout": timeout, "repeats": repeats},
+        "results": results,
+    }
+
+
+# --- Baselines and comparison --------------------------------------------------
+
+def load_results(path: str) -> Dict[str, Any]:
+    """
+    Read a results or baseline file.
+
+    Args:
+        path: JSON file written by save_results.
+
+    Returns:
+        Results document.
+
+    Raises:
+        ValueError: If the file has an unsupported format version.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark results format: {document.get('format_version')}")
+    return document
+
+
+def save_results(document: Dict[str, Any], path: str) -> None:
+    """
+    Write a results document (e.g. as the new baseline).
+
+    Args:
+        document: Results from run_suite.
+        path: Destination JSON file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    time_tolerance: float = 0.25,
+    rss_tolerance: float = 0.25,
+    min_seconds: float = 0.01,
+) -> List[Dict[str, Any]]:
+    """
+    Compare results against a baseline.
+
+    A time or peak RSS increase beyond its tolerance is a regression, as is
+    a measurement that completed in the baseline but now fails or times out.
+    Time changes under min_seconds are ignored as noise.
+
+    Args:
+        baseline: Baseline results document.
+        current: Current results document.
+        time_tolerance: Allowed fractional slowdown (0.25 = 25%).
+        rss_tolerance: Allowed fractional peak RSS growth.
+        min_seconds: Smallest absolute time change that counts.
+
+    Returns:
+        One row per tool and size measured now, with verdict "regression",
+        "improved", "ok", "new" or "failing", and the reasons.
+    """
+    rows = []
+    for tool, sizes in current["results"].items():
+        for size, now in sizes.items():
+            before = baseline["results"].get(tool, {}).get(size)
+            row = {"tool": tool, "size": int(size), "status": now["status"], "seconds": now.get("seconds"),
+                   "baseline_seconds": None, "time_ratio": None, "peak_rss_mb": now.get("peak_rss_mb"),
+                   "baseline_rss_mb": None, "verdict": "ok", "reasons": []}
+            rows.append(row)
+            if before is None:
+                row["verdict"] = "new" if now["status"] == "ok" else "failing"
+                continue
+
+            row["baseline_seconds"] = before.get("seconds")
+            row["baseline_rss_mb"] = before.get("peak_rss_mb")
+            if now["status"] != "ok":
+                row["verdict"] = "regression" if before["status"] == "ok" else "failing"
+                row["reasons"].append(f"{before['status']} -> {now['status']}")
+                continue
+            if before["status"] != "ok":
+                row["verdict"] = "improved"
+                row["reasons"].append(f"{before['status']} -> ok")
+                continue
+
+            ratio = now["seconds"] / before["seconds"] if before["seconds"] else None
+            row["time_ratio"] = round(ratio, 2) if ratio is not None else None
+            delta = now["seconds"] - before["seconds"]
+            if ratio is not None and abs(delta) >= min_seconds:
+                if ratio > 1 + time_tolerance:
+                    row["verdict"] = "regression"
+                    row["reasons"].append(f"time x{ratio:.2f}")
+                elif ratio < 1 / (1 + time_tolerance):
+                    row["verdict"] = "improved"
+                    row["reasons"].append(f"time x{ratio:.2f}")
+            if before.get("peak_rss_mb") and now.get("peak_rss_mb"):
+                rss_ratio = now["peak_rss_mb"] / before["peak_rss_mb"]
+                if rss_ratio > 1 + rss_tolerance:
+                    row["verdict"] = "regression"
+                    row["reasons"].append(f"peak RSS x{rss_ratio:.2f}")
+            if before.get("output_bytes") != now.get("output_bytes"):
+                row["reasons"].append(f"output {before.get('output_bytes')} -> {now.get('output_bytes')} bytes")
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]], only_changes: bool = False) -> str:
+    """
+    Comparison rows as a plain-text report.
+
+    Args:
+        rows: Rows from compare.
+        only_changes: Leave out rows whose verdict is "ok".
+
+    Returns:
+        Report with a table and a summary line.
+    """
+    def seconds(value):
+        return "-" if value is None else f"{value:.4f}"
+
+    lines = [f"{'tool':<34} {'size':>7} {'baseline s':>11} {'now s':>11} {'ratio':>6} "
+             f"{'RSS MB':>7}  verdict     reasons"]
+    for row in rows:
+        if only_changes and row["verdict"] == "ok":
+            continue
+        ratio = "-" if row["time_ratio"] is None else f"{row['time_ratio']:.2f}"
+        rss = "-" if row["peak_rss_mb"] is None else f"{row['peak_rss_mb']:.0f}"
+        lines.append(f"{row['tool']:<34} {row['size']:>7} {seconds(row['baseline_seconds']):>11} "
+                     f"{seconds(row['seconds']):>11} {ratio:>6} {rss:>7}  {row['verdict']:<11} "
+                     f"{'; '.join(row['reasons'])}")
+
+    counts = {}
+    for row in rows:
+        counts[row["verdict"]] = counts.get(row["verdict"], 0) + 1
+    lines.append("")
+    lines.append("Summary: " + ", ".join(f"{count} {verdict}" for verdict, count in sorted(counts.items())))
+    return "\n".join(lines)
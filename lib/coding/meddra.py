@@ -0,0 +1,243 @@
+"""
+MedDRA dictionaries and an indexed, memoised adverse event coder.
+
+A MeddraDictionary holds every lowest level term (LLT) with its primary
+hierarchy path (PT, HLT, HLGT, SOC) and a TermIndex over the LLT names. It
+is loaded from either:
+
+* A MedDRA ASCII distribution (``llt.asc``, ``mdhier.asc`` and optionally
+  ``meddra_release.asc``, ``$``-delimited). Parsing ~80k LLTs and building
+  the index takes a few seconds, so the result is saved as an .npz file
+  named by a digest of the files and later processes load that instead.
+* A small embedded term table like adverse_event_coder.MEDDRA_TERMS, for
+  running without a licensed distribution.
+
+MeddraCoder codes verbatims through the index and memoises each
+normalised verbatim, so a listing where the same terms recur codes each
+distinct verbatim once.
+"""
+
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from lib.coding.term_index import (
+    TermCoder, TermIndex, file_digest, load_or_build, normalize, pack_strings, save_npz, unpack_strings
+)
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Per-PT hierarchy columns (primary SOC path)
+HIERARCHY_COLUMNS = ("pt_code", "pt", "hlt_code", "hlt", "hlgt_code", "hlgt", "soc_code", "soc")
+
+ASCII_FILES = ("llt.asc", "mdhier.asc", "meddra_release.asc")
+
+
+def _find_file(directory: str, name: str) -> Optional[str]:
+    """Path of a distribution file, matching the name case-insensitively."""
+    for entry in os.listdir(directory):
+        if entry.lower() == name:
+            return os.path.join(directory, entry)
+    return None
+
+
+def _read_records(path: str) -> List[List[str]]:
+    """Rows of a ``$``-delimited MedDRA ASCII file."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    return [line.rstrip("\r").split("$") for line in text.split("\n") if line.strip()]
+
+
+class MeddraDictionary:
+    """
+    LLTs with their primary hierarchy, indexed for coding.
+
+    ``llt_pt[i]`` is the row of LLT ``i``'s PT in ``hierarchy``, a dict of
+    column name to list (see HIERARCHY_COLUMNS). Codes are strings; codes
+    that are not known (embedded tables) are empty strings.
+    """
+
+    def __init__(self, index: TermIndex, llt_codes: List[str], llt_pt: np.ndarray,
+                 hierarchy: Dict[str, List[str]], version: Optional[str] = None, digest: str = ""):
+        self.index = index
+        self.llt_codes = llt_codes
+        self.llt_pt = llt_pt
+        self.hierarchy = hierarchy
+        self.version = version
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def term(self, term_id: int) -> Dict[str, Any]:
+        """LLT and hierarchy of a term id, with unknown codes as None."""
+        row = int(self.llt_pt[term_id])
+        term = {"llt": self.index.names[term_id], "llt_code": self.llt_codes[term_id] or None}
+        for column in HIERARCHY_COLUMNS:
+            value = self.hierarchy[column][row]
+            term[column] = value if value or not column.endswith("_code") else None
+        return term
+
+    @classmethod
+    def from_terms(cls, terms: Dict[str, Dict[str, Any]]) -> "MeddraDictionary":
+        """
+        Dictionary from an embedded table of {key: {pt, llt, soc, hlgt, hlt, code}}.
+
+        Each entry becomes one PT; its key and LLT names become its LLTs.
+        """
+        names, llt_pt = [], []
+        hierarchy: Dict[str, List[str]] = {column: [] for column in HIERARCHY_COLUMNS}
+        for row, (key, entry) in enumerate(terms.items()):
+            for column, value in (("pt_code", entry.get("code", "")), ("pt", entry["pt"]), ("hlt", entry.get("hlt", "")),
+                                  ("hlgt", entry.get("hlgt", "")), ("soc", entry.get("soc", ""))):
+                hierarchy[column].append(value or "")
+            for column in ("hlt_code", "hlgt_code", "soc_code"):
+                hierarchy[column].append("")
+            seen = set()
+            for name in [entry["pt"]] + list(entry.get("llt", [])) + [key]:
+                if normalize(name) not in seen:
+                    seen.add(normalize(name))
+                    names.append(name)
+                    llt_pt.append(row)
+        return cls(TermIndex.build(names), [""] * len(names), np.asarray(llt_pt, dtype=np.int32), hierarchy)
+
+    @classmethod
+    def from_ascii(cls, directory: str, include_noncurrent: bool = False) -> "MeddraDictionary":
+        """
+        Parse a MedDRA ASCII distribution.
+
+        Args:
+            directory: Folder holding llt.asc and mdhier.asc (the MedAscii folder).
+            include_noncurrent: Also index LLTs flagged non-current.
+
+        Returns:
+            The dictionary, with the version from meddra_release.asc if present.
+
+        Raises:
+            FileNotFoundError: If llt.asc or mdhier.asc is missing.
+        """
+        paths = {name: _find_file(directory, name) for name in ASCII_FILES}
+        for required in ("llt.asc", "mdhier.asc"):
+            if not paths[required]:
+                raise FileNotFoundError(f"{required} not found in MedDRA directory {directory}")
+
+        # mdhier.asc: pt_code, hlt_code, hlgt_code, soc_code, pt_name, hlt_name, hlgt_name, soc_name,
+        # soc_abbrev, null, pt_soc_code, primary_soc_fg. Keep the primary path of each PT.
+        hierarchy: Dict[str, List[str]] = {column: [] for column in HIERARCHY_COLUMNS}
+        pt_rows: Dict[str, int] = {}
+        for fields in _read_records(paths["mdhier.asc"]):
+            if len(fields) < 8:
+                continue
+            primary = len(fields) > 11 and fields[11] == "Y"
+            pt_code = fields[0]
+            if pt_code in pt_rows and not primary:
+                continue
+            values = (pt_code, fields[4], fields[1], fields[5], fields[2], fields[6], fields[3], fields[7])
+            if pt_code in pt_rows:
+                row = pt_rows[pt_code]
+                for column, value in zip(HIERARCHY_COLUMNS, values):
+                    hierarchy[column][row] = value
+            else:
+                pt_rows[pt_code] = len(hierarchy["pt_code"])
+                for column, value in zip(HIERARCHY_COLUMNS, values):
+                    hierarchy[column].append(value)
+
+        # llt.asc: llt_code, llt_name, pt_code, ..., llt_currency (field 10)
+        names, llt_codes, llt_pt = [], [], []
+        orphans = 0
+        for fields in _read_records(paths["llt.asc"]):
+            if len(fields) < 3:
+                continue
+            if not include_noncurrent and len(fields) > 9 and fields[9] == "N":
+                continue
+            row = pt_rows.get(fields[2])
+            if row is None:
+                orphans += 1
+                continue
+            llt_codes.append(fields[0])
+            names.append(fields[1])
+            llt_pt.append(row)
+        if orphans:
+            logger.warning(f"Skipped {orphans} MedDRA LLTs whose PT is not in mdhier.asc")
+
+        version = None
+        if paths["meddra_release.asc"]:
+            release = _read_records(paths["meddra_release.asc"])
+            version = release[0][0] if release and release[0] else None
+
+        return cls(TermIndex.build(names), llt_codes, np.asarray(llt_pt, dtype=np.int32), hierarchy, version,
+                   digest_for(directory))
+
+    def save(self, path: str) -> None:
+        """Write the dictionary and its index to an .npz file (atomically replaced)."""
+        arrays = self.index.to_arrays("index_")
+        arrays.update({f"hierarchy_{column}": pack_strings(self.hierarchy[column]) for column in HIERARCHY_COLUMNS})
+        save_npz(
+            path,
+            format_version=np.array(FORMAT_VERSION),
+            digest=np.array(self.digest),
+            version=np.array(self.version or ""),
+            llt_codes=pack_strings(self.llt_codes),
+            llt_pt=self.llt_pt,
+            **arrays
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "MeddraDictionary":
+        """
+        Read a dictionary written by save().
+
+        Raises:
+            ValueError: If the file is from another format version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {int(data['format_version'])}, expected {FORMAT_VERSION}")
+            return cls(
+                index=TermIndex.from_arrays(data, "index_"),
+                llt_codes=unpack_strings(data["llt_codes"]),
+                llt_pt=data["llt_pt"],
+                hierarchy={column: unpack_strings(data[f"hierarchy_{column}"]) for column in HIERARCHY_COLUMNS},
+                version=str(data["version"]) or None,
+                digest=str(data["digest"]),
+            )
+
+
+def digest_for(directory: str) -> str:
+    """Digest identifying an index built from the distribution in directory."""
+    found = ((name, _find_file(directory, name)) for name in ASCII_FILES)
+    return file_digest(f"meddra-{FORMAT_VERSION}", [(name, path) for name, path in found if path])
+
+
+def load_meddra(directory: str, index_dir: Optional[str] = None) -> MeddraDictionary:
+    """
+    Load a MedDRA ASCII distribution, using the saved index when it matches.
+
+    Args:
+        directory: Folder holding the distribution's .asc files.
+        index_dir: Where built indexes are saved (no saving if None).
+
+    Returns:
+        The dictionary.
+    """
+    return load_or_build("meddra", digest_for(directory), index_dir, MeddraDictionary.load,
+                         lambda: MeddraDictionary.from_ascii(directory))
+
+
+class MeddraCoder(TermCoder):
+    """
+    Codes AE verbatims to MedDRA through a MeddraDictionary's index.
+
+    code() and code_batch() return the LLT, its code and hierarchy (see
+    MeddraDictionary.term) with ``confidence`` and ``match_method``.
+    Results are memoised per normalised verbatim; safe to share between
+    threads.
+    """
@@ -0,0 +1,391 @@
+"""
+Candidate index for coding verbatim text against large term dictionaries.
+
+Medical dictionaries (MedDRA LLTs, WHO Drug trade names) run to tens or
+hundreds of thousands of terms, so a verbatim cannot be compared with every
+term. TermIndex narrows the search in three steps, cheapest first:
+
+1. Exact match on the normalised term (a dict lookup).
+2. Phrase match through a token inverted index: terms whose words all
+   appear, in order, in the verbatim (or that contain the whole verbatim).
+3. Fuzzy match: the terms sharing the most character trigrams with the
+   verbatim (Dice overlap, via a trigram inverted index, ignoring trigrams
+   found in a large share of terms) are scored with difflib's
+   SequenceMatcher, so only a few dozen ratios are computed.
+
+Postings are stored as CSR arrays (pointer + term ids) and strings as a
+packed UTF-8 blob, so an index over ~100k terms is a few MB and loads from
+an .npz file without reparsing the source dictionary.
+"""
+
+import os
+import re
+import difflib
+import hashlib
+import logging
+import functools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMO_SIZE = 100_000
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_SEPARATOR = "\x1f"
+
+
+@dataclass
+class TermMatch:
+    """A dictionary term matched to a verbatim."""
+    term_id: int
+    confidence: float
+    method: str  # "exact", "contains", "partial" or "fuzzy"
+
+
+def normalize(text: str) -> str:
+    """Lower-case and collapse everything but letters and digits to single spaces."""
+    return _NON_ALNUM.sub(" ", str(text).lower()).strip()
+
+
+def pack_strings(values: Iterable[str]) -> np.ndarray:
+    """Store strings as one UTF-8 byte array (see unpack_strings)."""
+    return np.frombuffer(_SEPARATOR.join(values).encode("utf-8"), dtype=np.uint8)
+
+
+def unpack_strings(packed: np.ndarray) -> List[str]:
+    """Strings stored by pack_strings."""
+    return packed.tobytes().decode("utf-8").split(_SEPARATOR) if packed.size else []
+
+
+def _postings(keys: List[List[int]], vocabulary_size: int, term_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR inverted index (ptr, term ids) from each term's key ids."""
+    lengths = np.fromiter((len(term_keys) for term_keys in keys), dtype=np.int64, count=term_count)
+    flat_keys = np.fromiter((key for term_keys in keys for key in term_keys), dtype=np.int64, count=int(lengths.sum()))
+    flat_terms = np.repeat(np.arange(term_count, dtype=np.int32), lengths)
+    order = np.argsort(flat_keys, kind="stable")
+    ptr = np.concatenate(([0], np.cumsum(np.bincount(flat_keys, minlength=vocabulary_size)))).astype(np.int64)
+    return ptr, flat_terms[order]
+
+
+class TermIndex:
+    """
+    Exact, token and trigram index over a list of term names.
+
+    Term ids are positions in ``names``; callers keep their own per-term
+    data (codes, hierarchy) in arrays aligned with them.
+    """
+
+    NGRAM_SIZE = 3
+    FUZZY_CANDIDATES = 40
+    # Trigrams posted for more terms than this share are skipped when collecting candidates
+    COMMON_GRAM_FRACTION = 0.02
+    COMMON_GRAM_MIN = 500
+    CONTAINS_CONFIDENCE = 0.95
+
+    def __init__(self, names: List[str], tokens: List[str], token_ptr: np.ndarray, token_terms: np.ndarray,
+                 grams: List[str], gram_ptr: np.ndarray, gram_terms: np.ndarray):
+        self.names = names
+        self.normalized = [normalize(name) for name in names]
+        self.tokens = tokens
+        self.token_ptr = token_ptr
+        self.token_terms = token_terms
+        self.grams = grams
+        self.gram_ptr = gram_ptr
+        self.gram_terms = gram_terms
+
+        self._token_ids = {token: i for i, token in enumerate(tokens)}
+        self._gram_ids = {gram: i for i, gram in enumerate(grams)}
+        self._exact: Dict[str, int] = {}
+        for term_id, text in enumerate(self.normalized):
+            self._exact.setdefault(text, term_id)
+        # Distinct tokens / trigrams per term, for phrase checks and Dice scores
+        self._term_tokens = np.bincount(token_terms, minlength=len(names)) if len(names) else np.zeros(0, np.int64)
+        self._term_grams = np.bincount(gram_terms, minlength=len(names)) if len(names) else np.zeros(0, np.int64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def ngrams(cls, text: str) -> set:
+        """Distinct character trigrams of normalised text, padded at the ends."""
+        padded = f" {text} "
+        size = cls.NGRAM_SIZE
+        return {padded[i:i + size] for i in range(max(1, len(padded) - size + 1))}
+
+    @classmethod
+    def build(cls, names: List[str]) -> "TermIndex":
+        """
+        Index a list of term names.
+
+        Args:
+            names: Term names; duplicates after normalisation resolve to the first.
+
+        Returns:
+            The built index.
+        """
+        normalized = [normalize(name) for name in names]
+        token_sets = [sorted(set(text.split())) for text in normalized]
+        gram_sets = [sorted(cls.ngrams(text)) if text else [] for text in normalized]
+        tokens = sorted(set().union(*token_sets)) if token_sets else []
+        grams = sorted(set().union(*gram_sets)) if gram_sets else []
+        token_ids = {token: i for i, token in enumerate(tokens)}
+        gram_ids = {gram: i for i, gram in enumerate(grams)}
+
+        token_ptr, token_terms = _postings([[token_ids[t] for t in ts] for ts in token_sets], len(tokens), len(names))
+        gram_ptr, gram_terms = _postings([[gram_ids[g] for g in gs] for gs in gram_sets], len(grams), len(names))
+        return cls(list(names), tokens, token_ptr, token_terms, grams, gram_ptr, gram_terms)
+
+    def to_arrays(self, prefix: str = "") -> Dict[str, np.ndarray]:
+        """Arrays for np.savez; restore with from_arrays."""
+        return {
+            f"{prefix}names": pack_strings(self.names),
+            f"{prefix}tokens": pack_strings(self.tokens),
+            f"{prefix}token_ptr": self.token_ptr,
+            f"{prefix}token_terms": self.token_terms,
+            f"{prefix}grams": pack_strings(self.grams),
+            f"{prefix}gram_ptr": self.gram_ptr,
+            f"{prefix}gram_terms": self.gram_terms,
+        }
+
+    @classmethod
+    def from_arrays(cls, data, prefix: str = "") -> "TermIndex":
+        """Index from the arrays written by to_arrays (e.g. an open np.load result)."""
+        return cls(
+            names=unpack_strings(data[f"{prefix}names"]),
+            tokens=unpack_strings(data[f"{prefix}tokens"]),
+            token_ptr=data[f"{prefix}token_ptr"],
+            token_terms=data[f"{prefix}token_terms"],
+            grams=unpack_strings(data[f"{prefix}grams"]),
+            gram_ptr=data[f"{prefix}gram_ptr"],
+            gram_terms=data[f"{prefix}gram_terms"],
+        )
+
+    def _hits(self, key_ids: List[int], ptr: np.ndarray, terms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Terms posted under any of the keys, with how many of the keys each has."""
+        if not key_ids:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        posted = np.concatenate([terms[ptr[key]:ptr[key + 1]] for key in key_ids])
+        if len(posted) < len(self.names) // 8:
+            return np.unique(posted, return_counts=True)
+        # Long posting lists (common words and trigrams): count without sorting
+        counts = np.bincount(posted, minlength=len(self.names))
+        hit = np.flatnonzero(counts)
+        return hit, counts[hit]
+
+    def exact(self, text: str) -> Optional[int]:
+        """Id of the term whose normalised form equals the normalised text."""
+        return self._exact.get(normalize(text))
+
+    def phrase(self, text: str) -> Optional[TermMatch]:
+        """
+        Best term contained in the text as a whole phrase, else the shortest
+        term containing the whole text.
+
+        Longer contained terms win ("head pain" over "pain"), so modifiers
+        around a verbatim ("severe", "mild") do not change its coding.
+        """
+        text = normalize(text)
+        query_tokens = set(text.split())
+        token_ids = [self._token_ids[token] for token in query_tokens if token in self._token_ids]
+        terms, counts = self._hits(token_ids, self.token_ptr, self.token_terms)
+        if not len(terms):
+            return None
+
+        padded = f" {text} "
+        inside = terms[counts == self._term_tokens[terms]]
+        contained = [term for term in inside.tolist() if f" {self.normalized[term]} " in padded]
+        if contained:
+            best = min(contained, key=lambda term: (-self._term_tokens[term], -len(self.normalized[term]), term))
+            return TermMatch(best, self.CONTAINS_CONFIDENCE, "contains")
+
+        if len(token_ids) == len(query_tokens):
+            around = terms[counts == len(token_ids)]
+            containing = [term for term in around.tolist() if padded in f" {self.normalized[term]} "]
+            if containing:
+                best = min(containing, key=lambda term: (len(self.normalized[term]), term))
+                return TermMatch(best, self.CONTAINS_CONFIDENCE, "partial")
+        return None
+
+    def candidates(self, text: str, limit: Optional[int] = None) -> List[int]:
+        """Terms sharing the most trigrams with the text (by Dice overlap), best first."""
+        text = normalize(text)
+        query_grams = self.ngrams(text)
+        gram_ids = [self._gram_ids[gram] for gram in query_grams if gram in self._gram_ids]
+        # Common trigrams ("ion", "is ") barely narrow the search but dominate its cost;
+        # count the rarer ones, keeping at least the two rarest
+        frequency = {gram_id: int(self.gram_ptr[gram_id + 1] - self.gram_ptr[gram_id]) for gram_id in gram_ids}
+        common = max(self.COMMON_GRAM_MIN, int(len(self.names) * self.COMMON_GRAM_FRACTION))
+        rare = [gram_id for gram_id in gram_ids if frequency[gram_id] <= common]
+        if len(rare) < 2:
+            rare = sorted(gram_ids, key=frequency.get)[:2]
+        terms, shared = self._hits(rare, self.gram_ptr, self.gram_terms)
+        if not len(terms):
+            return []
+        dice = 2.0 * shared / (len(query_grams) + self._term_grams[terms])
+        limit = limit or self.FUZZY_CANDIDATES
+        if len(terms) > limit:
+            top = np.argpartition(-dice, limit - 1)[:limit]
+            terms, dice = terms[top], dice[top]
+        order = np.lexsort((terms, -dice))
+        return terms[order].tolist()
+
+    def fuzzy(self, text: str, threshold: float, limit: Optional[int] = None) -> Optional[TermMatch]:
+        """Best SequenceMatcher ratio at or above threshold among the trigram candidates."""
+        text = normalize(text)
+        # SequenceMatcher caches details of its second sequence, so the verbatim goes there
+        matcher = difflib.SequenceMatcher(None, "", text)
+        best, best_score = None, threshold
+        for term in self.candidates(text, limit):
+            matcher.set_seq1(self.normalized[term])
+            # The quick ratios are upper bounds, so most candidates skip the full comparison
+            if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                continue
+            score = matcher.ratio()
+            if score > best_score or (best is None and score >= best_score):
+                best, best_score = term, score
+        return TermMatch(best, round(best_score, 4), "fuzzy") if best is not None else None
+
+    def match(self, text: str, threshold: float = 0.7) -> Optional[TermMatch]:
+        """
+        Code text to a term: exact, then phrase, then fuzzy match.
+
+        Args:
+            text: Verbatim text.
+            threshold: Minimum similarity (0-1) for a fuzzy match.
+
+        Returns:
+            The match, or None if nothing reaches the threshold.
+        """
+        term = self.exact(text)
+        if term is not None:
+            return TermMatch(term, 1.0, "exact")
+        return self.phrase(text) or self.fuzzy(text, threshold)
+
+
+def file_digest(label: str, paths: Iterable[Tuple[str, str]]) -> str:
+    """
+    Digest identifying an index built from source files.
+
+    Args:
+        label: Dictionary kind and format version, e.g. "meddra-1".
+        paths: (name, path) of each source file that exists.
+    """
+    digest = hashlib.sha256(f"{label}-{TermIndex.NGRAM_SIZE}".encode("utf-8"))
+    for name, path in paths:
+        digest.update(name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(functools.partial(f.read, 1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def save_npz(path: str, **arrays: Any) -> None:
+    """Write arrays to an .npz file through a temporary file, so readers never see a partial one."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_or_build(kind: str, digest: str, index_dir: Optional[str], load: Callable[[str], Any],
+                  build: Callable[[], Any]) -> Any:
+    """
+    Load a saved dictionary index for this digest, or build and save it.
+
+    Args:
+        kind: File name prefix and log label, e.g. "meddra".
+        digest: Digest of the source files (see file_digest).
+        index_dir: Where built indexes are saved (no saving if None);
+            created owner-only (0700) if missing.
+        load: Reads a saved file; the result needs ``digest`` and ``save(path)``.
+        build: Builds the dictionary from its source files.
+
+    Returns:
+        The loaded or built dictionary.
+    """
+    path = os.path.join(index_dir, f"{kind}_index-{digest[:16]}.npz") if index_dir else None
+
+    if path and os.path.exists(path):
+        try:
+            dictionary = load(path)
+            if dictionary.digest == digest:
+                return dictionary
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding unreadable {kind} index {path}: {e}")
+
+    dictionary = build()
+    if path:
+        try:
+            os.makedirs(index_dir, mode=0o700, exist_ok=True)
+            dictionary.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save {kind} index to {path}: {e}")
+    return dictionary
+
+
+class TermCoder:
+    """
+    Codes verbatims through a dictionary's TermIndex, with a memo.
+
+    The dictionary needs an ``index`` (TermIndex) and ``term(term_id)``
+    returning the coded fields for a term. Results are memoised per
+    (normalised verbatim, threshold), so repeated verbatims cost a dict
+    lookup. Safe to share between threads.
+    """
+
+    def __init__(self, dictionary: Any, memo_size: int = DEFAULT_MEMO_SIZE):
+        self.dictionary = dictionary
+        self._match = functools.lru_cache(maxsize=memo_size)(self._match_normalized)
+
+    def _match_normalized(self, text: str, threshold: float) -> Optional[Tuple[int, float, str]]:
+        match = self.dictionary.index.match(text, threshold)
+        return (match.term_id, match.confidence, match.method) if match else None
+
+    def _result(self, found: Optional[Tuple[int, float, str]]) -> Optional[Dict[str, Any]]:
+        if found is None:
+            return None
+        term_id, confidence, method = found
+        return dict(self.dictionary.term(term_id), confidence=confidence, match_method=method)
+
+    def code(self, verbatim: str, threshold: float = 0.7) -> Optional[Dict[str, Any]]:
+        """
+        Code one verbatim.
+
+        Args:
+            verbatim: Reported term.
+            threshold: Minimum similarity (0-1) for a fuzzy match.
+
+        Returns:
+            The term's fields with ``confidence`` and ``match_method``
+            ("exact", "contains", "partial" or "fuzzy"), or None if uncoded.
+        """
+        text = normalize(verbatim or "")
+        return self._result(self._match(text, threshold)) if text else None
+
+    def code_batch(self, verbatims: List[str], threshold: float = 0.7) -> List[Optional[Dict[str, Any]]]:
+        """
+        Code a listing of verbatims, each distinct verbatim once.
+
+        Args:
+            verbatims: Reported terms.
+            threshold: Minimum similarity (0-1) for a fuzzy match.
+
+        Returns:
+            One result per verbatim, as for code(); verbatims that normalise
+            the same share one result dict.
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        coded = []
+        for verbatim in verbatims:
+            text = normalize(verbatim or "")
+            if text not in results:
+                results[text] = self._result(self._match(text, threshold)) if text else None
+            coded.append(results[text])
+        return coded
+
+    def cache_info(self):
+        """Hit and miss counts of the verbatim memo."""
+        return self._match.cache_info()
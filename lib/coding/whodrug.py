@@ -0,0 +1,350 @@
+"""
+WHO Drug dictionaries, an indexed medication coder and a drug interaction graph.
+
+A WhoDrugDictionary maps every drug name that can be coded (preferred
+names, ingredients and trade names) to a drug record (preferred name, drug
+code, ATC code and classes, routes, ingredients), with a TermIndex over the
+names. It is loaded from either:
+
+* A flat WHO Drug extract in CSV, one row per name, with columns ``name``,
+  ``drug_name`` and optionally ``drug_code``, ``atc_code``, ``atc_text``,
+  ``therapeutic_class``, ``anatomical_class``, ``routes`` and
+  ``ingredients`` (``;``-separated lists). The built index is saved as an
+  .npz file named by a digest of the file, like the MedDRA index.
+* The embedded tables in concomitant_med_coder, for running without a
+  licensed dictionary.
+
+InteractionGraph stores drug-drug interactions as an adjacency map keyed by
+ingredient name or ATC code (any level, e.g. ``B01A`` for all
+antithrombotics). Checking a medication list looks up each medication's
+keys and their neighbours, so the cost grows with the list and the
+neighbours of its drugs, not with the number of known interaction pairs.
+"""
+
+import re
+import csv
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from lib.coding.term_index import (
+    TermCoder, TermIndex, file_digest, load_or_build, normalize, pack_strings, save_npz, unpack_strings
+)
+
+FORMAT_VERSION = 1
+
+DRUG_COLUMNS = ("drug_name", "drug_code", "atc_code", "atc_text", "therapeutic_class", "anatomical_class",
+                "routes", "ingredients")
+
+# ATC codes at any level: A, A10, A10B, A10BA, A10BA02
+ATC_CODE = re.compile(r"^[A-Z](\d{2}([A-Z]([A-Z](\d{2})?)?)?)?$")
+ATC_LEVEL_LENGTHS = (1, 3, 4, 5, 7)
+
+
+def _split(value: Any) -> List[str]:
+    """A ``;``-separated field (or a list) as a list of stripped values."""
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or "").split(";") if item.strip()]
+
+
+class WhoDrugDictionary:
+    """
+    Drug names indexed for coding, each pointing at a drug record.
+
+    ``name_drug[i]`` is the row of name ``i``'s drug in ``drugs``, a dict of
+    column name to list (see DRUG_COLUMNS); list-valued columns are stored
+    ``;``-separated.
+    """
+
+    def __init__(self, index: TermIndex, name_drug: np.ndarray, drugs: Dict[str, List[str]],
+                 version: Optional[str] = None, digest: str = ""):
+        self.index = index
+        self.name_drug = name_drug
+        self.drugs = drugs
+        self.version = version
+        self.digest = digest
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def term(self, term_id: int) -> Dict[str, Any]:
+        """Drug record of a name id, with the name that matched."""
+        row = int(self.name_drug[term_id])
+        drug = {column: self.drugs[column][row] for column in DRUG_COLUMNS}
+        drug["route"] = _split(drug.pop("routes"))
+        drug["ingredients"] = _split(drug["ingredients"])
+        drug["matched_name"] = self.index.names[term_id]
+        return drug
+
+    @classmethod
+    def _from_rows(cls, rows: Iterable[Tuple[str, Dict[str, Any]]], version: Optional[str] = None,
+                   digest: str = "") -> "WhoDrugDictionary":
+        """Dictionary from (name, drug record) pairs; identical records are stored once."""
+        names, name_drug = [], []
+        drugs: Dict[str, List[str]] = {column: [] for column in DRUG_COLUMNS}
+        drug_rows: Dict[Tuple[str, ...], int] = {}
+        seen = set()
+        for name, record in rows:
+            normalized = normalize(name)
+            if not normalized or normalized in seen:
+                continue
+            seen.add(normalized)
+            values = tuple(
+                ";".join(_split(record.get(column))) if column in ("routes", "ingredients")
+                else str(record.get(column) or "")
+                for column in DRUG_COLUMNS
+            )
+            if values not in drug_rows:
+                drug_rows[values] = len(drugs["drug_name"])
+                for column, value in zip(DRUG_COLUMNS, values):
+                    drugs[column].append(value)
+            names.append(name)
+            name_drug.append(drug_rows[values])
+        return cls(TermIndex.build(names), np.asarray(name_drug, dtype=np.int32), drugs, version, digest)
+
+    @classmethod
+    def from_entries(cls, entries: Dict[str, Dict[str, Any]],
+                     synonyms: Optional[Dict[str, str]] = None) -> "WhoDrugDictionary":
+        """
+        Dictionary from an embedded table like concomitant_med_coder.WHO_DRUG_DICTIONARY.
+
+        Args:
+            entries: {key: {drug_name, atc_code, atc_text, drug_code, therapeutic_class,
+                anatomical_class, route: [...]}}; the key, drug name and ATC text are indexed.
+            synonyms: {trade name: entry key}, indexed as names of that entry's drug.
+        """
+        records = {
+            key: dict(entry, routes=entry.get("route", []), ingredients=entry.get("ingredients", [entry["drug_name"]]))
+            for key, entry in entries.items()
+        }
+        rows = []
+        for key, record in records.items():
+            rows.extend((name, record) for name in (key, record["drug_name"], record.get("atc_text")) if name)
+        for synonym, key in (synonyms or {}).items():
+            if key in records:
+                rows.append((synonym, records[key]))
+        return cls._from_rows(rows)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "WhoDrugDictionary":
+        """
+        Parse a WHO Drug CSV extract (see the module docstring for its columns).
+
+        Raises:
+            ValueError: If the name or drug_name column is missing.
+        """
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            fields = {field.strip().lower(): field for field in reader.fieldnames or []}
+            missing = {"name", "drug_name"} - set(fields)
+            if missing:
+                raise ValueError(f"WHO Drug extract {path} is missing columns: {', '.join(sorted(missing))}")
+            rows = [
+                (row[fields["name"]], {column: row.get(fields[column], "") for column in DRUG_COLUMNS if column in fields})
+                for row in reader
+            ]
+        return cls._from_rows(rows, digest=digest_for(path))
+
+    def save(self, path: str) -> None:
+        """Write the dictionary and its index to an .npz file (atomically replaced)."""
+        arrays = self.index.to_arrays("index_")
+        arrays.update({f"drug_{column}": pack_strings(self.drugs[column]) for column in DRUG_COLUMNS})
+        save_npz(
+            path,
+            format_version=np.array(FORMAT_VERSION),
+            digest=np.array(self.digest),
+            version=np.array(self.version or ""),
+            name_drug=self.name_drug,
+            **arrays
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "WhoDrugDictionary":
+        """
+        Read a dictionary written by save().
+
+        Raises:
+            ValueError: If the file is from another format version.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {int(data['format_version'])}, expected {FORMAT_VERSION}")
+            return cls(
+                index=TermIndex.from_arrays(data, "index_"),
+                name_drug=data["name_drug"],
+                drugs={column: unpack_strings(data[f"drug_{column}"]) for column in DRUG_COLUMNS},
+                version=str(data["version"]) or None,
+                digest=str(data["digest"]),
+            )
+
+
+def digest_for(path: str) -> str:
+    """Digest identifying an index built from a WHO Drug extract."""
+    return file_digest(f"whodrug-{FORMAT_VERSION}", [("whodrug.csv", path)])
+
+
+def load_whodrug(path: str, index_dir: Optional[str] = None) -> WhoDrugDictionary:
+    """
+    Load a WHO Drug CSV extract, using the saved index when it matches.
+
+    Args:
+        path: The extract.
+        index_dir: Where built indexes are saved (no saving if None).
+    """
+    return load_or_build("whodrug", digest_for(path), index_dir, WhoDrugDictionary.load,
+                         lambda: WhoDrugDictionary.from_csv(path))
+
+
+class WhoDrugCoder(TermCoder):
+    """
+    Codes medication verbatims to WHO Drug through a WhoDrugDictionary's index.
+
+    code() and code_batch() return the drug record (see
+    WhoDrugDictionary.term) with ``confidence`` and ``match_method``.
+    Results are memoised per normalised verbatim; safe to share between
+    threads.
+    """
+
+
+# --- Interactions --------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Interaction:
+    """A known interaction between two drugs or drug classes."""
+    drug1: str
+    drug2: str
+    interaction_type: str
+    severity: str = "moderate"
+    recommendation: str = "Monitor closely"
+
+
+def interaction_key(value: str) -> Tuple[str, str]:
+    """Graph key for an ingredient name or ATC code (e.g. ``B01AA03`` or ``B01A``)."""
+    code = str(value).strip().upper().replace(" ", "")
+    if ATC_CODE.match(code):
+        return ("atc", code)
+    return ("name", normalize(value))
+
+
+def medication_keys(medication: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """
+    Graph keys of a coded medication: its drug name and ingredients, and its
+    ATC code at every level.
+    """
+    keys = set()
+    for name in [medication.get("drug_name")] + list(medication.get("ingredients") or []):
+        if name:
+            keys.add(("name", normalize(name)))
+    atc_code = str(medication.get("atc_code") or "").upper().replace(" ", "")
+    for length in ATC_LEVEL_LENGTHS:
+        if len(atc_code) >= length:
+            keys.add(("atc", atc_code[:length]))
+    return keys
+
+
+class InteractionGraph:
+    """
+    Drug-drug interactions as an adjacency map.
+
+    ``adjacent[key]`` maps each neighbouring key to the interactions between
+    them, where keys are ingredient names or ATC codes (see interaction_key).
+    """
+
+    def __init__(self):
+        self.interactions: List[Interaction] = []
+        self.keys: List[Tuple[Tuple[str, str], Tuple[str, str]]] = []
+        self.adjacent: Dict[Tuple[str, str], Dict[Tuple[str, str], List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def add(self, interaction: Interaction) -> None:
+        """Add an interaction under both of its keys."""
+        number = len(self.interactions)
+        first, second = interaction_key(interaction.drug1), interaction_key(interaction.drug2)
+        self.interactions.append(interaction)
+        self.keys.append((first, second))
+        self.adjacent.setdefault(first, {}).setdefault(second, []).append(number)
+        if second != first:
+            self.adjacent.setdefault(second, {}).setdefault(first, []).append(number)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any]) -> "InteractionGraph":
+        """
+        Graph from (drug1, drug2, interaction_type[, severity, recommendation])
+        tuples or dicts with those keys.
+        """
+        graph = cls()
+        for record in records:
+            if isinstance(record, dict):
+                values = {key: value for key, value in record.items() if value not in (None, "")}
+                graph.add(Interaction(**{field: values[field] for field in Interaction.__dataclass_fields__
+                                         if field in values}))
+            else:
+                graph.add(Interaction(*record))
+        return graph
+
+    @classmethod
+    def from_file(cls, path: str) -> "InteractionGraph":
+        """
+        Load interactions from a CSV (header drug1, drug2, interaction_type,
+        optional severity, recommendation) or a JSON list of such objects.
+        """
+        if path.lower().endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                return cls.from_records(json.load(f))
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return cls.from_records(csv.DictReader(f))
+
+    def check(self, medications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Interactions among one subject's coded medications.
+
+        Each medication is looked up under its keys (see medication_keys),
+        and each neighbouring key is checked against the list, so the cost
+        is O(medications x neighbours). Every interaction is reported once
+        per pair of drug names, with drug1 and drug2 in the interaction's
+        own order.
+
+        Args:
+            medications: Coded medications (drug_name, atc_code, ingredients).
+
+        Returns:
+            {"drug1", "drug2", "interaction_type", "severity", "recommendation"}
+            for each interacting pair.
+        """
+        keys = [medication_keys(medication) if medication.get("drug_name") else set() for medication in medications]
+        holders: Dict[Tuple[str, str], List[int]] = {}
+        for position, medication_key_set in enumerate(keys):
+            for key in medication_key_set:
+                holders.setdefault(key, []).append(position)
+
+        found, seen = [], set()
+        for position, medication_key_set in enumerate(keys):
+            for key in medication_key_set:
+                for neighbour, numbers in self.adjacent.get(key, {}).items():
+                    for other in holders.get(neighbour, ()):
+                        if other == position:
+                            continue
+                        for number in numbers:
+                            # Report from the drug1 side only, so each pair is found once
+                            if self.keys[number][0] != key:
+                                continue
+                            interaction = self.interactions[number]
+                            first = medications[position]["drug_name"]
+                            second = medications[other]["drug_name"]
+                            pair = (number, frozenset((first, second)))
+                            if first == second or pair in seen:
+                                continue
+                            seen.add(pair)
+                            found.append({
+                                "drug1": first,
+                                "drug2": second,
+                                "interaction_type": interaction.interaction_type,
+                                "severity": interaction.severity,
+                                "recommendation": interaction.recommendation
+                            })
+        return found
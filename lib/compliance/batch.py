@@ -0,0 +1,550 @@
+"""
+Columnar batch evaluation of compliance rules.
+
+Portfolio reviews check hundreds of schedules with thousands of visits each.
+Rather than building a Visit per row and calling every check per visit,
+the visits of all schedules are loaded into one columnar table (dates as
+integer day ordinals, times as minutes, sites, visit types and procedures as
+integer codes) and each rule is evaluated over the whole table in a single
+pass of array operations. Violations are then counted per study.
+"""
+
+import logging
+from typing import Dict, List, Any, Tuple, Iterable, Callable, FrozenSet
+
+import numpy as np
+
+from lib.compliance.rules_engine import (
+    CompiledRule, ScheduleContext, Visit, normalize_key, parse_date, parse_time,
+    parse_time_range, parse_business_hours, _parse_int
+)
+
+logger = logging.getLogger(__name__)
+
+# Larger than any date ordinal, so (schedule, ordinal) packs into one sortable int64
+ORDINAL_SPAN = 1 << 22
+
+_EMPTY_ROWS = np.zeros(0, dtype=np.int64)
+
+
+class VisitColumns:
+    """
+    Visits of many schedules as parallel arrays (one element per visit).
+
+    Attributes:
+        studies: Study identifiers; ``schedule_study`` holds indexes into it.
+        schedules: Per schedule: study_id, schedule_id, study_start_date and the visit records.
+        schedule: Schedule index of each visit.
+        position: Position of each visit within its schedule.
+        day: Study day (valid where ``has_day``).
+        ordinal: Date as ``date.toordinal()``; 0 if missing or unparseable.
+        time: Minutes after midnight; -1 if missing.
+        site: Index into ``site_ids``; -1 if missing.
+        visit_type: Index into ``visit_types`` (normalised).
+        procedure_keys: Normalised procedure names; ``proc_codes`` index into it.
+        proc_ptr: Visit i's procedures are ``proc_codes[proc_ptr[i]:proc_ptr[i + 1]]``.
+    """
+
+    def __init__(self):
+        self.studies: List[str] = []
+        self.schedules: List[Dict[str, Any]] = []
+        self.site_ids: List[str] = []
+        self.visit_types: List[str] = []
+        self.procedure_keys: List[str] = []
+        self._memo: Dict[Any, Any] = {}
+
+    @classmethod
+    def from_schedules(cls, schedules: Iterable[Dict[str, Any]]) -> "VisitColumns":
+        """
+        Load schedules into columns.
+
+        Args:
+            schedules: Dicts with ``study_id``, ``visits`` (schema adapter visit
+                records) and optional ``schedule_id`` and ``study_start_date``.
+
+        Returns:
+            The columnar visit table.
+        """
+        columns = cls()
+        study_codes: Dict[str, int] = {}
+        site_codes: Dict[Any, int] = {}
+        type_codes: Dict[Any, int] = {}
+        procedure_codes: Dict[Any, int] = {}
+        date_cache: Dict[Any, int] = {}
+        time_cache: Dict[Any, int] = {None: -1}
+        type_keys: Dict[str, int] = {}
+        procedure_keys: Dict[str, int] = {}
+
+        schedule_study, schedule_start, schedule_offsets = [], [], []
+        schedule_col, position, day, has_day, ordinal, time, site, visit_type = [], [], [], [], [], [], [], []
+        proc_codes, proc_ptr = [], [0]
+
+        def code_for_key(key: str, codes: Dict[str, int], names: List[str]) -> int:
+            # Distinct raw values can normalise to the same key
+            if key not in codes:
+                codes[key] = len(names)
+                names.append(key)
+            return codes[key]
+
+        for schedule in schedules:
+            study_id = str(schedule.get("study_id", ""))
+            if study_id not in study_codes:
+                study_codes[study_id] = len(columns.studies)
+                columns.studies.append(study_id)
+            records = schedule.get("visits") or []
+            schedule_index = len(columns.schedules)
+            columns.schedules.append({
+                "study_id": study_id,
+                "schedule_id": schedule.get("schedule_id", schedule_index),
+                "study_start_date": schedule.get("study_start_date"),
+                "visits": records
+            })
+            start = parse_date(schedule.get("study_start_date"))
+            schedule_study.append(study_codes[study_id])
+            schedule_start.append(start.toordinal() if start else 0)
+            schedule_offsets.append(len(schedule_col))
+
+            for index, record in enumerate(records):
+                schedule_col.append(schedule_index)
+                position.append(index)
+
+                value = record.get("visit_day")
+                parsed_day = value if type(value) is int else _parse_int(value)
+                has_day.append(parsed_day is not None)
+                day.append(parsed_day if parsed_day is not None else 0)
+
+                value = record.get("visit_date")
+                if value not in date_cache:
+                    parsed_date = parse_date(value) if isinstance(value, str) else None
+                    date_cache[value] = parsed_date.toordinal() if parsed_date else 0
+                ordinal.append(date_cache[value])
+
+                value = record.get("visit_time")
+                if value not in time_cache:
+                    parsed_time = parse_time(value)
+                    time_cache[value] = parsed_time if parsed_time is not None else -1
+                time.append(time_cache[value])
+
+                value = record.get("site_id")
+                if value not in site_codes:
+                    site_codes[value] = len(columns.site_ids) if value is not None else -1
+                    if value is not None:
+                        columns.site_ids.append(str(value))
+                site.append(site_codes[value])
+
+                value = record.get("visit_type") or ""
+                if value not in type_codes:
+                    type_codes[value] = code_for_key(normalize_key(value), type_keys, columns.visit_types)
+                visit_type.append(type_codes[value])
+
+                for procedure in record.get("procedures") or ():
+                    if procedure not in procedure_codes:
+                        procedure_codes[procedure] = code_for_key(
+                            normalize_key(procedure), procedure_keys, columns.procedure_keys
+                        )
+                    proc_codes.append(procedure_codes[procedure])
+                proc_ptr.append(len(proc_codes))
+
+        columns.schedule_study = np.asarray(schedule_study, dtype=np.int64)
+        columns.schedule_start = np.asarray(schedule_start, dtype=np.int64)
+        columns.schedule_offsets = np.asarray(schedule_offsets, dtype=np.int64)
+        columns.schedule = np.asarray(schedule_col, dtype=np.int64)
+        columns.position = np.asarray(position, dtype=np.int64)
+        columns.day = np.asarray(day, dtype=np.int64)
+        columns.has_day = np.asarray(has_day, dtype=bool)
+        columns.ordinal = np.asarray(ordinal, dtype=np.int64)
+        columns.time = np.asarray(time, dtype=np.int64)
+        columns.site = np.asarray(site, dtype=np.int64)
+        columns.visit_type = np.asarray(visit_type, dtype=np.int64)
+        columns.proc_codes = np.asarray(proc_codes, dtype=np.int64)
+        columns.proc_ptr = np.asarray(proc_ptr, dtype=np.int64)
+        columns.proc_row = np.repeat(np.arange(len(schedule_col), dtype=np.int64), np.diff(columns.proc_ptr))
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.schedule)
+
+    @property
+    def study(self) -> np.ndarray:
+        """Study index of each visit."""
+        if "study" not in self._memo:
+            self._memo["study"] = self.schedule_study[self.schedule]
+        return self._memo["study"]
+
+    @property
+    def weekday(self) -> np.ndarray:
+        """Weekday of each visit (Monday = 0; meaningless where ordinal is 0)."""
+        if "weekday" not in self._memo:
+            self._memo["weekday"] = (self.ordinal - 1) % 7
+        return self._memo["weekday"]
+
+    def has_any(self, keys: FrozenSet[str]) -> np.ndarray:
+        """Mask of visits with at least one procedure in keys."""
+        lookup = np.fromiter((key in keys for key in self.procedure_keys), dtype=bool,
+                             count=len(self.procedure_keys))
+        return self._count_procedures(lookup) > 0
+
+    def has_any_outside(self, keys: FrozenSet[str]) -> np.ndarray:
+        """Mask of visits with at least one procedure not in keys."""
+        lookup = np.fromiter((key not in keys for key in self.procedure_keys), dtype=bool,
+                             count=len(self.procedure_keys))
+        return self._count_procedures(lookup) > 0
+
+    def _count_procedures(self, lookup: np.ndarray) -> np.ndarray:
+        """Per visit, how many of its procedures are flagged in lookup."""
+        if not lookup.any():
+            return np.zeros(len(self), dtype=np.int64)
+        return np.bincount(self.proc_row[lookup[self.proc_codes]], minlength=len(self))
+
+    def dated_order(self) -> np.ndarray:
+        """Dated visits sorted by schedule, date and study day (then position)."""
+        if "dated_order" not in self._memo:
+            rows = np.flatnonzero(self.ordinal > 0)
+            self._memo["dated_order"] = rows[np.lexsort((
+                self.position[rows],
+                np.where(self.has_day[rows], self.day[rows], 0),
+                self.ordinal[rows],
+                self.schedule[rows]
+            ))]
+        return self._memo["dated_order"]
+
+
+# ----------------------------------------------------------------------
+# Batch validation compilers: parameters -> function(columns) -> violating rows
+#
+# Each returns the index of the visit a violation is reported against, once
+# per violation, matching the per-schedule checks in rules_engine.
+# ----------------------------------------------------------------------
+
+BATCH_VALIDATORS: Dict[str, Callable[[Dict[str, Any]], Callable[[VisitColumns], np.ndarray]]] = {}
+
+
+def batch_validator(validation_type: str):
+    """Register a batch compiler for a validation type."""
+    def register(compiler):
+        BATCH_VALIDATORS[validation_type] = compiler
+        return compiler
+    return register
+
+
+@batch_validator("business_hours")
+def compile_business_hours(params: Dict[str, Any]):
+    weekdays, open_minutes, close_minutes = parse_business_hours(params.get("default_hours", "M-F 8:00-17:00"))
+    allowed = np.zeros(7, dtype=bool)
+    allowed[list(weekdays | ({5, 6} if params.get("allow_weekends", False) else set()))] = True
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        off_day = (columns.ordinal > 0) & ~allowed[columns.weekday]
+        off_hours = (columns.time >= 0) & ((columns.time < open_minutes) | (columns.time > close_minutes))
+        return np.concatenate((np.flatnonzero(off_day), np.flatnonzero(off_hours)))
+
+    return check
+
+
+@batch_validator("blackout_dates")
+def compile_blackout_dates(params: Dict[str, Any]):
+    blackout = np.array(sorted({
+        parsed.toordinal() for parsed in (parse_date(value) for value in params.get("holidays", [])) if parsed
+    }), dtype=np.int64)
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        if not len(blackout):
+            return _EMPTY_ROWS
+        # Vectorised bisect_left into the sorted blackout ordinals
+        index = np.minimum(np.searchsorted(blackout, columns.ordinal), len(blackout) - 1)
+        return np.flatnonzero((columns.ordinal > 0) & (blackout[index] == columns.ordinal))
+
+    return check
+
+
+@batch_validator("visit_order")
+def compile_visit_order(params: Dict[str, Any]):
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        rows = np.flatnonzero(columns.has_day & (columns.ordinal > 0))
+        ordered = rows[np.lexsort((columns.position[rows], columns.day[rows], columns.schedule[rows]))]
+        previous, current = ordered[:-1], ordered[1:]
+        out_of_order = (
+            (columns.schedule[previous] == columns.schedule[current])
+            & (columns.day[current] > columns.day[previous])
+            & (columns.ordinal[current] < columns.ordinal[previous])
+        )
+        return current[out_of_order]
+
+    return check
+
+
+@batch_validator("safety_followup")
+def compile_safety_followup(params: Dict[str, Any]):
+    triggers = frozenset(normalize_key(p) for p in params.get("safety_trigger_procedures", []))
+    window = int(params.get("followup_window_days", 7))
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        ordered = columns.dated_order()
+        triggered = np.flatnonzero(columns.has_any(triggers)[ordered])
+        if not len(triggered):
+            return _EMPTY_ROWS
+        schedules, ordinals = columns.schedule[ordered], columns.ordinal[ordered]
+        keys = schedules * ORDINAL_SPAN + ordinals
+        # First visit in the same schedule strictly after the trigger date
+        following = np.searchsorted(keys, keys[triggered], side="right")
+        clipped = np.minimum(following, len(ordered) - 1)
+        covered = (
+            (following < len(ordered))
+            & (schedules[clipped] == schedules[triggered])
+            & (ordinals[clipped] - ordinals[triggered] <= window)
+        )
+        return ordered[triggered[~covered]]
+
+    return check
+
+
+@batch_validator("consent_timing")
+def compile_consent_timing(params: Dict[str, Any]):
+    consent = frozenset(normalize_key(p) for p in params.get("consent_procedures", []))
+    exempt = frozenset(normalize_key(p) for p in params.get("exempt_procedures", [])) | consent
+
+    def first_per_schedule(columns: VisitColumns, rows: np.ndarray, sort_key: np.ndarray) -> np.ndarray:
+        ordered = rows[np.lexsort((columns.position[rows], sort_key[rows], columns.schedule[rows]))]
+        _, first = np.unique(columns.schedule[ordered], return_index=True)
+        return ordered[first]
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        schedule_count = len(columns.schedules)
+        consent_rows = np.flatnonzero(columns.has_any(consent))
+
+        # Earliest consent visit per schedule: by study day, else by date, else the first one
+        consent_visit = np.full(schedule_count, -1, dtype=np.int64)
+        for rows, sort_key in (
+            (consent_rows, columns.position),
+            (consent_rows[columns.ordinal[consent_rows] > 0], columns.ordinal),
+            (consent_rows[columns.has_day[consent_rows]], columns.day),
+        ):
+            if len(rows):
+                first = first_per_schedule(columns, rows, sort_key)
+                consent_visit[columns.schedule[first]] = first
+
+        study_visits = columns.has_any_outside(exempt)
+        chosen = consent_visit[columns.schedule]
+        exists = chosen >= 0
+        chosen = np.maximum(chosen, 0)
+        by_day = columns.has_day & columns.has_day[chosen]
+        by_date = ~by_day & (columns.ordinal > 0) & (columns.ordinal[chosen] > 0)
+        precedes = (
+            (by_day & (columns.day < columns.day[chosen]))
+            | (by_date & (columns.ordinal < columns.ordinal[chosen]))
+        )
+        return np.flatnonzero(study_visits & (~exists | precedes))
+
+    return check
+
+
+@batch_validator("site_capability")
+def compile_site_capability(params: Dict[str, Any]):
+    capabilities = {
+        str(site): frozenset(normalize_key(c) for c in caps)
+        for site, caps in params.get("site_capabilities", {}).items()
+    }
+    default = frozenset(normalize_key(c) for c in params.get("default_capabilities", []))
+    requirements = {
+        normalize_key(procedure): normalize_key(capability)
+        for procedure, capability in params.get("procedure_requirements", {}).items()
+    }
+    required_names = sorted(set(requirements.values()))
+    required_index = {name: i for i, name in enumerate(required_names)}
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        if not required_names or not len(columns.proc_codes):
+            return _EMPTY_ROWS
+        required = np.array(
+            [required_index.get(requirements.get(key), -1) for key in columns.procedure_keys], dtype=np.int64
+        )
+        # Row 0 is for visits without a site; site code i is row i + 1
+        available = np.array(
+            [[name in default for name in required_names]]
+            + [[name in capabilities.get(site_id, default) for name in required_names]
+               for site_id in columns.site_ids],
+            dtype=bool
+        )
+        entry_required = required[columns.proc_codes]
+        entry_site = columns.site[columns.proc_row] + 1
+        missing = (entry_required >= 0) & ~available[entry_site, np.maximum(entry_required, 0)]
+        return np.unique(columns.proc_row[missing])
+
+    return check
+
+
+@batch_validator("visit_window")
+def compile_visit_window(params: Dict[str, Any]):
+    default_window = (int(params.get("window_before", 0)), int(params.get("window_after", 0)))
+    strict = {
+        normalize_key(visit_type): (int(window.get("before", 0)), int(window.get("after", 0)))
+        for visit_type, window in params.get("strict_windows", {}).items()
+    }
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        windows = np.array(
+            [strict.get(visit_type, default_window) for visit_type in columns.visit_types] or [default_window],
+            dtype=np.int64
+        )
+        start = columns.schedule_start[columns.schedule]
+        deviation = columns.ordinal - (start + columns.day)
+        before, after = windows[columns.visit_type, 0], windows[columns.visit_type, 1]
+        valid = (start > 0) & (columns.ordinal > 0) & columns.has_day
+        return np.flatnonzero(valid & ((deviation < -before) | (deviation > after)))
+
+    return check
+
+
+@batch_validator("washout_period")
+def compile_washout_period(params: Dict[str, Any]):
+    procedures = frozenset(
+        normalize_key(p) for p in [params.get("procedure_type", "")] + list(params.get("affected_procedures", []))
+        if p
+    )
+    minimum = int(params.get("minimum_days_between", 0))
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        ordered = columns.dated_order()
+        matching = ordered[columns.has_any(procedures)[ordered]]
+        previous, current = matching[:-1], matching[1:]
+        too_close = (
+            (columns.schedule[previous] == columns.schedule[current])
+            & (columns.ordinal[current] - columns.ordinal[previous] < minimum)
+        )
+        return current[too_close]
+
+    return check
+
+
+@batch_validator("procedure_timing")
+def compile_procedure_timing(params: Dict[str, Any]):
+    procedures = frozenset(normalize_key(p) for p in params.get("procedures", []))
+    start, end = parse_time_range(params.get("required_time_range", "00:00-23:59"))
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        outside = (columns.time >= 0) & ((columns.time < start) | (columns.time > end))
+        return np.flatnonzero(outside & columns.has_any(procedures))
+
+    return check
+
+
+def _per_schedule_check(rule: CompiledRule) -> Callable[[VisitColumns], np.ndarray]:
+    """Fallback for validation types without a batch compiler: run the check per schedule."""
+
+    def check(columns: VisitColumns) -> np.ndarray:
+        rows = []
+        for index, schedule in enumerate(columns.schedules):
+            offset = int(columns.schedule_offsets[index])
+            visits = [Visit.from_record(record, i) for i, record in enumerate(schedule["visits"])]
+            context = ScheduleContext(visits, parse_date(schedule["study_start_date"]))
+            if rule.data_type == "visit_sequence":
+                rows.extend(offset for _ in rule.check(visits, context))
+            else:
+                for i, visit in enumerate(visits):
+                    rows.extend(offset + i for _ in rule.check(visit, context))
+        return np.asarray(rows, dtype=np.int64)
+
+    return check
+
+
+def batch_check_for(rule: CompiledRule) -> Callable[[VisitColumns], np.ndarray]:
+    """The rule's batch check, compiled on first use and kept on the rule."""
+    if rule.batch_check is None:
+        compiler = BATCH_VALIDATORS.get(rule.validation_type)
+        rule.batch_check = compiler(rule.parameters) if compiler else _per_schedule_check(rule)
+    return rule.batch_check
+
+
+def evaluate_columns(rules: List[CompiledRule],
+                     columns: VisitColumns) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Count violations of each rule per study.
+
+    Only rules for ``visits`` and ``visit_sequence`` are evaluated; rules
+    for other data types need the per-schedule engine.
+
+    Args:
+        rules: Compiled rules to evaluate.
+        columns: Visits of every schedule.
+
+    Returns:
+        (per rule_id, violation counts indexed by study; mask of schedules
+        with at least one violation).
+    """
+    flagged = np.zeros(len(columns.schedules), dtype=bool)
+    counts: Dict[str, np.ndarray] = {}
+    for rule in rules:
+        if rule.data_type not in ("visits", "visit_sequence"):
+            continue
+        rows = batch_check_for(rule)(columns)
+        counts[rule.rule_id] = np.bincount(columns.study[rows], minlength=len(columns.studies))
+        flagged[columns.schedule[rows]] = True
+    return counts, flagged
+
+
+def summarize_by_study(engine, columns: VisitColumns, rules: List[CompiledRule],
+                       max_findings_per_study: int = 10) -> Dict[str, Dict[str, Any]]:
+    """
+    Evaluate rules over all schedules and aggregate the results per study.
+
+    Counts come from the columnar evaluation. Example findings (with full
+    messages) come from running the per-schedule engine on flagged schedules
+    until each study has ``max_findings_per_study`` of them.
+
+    Args:
+        engine: RulesEngine used for the example findings.
+        columns: Visits of every schedule.
+        rules: Compiled rules to evaluate.
+        max_findings_per_study: Example findings to include per study (0 for none).
+
+    Returns:
+        Per study_id, the study's compliance summary.
+    """
+    counts, flagged = evaluate_columns(rules, columns)
+    study_count = len(columns.studies)
+    zeros = np.zeros(study_count, dtype=np.int64)
+
+    by_severity: Dict[str, np.ndarray] = {}
+    for rule in rules:
+        if rule.rule_id in counts:
+            by_severity[rule.severity] = by_severity.get(rule.severity, zeros) + counts[rule.rule_id]
+    schedules = np.bincount(columns.schedule_study, minlength=study_count)
+    visits = np.bincount(columns.study, minlength=study_count)
+    flagged_schedules = np.bincount(columns.schedule_study[flagged], minlength=study_count)
+
+    results = {}
+    for index, study_id in enumerate(columns.studies):
+        errors = int(by_severity.get("error", zeros)[index])
+        warnings = int(by_severity.get("warning", zeros)[index])
+        info = int(by_severity.get("info", zeros)[index])
+        results[study_id] = {
+            "compliance_status": "FAIL" if errors else ("WARNING" if warnings else "PASS"),
+            "schedules": int(schedules[index]),
+            "schedules_with_findings": int(flagged_schedules[index]),
+            "visits_analyzed": int(visits[index]),
+            "total_findings": int(sum(rule_counts[index] for rule_counts in counts.values())),
+            "errors": errors,
+            "warnings": warnings,
+            "info": info,
+            "findings_by_rule": {
+                rule_id: int(rule_counts[index]) for rule_id, rule_counts in counts.items() if rule_counts[index]
+            },
+            "sample_findings": []
+        }
+
+    if max_findings_per_study > 0:
+        rule_ids = set(counts)
+        for schedule_index in np.flatnonzero(flagged):
+            schedule = columns.schedules[schedule_index]
+            samples = results[schedule["study_id"]]["sample_findings"]
+            if len(samples) >= max_findings_per_study:
+                continue
+            findings = engine.apply_rules(
+                {"study_start_date": schedule["study_start_date"]}, {"visits": schedule["visits"]}
+            )
+            for finding in findings:
+                if finding.rule_id in rule_ids and len(samples) < max_findings_per_study:
+                    samples.append(dict(finding.to_dict(), schedule_id=schedule["schedule_id"]))
+
+    return results
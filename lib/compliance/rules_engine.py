@@ -0,0 +1,672 @@
+"""
+Compliance rules engine.
+
+Rules are read from data/compliance_rules/default_rules.json and compiled
+once into a rule plan: each rule's validation becomes a prebuilt check
+function with its parameters already parsed (dates, sets, time ranges), and
+rules are indexed by ``applies_to.data_type``. Plans are cached per rules
+file and rebuilt only when the file's modification time changes.
+"""
+
+import os
+import re
+import bisect
+import json
+import logging
+import threading
+from pathlib import Path
+from datetime import date, timedelta
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Tuple, Callable, Iterator, Iterable, FrozenSet
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = str(
+    Path(__file__).resolve().parent.parent.parent / "data" / "compliance_rules" / "default_rules.json"
+)
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# (message, affected item ids, details) produced by a check
+Violation = Tuple[str, List[str], Dict[str, Any]]
+
+
+@dataclass
+class Finding:
+    """A single compliance rule violation."""
+
+    rule_id: str
+    rule_type: str
+    severity: str
+    description: str
+    recommendation: str = ""
+    affected_items: List[str] = field(default_factory=list)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the finding to a JSON-serialisable dictionary."""
+        return asdict(self)
+
+
+@dataclass
+class Visit:
+    """
+    A visit prepared once per request for every rule.
+
+    Attributes:
+        visit_id: Visit identifier used in findings.
+        day: Protocol study day, if numeric.
+        date: Calendar date, if it parsed.
+        time: Scheduled time in minutes after midnight, if given.
+        site_id: Site the visit is scheduled at.
+        visit_type: Normalised visit type (e.g. ``screening``).
+        procedures: Procedures as given.
+        procedure_keys: Normalised procedure names for set lookups.
+    """
+
+    visit_id: str
+    day: Optional[int]
+    date: Optional[date]
+    time: Optional[int]
+    site_id: Optional[str]
+    visit_type: str
+    procedures: List[str]
+    procedure_keys: FrozenSet[str]
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], position: int) -> "Visit":
+        """Build a visit from a schema adapter visit record."""
+        procedures = [str(p) for p in record.get("procedures") or []]
+        site_id = record.get("site_id")
+        return cls(
+            visit_id=str(record.get("visit_id") or f"visit-{position + 1}"),
+            day=_parse_int(record.get("visit_day")),
+            date=parse_date(record.get("visit_date")),
+            time=parse_time(record.get("visit_time")),
+            site_id=str(site_id) if site_id is not None else None,
+            visit_type=normalize_key(record.get("visit_type") or ""),
+            procedures=procedures,
+            procedure_keys=frozenset(normalize_key(p) for p in procedures)
+        )
+
+
+class ScheduleContext:
+    """
+    Per-schedule state shared by the checks of one request.
+
+    Aggregates that several visits need (such as the first consent visit)
+    are computed on first use and memoised.
+    """
+
+    def __init__(self, visits: List[Visit], study_start: Optional[date] = None):
+        self.visits = visits
+        self.study_start = study_start
+        self._memo: Dict[Any, Any] = {}
+
+    def memo(self, key: Any, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it with factory on first use."""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+
+    def dated_visits(self) -> List[Visit]:
+        """Visits with a calendar date, in date order."""
+        return self.memo("dated_visits", lambda: sorted(
+            (visit for visit in self.visits if visit.date is not None),
+            key=lambda visit: (visit.date, visit.day if visit.day is not None else 0)
+        ))
+
+
+@dataclass
+class CompiledRule:
+    """
+    A rule with its validation compiled to a check function.
+
+    Visit-level rules (``data_type`` other than ``visit_sequence``) are
+    called once per item as ``check(item, context)``; sequence rules are
+    called once per schedule as ``check(visits, context)``. Both yield
+    ``(message, affected_items, details)`` tuples.
+    """
+
+    rule_id: str
+    rule_type: str
+    severity: str
+    description: str
+    recommendation: str
+    data_type: str
+    validation_type: str
+    check: Callable[..., Iterator[Violation]]
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    # Columnar form of the check, compiled on first batch evaluation
+    batch_check: Optional[Callable] = field(default=None, repr=False, compare=False)
+
+    def finding(self, violation: Violation) -> Finding:
+        """Build the finding for one violation of this rule."""
+        message, affected_items, details = violation
+        return Finding(
+            rule_id=self.rule_id,
+            rule_type=self.rule_type,
+            severity=self.severity,
+            description=message,
+            recommendation=self.recommendation,
+            affected_items=affected_items,
+            details=dict(details, rule_description=self.description)
+        )
+
+
+# ----------------------------------------------------------------------
+# Value parsing
+# ----------------------------------------------------------------------
+
+def normalize_key(value: Any) -> str:
+    """Lower-case a procedure/visit name and join words with underscores."""
+    return re.sub(r"[\s\-/]+", "_", str(value).strip().lower())
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """Parse an ISO date (or datetime) string; None if it does not parse."""
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError:
+        return None
+
+
+def parse_time(value: Any) -> Optional[int]:
+    """Parse ``HH:MM`` to minutes after midnight; None if it does not parse."""
+    if not isinstance(value, str):
+        return None
+    match = re.match(r"^\s*(\d{1,2}):(\d{2})", value)
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def parse_time_range(value: str) -> Tuple[int, int]:
+    """Parse ``HH:MM-HH:MM`` to (start, end) minutes after midnight."""
+    start, _, end = value.partition("-")
+    start_minutes, end_minutes = parse_time(start), parse_time(end)
+    if start_minutes is None or end_minutes is None:
+        raise ValueError(f"Invalid time range: {value!r}")
+    return start_minutes, end_minutes
+
+
+def _parse_int(value: Any) -> Optional[int]:
+    """Parse an integer day; None for missing or non-numeric values."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_DAY_CODES = {"M": 0, "T": 1, "TU": 1, "W": 2, "R": 3, "TH": 3, "F": 4, "SA": 5, "S": 5, "SU": 6, "U": 6}
+
+
+def parse_business_hours(value: str) -> Tuple[FrozenSet[int], int, int]:
+    """Parse e.g. ``M-F 8:00-17:00`` to (weekdays, open minutes, close minutes)."""
+    match = re.match(r"^\s*(?P<first>[A-Za-z]+)(?:-(?P<last>[A-Za-z]+))?\s+(?P<hours>\S+)\s*$", value or "")
+    if not match:
+        raise ValueError(f"Invalid business hours: {value!r}")
+    first = _DAY_CODES.get(match.group("first").upper())
+    last = _DAY_CODES.get((match.group("last") or match.group("first")).upper())
+    if first is None or last is None:
+        raise ValueError(f"Invalid business hours: {value!r}")
+    open_minutes, close_minutes = parse_time_range(match.group("hours"))
+    return frozenset(range(first, last + 1)), open_minutes, close_minutes
+
+
+def _format_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _precedes(visit: Visit, other: Visit) -> Optional[bool]:
+    """Whether visit comes before other (by study day, else date); None if unknown."""
+    if visit.day is not None and other.day is not None:
+        return visit.day < other.day
+    if visit.date is not None and other.date is not None:
+        return visit.date < other.date
+    return None
+
+
+# ----------------------------------------------------------------------
+# Validation compilers: parameters -> check function
+# ----------------------------------------------------------------------
+
+VALIDATORS: Dict[str, Callable[[Dict[str, Any]], Callable[..., Iterator[Violation]]]] = {}
+
+
+def validator(validation_type: str):
+    """Register a compiler for a validation type."""
+    def register(compiler):
+        VALIDATORS[validation_type] = compiler
+        return compiler
+    return register
+
+
+@validator("business_hours")
+def compile_business_hours(params: Dict[str, Any]):
+    weekdays, open_minutes, close_minutes = parse_business_hours(params.get("default_hours", "M-F 8:00-17:00"))
+    allow_weekends = params.get("allow_weekends", False)
+    if allow_weekends:
+        weekdays = weekdays | {5, 6}
+
+    def check(visit: Visit, context: ScheduleContext) -> Iterator[Violation]:
+        if visit.date is not None:
+            weekday = visit.date.weekday()
+            if weekday not in weekdays:
+                where = "on a weekend" if weekday >= 5 else "outside site operating days"
+                yield (
+                    f"Visit {visit.visit_id} is scheduled {where} ({WEEKDAY_NAMES[weekday]} {visit.date.isoformat()})",
+                    [visit.visit_id],
+                    {"date": visit.date.isoformat(), "weekday": WEEKDAY_NAMES[weekday]}
+                )
+        if visit.time is not None and not open_minutes <= visit.time <= close_minutes:
+            yield (
+                f"Visit {visit.visit_id} at {_format_time(visit.time)} is outside site hours "
+                f"({_format_time(open_minutes)}-{_format_time(close_minutes)})",
+                [visit.visit_id],
+                {"time": _format_time(visit.time)}
+            )
+
+    return check
+
+
+@validator("blackout_dates")
+def compile_blackout_dates(params: Dict[str, Any]):
+    blackout = frozenset(filter(None, (parse_date(value) for value in params.get("holidays", []))))
+
+    def check(visit: Visit, context: ScheduleContext) -> Iterator[Violation]:
+        if visit.date in blackout:
+            yield (
+                f"Visit {visit.visit_id} is scheduled on a blackout date ({visit.date.isoformat()})",
+                [visit.visit_id],
+                {"date": visit.date.isoformat()}
+            )
+
+    return check
+
+
+@validator("visit_order")
+def compile_visit_order(params: Dict[str, Any]):
+
+    def check(visits: List[Visit], context: ScheduleContext) -> Iterator[Violation]:
+        ordered = sorted(
+            (visit for visit in visits if visit.day is not None and visit.date is not None),
+            key=lambda visit: visit.day
+        )
+        for previous, current in zip(ordered, ordered[1:]):
+            if current.day > previous.day and current.date < previous.date:
+                yield (
+                    f"Visit {current.visit_id} (day {current.day}) is dated {current.date.isoformat()}, "
+                    f"before visit {previous.visit_id} (day {previous.day}) on {previous.date.isoformat()}",
+                    [previous.visit_id, current.visit_id],
+                    {"previous_date": previous.date.isoformat(), "date": current.date.isoformat()}
+                )
+
+    return check
+
+
+@validator("safety_followup")
+def compile_safety_followup(params: Dict[str, Any]):
+    triggers = frozenset(normalize_key(p) for p in params.get("safety_trigger_procedures", []))
+    window = int(params.get("followup_window_days", 7))
+
+    def check(visits: List[Visit], context: ScheduleContext) -> Iterator[Violation]:
+        dated = context.dated_visits()
+        ordinals = [visit.date.toordinal() for visit in dated]
+        for position, visit in enumerate(dated):
+            triggered = visit.procedure_keys & triggers
+            if not triggered:
+                continue
+            # First visit strictly after this date, then check it is in the window
+            following = bisect.bisect_right(ordinals, ordinals[position])
+            if following == len(dated) or ordinals[following] - ordinals[position] > window:
+                yield (
+                    f"No safety follow-up within {window} days of {', '.join(sorted(triggered))} "
+                    f"at visit {visit.visit_id}",
+                    [visit.visit_id],
+                    {"procedures": sorted(triggered), "followup_window_days": window}
+                )
+
+    return check
+
+
+@validator("consent_timing")
+def compile_consent_timing(params: Dict[str, Any]):
+    consent = frozenset(normalize_key(p) for p in params.get("consent_procedures", []))
+    exempt = frozenset(normalize_key(p) for p in params.get("exempt_procedures", [])) | consent
+    memo_key = ("first_consent", consent)
+
+    def first_consent(context: ScheduleContext) -> Optional[Visit]:
+        # Earliest by study day; by date if no consent visit has a day
+        candidates = [visit for visit in context.visits if visit.procedure_keys & consent]
+        with_day = [visit for visit in candidates if visit.day is not None]
+        if with_day:
+            return min(with_day, key=lambda visit: visit.day)
+        with_date = [visit for visit in candidates if visit.date is not None]
+        if with_date:
+            return min(with_date, key=lambda visit: visit.date)
+        return candidates[0] if candidates else None
+
+    def check(visit: Visit, context: ScheduleContext) -> Iterator[Violation]:
+        study_procedures = visit.procedure_keys - exempt
+        if not study_procedures:
+            return
+        consent_visit = context.memo(memo_key, lambda: first_consent(context))
+        if consent_visit is None:
+            yield (
+                f"Visit {visit.visit_id} has study procedures but no informed consent visit is scheduled",
+                [visit.visit_id],
+                {"procedures": sorted(study_procedures)}
+            )
+        elif _precedes(visit, consent_visit):
+            yield (
+                f"Visit {visit.visit_id} has study procedures before informed consent "
+                f"at visit {consent_visit.visit_id}",
+                [visit.visit_id, consent_visit.visit_id],
+                {"procedures": sorted(study_procedures)}
+            )
+
+    return check
+
+
+@validator("site_capability")
+def compile_site_capability(params: Dict[str, Any]):
+    capabilities = {
+        str(site): frozenset(normalize_key(c) for c in caps)
+        for site, caps in params.get("site_capabilities", {}).items()
+    }
+    default = frozenset(normalize_key(c) for c in params.get("default_capabilities", []))
+    requirements = {
+        normalize_key(procedure): normalize_key(capability)
+        for procedure, capability in params.get("procedure_requirements", {}).items()
+    }
+
+    def check(visit: Visit, context: ScheduleContext) -> Iterator[Violation]:
+        available = capabilities.get(visit.site_id, default)
+        missing = {}
+        for procedure in visit.procedures:
+            required = requirements.get(normalize_key(procedure))
+            if required and required not in available:
+                missing[procedure] = required
+        if missing:
+            yield (
+                f"Site {visit.site_id} cannot perform {', '.join(missing)} scheduled at visit {visit.visit_id}",
+                [visit.visit_id],
+                {"site_id": visit.site_id, "missing_capabilities": sorted(set(missing.values()))}
+            )
+
+    return check
+
+
+@validator("visit_window")
+def compile_visit_window(params: Dict[str, Any]):
+    default_window = (int(params.get("window_before", 0)), int(params.get("window_after", 0)))
+    strict = {
+        normalize_key(visit_type): (int(window.get("before", 0)), int(window.get("after", 0)))
+        for visit_type, window in params.get("strict_windows", {}).items()
+    }
+
+    def check(visit: Visit, context: ScheduleContext) -> Iterator[Violation]:
+        if context.study_start is None or visit.date is None or visit.day is None:
+            return
+        expected = context.study_start + timedelta(days=visit.day)
+        deviation = (visit.date - expected).days
+        before, after = strict.get(visit.visit_type, default_window)
+        if deviation < -before or deviation > after:
+            yield (
+                f"Visit {visit.visit_id} on {visit.date.isoformat()} is {abs(deviation)} days "
+                f"{'early' if deviation < 0 else 'late'} (window -{before}/+{after} around {expected.isoformat()})",
+                [visit.visit_id],
+                {"expected_date": expected.isoformat(), "deviation_days": deviation}
+            )
+
+    return check
+
+
+@validator("washout_period")
+def compile_washout_period(params: Dict[str, Any]):
+    procedures = frozenset(
+        normalize_key(p) for p in [params.get("procedure_type", "")] + list(params.get("affected_procedures", []))
+        if p
+    )
+    minimum = int(params.get("minimum_days_between", 0))
+
+    def check(visits: List[Visit], context: ScheduleContext) -> Iterator[Violation]:
+        matching = [visit for visit in context.dated_visits() if visit.procedure_keys & procedures]
+        for previous, current in zip(matching, matching[1:]):
+            gap = (current.date - previous.date).days
+            if gap < minimum:
+                yield (
+                    f"Only {gap} days between {params.get('procedure_type', 'procedures')} at visits "
+                    f"{previous.visit_id} and {current.visit_id} (minimum {minimum})",
+                    [previous.visit_id, current.visit_id],
+                    {"days_between": gap, "minimum_days_between": minimum}
+                )
+
+    return check
+
+
+@validator("procedure_timing")
+def compile_procedure_timing(params: Dict[str, Any]):
+    procedures = frozenset(normalize_key(p) for p in params.get("procedures", []))
+    start, end = parse_time_range(params.get("required_time_range", "00:00-23:59"))
+
+    def check(visit: Visit, context: ScheduleContext) -> Iterator[Violation]:
+        timed = visit.procedure_keys & procedures
+        if timed and visit.time is not None and not start <= visit.time <= end:
+            yield (
+                f"{', '.join(sorted(timed))} at visit {visit.visit_id} scheduled at {_format_time(visit.time)}, "
+                f"outside {_format_time(start)}-{_format_time(end)}",
+                [visit.visit_id],
+                {"time": _format_time(visit.time)}
+            )
+
+    return check
+
+
+# ----------------------------------------------------------------------
+# Rule plans
+# ----------------------------------------------------------------------
+
+class RulePlan:
+    """
+    Compiled rules from one rules file, indexed by data type.
+
+    Attributes:
+        rules: Compiled rules in file order.
+        by_data_type: Compiled rules grouped by ``applies_to.data_type``.
+    """
+
+    def __init__(self, rules: List[CompiledRule]):
+        self.rules = rules
+        self.by_data_type = self._index(rules)
+        self._selections: Dict[Optional[FrozenSet[str]], List[CompiledRule]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(rules: Iterable[CompiledRule]) -> Dict[str, List[CompiledRule]]:
+        index: Dict[str, List[CompiledRule]] = {}
+        for rule in rules:
+            index.setdefault(rule.data_type, []).append(rule)
+        return index
+
+    @classmethod
+    def compile(cls, definitions: List[Dict[str, Any]]) -> "RulePlan":
+        """
+        Compile rule definitions.
+
+        Rules with an unknown validation type or invalid parameters are
+        skipped with a warning rather than failing every request.
+
+        Args:
+            definitions: Rule definitions as stored in the rules file.
+
+        Returns:
+            The compiled plan.
+        """
+        compiled = []
+        for definition in definitions:
+            rule_id = definition.get("rule_id", "UNKNOWN")
+            validation = definition.get("validation", {})
+            compiler = VALIDATORS.get(validation.get("type"))
+            if compiler is None:
+                logger.warning(f"Skipping rule {rule_id}: unknown validation type {validation.get('type')!r}")
+                continue
+            try:
+                check = compiler(validation.get("parameters", {}))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping rule {rule_id}: invalid parameters: {e}")
+                continue
+            compiled.append(CompiledRule(
+                rule_id=rule_id,
+                rule_type=definition.get("rule_type", ""),
+                severity=definition.get("severity", "error"),
+                description=definition.get("description", ""),
+                recommendation=definition.get("recommendation", ""),
+                data_type=definition.get("applies_to", {}).get("data_type", "visits"),
+                validation_type=validation["type"],
+                check=check,
+                parameters=validation.get("parameters", {})
+            ))
+        return cls(compiled)
+
+    def select(self, categories: Optional[Iterable[str]] = None) -> List[CompiledRule]:
+        """Rules whose rule_type is in categories (all rules if None)."""
+        key = frozenset(categories) if categories else None
+        with self._lock:
+            if key not in self._selections:
+                self._selections[key] = [r for r in self.rules if key is None or r.rule_type in key]
+            return self._selections[key]
+
+
+# (mtime_ns, plan) per rules file, shared by every engine in the process
+_plan_cache: Dict[str, Tuple[int, RulePlan]] = {}
+_plan_cache_lock = threading.Lock()
+
+
+def get_rule_plan(path: str = DEFAULT_RULES_PATH) -> RulePlan:
+    """
+    Get the compiled plan for a rules file, recompiling only if it changed.
+
+    Args:
+        path: Path to the JSON rules file.
+
+    Returns:
+        The compiled rule plan.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _plan_cache_lock:
+        cached = _plan_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        plan = RulePlan.compile(json.load(f))
+
+    with _plan_cache_lock:
+        _plan_cache[path] = (mtime_ns, plan)
+    return plan
+
+
+class RulesEngine:
+    """
+    Applies compiled compliance rules to extracted schedule data.
+
+    Attributes:
+        rules_path: JSON rules file the plan is compiled from.
+        rules: Rules selected by the last ``load_rules`` call.
+    """
+
+    def __init__(self, rules_path: Optional[str] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            rules_path: Rules file (default: COMPLIANCE_RULES_PATH or the bundled default_rules.json).
+        """
+        self.rules_path = rules_path or os.getenv("COMPLIANCE_RULES_PATH", DEFAULT_RULES_PATH)
+        self.rules: List[CompiledRule] = []
+        self._by_data_type: Optional[Dict[str, List[CompiledRule]]] = None
+
+    def load_rules(self, categories: Optional[List[str]] = None) -> List[CompiledRule]:
+        """
+        Select the rules to apply from the (cached) compiled plan.
+
+        Args:
+            categories: Rule types to include (logistics, equipment, regulatory, safety); all if None.
+
+        Returns:
+            The selected rules.
+        """
+        self.rules = get_rule_plan(self.rules_path).select(categories)
+        self._by_data_type = RulePlan._index(self.rules)
+        return self.rules
+
+    def apply_rules(self, schedule_data: Dict[str, Any],
+                    extracted_data: Dict[str, List[Dict[str, Any]]]) -> List[Finding]:
+        """
+        Evaluate the loaded rules against one schedule.
+
+        Each visit is checked only against the rules for ``visits``;
+        ``visit_sequence`` rules run once over the whole schedule, and rules
+        for other data types run once per extracted item of that type.
+
+        Args:
+            schedule_data: Original schedule data (``study_start_date`` is read from it).
+            extracted_data: Schema adapter output keyed by data type.
+
+        Returns:
+            List of findings.
+        """
+        if self._by_data_type is None:
+            self.load_rules()
+
+        visits = [Visit.from_record(record, i) for i, record in enumerate(extracted_data.get("visits", []))]
+        context = ScheduleContext(visits, parse_date(schedule_data.get("study_start_date")))
+        findings: List[Finding] = []
+
+        visit_rules = self._by_data_type.get("visits", [])
+        if visit_rules:
+            for visit in visits:
+                for rule in visit_rules:
+                    findings.extend(rule.finding(v) for v in rule.check(visit, context))
+
+        for rule in self._by_data_type.get("visit_sequence", []):
+            findings.extend(rule.finding(v) for v in rule.check(visits, context))
+
+        for data_type, rules in self._by_data_type.items():
+            if data_type in ("visits", "visit_sequence"):
+                continue
+            for item in extracted_data.get(data_type, []):
+                for rule in rules:
+                    findings.extend(rule.finding(v) for v in rule.check(item, context))
+
+        return findings
+
+    def apply_rules_batch(self, columns, include_warnings: bool = True,
+                          max_findings_per_study: int = 10) -> Dict[str, Dict[str, Any]]:
+        """
+        Evaluate the loaded rules over many schedules in one columnar pass.
+
+        Args:
+            columns: ``lib.compliance.batch.VisitColumns`` holding every schedule's visits.
+            include_warnings: Evaluate warning-level rules too.
+            max_findings_per_study: Example findings to include per study (0 for none).
+
+        Returns:
+            Per study_id: compliance status, schedule/visit counts, finding
+            counts by severity and by rule, and example findings.
+        """
+        # batch imports this module, so it is imported here rather than at the top
+        from lib.compliance.batch import summarize_by_study
+
+        if self._by_data_type is None:
+            self.load_rules()
+        rules = [rule for rule in self.rules if include_warnings or rule.severity != "warning"]
+        return summarize_by_study(self, columns, rules, max_findings_per_study)
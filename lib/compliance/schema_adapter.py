@@ -0,0 +1,475 @@
+"""
+Schema adapter for compliance validation.
+
+Maps schedule data in different export formats (generic, REDCap, CDISC-like)
+onto the standard visit, participant and site fields the rules engine uses,
+driven by the JSON mappings in data/schema_mappings.
+"""
+
+import os
+import re
+import json
+import glob
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DIR = str(Path(__file__).resolve().parent.parent.parent / "data" / "schema_mappings")
+
+# Mapping date_format values onto strptime formats
+DATE_FORMATS = {
+    "YYYY-MM-DD": "%Y-%m-%d",
+    "MM/DD/YYYY": "%m/%d/%Y",
+    "DD/MM/YYYY": "%d/%m/%Y",
+    "YYYYMMDD": "%Y%m%d",
+}
+
+# Extraction expression in a schema mapping for each kind of record
+EXTRACTION_KEYS = {
+    "visits": "visit_extraction",
+    "participants": "participant_extraction",
+    "sites": "site_extraction",
+}
+
+_PATH_TOKEN = re.compile(
+    r"\.(?P<key>[A-Za-z_][\w-]*)"
+    r"|\[(?P<wildcard>\*)\]"
+    r"|\[(?P<index>-?\d+)\]"
+    r"|\[\?\(@\.(?P<filter_key>[\w-]+)\s*(?P<op>==|!=)\s*(?P<quote>['\"])(?P<filter_value>.*?)(?P=quote)\)\]"
+)
+
+_PROCEDURE_DELIMITERS = re.compile(r"[,|;]")
+
+# (mtime_ns, mapping) per schema file, shared by every adapter in the process
+_schema_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+_schema_cache_lock = threading.Lock()
+
+
+def load_schema(path: str) -> Dict[str, Any]:
+    """Read a schema mapping file, reusing the parsed copy until the file changes."""
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _schema_cache_lock:
+        cached = _schema_cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+
+    with _schema_cache_lock:
+        _schema_cache[path] = (mtime_ns, schema)
+    return schema
+
+
+# Compiled path steps: ("key", name), ("wildcard",), ("index", n) or ("filter", key, value, equal)
+Step = Tuple[Any, ...]
+
+# Steps that select items of a list (a filter on a single object treats it as a one-item list)
+_ITEM_STEPS = ("wildcard", "filter")
+
+
+@lru_cache(maxsize=256)
+def compile_path(expression: str) -> Tuple[Step, ...]:
+    """
+    Compile a JSONPath expression into a tuple of steps.
+
+    Args:
+        expression: JSONPath expression starting with ``$``.
+
+    Returns:
+        Steps applied in order from the document root.
+
+    Raises:
+        ValueError: If the expression is not in the supported subset.
+    """
+    if not expression or not expression.startswith("$"):
+        raise ValueError(f"Unsupported JSONPath expression: {expression!r}")
+
+    steps = []
+    position = 1
+    while position < len(expression):
+        token = _PATH_TOKEN.match(expression, position)
+        if not token:
+            raise ValueError(f"Unsupported JSONPath expression: {expression!r}")
+        position = token.end()
+
+        if token.group("key") is not None:
+            steps.append(("key", token.group("key")))
+        elif token.group("wildcard"):
+            steps.append(("wildcard",))
+        elif token.group("index") is not None:
+            steps.append(("index", int(token.group("index"))))
+        else:
+            steps.append(("filter", token.group("filter_key"), token.group("filter_value"),
+                          token.group("op") == "=="))
+    return tuple(steps)
+
+
+def _item_predicate(step: Step) -> Optional[Callable[[Any], bool]]:
+    """Predicate for a filter step over list items (None for a wildcard, which takes every item)."""
+    if step[0] == "wildcard":
+        return None
+    _, key, value, equal = step
+    if equal:
+        return lambda item: isinstance(item, dict) and key in item and str(item[key]) == value
+    return lambda item: isinstance(item, dict) and key in item and str(item[key]) != value
+
+
+def _apply_step(step: Step, node: Any) -> List[Any]:
+    """Values one step selects from a node."""
+    kind = step[0]
+    if kind == "key":
+        return [node[step[1]]] if isinstance(node, dict) and step[1] in node else []
+    if kind == "index":
+        index = step[1]
+        return [node[index]] if isinstance(node, list) and -len(node) <= index < len(node) else []
+    if kind == "wildcard":
+        if isinstance(node, list):
+            return list(node)
+        return list(node.values()) if isinstance(node, dict) else []
+    items = node if isinstance(node, list) else [node]
+    return list(filter(_item_predicate(step), items))
+
+
+@lru_cache(maxsize=65536)
+def _iso_date(value: str, date_format: str) -> Optional[str]:
+    """ISO date for a string in date_format, or None; exports repeat the same dates a lot."""
+    try:
+        return datetime.strptime(value, date_format).date().isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=65536)
+def _split_procedures(value: str) -> Tuple[str, ...]:
+    """Procedure names from a delimited string."""
+    return tuple(item.strip() for item in _PROCEDURE_DELIMITERS.split(value) if item.strip())
+
+
+def evaluate_path(document: Any, expression: str) -> List[Any]:
+    """
+    Evaluate a JSONPath expression against a document.
+
+    Supports the subset used by the schema mappings: child keys (``$.a.b``),
+    wildcards (``[*]``), indexes (``[0]``) and equality filters
+    (``[?(@.field=='value')]``).
+
+    Args:
+        document: Parsed JSON document.
+        expression: JSONPath expression starting with ``$``.
+
+    Returns:
+        List of matched values (empty if nothing matches).
+
+    Raises:
+        ValueError: If the expression is not in the supported subset.
+    """
+    matches = [document]
+    for step in compile_path(expression):
+        matches = [value for node in matches for value in _apply_step(step, node)]
+    return matches
+
+
+class ExtractionPlan:
+    """
+    Several JSONPath expressions compiled into one traversal.
+
+    The compiled expressions form a prefix tree, so shared prefixes (``$.data``
+    for both REDCap visits and participants) are resolved once, and each list
+    is looped over once for all the filters applied to its items. Wildcards
+    that end an expression take the whole list without a Python-level loop.
+    Each output keeps the same values, in the same order, as evaluating its
+    expression on its own.
+
+    Attributes:
+        outputs: Output names in the order they were given.
+    """
+
+    def __init__(self, expressions: Dict[str, str]):
+        """
+        Compile the expressions.
+
+        Args:
+            expressions: Output name to JSONPath expression; empty expressions
+                always extract nothing.
+
+        Raises:
+            ValueError: If an expression is not in the supported subset.
+        """
+        self.outputs = list(expressions)
+        # node = (names emitted here, {step: child node})
+        root: Tuple[List[str], Dict[Step, Any]] = ([], {})
+        for name, expression in expressions.items():
+            if not expression:
+                continue
+            node = root
+            for step in compile_path(expression):
+                node = node[1].setdefault(step, ([], {}))
+            node[0].append(name)
+        self._extract = self._compile(root)
+
+    def __call__(self, document: Any) -> Dict[str, List[Any]]:
+        """
+        Extract every output from a document.
+
+        Args:
+            document: Parsed JSON document.
+
+        Returns:
+            Output name to list of matched values.
+        """
+        results: Dict[str, List[Any]] = {name: [] for name in self.outputs}
+        self._extract(document, results)
+        return results
+
+    def _compile(self, node: Tuple[List[str], Dict[Step, Any]]) -> Callable[[Any, Dict[str, List[Any]]], None]:
+        """Turn a prefix tree node into a function that extracts from a value."""
+        names, children = node
+        value_steps = []    # (step, child) for every step, used when the value is not a list
+        bulk = []           # names ending at a wildcard: take the whole list
+        filtered = []       # (key, value, equal, names) for filters ending an expression
+        nested = []         # (predicate, child) for item steps with further steps
+        for step, child in children.items():
+            compiled = self._compile(child)
+            value_steps.append((step, compiled))
+            if step[0] not in _ITEM_STEPS:
+                continue
+            if child[1]:
+                nested.append((_item_predicate(step), compiled))
+            elif step[0] == "wildcard":
+                bulk.append(child[0])
+            else:
+                filtered.append((step[1], step[2], step[3], child[0]))
+
+        def extract(value: Any, results: Dict[str, List[Any]]) -> None:
+            for name in names:
+                results[name].append(value)
+            if type(value) is not list:
+                for step, compiled in value_steps:
+                    for selected in _apply_step(step, value):
+                        compiled(selected, results)
+                return
+
+            for step, compiled in value_steps:
+                if step[0] not in _ITEM_STEPS:
+                    for selected in _apply_step(step, value):
+                        compiled(selected, results)
+            for child_names in bulk:
+                for name in child_names:
+                    results[name].extend(value)
+            for key, expected, equal, child_names in filtered:
+                # A comprehension per filter beats one shared loop calling a predicate per item
+                if equal:
+                    matched = [item for item in value
+                               if isinstance(item, dict) and key in item and str(item[key]) == expected]
+                else:
+                    matched = [item for item in value
+                               if isinstance(item, dict) and key in item and str(item[key]) != expected]
+                for name in child_names:
+                    results[name].extend(matched)
+            for predicate, compiled in nested:
+                for item in value if predicate is None else filter(predicate, value):
+                    compiled(item, results)
+
+        return extract
+
+
+@lru_cache(maxsize=64)
+def _compile_plan(expressions: Tuple[Tuple[str, str], ...]) -> ExtractionPlan:
+    return ExtractionPlan(dict(expressions))
+
+
+def compile_extraction(expressions: Dict[str, str]) -> ExtractionPlan:
+    """
+    Get the extraction plan for a set of expressions, compiling it on first use.
+
+    Args:
+        expressions: Output name to JSONPath expression.
+
+    Returns:
+        Cached ExtractionPlan shared by every caller with the same expressions.
+    """
+    return _compile_plan(tuple(expressions.items()))
+
+
+class SchemaAdapter:
+    """
+    Extracts standard visit, participant and site records from schedule data.
+
+    Visits come back with the standard field names from the mapping's
+    ``field_mappings`` and ``optional_fields`` (visit_id, visit_date,
+    visit_day, site_id, participant_id, procedures, visit_type, ...). Dates
+    are normalised to ISO format where they parse with the schema's
+    ``date_format`` and procedures are always a list.
+
+    Attributes:
+        schema_type: Identifier of the schema mapping in use.
+        schema: Parsed mapping for ``schema_type``.
+        extraction_plan: Compiled single-pass extraction of visits,
+            participants and sites, shared by adapters for the same mapping.
+    """
+
+    def __init__(self, schema_type: str = "generic", schema_dir: Optional[str] = None):
+        """
+        Initialize the adapter.
+
+        Args:
+            schema_type: Schema identifier (file name in the schema directory).
+            schema_dir: Directory of schema mapping files (default: data/schema_mappings).
+
+        Raises:
+            ValueError: If no mapping exists for ``schema_type``.
+        """
+        self.schema_dir = schema_dir or SCHEMA_DIR
+        self.schema_type = schema_type
+
+        path = os.path.join(self.schema_dir, f"{schema_type}.json")
+        if not os.path.exists(path):
+            raise ValueError(
+                f"Unknown schema type '{schema_type}'. Available: {', '.join(self.get_available_schemas())}"
+            )
+        self.schema = load_schema(path)
+        self.field_mappings: Dict[str, str] = dict(self.schema.get("field_mappings", {}))
+        self.optional_fields: Dict[str, str] = dict(self.schema.get("optional_fields", {}))
+        self.date_format = DATE_FORMATS.get(self.schema.get("date_format", "YYYY-MM-DD"), "%Y-%m-%d")
+        self._standard_fields = tuple(self.field_mappings)
+        self._source_fields = tuple(self.field_mappings.values())
+        self._optional_items = tuple(self.optional_fields.items())
+        self.extraction_plan = compile_extraction(
+            {kind: self.schema.get(key) or "" for kind, key in EXTRACTION_KEYS.items()}
+        )
+
+    def get_available_schemas(self) -> List[str]:
+        """
+        List the schema identifiers that can be used.
+
+        Returns:
+            Sorted schema identifiers.
+        """
+        return sorted(
+            os.path.splitext(os.path.basename(path))[0]
+            for path in glob.glob(os.path.join(self.schema_dir, "*.json"))
+        )
+
+    def extract_all(self, data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract visits, participants and sites in one pass over the data.
+
+        Args:
+            data: Schedule data in this adapter's schema.
+
+        Returns:
+            Dictionary with "visits", "participants" and "sites", each the same
+            as the corresponding ``extract_*`` method returns.
+        """
+        raw = self.extraction_plan(data)
+        return {
+            "visits": self._map_visits(raw["visits"]),
+            "participants": self._map_participants(raw["participants"]),
+            "sites": self._map_sites(raw["sites"]),
+        }
+
+    def extract_visits(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Extract visits mapped to the standard field names.
+
+        Args:
+            data: Schedule data in this adapter's schema.
+
+        Returns:
+            List of visit dictionaries.
+        """
+        return self._map_visits(self._extract(data, "visit_extraction"))
+
+    def extract_participants(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Extract participants with participant_id and site_id.
+
+        Args:
+            data: Schedule data in this adapter's schema.
+
+        Returns:
+            List of participant dictionaries.
+        """
+        return self._map_participants(self._extract(data, "participant_extraction"))
+
+    def extract_sites(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Extract sites, keeping their attributes and adding site_id.
+
+        Args:
+            data: Schedule data in this adapter's schema.
+
+        Returns:
+            List of site dictionaries.
+        """
+        return self._map_sites(self._extract(data, "site_extraction"))
+
+    def _extract(self, data: Dict[str, Any], key: str) -> List[Any]:
+        """Evaluate one of the schema's extraction expressions."""
+        expression = self.schema.get(key)
+        if not expression:
+            return []
+        return evaluate_path(data, expression)
+
+    def _map_visits(self, raws: List[Any]) -> List[Dict[str, Any]]:
+        """Map extracted visit records, skipping anything that is not an object."""
+        return [self._map_visit(raw) for raw in raws if isinstance(raw, dict)]
+
+    def _map_participants(self, raws: List[Any]) -> List[Dict[str, Any]]:
+        """Map extracted participant records to participant_id and site_id."""
+        participant_field = self.field_mappings.get("participant_id", "participant_id")
+        site_field = self.field_mappings.get("site_id", "site_id")
+        return [
+            {"participant_id": raw.get(participant_field), "site_id": raw.get(site_field)}
+            for raw in raws if isinstance(raw, dict)
+        ]
+
+    def _map_sites(self, raws: List[Any]) -> List[Dict[str, Any]]:
+        """Copy extracted site records, adding site_id."""
+        site_field = self.field_mappings.get("site_id", "site_id")
+        sites = []
+        for raw in raws:
+            if isinstance(raw, dict):
+                site = dict(raw)
+                site["site_id"] = raw.get("id", raw.get(site_field))
+                sites.append(site)
+        return sites
+
+    def _map_visit(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Rename a raw visit's fields to the standard names."""
+        visit = dict(zip(self._standard_fields, map(raw.get, self._source_fields)))
+        for standard, source in self._optional_items:
+            if source in raw:
+                visit[standard] = raw[source]
+
+        date_value = visit.get("visit_date")
+        if "visit_time" not in visit:
+            if "time" in raw:
+                visit["visit_time"] = raw["time"]
+            elif isinstance(date_value, str) and "T" in date_value:
+                visit["visit_time"] = date_value.split("T", 1)[1][:5]
+
+        visit["visit_date"] = self._normalize_date(date_value)
+        visit["procedures"] = self._normalize_procedures(visit.get("procedures"))
+        return visit
+
+    def _normalize_date(self, value: Any) -> Any:
+        """ISO-format a date in the schema's format; other values pass through."""
+        if not isinstance(value, str):
+            return value
+        return _iso_date(value.strip()[:10], self.date_format) or value
+
+    @staticmethod
+    def _normalize_procedures(value: Any) -> List[str]:
+        """Procedures as a list (REDCap and CSV exports store them delimited)."""
+        if value is None or value == "":
+            return []
+        if isinstance(value, (list, tuple)):
+            return [str(item) for item in value]
+        return list(_split_procedures(str(value)))
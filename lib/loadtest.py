@@ -0,0 +1,618 @@
+"""
+HTTP load generation and replay against the tool server.
+
+Drives ``POST /run_tool/<tool>`` on a running server (or one started here
+with the Flask development server or gunicorn) and reports throughput,
+per-tool latency percentiles, error rate and the server's CPU and RSS, so
+worker models and instance sizes can be compared on the same traffic.
+
+Traffic comes from either:
+
+* A capture file: JSON lines of ``{"tool": ..., "input": {...},
+  "timestamp": <epoch seconds>}``, written by server.py when
+  ``RUN_TOOL_CAPTURE_PATH`` is set (see capture_request). Replays keep the
+  captured spacing, optionally sped up.
+* A synthetic mix: weighted tools with inputs from the benchmark suite's
+  seed inputs (lib.benchmarks), scaled to a number of records.
+
+Two load models are supported. Closed loop (no rate): ``concurrency``
+clients send back to back. Open loop (a rate or a replay): requests are due
+at scheduled times and latency is measured from when each was due, so a
+slow server shows up as queueing rather than as a quietly lower send rate.
+
+Server CPU and RSS are read from /proc for the server process and its
+children (gunicorn workers), so they are only reported on Linux.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import socket
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CAPTURE_PATH_ENV = "RUN_TOOL_CAPTURE_PATH"
+PERCENTILES = (50, 95, 99)
+
+logger = logging.getLogger(__name__)
+
+_capture_lock = threading.Lock()
+
+
+@dataclass
+class ToolRequest:
+    """One /run_tool call to send."""
+    tool: str
+    payload: Dict[str, Any]
+    offset: Optional[float] = None  # seconds after the start of the run, for replays
+
+
+# --- Traffic -------------------------------------------------------------------
+
+def capture_request(tool: str, payload: Dict[str, Any], path: Optional[str] = None) -> None:
+    """
+    Append a /run_tool call to the capture file, if capturing is enabled.
+
+    Each call is written as one JSON line with a single append, so several
+    gunicorn workers can share one file. The file holds raw request bodies,
+    which can contain PHI: it is created owner-only (0600) and should be
+    kept on protected storage and deleted once replayed. A file that cannot
+    be written is logged and skipped, so capturing never fails a request.
+
+    Args:
+        tool: Tool name from the URL.
+        payload: JSON body of the request.
+        path: Capture file (defaults to env var RUN_TOOL_CAPTURE_PATH; no-op if unset).
+    """
+    path = path or os.environ.get(CAPTURE_PATH_ENV)
+    if not path:
+        return
+    line = json.dumps({"tool": tool, "input": payload, "timestamp": time.time()}, default=str) + "\n"
+    with _capture_lock:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.warning(f"Could not capture /run_tool/{tool} call to {path}: {e}")
+
+
+def read_capture(path: str) -> List[ToolRequest]:
+    """
+    Load captured traffic for replay.
+
+    Args:
+        path: JSON lines file of {"tool", "input", "timestamp"} records.
+
+    Returns:
+        Requests in time order with offsets relative to the first one.
+        Records without timestamps get no offset and are sent as fast as
+        the load model allows.
+
+    Raises:
+        ValueError: If a line is not a capture record.
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or "tool" not in record or not isinstance(record.get("input"), dict):
+                raise ValueError(f"{path}:{number} is not a capture record (needs 'tool' and an 'input' object)")
+            records.append(record)
+
+    stamps = [record["timestamp"] for record in records if record.get("timestamp") is not None]
+    if len(stamps) != len(records):
+        return [ToolRequest(record["tool"], record["input"]) for record in records]
+    records.sort(key=lambda record: record["timestamp"])
+    start = records[0]["timestamp"] if records else 0.0
+    return [ToolRequest(record["tool"], record["input"], record["timestamp"] - start) for record in records]
+
+
+def write_capture(requests_: List[ToolRequest], path: str, start: float = 0.0) -> None:
+    """
+    Write requests as a capture file.
+
+    Args:
+        requests_: Requests to write.
+        path: Output JSON lines file.
+        start: Timestamp added to each request's offset.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests_:
+            record = {"tool": request.tool, "input": request.payload}
+            if request.offset is not None:
+                record["timestamp"] = start + request.offset
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def parse_mix(spec: List[str]) -> Dict[str, float]:
+    """
+    Parse ``tool`` or ``tool=weight`` arguments into mix weights.
+
+    Raises:
+        ValueError: If a weight is not a positive number.
+    """
+    weights = {}
+    for item in spec:
+        tool, _, weight = item.partition("=")
+        value = float(weight) if weight else 1.0
+        if value <= 0:
+            raise ValueError(f"Mix weight for {tool} must be positive")
+        weights[tool] = value
+    return weights
+
+
+def synthetic_mix(weights: Dict[str, float], count: int, records: int = 100, seed: int = 0) -> List[ToolRequest]:
+    """
+    Build a weighted random sequence of tool calls.
+
+    Each tool gets one input, its first working seed input from the
+    benchmark suite scaled to ``records`` records; the order of calls is
+    drawn from ``weights`` with a fixed seed so runs are repeatable.
+
+    Args:
+        weights: Relative share of calls per tool.
+        count: Number of requests.
+        records: Records per request input.
+        seed: Random seed for the call order.
+
+    Returns:
+        Requests without offsets.
+
+    Raises:
+        ValueError: If a tool has no usable seed input.
+    """
+    from lib.benchmarks import scale_input, seed_inputs
+
+    payloads = {}
+    for tool in weights:
+        candidates = seed_inputs(tool)
+        if not candidates:
+            raise ValueError(f"No seed input for tool '{tool}'")
+        payloads[tool] = scale_input(candidates[0], records, tool)[0]
+
+    tools = list(weights)
+    order = random.Random(seed).choices(tools, weights=[weights[tool] for tool in tools], k=count)
+    return [ToolRequest(tool, payloads[tool]) for tool in order]
+
+
+def schedule(requests_: List[ToolRequest], rate: Optional[float] = None, speed: float = 1.0,
+             seed: int = 0) -> List[Tuple[Optional[float], ToolRequest]]:
+    """
+    Due times for each request.
+
+    Args:
+        requests_: Requests in send order.
+        rate: Mean arrivals per second (Poisson). Takes precedence over offsets.
+        speed: Replay speed-up applied to captured offsets.
+        seed: Random seed for arrival gaps.
+
+    Returns:
+        (due seconds after start, request) pairs; due is None throughout for
+        a closed loop (no rate and no offsets).
+    """
+    if rate:
+        rng = random.Random(seed)
+        due, timed = 0.0, []
+        for request in requests_:
+            timed.append((due, request))
+            due += rng.expovariate(rate)
+        return timed
+    if requests_ and all(request.offset is not None for request in requests_):
+        return [(request.offset / speed, request) for request in requests_]
+    return [(None, request) for request in requests_]
+
+
+# --- Server processes ----------------------------------------------------------
+
+def free_port() -> int:
+    """An unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind: str, port: int, workers: int = 1, threads: int = 1,
+                   worker_class: Optional[str] = None) -> List[str]:
+    """
+    Command line that serves server:app on 127.0.0.1:port.
+
+    Args:
+        kind: "gunicorn" or "flask" (the threaded Werkzeug development server).
+        port: Port to bind.
+        workers: gunicorn worker processes.
+        threads: gunicorn threads per worker (gthread).
+        worker_class: gunicorn worker class, e.g. "sync", "gthread" or "gevent".
+
+    Raises:
+        ValueError: For an unknown server kind.
+    """
+    if kind == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}",
+                   "--workers", str(workers), "--threads", str(threads), "--timeout", "300"]
+        if worker_class:
+            command += ["--worker-class", worker_class]
+        return command + ["server:app"]
+    if kind == "flask":
+        return [sys.executable, "-c",
+                "from werkzeug.serving import run_simple; from server import app; "
+                f"run_simple('127.0.0.1', {port}, app, threaded=True)"]
+    raise ValueError(f"Unknown server kind '{kind}' (use 'gunicorn' or 'flask')")
+
+
+def wait_until_ready(url: str, timeout: float = 60.0, process: Optional[subprocess.Popen] = None) -> None:
+    """
+    Poll /health until the server answers.
+
+    Raises:
+        RuntimeError: If the server exits or is not ready within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} before becoming ready")
+        try:
+            if requests.get(f"{url}/health", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} not ready after {timeout:.0f} s")
+
+
+class LocalServer:
+    """
+    Tool server started in a child process for the duration of a run.
+
+    Use as a context manager; ``url`` and ``pid`` are set once it is ready.
+    Server output goes to ``log_path`` (default: discarded).
+    """
+
+    def __init__(self, kind: str = "flask", workers: int = 1, threads: int = 1,
+                 worker_class: Optional[str] = None, port: Optional[int] = None,
+                 log_path: Optional[str] = None, env: Optional[Dict[str, str]] = None):
+        self.port = port or free_port()
+        self.command = server_command(kind, self.port, workers, threads, worker_class)
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = log_path
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    def start(self, timeout: float = 60.0) -> "LocalServer":
+        log = open(self.log_path, "ab") if self.log_path else subprocess.DEVNULL
+        try:
+            self.process = subprocess.Popen(self.command, cwd=str(REPO_ROOT), stdout=log, stderr=subprocess.STDOUT,
+                                            env={**os.environ, **(self.env or {})})
+        finally:
+            if self.log_path:
+                log.close()
+        try:
+            wait_until_ready(self.url, timeout, self.process)
+        except RuntimeError:
+            self.stop()
+            raise
+        return self
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def __enter__(self) -> "LocalServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# --- Server resource sampling --------------------------------------------------
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _read_stat(pid: int) -> Optional[List[str]]:
+    """Fields of /proc/<pid>/stat after the command name, or None if gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+
+
+def process_tree(pid: int) -> List[int]:
+    """The process and all its descendants (Linux /proc only)."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            fields = _read_stat(int(entry))
+            if fields:
+                children.setdefault(int(fields[1]), []).append(int(entry))
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def process_usage(pid: int) -> Tuple[float, int]:
+    """
+    CPU seconds (user + system) and resident bytes of a process and its descendants.
+    """
+    cpu, rss = 0.0, 0
+    for member in process_tree(pid):
+        fields = _read_stat(member)
+        if fields:
+            # After the command name: utime and stime are fields 12-13, rss (pages) is field 22
+            cpu += (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+            rss += int(fields[21]) * _PAGE_SIZE
+    return cpu, rss
+
+
+class ResourceSampler:
+    """
+    Samples a server process tree's CPU and RSS on a background thread.
+
+    CPU time of workers that exit during the run is not counted, which only
+    matters if gunicorn recycles workers (max_requests).
+    """
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Tuple[float, float, int]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        cpu, rss = process_usage(self.pid)
+        self.samples.append((time.monotonic(), cpu, rss))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "ResourceSampler":
+        self._sample()
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop sampling and summarise CPU and memory use."""
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        if len(self.samples) < 2:
+            return {}
+        (start, cpu_start, _), (end, cpu_end, _) = self.samples[0], self.samples[-1]
+        elapsed = max(end - start, 1e-9)
+        intervals = [
+            (cpu - previous_cpu) / max(at - previous_at, 1e-9)
+            for (previous_at, previous_cpu, _), (at, cpu, _) in zip(self.samples, self.samples[1:])
+        ]
+        rss_mb = [rss / (1024 * 1024) for _, _, rss in self.samples]
+        return {
+            "cpu_seconds": round(cpu_end - cpu_start, 3),
+            "cpu_percent_mean": round(100 * (cpu_end - cpu_start) / elapsed, 1),
+            "cpu_percent_peak": round(100 * max(intervals), 1),
+            "rss_mb_start": round(rss_mb[0], 1),
+            "rss_mb_peak": round(max(rss_mb), 1),
+            "rss_mb_end": round(rss_mb[-1], 1),
+            "samples": len(self.samples),
+        }
+
+
+# --- Load generation -----------------------------------------------------------
+
+def _send(session: requests.Session, url: str, request: ToolRequest, timeout: float) -> Tuple[Optional[int], Optional[str]]:
+    """POST one request; returns (status code, error) where error is None for a 2xx response."""
+    try:
+        response = session.post(f"{url}/run_tool/{request.tool}", json=request.payload, timeout=timeout)
+    except requests.RequestException as e:
+        return None, type(e).__name__
+    if response.status_code >= 400:
+        return response.status_code, f"HTTP {response.status_code}"
+    return response.status_code, None
+
+
+def run_load(
+    url: str,
+    requests_: List[ToolRequest],
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    speed: float = 1.0,
+    duration: Optional[float] = None,
+    timeout: float = 120.0,
+    server_pid: Optional[int] = None,
+    seed: int = 0,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Send requests to a tool server and summarise the results.
+
+    Args:
+        url: Server base URL, e.g. http://127.0.0.1:8210.
+        requests_: Requests to send (see read_capture and synthetic_mix).
+        concurrency: Client threads, i.e. the most requests in flight.
+        rate: Open-loop arrival rate in requests per second (Poisson).
+        speed: Replay speed-up for captured offsets (ignored with a rate).
+        duration: Stop issuing requests after this many seconds.
+        timeout: Per-request timeout in seconds.
+        server_pid: Server process to sample CPU and RSS for.
+        seed: Random seed for arrival gaps.
+        progress: Called with (completed, total) as requests finish.
+
+    Returns:
+        Report from summarize, plus the load settings used.
+    """
+    from auth.http_pool import create_session
+
+    timed = schedule(requests_, rate, speed, seed)
+    work: "queue.Queue[Optional[Tuple[Optional[float], ToolRequest]]]" = queue.Queue()
+    samples: List[Dict[str, Any]] = []
+    samples_lock = threading.Lock()
+    sampler = ResourceSampler(server_pid).start() if server_pid and os.path.isdir("/proc") else None
+    started = time.monotonic()
+
+    def client() -> None:
+        session = create_session(pool_maxsize=1)
+        while True:
+            item = work.get()
+            if item is None:
+                break
+            due, request = item
+            sent = time.monotonic()
+            status, error = _send(session, url, request, timeout)
+            done = time.monotonic()
+            sample = {
+                "tool": request.tool, "status": status, "error": error,
+                "service": done - sent,
+                # Open loop: measured from when the request was due, so client-side queueing counts
+                "latency": done - (started + due) if due is not None else done - sent,
+            }
+            with samples_lock:
+                samples.append(sample)
+                completed = len(samples)
+            if progress:
+                progress(completed, len(timed))
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+
+    for due, request in timed:
+        now = time.monotonic() - started
+        if duration is not None and now >= duration:
+            break
+        if due is not None:
+            if duration is not None and due >= duration:
+                break
+            if due > now:
+                time.sleep(due - now)
+        else:
+            # Closed loop: keep only `concurrency` requests queued so duration cuts off cleanly
+            while work.qsize() >= concurrency:
+                time.sleep(0.001)
+        work.put((due, request))
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+
+    wall = time.monotonic() - started
+    report = summarize(samples, wall, sampler.stop() if sampler else None)
+    report["settings"] = {
+        "url": url, "concurrency": concurrency, "rate": rate, "speed": speed if rate is None else None,
+        "duration": duration, "timeout": timeout, "model": "closed" if timed and timed[0][0] is None else "open",
+    }
+    return report
+
+
+# --- Reporting -----------------------------------------------------------------
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of already-sorted values."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _latency_stats(samples: List[Dict[str, Any]], wall: float) -> Dict[str, Any]:
+    latencies = sorted(sample["latency"] for sample in samples)
+    errors = sum(1 for sample in samples if sample["error"])
+    stats = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / wall, 2) if wall > 0 else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "max_ms": round(1000 * latencies[-1], 2) if latencies else 0.0,
+    }
+    for q in PERCENTILES:
+        stats[f"p{q}_ms"] = round(1000 * percentile(latencies, q), 2)
+    return stats
+
+
+def summarize(samples: List[Dict[str, Any]], wall: float, server: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Throughput, latency percentiles and error rates overall and per tool.
+
+    Args:
+        samples: Per-request {"tool", "status", "error", "latency", "service"}.
+        wall: Seconds the run took.
+        server: Server resource summary from ResourceSampler, if sampled.
+
+    Returns:
+        {"overall", "tools", "errors", "server", "wall_seconds"}; errors
+        counts each distinct error message.
+    """
+    by_tool: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, int] = {}
+    for sample in samples:
+        by_tool.setdefault(sample["tool"], []).append(sample)
+        if sample["error"]:
+            errors[sample["error"]] = errors.get(sample["error"], 0) + 1
+    return {
+        "wall_seconds": round(wall, 3),
+        "overall": _latency_stats(samples, wall),
+        "tools": {tool: _latency_stats(tool_samples, wall) for tool, tool_samples in sorted(by_tool.items())},
+        "errors": errors,
+        "server": server or {},
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text table of a run_load report."""
+    header = f"{'tool':<34} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    lines = [header, "-" * len(header)]
+
+    def row(name: str, stats: Dict[str, Any]) -> str:
+        return (f"{name:<34} {stats['requests']:>7} {100 * stats['error_rate']:>6.1f} {stats['throughput_rps']:>8.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+    for tool, stats in report["tools"].items():
+        lines.append(row(tool, stats))
+    lines.append("-" * len(header))
+    lines.append(row("all", report["overall"]))
+
+    settings = report.get("settings", {})
+    if settings:
+        load = f"rate {settings['rate']}/s" if settings.get("rate") else f"{settings['model']} loop"
+        lines.append(f"\n{settings['concurrency']} clients, {load}, {report['wall_seconds']:.1f} s")
+    server = report.get("server")
+    if server:
+        lines.append(f"Server CPU {server['cpu_percent_mean']:.0f}% mean, {server['cpu_percent_peak']:.0f}% peak "
+                     f"({server['cpu_seconds']:.1f} CPU s); RSS {server['rss_mb_start']:.0f} -> "
+                     f"{server['rss_mb_peak']:.0f} MB peak")
+    for error, count in sorted(report.get("errors", {}).items(), key=lambda item: -item[1]):
+        lines.append(f"  {count} x {error}")
+    return "\n".join(lines)
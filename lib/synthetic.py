@@ -0,0 +1,547 @@
+"""
+Synthetic clinical trial data for performance testing.
+
+Generates a linked study (sites, subjects, visits, labs, adverse events,
+SAE listings, concomitant medications, diary entries, audit trail and data
+queries) at any scale from a seed. The same arguments always give the same
+data, and each domain draws from its own random stream, so changing the
+number of diary days does not change the labs.
+
+Records are built in the shapes the tools accept, and
+``SyntheticStudy.tool_inputs`` returns ready-made ``run()`` inputs, e.g.::
+
+    study = generate_study(subjects=5000, seed=7)
+    edc_data_validator.run(study.tool_inputs()["edc_data_validator"])
+"""
+
+import csv
+import math
+import random
+from io import StringIO
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Protocol visit schedule: (visit name, study day, window in days)
+VISIT_SCHEDULE = [
+    ("Screening", -14, 7),
+    ("Baseline", 0, 0),
+    ("Week 2", 14, 3),
+    ("Week 4", 28, 3),
+    ("Week 8", 56, 5),
+    ("Week 12", 84, 5),
+    ("Week 16", 112, 7),
+    ("Week 24", 168, 7),
+    ("Week 36", 252, 14),
+    ("End of Study", 364, 14),
+]
+
+# Assessments recorded on visit rows, with the visits that require them
+ASSESSMENTS = {
+    "vital_signs": [name for name, _, _ in VISIT_SCHEDULE],
+    "ecg": ["Screening", "Baseline", "Week 12", "End of Study"],
+    "physical_exam": ["Screening", "End of Study"],
+}
+
+# Lab analytes: (male mean, female mean, standard deviation, decimals)
+LAB_TESTS = {
+    "glucose": (86.0, 86.0, 7.0, 0),
+    "hemoglobin": (15.4, 13.6, 0.8, 1),
+    "creatinine": (1.0, 0.85, 0.12, 2),
+}
+
+# Verbatim adverse event terms: MedDRA lower level terms, lay wording and
+# a few misspellings, with how often each is reported
+AE_VERBATIMS = [
+    ("headache", 12), ("head pain", 4), ("bad headache", 3), ("cephalgia", 1), ("headach", 1),
+    ("nausea", 10), ("feeling sick", 3), ("nausia", 1),
+    ("vomiting", 5), ("throwing up", 2), ("emesis", 1),
+    ("dizziness", 7), ("feeling dizzy", 3), ("lightheadedness", 2),
+    ("fatigue", 9), ("tiredness", 4), ("exhaustion", 1),
+    ("fever", 5), ("pyrexia", 2), ("high temperature", 1),
+    ("rash", 5), ("skin rash", 3),
+    ("diarrhea", 5), ("diarrhoea", 2), ("loose stools", 2),
+    ("cough", 5), ("coughing", 2),
+    ("pain", 3), ("back ache", 2),
+    ("hypertension", 3), ("high blood pressure", 2), ("blood pressure increased", 1),
+    ("hypotension", 1), ("low blood pressure", 1),
+    ("insomnia", 2), ("dry mouth", 1),
+]
+AE_SEVERITIES = [("mild", 55), ("moderate", 30), ("severe", 12), ("life-threatening", 2), ("fatal", 1)]
+AE_OUTCOMES = ["recovered", "recovering", "not recovered", "recovered with sequelae", "unknown"]
+CAUSALITY = ["not related", "unlikely related", "possibly related", "probably related", "related"]
+
+# Concomitant medication verbatims: generic, brand and misspelled names,
+# with (dose, unit, route, indication) choices
+CONMEDS = [
+    ("aspirin", [(81, "mg", "oral", "Antiplatelet"), (325, "mg", "oral", "Pain")]),
+    ("acetaminophen", [(500, "mg", "oral", "Pain"), (650, "mg", "oral", "Fever")]),
+    ("tylenol", [(500, "mg", "oral", "Headache")]),
+    ("paracetamol", [(1000, "mg", "oral", "Pain")]),
+    ("ibuprofen", [(400, "mg", "oral", "Pain"), (200, "mg", "oral", "Fever")]),
+    ("advil", [(200, "mg", "oral", "Back pain")]),
+    ("motrin", [(600, "mg", "oral", "Pain")]),
+    ("metformin", [(500, "mg", "oral", "Type 2 diabetes"), (1000, "mg", "oral", "Type 2 diabetes")]),
+    ("glucophage", [(850, "mg", "oral", "Type 2 diabetes")]),
+    ("lisinopril", [(10, "mg", "oral", "Hypertension"), (20, "mg", "oral", "Hypertension")]),
+    ("atorvastatin", [(20, "mg", "oral", "Hyperlipidemia")]),
+    ("lipitor", [(40, "mg", "oral", "Hyperlipidemia")]),
+    ("omeprazole", [(20, "mg", "oral", "GERD")]),
+    ("prilosec", [(20, "mg", "oral", "Heartburn")]),
+    ("warfarin", [(5, "mg", "oral", "Atrial fibrillation")]),
+    ("coumadin", [(2.5, "mg", "oral", "DVT prophylaxis")]),
+    ("prednisone", [(10, "mg", "oral", "Asthma")]),
+    ("insulin", [(10, "units", "subcutaneous", "Type 1 diabetes")]),
+    ("asprin", [(81, "mg", "oral", "Antiplatelet")]),
+    ("ibuprofin", [(400, "mg", "oral", "Pain")]),
+    ("vitamin d", [(1000, "IU", "oral", "Supplement")]),
+    ("fish oil", [(1, "g", "oral", "Supplement")]),
+]
+FREQUENCIES = ["QD", "BID", "TID", "PRN", "QHS"]
+
+DIARY_DEVICES = ["smartphone", "tablet", "web", "paper"]
+QUERY_TYPES = ["data_clarification", "missing_data", "out_of_range", "protocol_deviation", "inconsistent_data"]
+AUDIT_ENTITIES = ["CRF", "Lab", "AE", "ConMed", "Query"]
+
+
+def _stream(seed: int, domain: str) -> random.Random:
+    """Independent, reproducible random stream for one domain."""
+    return random.Random(f"{seed}:{domain}")
+
+
+def _weighted(rng: random.Random, choices: List[tuple]) -> Any:
+    """Pick a value from (value, weight) pairs."""
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _to_csv(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    """Rows as CSV text with a header."""
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+@dataclass
+class SyntheticStudy:
+    """
+    A generated study with every domain linked by subject and site.
+
+    Attributes:
+        study_id: Study identifier.
+        seed: Seed the study was generated from.
+        start_date: First enrollment date.
+        sites: Site records (site_id, name, country, investigator).
+        subjects: Subjects with site_id, age, gender, arm and enrollment_date.
+        visits: Visit rows (subject_id, visit_name, visit_date, status and
+            assessment flags); missed visits are left out.
+        labs: Lab rows, one per subject and visit, with one column per analyte.
+        adverse_events: Verbatim adverse events for coding.
+        edc_saes: SAE listing from the EDC (the serious adverse events).
+        safety_db_saes: The same SAEs as held in the safety database, with
+            seeded discrepancies (date shifts, reworded terms, missing cases).
+        medications: Concomitant medication verbatims for coding.
+        diary_entries: Daily ePRO diary entries.
+        audit_trail: Audit trail entries for data entry and changes.
+        queries: Data queries raised against visits and labs.
+    """
+    study_id: str
+    seed: int
+    start_date: date
+    sites: List[Dict[str, Any]] = field(default_factory=list)
+    subjects: List[Dict[str, Any]] = field(default_factory=list)
+    visits: List[Dict[str, Any]] = field(default_factory=list)
+    labs: List[Dict[str, Any]] = field(default_factory=list)
+    adverse_events: List[Dict[str, Any]] = field(default_factory=list)
+    edc_saes: List[Dict[str, Any]] = field(default_factory=list)
+    safety_db_saes: List[Dict[str, Any]] = field(default_factory=list)
+    medications: List[Dict[str, Any]] = field(default_factory=list)
+    diary_entries: List[Dict[str, Any]] = field(default_factory=list)
+    audit_trail: List[Dict[str, Any]] = field(default_factory=list)
+    queries: List[Dict[str, Any]] = field(default_factory=list)
+
+    def record_counts(self) -> Dict[str, int]:
+        """
+        Number of records in each domain.
+
+        Returns:
+            Domain name to record count.
+        """
+        return {
+            name: len(getattr(self, name))
+            for name in ("sites", "subjects", "visits", "labs", "adverse_events", "edc_saes",
+                         "safety_db_saes", "medications", "diary_entries", "audit_trail", "queries")
+        }
+
+    def edc_csv(self) -> str:
+        """
+        EDC export as CSV: a demographics row per subject, then visit rows.
+
+        Returns:
+            CSV text in the shape edc_data_validator reads.
+        """
+        demographics = [
+            {"subject_id": s["subject_id"], "site_id": s["site_id"], "age": s["age"], "gender": s["gender"]}
+            for s in self.subjects
+        ]
+        columns = ["subject_id", "site_id", "visit_name", "visit_date", "age", "gender", "status"] + list(ASSESSMENTS)
+        return _to_csv(demographics + self.visits, columns)
+
+    def lab_csv(self) -> str:
+        """
+        Lab results as CSV, one row per subject and visit.
+
+        Returns:
+            CSV text in the shape lab_range_validator reads.
+        """
+        columns = ["subject_id", "visit_name", "collection_date", "age", "gender"] + list(LAB_TESTS)
+        return _to_csv(self.labs, columns)
+
+    def study_spec(self) -> Dict[str, Any]:
+        """
+        Study specification matching the generated protocol.
+
+        Returns:
+            Specification in the shape edc_data_validator expects.
+        """
+        return {
+            "enrollment_criteria": {"age": {"minimum": 18, "maximum": 80}, "gender": ["M", "F"]},
+            "visit_schedule": [
+                {"name": name, "day": day, "day_range": [day - window, day + window], "required": True}
+                for name, day, window in VISIT_SCHEDULE
+            ],
+            "required_demographics": ["age", "gender"],
+            "required_visit_fields": ["visit_date", "status"],
+            "required_assessments": [
+                {"name": name, "required_at_visits": visits} for name, visits in ASSESSMENTS.items()
+            ],
+        }
+
+    def tool_inputs(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Inputs for each tool's ``run()`` built from this study.
+
+        Returns:
+            Tool module name to input dictionary.
+        """
+        return {
+            "edc_data_validator": {
+                "edc_data": self.edc_csv(), "study_spec": self.study_spec(), "validation_level": "standard"
+            },
+            "lab_range_validator": {"lab_data": self.lab_csv(), "validation_level": "standard"},
+            "sae_reconciliation": {"edc_saes": self.edc_saes, "safety_db_saes": self.safety_db_saes},
+            "audit_trail_reviewer": {"audit_entries": self.audit_trail, "analysis_period": 3650},
+            "adverse_event_coder": {"events": self.adverse_events},
+            "concomitant_med_coder": {"medications": self.medications, "include_interactions": True},
+            "patient_diary_checker": {
+                "diary_data": self.diary_entries,
+                "study_schedule": {"diary_frequency": "daily"},
+                "patient_population": [
+                    {"patient_id": s["subject_id"], "age": s["age"], "gender": s["gender"], "site_id": s["site_id"]}
+                    for s in self.subjects
+                ],
+            },
+            "query_response_analyzer": {"queries": self.queries, "analysis_period": 3650},
+        }
+
+
+def generate_study(
+    subjects: int = 100,
+    sites: int = 10,
+    seed: int = 0,
+    study_id: str = "SYN-001",
+    start_date: str = "2024-01-08",
+    visits_per_subject: Optional[int] = None,
+    diary_days: int = 28,
+    aes_per_subject: float = 1.5,
+    conmeds_per_subject: float = 2.0,
+    queries_per_subject: float = 1.0,
+    discrepancy_rate: float = 0.1,
+) -> SyntheticStudy:
+    """
+    Generate a synthetic study.
+
+    Args:
+        subjects: Number of subjects.
+        sites: Number of sites (subjects are spread unevenly across them).
+        seed: Random seed; the same arguments always give the same study.
+        study_id: Study identifier used as the subject ID prefix.
+        start_date: First enrollment date (ISO format).
+        visits_per_subject: Protocol visits per subject, up to
+            ``len(VISIT_SCHEDULE)`` (default: all of them).
+        diary_days: Days of diary entries per subject.
+        aes_per_subject: Mean adverse events per subject.
+        conmeds_per_subject: Mean concomitant medications per subject.
+        queries_per_subject: Mean data queries per subject.
+        discrepancy_rate: Share of data seeded with errors (out-of-range
+            labs, missing change reasons, SAE mismatches, late diary entries).
+
+    Returns:
+        The generated SyntheticStudy.
+
+    Raises:
+        ValueError: If subjects or sites is less than 1.
+    """
+    if subjects < 1 or sites < 1:
+        raise ValueError("subjects and sites must be at least 1")
+
+    schedule = VISIT_SCHEDULE[:visits_per_subject] if visits_per_subject else VISIT_SCHEDULE
+    study = SyntheticStudy(study_id=study_id, seed=seed, start_date=date.fromisoformat(start_date))
+
+    _generate_sites(study, sites)
+    _generate_subjects(study, subjects)
+    _generate_visits(study, schedule, discrepancy_rate)
+    _generate_labs(study, discrepancy_rate)
+    _generate_adverse_events(study, aes_per_subject, discrepancy_rate)
+    _generate_medications(study, conmeds_per_subject)
+    _generate_diary(study, diary_days, discrepancy_rate)
+    _generate_audit_trail(study, discrepancy_rate)
+    _generate_queries(study, queries_per_subject)
+    return study
+
+
+def _generate_sites(study: SyntheticStudy, count: int) -> None:
+    rng = _stream(study.seed, "sites")
+    countries = ["US", "US", "US", "CA", "GB", "DE", "FR", "ES", "PL", "AU"]
+    for number in range(1, count + 1):
+        study.sites.append({
+            "site_id": f"SITE-{number:03d}",
+            "name": f"Research Site {number}",
+            "country": rng.choice(countries),
+            "investigator": f"Dr. Investigator {number}",
+            "capabilities": rng.sample(["MRI", "CT", "PET", "ECG", "Pharmacy", "Infusion"], 3),
+        })
+
+
+def _generate_subjects(study: SyntheticStudy, count: int) -> None:
+    rng = _stream(study.seed, "subjects")
+    # Some sites recruit much faster than others
+    site_weights = [rng.paretovariate(1.5) for _ in study.sites]
+    enrollment_days = max(30, count // 5)
+    for number in range(1, count + 1):
+        site = rng.choices(study.sites, site_weights)[0]
+        study.subjects.append({
+            "subject_id": f"{study.study_id}-{number:05d}",
+            "site_id": site["site_id"],
+            "age": min(80, max(18, int(rng.gauss(52, 13)))),
+            "gender": rng.choice(["M", "F"]),
+            "arm": rng.choice(["Placebo", "Treatment"]),
+            "enrollment_date": (study.start_date + timedelta(days=rng.randrange(enrollment_days))).isoformat(),
+        })
+
+
+def _generate_visits(study: SyntheticStudy, schedule: List[tuple], discrepancy_rate: float) -> None:
+    rng = _stream(study.seed, "visits")
+    for subject in study.subjects:
+        enrolled = date.fromisoformat(subject["enrollment_date"])
+        # A share of subjects discontinue early and have no later visits
+        last_visit = len(schedule) if rng.random() > 0.12 else rng.randrange(2, len(schedule) + 1)
+        for name, day, window in schedule[:last_visit]:
+            if name not in ("Screening", "Baseline") and rng.random() < discrepancy_rate / 4:
+                continue  # missed visit
+            # Mostly inside the window, sometimes outside it
+            offset = rng.randint(-window, window) if rng.random() > discrepancy_rate else window + rng.randint(1, 7)
+            visit = {
+                "subject_id": subject["subject_id"],
+                "site_id": subject["site_id"],
+                "visit_name": name,
+                "visit_date": (enrolled + timedelta(days=day + offset)).isoformat(),
+                "status": "COMPLETED" if rng.random() > discrepancy_rate / 5 else "",
+            }
+            for assessment, visit_names in ASSESSMENTS.items():
+                if name in visit_names:
+                    visit[assessment] = "Y" if rng.random() > discrepancy_rate / 5 else ""
+            study.visits.append(visit)
+
+
+def _generate_labs(study: SyntheticStudy, discrepancy_rate: float) -> None:
+    rng = _stream(study.seed, "labs")
+    subjects = {subject["subject_id"]: subject for subject in study.subjects}
+    for visit in study.visits:
+        subject = subjects[visit["subject_id"]]
+        row = {
+            "subject_id": visit["subject_id"],
+            "visit_name": visit["visit_name"],
+            "collection_date": visit["visit_date"],
+            "age": subject["age"],
+            "gender": "male" if subject["gender"] == "M" else "female",
+        }
+        for test, (male_mean, female_mean, spread, decimals) in LAB_TESTS.items():
+            value = rng.gauss(male_mean if subject["gender"] == "M" else female_mean, spread)
+            if rng.random() < discrepancy_rate / 3:
+                value *= rng.choice((0.4, 1.8, 4.5))  # clearly abnormal, sometimes critical
+            row[test] = round(max(value, 0.1), decimals) if decimals else int(round(max(value, 1)))
+        study.labs.append(row)
+
+
+def _generate_adverse_events(study: SyntheticStudy, per_subject: float, discrepancy_rate: float) -> None:
+    rng = _stream(study.seed, "adverse_events")
+    sae_number = 0
+    for subject in study.subjects:
+        enrolled = date.fromisoformat(subject["enrollment_date"])
+        for _ in range(_poisson(rng, per_subject)):
+            start = enrolled + timedelta(days=rng.randrange(1, 300))
+            severity = _weighted(rng, AE_SEVERITIES)
+            verbatim = _weighted(rng, AE_VERBATIMS)
+            outcome = "fatal" if severity == "fatal" else rng.choice(AE_OUTCOMES)
+            event = {
+                "subject_id": subject["subject_id"],
+                "site_id": subject["site_id"],
+                "verbatim_term": verbatim,
+                "severity_description": severity,
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(days=rng.randrange(1, 30))).isoformat(),
+                "outcome": outcome,
+                "serious": severity in ("severe", "life-threatening", "fatal") and rng.random() < 0.5,
+            }
+            study.adverse_events.append(event)
+            if not event["serious"]:
+                continue
+
+            sae_number += 1
+            sae = {
+                "sae_number": f"SAE-{sae_number:06d}",
+                "subject_id": subject["subject_id"],
+                "event_term": verbatim.title(),
+                "onset_date": event["start_date"],
+                "report_date": (start + timedelta(days=rng.randrange(0, 3))).isoformat(),
+                "outcome": outcome,
+                "severity": severity,
+                "causality": rng.choice(CAUSALITY),
+            }
+            study.edc_saes.append(sae)
+            if rng.random() < discrepancy_rate / 3:
+                continue  # never reached the safety database
+            copy = dict(sae)
+            if rng.random() < discrepancy_rate:
+                copy["onset_date"] = (start + timedelta(days=rng.choice((-2, -1, 1, 2, 6)))).isoformat()
+            if rng.random() < discrepancy_rate:
+                copy["severity"] = rng.choice([s for s, _ in AE_SEVERITIES if s != severity])
+            if rng.random() < discrepancy_rate:
+                copy["event_term"] = copy["event_term"].upper()
+            study.safety_db_saes.append(copy)
+
+
+def _generate_medications(study: SyntheticStudy, per_subject: float) -> None:
+    rng = _stream(study.seed, "medications")
+    for subject in study.subjects:
+        enrolled = date.fromisoformat(subject["enrollment_date"])
+        for _ in range(_poisson(rng, per_subject)):
+            verbatim, options = rng.choice(CONMEDS)
+            dose, unit, route, indication = rng.choice(options)
+            start = enrolled + timedelta(days=rng.randrange(-365, 200))
+            study.medications.append({
+                "subject_id": subject["subject_id"],
+                "verbatim_name": verbatim,
+                "dose": dose,
+                "unit": unit,
+                "frequency": rng.choice(FREQUENCIES),
+                "route": route,
+                "indication": indication,
+                "start_date": start.isoformat(),
+                "stop_date": (start + timedelta(days=rng.randrange(7, 400))).isoformat() if rng.random() < 0.6 else None,
+            })
+
+
+def _generate_diary(study: SyntheticStudy, days: int, discrepancy_rate: float) -> None:
+    rng = _stream(study.seed, "diary")
+    for subject in study.subjects:
+        enrolled = date.fromisoformat(subject["enrollment_date"])
+        adherence = min(1.0, max(0.3, rng.gauss(0.88, 0.1)))
+        device = rng.choice(DIARY_DEVICES)
+        for day in range(days):
+            if rng.random() > adherence:
+                continue  # no entry that day
+            total = 10
+            answered = total if rng.random() > discrepancy_rate else rng.randrange(total)
+            late = rng.random() < discrepancy_rate
+            study.diary_entries.append({
+                "patient_id": subject["subject_id"],
+                "entry_date": (enrolled + timedelta(days=day)).isoformat(),
+                "completion_time": f"{rng.choice((7, 8, 9, 20, 21, 22, 23)):02d}:{rng.randrange(60):02d}",
+                "diary_type": "daily",
+                "questions_answered": answered,
+                "total_questions": total,
+                "completion_status": "complete" if answered == total else "incomplete",
+                "response_time_minutes": round(rng.lognormvariate(1.6, 0.5), 1),
+                "device_type": device,
+                "entry_method": "manual",
+                "reminder_count": rng.choice((0, 0, 0, 1, 2)),
+                "late_entry": late,
+                "partial_completion": answered < total,
+                "symptom_scores": {"pain": rng.randrange(11), "fatigue": rng.randrange(11)},
+            })
+
+
+def _generate_audit_trail(study: SyntheticStudy, discrepancy_rate: float) -> None:
+    rng = _stream(study.seed, "audit_trail")
+    users = {site["site_id"]: [f"{site['site_id'].lower()}_crc{n}" for n in (1, 2)] for site in study.sites}
+    for index, visit in enumerate(study.visits):
+        entered = datetime.fromisoformat(visit["visit_date"]) + timedelta(
+            days=rng.randrange(0, 4), hours=rng.choice((9, 10, 11, 13, 14, 15, 16, 22)), minutes=rng.randrange(60)
+        )
+        user = rng.choice(users[visit["site_id"]])
+        entity = rng.choice(AUDIT_ENTITIES[:2]) if index % 2 else "CRF"
+        entity_id = f"{visit['subject_id']}/{visit['visit_name']}/{entity}"
+        study.audit_trail.append({
+            "timestamp": entered.isoformat(), "user": user, "action": "create",
+            "entity": entity, "entity_id": entity_id,
+        })
+        for _ in range(_poisson(rng, 0.6)):
+            changed = entered + timedelta(hours=rng.randrange(1, 72), minutes=rng.randrange(60))
+            action = "delete" if rng.random() < 0.03 else "update"
+            entry = {
+                "timestamp": changed.isoformat(),
+                "user": rng.choice(users[visit["site_id"]] + ["data_manager"]),
+                "action": action,
+                "entity": entity,
+                "entity_id": entity_id,
+            }
+            if rng.random() > discrepancy_rate:
+                entry["reason"] = rng.choice(["Transcription error", "Source verified", "Query response"])
+            study.audit_trail.append(entry)
+    study.audit_trail.sort(key=lambda entry: entry["timestamp"])
+
+
+def _generate_queries(study: SyntheticStudy, per_subject: float) -> None:
+    rng = _stream(study.seed, "queries")
+    visits_by_subject: Dict[str, List[Dict[str, Any]]] = {}
+    for visit in study.visits:
+        visits_by_subject.setdefault(visit["subject_id"], []).append(visit)
+
+    number = 0
+    for subject in study.subjects:
+        visits = visits_by_subject.get(subject["subject_id"])
+        if not visits:
+            continue
+        for _ in range(_poisson(rng, per_subject)):
+            number += 1
+            visit = rng.choice(visits)
+            issued = date.fromisoformat(visit["visit_date"]) + timedelta(days=rng.randrange(1, 15))
+            status = _weighted(rng, [("closed", 70), ("answered", 15), ("open", 15)])
+            responded = issued + timedelta(days=int(rng.expovariate(1 / 6)))
+            study.queries.append({
+                "query_id": f"Q-{number:07d}",
+                "subject_id": subject["subject_id"],
+                "site_id": subject["site_id"],
+                "visit_name": visit["visit_name"],
+                "query_type": rng.choice(QUERY_TYPES),
+                "severity": _weighted(rng, [("low", 50), ("medium", 35), ("high", 15)]),
+                "issued_date": issued.isoformat(),
+                "response_date": responded.isoformat() if status != "open" else None,
+                "closed_date": (responded + timedelta(days=rng.randrange(0, 5))).isoformat() if status == "closed" else None,
+                "status": status,
+            })
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Poisson-distributed count (Knuth's method; means here are small)."""
+    if mean <= 0:
+        return 0
+    limit, count, product = math.exp(-mean), 0, rng.random()
+    while product > limit:
+        count += 1
+        product *= rng.random()
+    return count
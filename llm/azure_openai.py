@@ -0,0 +1,486 @@
+"""
+Shared Azure OpenAI client for DCRI MCP Tools.
+
+Every tool that calls Azure OpenAI goes through one client per process. The
+client keeps a pooled keep-alive session and a response cache, kept in
+memory unless LLM_CACHE_DB names a SQLite file to persist it. Cache entries are keyed by a hash of the deployment, messages,
+temperature and max_tokens. Requests pass an adaptive concurrency limiter
+that backs off on 429, and identical prompts already in flight are sent only
+once.
+"""
+
+import os
+import copy
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+
+import requests
+from requests.exceptions import HTTPError, ConnectionError as RequestsConnectionError, Timeout
+
+from auth.http_pool import create_session, get_pool_stats
+from auth.graph_auth import AdaptiveThrottle, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    Cache of chat completion responses.
+
+    Responses are stored in SQLite (WAL mode, one reused connection) with an
+    in-process LRU in front, so repeated prompts are answered without an API
+    call. The database is in memory unless a file is configured; a file
+    survives restarts but holds prompts' responses in plain text, so it is
+    created readable by the owner only.
+    """
+
+    DEFAULT_TTL = 7 * 24 * 3600
+    MAX_ENTRIES = 1024
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        ttl: Optional[int] = None,
+        max_entries: int = MAX_ENTRIES
+    ):
+        """
+        Initialize the response cache.
+
+        Args:
+            db_path: SQLite file (defaults to env var LLM_CACHE_DB, else
+                ":memory:", which keeps it in process)
+            ttl: Seconds a response stays valid (defaults to env var
+                LLM_CACHE_TTL or seven days)
+            max_entries: Maximum responses kept in the in-process LRU
+        """
+        self.db_path = db_path or os.getenv('LLM_CACHE_DB') or ':memory:'
+        self.ttl = ttl if ttl is not None else int(os.getenv('LLM_CACHE_TTL', self.DEFAULT_TTL))
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.db_path != ':memory:':
+            # SQLite gives the -wal and -shm files the database file's mode
+            os.close(os.open(self.db_path, os.O_RDWR | os.O_CREAT, 0o600))
+            os.chmod(self.db_path, 0o600)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self.db_path != ':memory:':
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(deployment: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            deployment: Azure OpenAI deployment name
+            messages: Chat messages sent
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            Hex SHA-256 of the canonical request
+        """
+        canonical = json.dumps(
+            {'deployment': deployment, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens},
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Response JSON or None if absent or expired
+        """
+        with self._lock:
+            response = self._lru.get(key)
+            if response is None:
+                row = self._conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and time.time() - row[1] < self.ttl:
+                    response = json.loads(row[0])
+                    self._remember(key, response)
+            else:
+                self._lru.move_to_end(key)
+
+            if response is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return copy.deepcopy(response)
+
+    def _remember(self, key: str, response: Dict[str, Any]):
+        """Add a response to the in-process LRU (lock held)."""
+        self._lru[key] = response
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def set(self, key: str, response: Dict[str, Any]):
+        """
+        Store a response.
+
+        Args:
+            key: Key from make_key
+            response: Response JSON
+        """
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO responses (key, response, created_at) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET response = excluded.response, created_at = excluded.created_at
+            """, (key, json.dumps(response), time.time()))
+            self._conn.commit()
+            self._remember(key, copy.deepcopy(response))
+
+    def clear(self) -> int:
+        """
+        Remove every cached response.
+
+        Returns:
+            Number of responses removed
+        """
+        with self._lock:
+            count = self._conn.execute("DELETE FROM responses").rowcount
+            self._conn.commit()
+            self._lru.clear()
+            self.hits = 0
+            self.misses = 0
+        return count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hits, misses and stored responses
+        """
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {'hits': self.hits, 'misses': self.misses, 'stored': stored}
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class _InFlight:
+    """A request whose result identical concurrent requests wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class AzureOpenAIClient:
+    """
+    Client for Azure OpenAI chat completions.
+
+    Thread-safe; one instance is meant to be shared by every caller in the
+    process (see get_llm_client).
+    """
+
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    MAX_RETRIES = 4
+    BACKOFF_BASE = 1.0  # seconds
+    BACKOFF_MAX = 60.0  # seconds
+    DEFAULT_TIMEOUT = 60.0  # seconds
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        deployment: Optional[str] = None,
+        api_version: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        cache: Optional[LLMResponseCache] = None,
+        throttle: Optional[AdaptiveThrottle] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            api_key: API key (defaults to env var AZURE_OPENAI_API_KEY)
+            endpoint: Resource endpoint (defaults to env var AZURE_OPENAI_ENDPOINT)
+            deployment: Deployment name (defaults to env var AZURE_OPENAI_DEPLOYMENT_NAME)
+            api_version: API version (defaults to env var AZURE_OPENAI_API_VERSION)
+            session: Session to send requests with (defaults to a pooled keep-alive session)
+            cache: Response cache (defaults to the process-wide cache)
+            throttle: Concurrency limiter (defaults to the process-wide LLM throttle)
+            timeout: Request timeout in seconds (defaults to env var LLM_TIMEOUT or 60)
+        """
+        self.api_key = api_key or os.getenv("AZURE_OPENAI_API_KEY")
+        self.endpoint = endpoint or os.getenv("AZURE_OPENAI_ENDPOINT")
+        self.deployment = deployment or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+        self.api_version = api_version or os.getenv("AZURE_OPENAI_API_VERSION")
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', self.DEFAULT_TIMEOUT))
+
+        if not all([self.api_key, self.endpoint, self.deployment, self.api_version]):
+            logger.warning("Azure OpenAI credentials not fully configured - will use fallback mode")
+            self.configured = False
+        else:
+            self.configured = True
+            self.url = f"{self.endpoint}openai/deployments/{self.deployment}/chat/completions?api-version={self.api_version}"
+            self.headers = {
+                "Content-Type": "application/json",
+                "api-key": self.api_key
+            }
+
+        self._session = session or create_session()
+        self._cache = cache
+        self.throttle = throttle or get_llm_throttle()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'retries': 0}
+
+    @property
+    def cache(self) -> LLMResponseCache:
+        """Response cache, opened on first use."""
+        if self._cache is None:
+            self._cache = get_response_cache()
+        return self._cache
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 500,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Send a chat completion request.
+
+        Cached responses are returned without a request; concurrent calls
+        with the same cache key share one request.
+
+        Args:
+            messages: Chat messages
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+            use_cache: Read and write the response cache and coalesce
+                identical requests (False always sends a new request)
+
+        Returns:
+            Response JSON
+
+        Raises:
+            ValueError: If the client is not configured
+            RequestException: If the request fails after retries
+        """
+        if not self.configured:
+            raise ValueError("Azure OpenAI credentials not configured")
+
+        payload = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        if not use_cache:
+            return self._send(payload)
+
+        key = LLMResponseCache.make_key(self.deployment, messages, temperature, max_tokens)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._lock:
+                self._stats['cache_hits'] += 1
+            return cached
+
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return copy.deepcopy(in_flight.result)
+
+        try:
+            result = self._send(payload)
+            self.cache.set(key, result)
+            in_flight.result = result
+            return copy.deepcopy(result)
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def _send(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST a request, retrying throttled and failed attempts."""
+        attempt = 0
+        while True:
+            try:
+                with self.throttle.slot():
+                    with self._lock:
+                        self._stats['requests'] += 1
+                    response = self._session.post(self.url, headers=self.headers, json=payload, timeout=self.timeout)
+            except (RequestsConnectionError, Timeout) as e:
+                if attempt >= self.MAX_RETRIES:
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"Azure OpenAI request failed ({e}), retrying in {delay:.1f}s")
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            if response.status_code in self.RETRY_STATUS_CODES and attempt < self.MAX_RETRIES:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = min(self.BACKOFF_MAX, retry_after) if retry_after is not None else self._backoff_delay(attempt)
+                if response.status_code == 429:
+                    self.throttle.on_throttle(delay)
+                logger.warning(
+                    f"Azure OpenAI returned {response.status_code}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.MAX_RETRIES})"
+                )
+                self._sleep_before_retry(delay)
+                attempt += 1
+                continue
+
+            if response.status_code != 200:
+                raise HTTPError(f"Azure OpenAI API error: {response.status_code}", response=response)
+
+            self.throttle.on_success()
+            return response.json()
+
+    def _sleep_before_retry(self, delay: float):
+        """Wait before a retry, counting it."""
+        with self._lock:
+            self._stats['retries'] += 1
+        time.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** attempt)))
+
+    def call_llm(self, system_prompt: str, user_prompt: str, temperature: float = 0.3, max_tokens: int = 500) -> Optional[str]:
+        """
+        Make a call to Azure OpenAI.
+
+        Args:
+            system_prompt: System message
+            user_prompt: User message
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            The completion text, or None if not configured or the call failed
+        """
+        if not self.configured:
+            return None
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        try:
+            result = self.chat(messages, temperature=temperature, max_tokens=max_tokens)
+            return result['choices'][0]['message']['content']
+        except Exception as e:
+            logger.error(f"Azure OpenAI call failed: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get client statistics.
+
+        Returns:
+            Dictionary with requests sent, cache hits, coalesced calls,
+            retries, throttle state and connection pool use
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['throttle'] = self.throttle.get_stats()
+        stats['pool'] = get_pool_stats(self._session)
+        return stats
+
+    def close(self):
+        """Close the HTTP session."""
+        self._session.close()
+
+
+# Shared by every AzureOpenAIClient in the process
+_default_cache: Optional[LLMResponseCache] = None
+_default_throttle: Optional[AdaptiveThrottle] = None
+_default_client: Optional[AzureOpenAIClient] = None
+_default_lock = threading.RLock()  # get_llm_client creates the throttle under it
+
+
+def get_response_cache() -> LLMResponseCache:
+    """
+    Get or create the process-wide response cache.
+
+    Returns:
+        LLMResponseCache instance
+    """
+    global _default_cache
+
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+    return _default_cache
+
+
+def get_llm_throttle() -> AdaptiveThrottle:
+    """
+    Get or create the process-wide Azure OpenAI throttle.
+
+    Returns:
+        AdaptiveThrottle instance
+    """
+    global _default_throttle
+
+    with _default_lock:
+        if _default_throttle is None:
+            max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+            _default_throttle = AdaptiveThrottle(
+                rate=float(os.getenv('LLM_INITIAL_RATE', 5.0)),
+                max_rate=float(os.getenv('LLM_MAX_RATE', 50.0)),
+                concurrency=max_concurrency,
+                max_concurrency=max_concurrency
+            )
+    return _default_throttle
+
+
+def get_llm_client() -> AzureOpenAIClient:
+    """
+    Get or create the process-wide Azure OpenAI client.
+
+    Returns:
+        AzureOpenAIClient instance
+    """
+    global _default_client
+
+    with _default_lock:
+        if _default_client is None:
+            _default_client = AzureOpenAIClient()
+    return _default_client
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch compliance evaluation across a study portfolio
+
+Generates a synthetic portfolio (studies x schedules x visits, 1M visits by
+default), loads it into columns and evaluates the default rule set in one
+pass, then times the per-schedule engine on a sample of the same schedules
+and checks both report the same violation counts.
+
+Usage:
+    python scripts/benchmark_compliance_batch.py
+    python scripts/benchmark_compliance_batch.py --studies 100 --schedules 10 --visits 1000 --json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from datetime import date, timedelta
+from collections import Counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.compliance.rules_engine import RulesEngine
+from lib.compliance.batch import VisitColumns, evaluate_columns
+
+PROCEDURES = [
+    "blood_draw", "ecg", "vital_signs", "MRI", "CT Scan", "biopsy", "surgery", "X-Ray",
+    "contrast_imaging", "contrast_mri", "fasting_labs", "lipid_panel", "phone_screen", "PET Scan"
+]
+VISIT_TYPES = ["Screening", "Baseline", "Treatment", "Follow-up", "Final", "Unscheduled"]
+SITES = ["SITE-001", "SITE-002", "SITE-003", "SITE-004", "SITE-009"]
+
+
+def make_portfolio(studies=100, schedules_per_study=10, visits_per_schedule=1000, seed=42):
+    """Generate schedules in the shape SchemaAdapter.extract_visits returns"""
+    rng = random.Random(seed)
+    schedules = []
+    for study in range(studies):
+        for schedule in range(schedules_per_study):
+            start = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+            visits = []
+            day = -14
+            for number in range(visits_per_schedule):
+                # Mostly on schedule, sometimes early/late or out of order
+                jitter = rng.choice((0, 0, 0, 0, 1, -1, 2, -5))
+                procedures = rng.sample(PROCEDURES, rng.randrange(4))
+                if number == 1:
+                    procedures.append("informed_consent")
+                visits.append({
+                    "visit_id": f"V{number + 1}",
+                    "visit_day": day,
+                    "visit_date": (start + timedelta(days=day + jitter)).isoformat(),
+                    "visit_time": f"{rng.randrange(6, 19):02d}:{rng.choice(('00', '30'))}",
+                    "visit_type": rng.choice(VISIT_TYPES),
+                    "site_id": rng.choice(SITES),
+                    "procedures": procedures
+                })
+                day += rng.randrange(1, 15)
+            schedules.append({
+                "study_id": f"STUDY-{study:03d}",
+                "schedule_id": f"STUDY-{study:03d}-{schedule:02d}",
+                "study_start_date": start.isoformat(),
+                "visits": visits
+            })
+    return schedules
+
+
+def scalar_counts(engine, schedules):
+    """Per (study, rule) violation counts from the per-schedule engine"""
+    counts = Counter()
+    for schedule in schedules:
+        findings = engine.apply_rules(
+            {"study_start_date": schedule["study_start_date"]}, {"visits": schedule["visits"]}
+        )
+        counts.update((schedule["study_id"], finding.rule_id) for finding in findings)
+    return counts
+
+
+def run_benchmark(studies=100, schedules_per_study=10, visits_per_schedule=1000, sample_schedules=20):
+    """Run the benchmark and return timings and the parity check"""
+    schedules = make_portfolio(studies, schedules_per_study, visits_per_schedule)
+    visit_count = sum(len(schedule["visits"]) for schedule in schedules)
+    engine = RulesEngine()
+    engine.load_rules()
+
+    started = time.perf_counter()
+    columns = VisitColumns.from_schedules(schedules)
+    loaded = time.perf_counter()
+    results = engine.apply_rules_batch(columns, max_findings_per_study=0)
+    evaluated = time.perf_counter()
+
+    sample = schedules[:sample_schedules]
+    sample_visits = sum(len(schedule["visits"]) for schedule in sample)
+    started_scalar = time.perf_counter()
+    expected = scalar_counts(engine, sample)
+    scalar_seconds = time.perf_counter() - started_scalar
+
+    sample_columns = VisitColumns.from_schedules(sample)
+    batch_counts, _ = evaluate_columns(engine.rules, sample_columns)
+    actual = Counter({
+        (study_id, rule_id): int(rule_counts[index])
+        for rule_id, rule_counts in batch_counts.items()
+        for index, study_id in enumerate(sample_columns.studies)
+        if rule_counts[index]
+    })
+
+    batch_seconds = evaluated - loaded
+    scalar_per_visit = scalar_seconds / max(1, sample_visits)
+    return {
+        "studies": studies,
+        "schedules": len(schedules),
+        "visits": visit_count,
+        "load_seconds": round(loaded - started, 3),
+        "evaluate_seconds": round(batch_seconds, 3),
+        "batch_visits_per_second": round(visit_count / batch_seconds) if batch_seconds else None,
+        "per_schedule_visits_timed": sample_visits,
+        "per_schedule_extrapolated_seconds": round(scalar_per_visit * visit_count, 1),
+        "speedup_vs_per_schedule": round(scalar_per_visit * visit_count / batch_seconds, 1) if batch_seconds else None,
+        "total_findings": sum(study["total_findings"] for study in results.values()),
+        "counts_match_per_schedule": actual == expected
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch compliance evaluation")
+    parser.add_argument("--studies", type=int, default=100, help="Studies in the portfolio")
+    parser.add_argument("--schedules", type=int, default=10, help="Schedules per study")
+    parser.add_argument("--visits", type=int, default=1000, help="Visits per schedule")
+    parser.add_argument("--sample", type=int, default=20, help="Schedules to time with the per-schedule engine")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.studies, args.schedules, args.visits, args.sample)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Batch compliance evaluation: {results['visits']:,} visits in {results['schedules']:,} schedules "
+          f"across {results['studies']} studies")
+    print(f"  load into columns       {results['load_seconds']:>8.3f} s")
+    print(f"  evaluate all rules      {results['evaluate_seconds']:>8.3f} s  "
+          f"({results['batch_visits_per_second']:,} visits/s)")
+    print(f"  per-schedule engine     {results['per_schedule_extrapolated_seconds']:>8.1f} s (extrapolated from "
+          f"{results['per_schedule_visits_timed']:,} visits)")
+    print(f"  speedup: {results['speedup_vs_per_schedule']}x   findings: {results['total_findings']:,}   "
+          f"counts match per-schedule engine: {results['counts_match_per_schedule']}")
+
+
+if __name__ == "__main__":
+    main()
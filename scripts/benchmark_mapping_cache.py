@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark the schedule converter MappingCache
+
+Loads 100k cached mappings and times lookups and stores against the
+MappingCache, next to the previous storage pattern (a new connection per
+call and an unindexed table) for comparison.
+
+Usage:
+    python scripts/benchmark_mapping_cache.py
+    python scripts/benchmark_mapping_cache.py --mappings 100000 --lookups 5000 --json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools.schedule_converter import MappingCache
+
+LEGACY_SCHEMA = """
+    CREATE TABLE mappings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        org_id TEXT,
+        fingerprint TEXT,
+        mappings TEXT,
+        confidence REAL,
+        success_count INTEGER DEFAULT 1,
+        last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def make_rows(count, orgs):
+    """Generate (org_id, fingerprint, mappings_json, confidence) rows"""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        mappings = {"Visit": "visit_name", "Day": "visit_day", f"Col{i % 50}": "procedure"}
+        rows.append((f"org{i % orgs}", f"visit|day|col{i}", json.dumps(mappings), rng.uniform(70, 99)))
+    return rows
+
+
+def legacy_lookup(db_path, org_id, fingerprint):
+    """The previous lookup: connect, scan, close"""
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("""
+        SELECT mappings, confidence FROM mappings
+        WHERE org_id = ? AND fingerprint = ?
+        ORDER BY confidence DESC, success_count DESC
+        LIMIT 1
+    """, (org_id, fingerprint)).fetchone()
+    conn.close()
+    return row
+
+
+def time_calls(func, args_list):
+    """Time each call and return per-call latencies in microseconds"""
+    latencies = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+def summarize(latencies):
+    """Mean, median and p99 latency in microseconds"""
+    ordered = sorted(latencies)
+    return {
+        "calls": len(ordered),
+        "mean_us": round(statistics.mean(ordered), 1),
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 1)
+    }
+
+
+def run_benchmark(mapping_count=100000, lookups=5000, orgs=100, stores=2000):
+    """Run the benchmark and return results keyed by scenario"""
+    rows = make_rows(mapping_count, orgs)
+    rng = random.Random(7)
+    # Most traffic goes to a small working set, as with repeat submissions
+    hot = rng.sample(rows, 256)
+    lookup_args = [
+        (row[0], row[1]) for row in (rng.choice(hot) if rng.random() < 0.8 else rng.choice(rows)
+                                     for _ in range(lookups))
+    ]
+
+    results = {"mappings": mapping_count}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute(LEGACY_SCHEMA)
+        conn.executemany(
+            "INSERT INTO mappings (org_id, fingerprint, mappings, confidence) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.commit()
+        conn.close()
+        results["legacy_lookup"] = summarize(
+            time_calls(lambda o, f: legacy_lookup(legacy_path, o, f), lookup_args[:min(lookups, 500)])
+        )
+
+        db_path = os.path.join(tmp, "indexed.db")
+        cache = MappingCache(db_path=db_path)
+        with cache._lock:
+            cache._conn.executemany(
+                "INSERT INTO mappings (org_id, fingerprint, mappings, confidence) VALUES (?, ?, ?, ?)", rows
+            )
+            cache._conn.commit()
+        cache.close()
+
+        uncached = MappingCache(db_path=db_path, max_entries=0)
+        results["indexed_lookup"] = summarize(time_calls(uncached.get_org_mappings, lookup_args))
+        uncached.close()
+
+        cache = MappingCache(db_path=db_path)
+        results["indexed_lru_lookup"] = summarize(time_calls(cache.get_org_mappings, lookup_args))
+        results["indexed_lru_lookup"]["hit_rate"] = round(cache.hits / max(1, cache.hits + cache.misses), 3)
+
+        store_args = [
+            (row[0], {"mappings": json.loads(row[2]), "confidence": row[3], "fingerprint": row[1]})
+            for row in (rng.choice(rows) for _ in range(stores))
+        ]
+        results["upsert"] = summarize(time_calls(cache.store_mapping, store_args))
+        results["rows_after_upserts"] = cache.get_statistics()["total_mappings"]
+        cache.close()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the schedule converter MappingCache")
+    parser.add_argument("--mappings", type=int, default=100000, help="Cached mappings to load")
+    parser.add_argument("--lookups", type=int, default=5000, help="Lookups to time")
+    parser.add_argument("--stores", type=int, default=2000, help="Upserts to time")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.mappings, args.lookups, stores=args.stores)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"MappingCache benchmark ({results['mappings']:,} cached mappings)")
+    for name in ("legacy_lookup", "indexed_lookup", "indexed_lru_lookup", "upsert"):
+        stats = results[name]
+        extra = f"  hit rate {stats['hit_rate']:.1%}" if "hit_rate" in stats else ""
+        print(f"  {name:<20} mean {stats['mean_us']:>10.1f} us  p50 {stats['p50_us']:>10.1f} us  "
+              f"p99 {stats['p99_us']:>10.1f} us{extra}")
+    print(f"  rows after upserts: {results['rows_after_upserts']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark MedDRA coding against a full-size dictionary
+
+Writes a synthetic MedDRA ASCII distribution (llt.asc, mdhier.asc) with as
+many LLTs as a real release, then times parsing and indexing it, loading
+the saved index, and coding an AE listing with MeddraCoder.code_batch. A
+sample of verbatims is also coded with the previous approach (substring
+checks, then SequenceMatcher against every LLT) to extrapolate its cost
+for the whole listing.
+
+Usage:
+    python scripts/benchmark_meddra_coding.py
+    python scripts/benchmark_meddra_coding.py --llts 80000 --events 50000 --distinct 5000 --json
+"""
+
+import sys
+import json
+import time
+import random
+import difflib
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.coding.meddra import MeddraCoder, MeddraDictionary, load_meddra
+
+SYLLABLES = ["ab", "ac", "al", "an", "ar", "cap", "car", "cer", "col", "cy", "der", "dys", "en", "gas", "hem",
+             "hep", "hy", "lar", "leu", "lip", "lym", "my", "neph", "neu", "os", "pan", "per", "pha", "pleu",
+             "pul", "ren", "rhin", "sep", "spin", "ten", "thy", "tox", "tra", "ur", "vas", "ven"]
+SUFFIXES = ["itis", "algia", "osis", "emia", "oma", "pathy", "rrhea", "plasia", "spasm", "ectasia"]
+QUALIFIERS = ["acute", "chronic", "left", "right", "upper", "lower", "recurrent", "bilateral", "localised",
+              "generalised", "increased", "decreased", "abnormal", "pain", "infection", "disorder", "syndrome"]
+MODIFIERS = ["mild", "moderate", "severe", "intermittent", "worsening", "grade 2"]
+
+
+def make_distribution(directory, llts=80000, seed=7):
+    """Write llt.asc and mdhier.asc with about llts LLTs (4 per PT) and return the LLT names"""
+    rng = random.Random(seed)
+    names, seen = [], set()
+    while len(names) < llts:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) + rng.choice(SUFFIXES)
+        words = [rng.choice(QUALIFIERS) for _ in range(rng.choice([0, 0, 1, 1, 2]))] + [word]
+        name = " ".join(words).capitalize()
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+
+    directory = Path(directory)
+    pts = (len(names) + 3) // 4
+    with open(directory / "mdhier.asc", "w", encoding="utf-8") as f:
+        for pt in range(pts):
+            soc, hlgt, hlt = 10000000 + pt % 27, 10100000 + pt % 330, 10200000 + pt % 1700
+            f.write(f"{20000000 + pt}${hlt}${hlgt}${soc}${names[pt * 4]}$HLT {hlt}$HLGT {hlgt}$SOC {soc}$S{soc}$$"
+                    f"{soc}$Y$\n")
+    with open(directory / "llt.asc", "w", encoding="utf-8") as f:
+        for number, name in enumerate(names):
+            f.write(f"{30000000 + number}${name}${20000000 + number // 4}$$$$$$$Y$$\n")
+    return names
+
+
+def make_listing(names, events=50000, distinct=5000, seed=11):
+    """AE verbatims: exact LLTs, LLTs with severity modifiers and misspelled LLTs, repeated across events"""
+    rng = random.Random(seed)
+    verbatims = []
+    for _ in range(distinct):
+        name = rng.choice(names).lower()
+        kind = rng.random()
+        if kind < 0.4:
+            verbatims.append(name)
+        elif kind < 0.7:
+            verbatims.append(f"{rng.choice(MODIFIERS)} {name}")
+        else:
+            position = rng.randrange(len(name))
+            verbatims.append(name[:position] + name[position + 1:])
+    return [rng.choice(verbatims) for _ in range(events)]
+
+
+def legacy_code(names, verbatim, threshold=0.7):
+    """The previous find_meddra_term: substring checks, then SequenceMatcher over every LLT"""
+    verbatim_lower = verbatim.lower()
+    for name in names:
+        if name.lower() in verbatim_lower or verbatim_lower in name.lower():
+            return name
+    best, best_score = None, 0
+    for name in names:
+        score = difflib.SequenceMatcher(None, verbatim_lower, name.lower()).ratio()
+        if score > best_score and score >= threshold:
+            best, best_score = name, score
+    return best
+
+
+def run_benchmark(llts=80000, events=50000, distinct=5000, legacy_sample=10):
+    with tempfile.TemporaryDirectory() as directory:
+        names = make_distribution(directory, llts)
+        listing = make_listing(names, events, distinct)
+
+        started = time.perf_counter()
+        MeddraDictionary.from_ascii(directory)
+        build_seconds = time.perf_counter() - started
+
+        index_dir = str(Path(directory) / "index")
+        load_meddra(directory, index_dir)
+        started = time.perf_counter()
+        dictionary = load_meddra(directory, index_dir)
+        load_seconds = time.perf_counter() - started
+        index_bytes = sum(path.stat().st_size for path in Path(index_dir).iterdir())
+
+        coder = MeddraCoder(dictionary)
+        started = time.perf_counter()
+        coded = coder.code_batch(listing)
+        code_seconds = time.perf_counter() - started
+
+        sample = list(dict.fromkeys(listing))[:legacy_sample]
+        started = time.perf_counter()
+        for verbatim in sample:
+            legacy_code(names, verbatim)
+        legacy_per_verbatim = (time.perf_counter() - started) / max(1, len(sample))
+
+    distinct_coded = len(set(listing))
+    legacy_estimate = legacy_per_verbatim * len(listing)
+    return {
+        "llts": len(names),
+        "events": len(listing),
+        "distinct_verbatims": distinct_coded,
+        "coded": sum(1 for result in coded if result),
+        "build_seconds": round(build_seconds, 2),
+        "load_seconds": round(load_seconds, 3),
+        "index_mb": round(index_bytes / (1024 * 1024), 1),
+        "code_batch_seconds": round(code_seconds, 2),
+        "events_per_second": round(len(listing) / code_seconds),
+        "ms_per_distinct_verbatim": round(1000 * code_seconds / distinct_coded, 3),
+        "legacy_seconds_per_verbatim": round(legacy_per_verbatim, 3),
+        "legacy_listing_estimate_seconds": round(legacy_estimate),
+        "speedup": round(legacy_estimate / code_seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MedDRA coding against a full-size dictionary")
+    parser.add_argument("--llts", type=int, default=80000, help="LLTs in the synthetic distribution")
+    parser.add_argument("--events", type=int, default=50000, help="AE records in the listing")
+    parser.add_argument("--distinct", type=int, default=5000, help="Distinct verbatims in the listing")
+    parser.add_argument("--legacy-sample", type=int, default=10, help="Verbatims coded the previous way")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.llts, args.events, args.distinct, args.legacy_sample)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"MedDRA coding: {results['llts']:,} LLTs, {results['events']:,} events "
+          f"({results['distinct_verbatims']:,} distinct verbatims, {results['coded']:,} coded)")
+    print(f"  parse + index distribution  {results['build_seconds']:>8.2f} s")
+    print(f"  load saved index            {results['load_seconds']:>8.3f} s  ({results['index_mb']} MB)")
+    print(f"  code_batch listing          {results['code_batch_seconds']:>8.2f} s  "
+          f"({results['events_per_second']:,} events/s, {results['ms_per_distinct_verbatim']} ms per distinct)")
+    print(f"  previous linear scan        {results['legacy_seconds_per_verbatim']:>8.3f} s per verbatim, "
+          f"~{results['legacy_listing_estimate_seconds']:,} s for the listing ({results['speedup']:,}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark per-call overhead of the schedule converter
+
+Converts small schedules repeatedly, once building a new ScheduleConverter
+per call (the previous run() behaviour) and once through the shared
+process-level converter, and reports the latency of each.
+
+Usage:
+    python scripts/benchmark_schedule_converter.py
+    python scripts/benchmark_schedule_converter.py --calls 2000 --json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tools.schedule_converter import ScheduleConverter, MappingCache
+
+SCHEDULES = [
+    "Visit,Day,Procedure\nScreening,-14,Consent\nBaseline,0,Labs\nWeek 4,28,Labs",
+    "Timepoint,Study Day,Assessments\nV1,1,ECG\nV2,8,Vitals",
+    "Visit Name,Visit Day\nScreening,-7\nDay 1,1\nFollow-up,30\nEnd of Study,90",
+]
+
+
+def time_calls(convert, calls, organization_id):
+    """Call convert() for each schedule in turn and return latencies in microseconds"""
+    latencies = []
+    for i in range(calls):
+        started = time.perf_counter()
+        convert(SCHEDULES[i % len(SCHEDULES)], organization_id)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    return latencies
+
+
+def summarize(latencies):
+    """Mean, median and p99 latency in microseconds"""
+    ordered = sorted(latencies)
+    return {
+        "calls": len(ordered),
+        "mean_us": round(statistics.mean(ordered), 1),
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 1)
+    }
+
+
+def run_benchmark(calls=1000, organization_id="bench_org"):
+    """Run both scenarios and return results keyed by scenario"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "mappings.db")
+
+        def per_call(content, org):
+            cache = MappingCache(db_path=db_path)
+            ScheduleConverter(mapping_cache=cache).convert(content, "csv", "CDISC_SDTM", org)
+            cache.close()
+
+        shared = ScheduleConverter(mapping_cache=MappingCache(db_path=db_path))
+
+        def reused(content, org):
+            shared.convert(content, "csv", "CDISC_SDTM", org)
+
+        # Warm up both paths (imports, first table creation)
+        per_call(SCHEDULES[0], organization_id)
+        reused(SCHEDULES[0], organization_id)
+
+        results["new_converter_per_call"] = summarize(time_calls(per_call, calls, organization_id))
+        results["shared_converter"] = summarize(time_calls(reused, calls, organization_id))
+        shared.mapping_cache.close()
+
+    before = results["new_converter_per_call"]["mean_us"]
+    after = results["shared_converter"]["mean_us"]
+    results["speedup"] = round(before / after, 2) if after else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark schedule converter per-call overhead")
+    parser.add_argument("--calls", type=int, default=1000, help="Conversions per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.calls)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Schedule converter per-call overhead ({args.calls} small schedules per scenario)")
+    for name in ("new_converter_per_call", "shared_converter"):
+        stats = results[name]
+        print(f"  {name:<24} mean {stats['mean_us']:>9.1f} us  p50 {stats['p50_us']:>9.1f} us  "
+              f"p99 {stats['p99_us']:>9.1f} us")
+    print(f"  speedup: {results['speedup']}x")
+
+
+if __name__ == "__main__":
+    main()
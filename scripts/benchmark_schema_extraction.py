@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark schema extraction on large REDCap exports
+
+Generates a REDCap-style export (records x events rows), then times
+extracting visits, participants and sites with SchemaAdapter.extract_all
+(compiled single-pass plan, cached date parsing) against the previous
+pipeline (each JSONPath expression tokenised and walked separately, every
+date parsed with strptime), and checks both give the same records.
+
+Usage:
+    python scripts/benchmark_schema_extraction.py
+    python scripts/benchmark_schema_extraction.py --records 20000 --events 10 --json
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.compliance.schema_adapter import SchemaAdapter, _PATH_TOKEN
+
+EVENTS = ["enrollment_arm_1", "baseline_arm_1"] + [f"week_{week}_arm_1" for week in range(1, 40)]
+PROCEDURES = ["blood_draw", "ecg", "vital_signs", "mri", "ct_scan", "fasting_labs", "lipid_panel"]
+
+
+def make_export(records=20000, events=10, sites=50, seed=42):
+    """Generate a REDCap export with one row per record and event"""
+    rng = random.Random(seed)
+    rows = []
+    for record in range(records):
+        start = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+        site = f"SITE-{rng.randrange(sites):03d}"
+        for number, event in enumerate(EVENTS[:events]):
+            day = number * 7
+            rows.append({
+                "record_id": f"{record:06d}",
+                "redcap_event_name": event,
+                "event_name": event.replace("_arm_1", "").replace("_", " ").title(),
+                "visit_date": (start + timedelta(days=day + rng.randrange(-2, 3))).strftime("%m/%d/%Y"),
+                "study_day": str(day),
+                "site_number": site,
+                "procedures_performed": "|".join(rng.sample(PROCEDURES, rng.randrange(4))),
+                "visit_complete": rng.choice(["0", "1", "2"])
+            })
+    return {
+        "data": rows,
+        "metadata": {"sites": [{"id": f"SITE-{site:03d}", "name": f"Site {site}"} for site in range(sites)]}
+    }
+
+
+def evaluate_uncompiled(document, expression):
+    """Tokenise and walk one expression per call, as evaluate_path did before compiled plans"""
+    matches = [document]
+    position = 1
+    while position < len(expression):
+        token = _PATH_TOKEN.match(expression, position)
+        position = token.end()
+        selected = []
+        for node in matches:
+            if token.group("key") is not None:
+                if isinstance(node, dict) and token.group("key") in node:
+                    selected.append(node[token.group("key")])
+            elif token.group("wildcard"):
+                if isinstance(node, list):
+                    selected.extend(node)
+                elif isinstance(node, dict):
+                    selected.extend(node.values())
+            elif token.group("index") is not None:
+                index = int(token.group("index"))
+                if isinstance(node, list) and -len(node) <= index < len(node):
+                    selected.append(node[index])
+            else:
+                items = node if isinstance(node, list) else [node]
+                key, value = token.group("filter_key"), token.group("filter_value")
+                equal = token.group("op") == "=="
+                selected.extend(
+                    item for item in items
+                    if isinstance(item, dict) and key in item and (str(item[key]) == value) == equal
+                )
+        matches = selected
+    return matches
+
+
+def extract_per_expression(adapter, document):
+    """Raw records with one traversal per extraction expression"""
+    return {
+        "visits": evaluate_uncompiled(document, adapter.schema["visit_extraction"]),
+        "participants": evaluate_uncompiled(document, adapter.schema["participant_extraction"]),
+        "sites": evaluate_uncompiled(document, adapter.schema["site_extraction"])
+    }
+
+
+def legacy_map_visit(adapter, raw):
+    """Map a visit the way the adapter did before, parsing every date"""
+    visit = {}
+    for standard, source in adapter.field_mappings.items():
+        visit[standard] = raw.get(source)
+    for standard, source in adapter.optional_fields.items():
+        if source in raw:
+            visit[standard] = raw[source]
+    date_value = visit.get("visit_date")
+    if "visit_time" not in visit:
+        if "time" in raw:
+            visit["visit_time"] = raw["time"]
+        elif isinstance(date_value, str) and "T" in date_value:
+            visit["visit_time"] = date_value.split("T", 1)[1][:5]
+    if isinstance(date_value, str):
+        try:
+            date_value = datetime.strptime(date_value.strip()[:10], adapter.date_format).date().isoformat()
+        except ValueError:
+            pass
+    visit["visit_date"] = date_value
+    procedures = visit.get("procedures")
+    if procedures is None or procedures == "":
+        visit["procedures"] = []
+    elif isinstance(procedures, (list, tuple)):
+        visit["procedures"] = [str(item) for item in procedures]
+    else:
+        visit["procedures"] = [item.strip() for item in re.split(r"[,|;]", str(procedures)) if item.strip()]
+    return visit
+
+
+def legacy_extract(adapter, document):
+    """Visits, participants and sites the way the adapter extracted them before"""
+    raw = extract_per_expression(adapter, document)
+    participant_field = adapter.field_mappings["participant_id"]
+    site_field = adapter.field_mappings["site_id"]
+    return {
+        "visits": [legacy_map_visit(adapter, visit) for visit in raw["visits"] if isinstance(visit, dict)],
+        "participants": [
+            {"participant_id": item.get(participant_field), "site_id": item.get(site_field)}
+            for item in raw["participants"] if isinstance(item, dict)
+        ],
+        "sites": [
+            dict(site, site_id=site.get("id", site.get(site_field)))
+            for site in raw["sites"] if isinstance(site, dict)
+        ]
+    }
+
+
+def best_of(function, repeats):
+    """Fastest wall time of repeated calls, plus the last result"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def run_benchmark(records=20000, events=10, repeats=5):
+    """Run the benchmark and return timings and the parity check"""
+    document = make_export(records, events)
+    adapter = SchemaAdapter("redcap")
+
+    traverse_old, old_raw = best_of(lambda: extract_per_expression(adapter, document), repeats)
+    traverse_new, new_raw = best_of(lambda: adapter.extraction_plan(document), repeats)
+    full_old, old_records = best_of(lambda: legacy_extract(adapter, document), repeats)
+    full_new, new_records = best_of(lambda: adapter.extract_all(document), repeats)
+
+    return {
+        "rows": len(document["data"]),
+        "participants": len(new_records["participants"]),
+        "traversal_per_expression_ms": round(traverse_old * 1000, 2),
+        "traversal_single_pass_ms": round(traverse_new * 1000, 2),
+        "traversal_speedup": round(traverse_old / traverse_new, 2),
+        "extract_previous_ms": round(full_old * 1000, 2),
+        "extract_all_ms": round(full_new * 1000, 2),
+        "extract_speedup": round(full_old / full_new, 2),
+        "rows_per_second": round(len(document["data"]) / full_new),
+        "results_match": old_raw == new_raw and old_records == new_records
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schema extraction on REDCap exports")
+    parser.add_argument("--records", type=int, default=20000, help="REDCap records in the export")
+    parser.add_argument("--events", type=int, default=10, help="Events per record")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats (best is reported)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.records, args.events, args.repeats)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"REDCap extraction: {results['rows']:,} rows, {results['participants']:,} participants")
+    print(f"  traversal, one per expression {results['traversal_per_expression_ms']:>9.2f} ms")
+    print(f"  traversal, single pass        {results['traversal_single_pass_ms']:>9.2f} ms  "
+          f"({results['traversal_speedup']}x)")
+    print(f"  extraction, previous pipeline {results['extract_previous_ms']:>9.2f} ms")
+    print(f"  extraction, extract_all       {results['extract_all_ms']:>9.2f} ms  "
+          f"({results['extract_speedup']}x, {results['rows_per_second']:,} rows/s)")
+    print(f"  results match: {results['results_match']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Load-test the tool server with captured or synthetic /run_tool traffic
+
+Starts server.py under the Flask development server or gunicorn (or targets
+an already running server with --url), drives it at a fixed concurrency
+and optionally a fixed arrival rate, and reports throughput, per-tool
+p50/p95/p99 latency, error rate and server CPU and RSS (see lib/loadtest.py).
+
+Traffic is either a capture file written by a server running with
+RUN_TOOL_CAPTURE_PATH=<file>, or a weighted mix of tools with inputs from
+the benchmark suite.
+
+Usage:
+    python scripts/benchmark_server_load.py --mix adverse_event_coder=3 edc_data_validator --requests 500
+    python scripts/benchmark_server_load.py --server gunicorn --workers 4 --capture traffic.jsonl --speed 2
+    python scripts/benchmark_server_load.py --server gunicorn --worker-class gthread --threads 8 \\
+        --mix sae_reconciliation lab_range_validator --rate 20 --duration 60 --json
+    python scripts/benchmark_server_load.py --url http://127.0.0.1:8210 --pid 1234 --capture traffic.jsonl
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.loadtest import LocalServer, format_report, parse_mix, read_capture, run_load, synthetic_mix
+
+
+def print_progress(completed, total):
+    """Progress line every 10% of requests"""
+    if total and (completed == total or completed % max(1, total // 10) == 0):
+        print(f"  {completed}/{total} requests", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the tool server")
+    traffic = parser.add_mutually_exclusive_group(required=True)
+    traffic.add_argument("--capture", help="Replay a capture file (JSON lines of tool, input, timestamp)")
+    traffic.add_argument("--mix", nargs="+", help="Synthetic mix as tool or tool=weight")
+    parser.add_argument("--requests", type=int, default=200, help="Requests in a synthetic mix")
+    parser.add_argument("--records", type=int, default=100, help="Records per synthetic request input")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client connections")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up for captured timing")
+    parser.add_argument("--duration", type=float, help="Stop issuing requests after this many seconds")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the mix and arrivals")
+    parser.add_argument("--url", help="Use a running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="Server process to sample CPU and RSS for (with --url)")
+    parser.add_argument("--server", choices=["flask", "gunicorn"], default="flask", help="Server to start")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--worker-class", help="gunicorn worker class (sync, gthread, gevent, ...)")
+    parser.add_argument("--server-log", help="Append the started server's output to this file")
+    parser.add_argument("--output", help="Write the JSON report to a file")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    if args.capture:
+        requests_ = read_capture(args.capture)
+    else:
+        try:
+            requests_ = synthetic_mix(parse_mix(args.mix), args.requests, args.records, args.seed)
+        except ValueError as e:
+            parser.error(str(e))
+    if not requests_:
+        parser.error("No requests to send")
+
+    def load(url, pid):
+        return run_load(url, requests_, args.concurrency, args.rate, args.speed, args.duration,
+                        args.timeout, pid, args.seed, progress=print_progress)
+
+    if args.url:
+        report = load(args.url.rstrip("/"), args.pid)
+    else:
+        server = LocalServer(args.server, args.workers, args.threads, args.worker_class, log_path=args.server_log)
+        with server:
+            report = load(server.url, server.pid)
+        report["settings"]["server"] = {"kind": args.server, "workers": args.workers, "threads": args.threads,
+                                        "worker_class": args.worker_class}
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark every tool at several input sizes and compare with the baseline
+
+Runs each tool's run() offline at each size in a fresh process (see
+lib/benchmarks.py), records wall time, peak RSS and output size, and
+compares the results with data/benchmarks/baseline.json. Exits with status
+1 if anything regressed beyond the tolerances.
+
+Usage:
+    python scripts/benchmark_tools.py
+    python scripts/benchmark_tools.py --tools adverse_event_coder sae_reconciliation --sizes 100 1000
+    python scripts/benchmark_tools.py --update-baseline
+    python scripts/benchmark_tools.py --output results.json --report report.txt --changes-only
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.benchmarks import (
+    DEFAULT_BASELINE_PATH, DEFAULT_SIZES, compare, format_report, list_tools, load_results,
+    run_suite, save_results
+)
+
+
+def print_progress(tool, size, measurement):
+    """One line per measurement while the suite runs"""
+    if measurement["status"] == "ok":
+        detail = (f"{measurement['seconds']:.4f} s  {measurement['peak_rss_mb']:.0f} MB  "
+                  f"{measurement['output_bytes']:,} bytes out")
+        if measurement.get("scaled") is None:
+            detail += "  (fixed input)"
+    else:
+        detail = f"{measurement['status']} {measurement.get('error', '')}"
+    print(f"  {tool:<34} {size:>7}  {detail}", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tools and flag regressions against a baseline")
+    parser.add_argument("--tools", nargs="+", help="Tools to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Input sizes in records")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds allowed per measurement")
+    parser.add_argument("--repeats", type=int, default=3, help="Maximum timing runs per measurement")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline JSON to compare with")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--rss-tolerance", type=float, default=0.25, help="Allowed peak RSS growth")
+    parser.add_argument("--min-seconds", type=float, default=0.01, help="Ignore time changes smaller than this")
+    parser.add_argument("--output", help="Write this run's results to a JSON file")
+    parser.add_argument("--report", help="Write the comparison report to a file as well as stdout")
+    parser.add_argument("--changes-only", action="store_true", help="Only list rows that changed")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the baseline")
+    parser.add_argument("--list", action="store_true", help="List the tools that would run and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(list_tools()))
+        return 0
+
+    unknown = set(args.tools or []) - set(list_tools())
+    if unknown:
+        parser.error(f"Unknown or excluded tools: {', '.join(sorted(unknown))}")
+
+    results = run_suite(args.tools, args.sizes, args.timeout, args.repeats, progress=print_progress)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.update_baseline:
+        if args.tools and Path(args.baseline).exists():
+            # Partial runs update only the tools that were run
+            baseline = load_results(args.baseline)
+            baseline["results"].update(results["results"])
+            baseline.update({key: results[key] for key in ("created", "environment", "settings")})
+            results = baseline
+        save_results(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not Path(args.baseline).exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    baseline = load_results(args.baseline)
+    rows = compare(baseline, results, args.time_tolerance, args.rss_tolerance, args.min_seconds)
+    report = format_report(rows, args.changes_only)
+    header = (f"Baseline {baseline['created']} ({baseline['environment']['platform']}, "
+              f"Python {baseline['environment']['python']}) vs now ({results['environment']['platform']}, "
+              f"Python {results['environment']['python']})\n")
+    print(header + report)
+    if args.report:
+        Path(args.report).write_text(header + report + "\n", encoding="utf-8")
+
+    return 1 if any(row["verdict"] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
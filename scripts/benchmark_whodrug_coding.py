@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Benchmark WHO Drug coding and interaction checking at dictionary scale
+
+Writes a synthetic WHO Drug CSV extract (drugs with several trade names
+each) and an interaction table mixing ingredient pairs and ATC class
+pairs, then times building and loading the index, coding a medication
+listing with WhoDrugCoder.code_batch, and checking every subject's
+medications against the InteractionGraph. A sample of subjects is also
+checked the previous way (every known pair tested against the subject's
+drug names) to extrapolate its cost for the whole listing.
+
+Usage:
+    python scripts/benchmark_whodrug_coding.py
+    python scripts/benchmark_whodrug_coding.py --drugs 30000 --pairs 50000 --medications 50000 --json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.coding.whodrug import InteractionGraph, WhoDrugCoder, WhoDrugDictionary, load_whodrug
+
+SYLLABLES = ["ab", "ac", "al", "am", "ar", "ba", "cef", "cil", "do", "fen", "ga", "lo", "ma", "mi", "ne", "ni",
+             "pra", "pro", "qui", "ri", "sar", "ta", "ti", "tra", "va", "xa", "zo"]
+STEMS = ["pril", "sartan", "olol", "statin", "mab", "azole", "cillin", "floxacin", "dipine", "tidine", "parin",
+         "prazole", "triptan", "setron", "vir"]
+ATC_GROUPS = ["A02BC", "A10BA", "B01AA", "B01AC", "B01AF", "C07AB", "C08CA", "C09AA", "C09CA", "C10AA", "J01CA",
+              "J01MA", "J05AB", "L01XC", "M01AE", "N02CC", "A04AA"]
+ROUTES = ["oral", "intravenous", "subcutaneous", "topical", "intramuscular"]
+
+
+def make_extract(path, drugs=30000, trade_names=3, seed=5):
+    """Write a WHO Drug CSV extract of drugs, each with its generic name and trade_names trade names; return the drug rows"""
+    rng = random.Random(seed)
+    rows, seen = [], set()
+    while len(rows) < drugs:
+        name = ("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) + rng.choice(STEMS)).upper()
+        if name in seen:
+            continue
+        seen.add(name)
+        group = rng.choice(ATC_GROUPS)
+        rows.append({"drug_name": name, "drug_code": f"{len(rows):08d}", "atc_code": f"{group}{len(rows) % 100:02d}",
+                     "routes": ";".join(rng.sample(ROUTES, rng.randint(1, 2)))})
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("name,drug_name,drug_code,atc_code,atc_text,therapeutic_class,anatomical_class,routes,ingredients\n")
+        for row in rows:
+            names = [row["drug_name"].capitalize()]
+            names += ["".join(rng.choice(SYLLABLES) for _ in range(4)).capitalize() for _ in range(trade_names)]
+            for name in names:
+                f.write(f"{name},{row['drug_name']},{row['drug_code']},{row['atc_code']},{row['drug_name'].capitalize()},"
+                        f"Class {row['atc_code'][:4]},Group {row['atc_code'][0]},{row['routes']},{row['drug_name']}\n")
+    return rows
+
+
+def make_interactions(rows, pairs=50000, seed=9):
+    """Interaction records: ingredient pairs, plus one ATC class pair per 5,000"""
+    rng = random.Random(seed)
+    records = []
+    for number in range(pairs):
+        if number % 5000 == 0:
+            first, second = rng.choice(ATC_GROUPS)[:4], rng.choice(ATC_GROUPS)
+        else:
+            first, second = rng.choice(rows)["drug_name"], rng.choice(rows)["drug_name"]
+        records.append((first, second, "Synthetic interaction", "moderate", "Monitor closely"))
+    return records
+
+
+def make_listing(rows, medications=50000, per_subject=8, seed=13):
+    """Medication verbatims for subjects: generic names, names with doses and misspellings"""
+    rng = random.Random(seed)
+    listing = []
+    for number in range(medications):
+        name = rng.choice(rows)["drug_name"].lower()
+        kind = rng.random()
+        if kind < 0.5:
+            verbatim = name
+        elif kind < 0.8:
+            verbatim = f"{name} {rng.choice([5, 10, 20, 40, 81, 500])} mg"
+        else:
+            position = rng.randrange(len(name))
+            verbatim = name[:position] + name[position + 1:]
+        listing.append({"verbatim_name": verbatim, "subject_id": f"S{number // per_subject:05d}"})
+    return listing
+
+
+def legacy_check(records, drug_names):
+    """The previous check_drug_interactions: test every known pair against the drug names"""
+    return [(first, second) for first, second, *_ in records if first in drug_names and second in drug_names]
+
+
+def run_benchmark(drugs=30000, pairs=50000, medications=50000, legacy_sample=50):
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "whodrug.csv")
+        rows = make_extract(path, drugs)
+        records = make_interactions(rows, pairs)
+        listing = make_listing(rows, medications)
+
+        started = time.perf_counter()
+        WhoDrugDictionary.from_csv(path)
+        build_seconds = time.perf_counter() - started
+
+        index_dir = str(Path(directory) / "index")
+        load_whodrug(path, index_dir)
+        started = time.perf_counter()
+        dictionary = load_whodrug(path, index_dir)
+        load_seconds = time.perf_counter() - started
+
+        coder = WhoDrugCoder(dictionary)
+        started = time.perf_counter()
+        coded = coder.code_batch([med["verbatim_name"] for med in listing])
+        code_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    graph = InteractionGraph.from_records(records)
+    graph_seconds = time.perf_counter() - started
+
+    by_subject = {}
+    for med, match in zip(listing, coded):
+        if match:
+            by_subject.setdefault(med["subject_id"], []).append(match)
+    started = time.perf_counter()
+    found = sum(len(graph.check(subject_medications)) for subject_medications in by_subject.values())
+    check_seconds = time.perf_counter() - started
+
+    sample = list(by_subject.values())[:legacy_sample]
+    started = time.perf_counter()
+    for subject_medications in sample:
+        legacy_check(records, [med["drug_name"] for med in subject_medications])
+    legacy_per_subject = (time.perf_counter() - started) / max(1, len(sample))
+    legacy_estimate = legacy_per_subject * len(by_subject)
+
+    return {
+        "drugs": len(rows),
+        "names": len(dictionary),
+        "interaction_pairs": len(graph),
+        "medications": len(listing),
+        "subjects": len(by_subject),
+        "coded": sum(1 for match in coded if match),
+        "interactions_found": found,
+        "build_seconds": round(build_seconds, 2),
+        "load_seconds": round(load_seconds, 3),
+        "code_batch_seconds": round(code_seconds, 2),
+        "medications_per_second": round(len(listing) / code_seconds),
+        "graph_build_seconds": round(graph_seconds, 3),
+        "interaction_check_seconds": round(check_seconds, 3),
+        "legacy_check_estimate_seconds": round(legacy_estimate, 2),
+        "check_speedup": round(legacy_estimate / check_seconds) if check_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WHO Drug coding and interaction checking")
+    parser.add_argument("--drugs", type=int, default=30000, help="Drugs in the synthetic extract")
+    parser.add_argument("--pairs", type=int, default=50000, help="Known interaction pairs")
+    parser.add_argument("--medications", type=int, default=50000, help="Medication records in the listing")
+    parser.add_argument("--legacy-sample", type=int, default=50, help="Subjects checked the previous way")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.drugs, args.pairs, args.medications, args.legacy_sample)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"WHO Drug coding: {results['drugs']:,} drugs ({results['names']:,} names), "
+          f"{results['medications']:,} medications for {results['subjects']:,} subjects ({results['coded']:,} coded)")
+    print(f"  parse + index extract       {results['build_seconds']:>8.2f} s")
+    print(f"  load saved index            {results['load_seconds']:>8.3f} s")
+    print(f"  code_batch listing          {results['code_batch_seconds']:>8.2f} s  "
+          f"({results['medications_per_second']:,} medications/s)")
+    print(f"Interactions: {results['interaction_pairs']:,} known pairs, {results['interactions_found']:,} found")
+    print(f"  build graph                 {results['graph_build_seconds']:>8.3f} s")
+    print(f"  check all subjects          {results['interaction_check_seconds']:>8.3f} s")
+    print(f"  previous pair scan          {results['legacy_check_estimate_seconds']:>8.2f} s  "
+          f"({results['check_speedup']:,}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic clinical trial dataset
+
+Writes a seeded synthetic study (see lib/synthetic.py) to a directory:
+edc_export.csv and labs.csv in the CSV shapes edc_data_validator and
+lab_range_validator read, one JSON file per record domain, and
+tool_inputs/<tool>.json with ready-made run() inputs.
+
+Usage:
+    python scripts/generate_synthetic_study.py --output synthetic_study
+    python scripts/generate_synthetic_study.py --subjects 10000 --sites 50 --seed 7 --output /tmp/study
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.synthetic import generate_study
+
+DOMAINS = ["sites", "subjects", "visits", "labs", "adverse_events", "edc_saes", "safety_db_saes",
+           "medications", "diary_entries", "audit_trail", "queries"]
+
+
+def write_study(study, output):
+    """Write every domain, the CSV exports and tool inputs under output"""
+    output.mkdir(parents=True, exist_ok=True)
+    (output / "edc_export.csv").write_text(study.edc_csv(), encoding="utf-8")
+    (output / "labs.csv").write_text(study.lab_csv(), encoding="utf-8")
+    for domain in DOMAINS:
+        with open(output / f"{domain}.json", "w", encoding="utf-8") as f:
+            json.dump(getattr(study, domain), f)
+
+    inputs_dir = output / "tool_inputs"
+    inputs_dir.mkdir(exist_ok=True)
+    for tool, input_data in study.tool_inputs().items():
+        with open(inputs_dir / f"{tool}.json", "w", encoding="utf-8") as f:
+            json.dump(input_data, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic clinical trial dataset")
+    parser.add_argument("--subjects", type=int, default=1000, help="Number of subjects")
+    parser.add_argument("--sites", type=int, default=20, help="Number of sites")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--study-id", default="SYN-001", help="Study identifier")
+    parser.add_argument("--diary-days", type=int, default=28, help="Diary days per subject")
+    parser.add_argument("--discrepancy-rate", type=float, default=0.1, help="Share of data seeded with errors")
+    parser.add_argument("--output", required=True, help="Directory to write the dataset to")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    study = generate_study(
+        subjects=args.subjects, sites=args.sites, seed=args.seed, study_id=args.study_id,
+        diary_days=args.diary_days, discrepancy_rate=args.discrepancy_rate
+    )
+    write_study(study, Path(args.output))
+
+    print(f"Generated {args.study_id} (seed {args.seed}) in {time.perf_counter() - started:.1f} s -> {args.output}")
+    for domain, count in study.record_counts().items():
+        print(f"  {domain:<16} {count:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from scripts.mcp_server import MCPServer
 from tools.schedule_converter_azure import ScheduleConverterWithAzure as ScheduleConverter
 
+# Directory that convert_bulk inputs and outputs must lie under; bulk
+# conversion is disabled when unset
+BULK_BASE_DIR_ENV = "SCHEDULE_BULK_BASE_DIR"
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -89,6 +93,57 @@ class ScheduleConverterMCPServer(MCPServer):
             handler=self._handle_convert_schedule
         )
 
+        # Bulk conversion of many files
+        self.register_tool(
+            name="convert_schedules_bulk",
+            description="Convert a directory or list of schedule files in parallel, mapping each distinct structure once",
+            input_schema={
+                "type": "object",
+                "properties": {
+                    "inputs": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Schedule files and/or directories (csv, json, ndjson, txt), "
+                                       "relative to the server's bulk base directory"
+                    },
+                    "output_dir": {
+                        "type": "string",
+                        "description": "Directory for per-file NDJSON results and the summary report, "
+                                       "relative to the server's bulk base directory"
+                    },
+                    "target_format": {
+                        "type": "string",
+                        "enum": ["CDISC_SDTM", "FHIR_R4", "OMOP_CDM"],
+                        "default": "CDISC_SDTM",
+                        "description": "Target standard format for conversion"
+                    },
+                    "organization_id": {
+                        "type": "string",
+                        "description": "Optional organization ID for cached mappings"
+                    },
+                    "confidence_threshold": {
+                        "type": "number",
+                        "minimum": 0,
+                        "maximum": 100,
+                        "default": 85,
+                        "description": "Minimum confidence threshold for autonomous conversion"
+                    },
+                    "max_workers": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Worker processes (default: CPU count)"
+                    },
+                    "recursive": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Include files in subdirectories"
+                    }
+                },
+                "required": ["inputs", "output_dir"]
+            },
+            handler=self._handle_convert_bulk
+        )
+
         # Analyze schedule structure tool
         self.register_tool(
             name="analyze_schedule",
@@ -228,6 +283,56 @@ class ScheduleConverterMCPServer(MCPServer):
                 "confidence": 0
             }
 
+    def _handle_convert_bulk(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a bulk conversion request"""
+        try:
+            inputs = args.get("inputs")
+            output_dir = args.get("output_dir")
+            target_format = args.get("target_format", "CDISC_SDTM")
+            organization_id = args.get("organization_id")
+
+            if not isinstance(inputs, list) or not inputs or not all(isinstance(i, str) and i for i in inputs):
+                return {"error": "inputs must be a non-empty list of paths", "success": False}
+            if not isinstance(output_dir, str) or not output_dir:
+                return {"error": "output_dir must be a path", "success": False}
+            base_dir = os.getenv(BULK_BASE_DIR_ENV)
+            if not base_dir:
+                return {"error": f"Bulk conversion is disabled; set {BULK_BASE_DIR_ENV}", "success": False}
+
+            logger.info(f"Bulk converting {len(inputs)} input(s): target={target_format}, org={organization_id}")
+
+            report = self.converter.convert_bulk(
+                inputs=inputs,
+                output_dir=output_dir,
+                target_format=target_format,
+                organization_id=organization_id,
+                confidence_threshold=args.get("confidence_threshold", 85),
+                max_workers=args.get("max_workers"),
+                recursive=args.get("recursive", False),
+                base_dir=base_dir
+            )
+
+            logger.info(
+                f"Bulk conversion completed: {report['succeeded']}/{report['files']} files "
+                f"in {report['timing']['total_seconds']}s"
+            )
+
+            report["metadata"] = {
+                "converter_version": self.version,
+                "target_format": target_format,
+                "organization_id": organization_id,
+                "autonomous": True
+            }
+
+            return report
+
+        except Exception as e:
+            logger.error(f"Bulk conversion failed: {e}")
+            return {
+                "error": str(e),
+                "success": False
+            }
+
     def _handle_analyze_schedule(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze schedule structure without converting"""
         try:
@@ -8,7 +8,7 @@ import json
 import subprocess
 import sys
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 class ScheduleConverterClient:
@@ -155,6 +155,55 @@ class ScheduleConverterClient:
 
         return {"error": "Failed to get response from MCP server"}
 
+    def convert_bulk(self,
+                     inputs: List[str],
+                     output_dir: str,
+                     target_format: str = "CDISC_SDTM",
+                     organization_id: str = None,
+                     confidence_threshold: float = 85,
+                     max_workers: int = None,
+                     recursive: bool = False) -> Dict[str, Any]:
+        """
+        Convert many schedule files in parallel
+
+        Args:
+            inputs: Schedule files and/or directories
+            output_dir: Directory for per-file NDJSON results and the summary report
+            target_format: Target format (CDISC_SDTM, FHIR_R4, OMOP_CDM)
+            organization_id: Optional org ID for caching
+            confidence_threshold: Minimum confidence for conversion
+            max_workers: Worker processes (defaults to the CPU count)
+            recursive: Include files in subdirectories
+
+        Returns:
+            Summary report with per-file results and timing
+        """
+        if not self.initialized:
+            if not self.start():
+                return {"error": "Failed to start MCP server"}
+
+        arguments = {
+            "inputs": [os.path.abspath(path) for path in inputs],
+            "output_dir": os.path.abspath(output_dir),
+            "target_format": target_format,
+            "organization_id": organization_id,
+            "confidence_threshold": confidence_threshold,
+            "recursive": recursive
+        }
+        if max_workers:
+            arguments["max_workers"] = max_workers
+
+        response = self._send_request("tools/call", {
+            "name": "convert_schedules_bulk",
+            "arguments": arguments
+        })
+
+        if response and "result" in response:
+            content = response["result"]["content"][0]["text"]
+            return json.loads(content)
+
+        return {"error": "Failed to get response from MCP server"}
+
     def analyze_schedule(self, file_content: str, file_type: str = "csv") -> Dict[str, Any]:
         """
         Analyze schedule structure without converting
@@ -253,25 +302,76 @@ Week 2,14,Safety Assessment|ECG"""
         print("✅ Server stopped")
 
 
+def bulk_convert(args):
+    """Run a bulk conversion from the command line and print the summary"""
+    if not args.output:
+        print("❌ --output is required for bulk conversion (directory for results)")
+        sys.exit(1)
+
+    client = ScheduleConverterClient()
+
+    try:
+        if not client.start():
+            print("Failed to start MCP server")
+            sys.exit(1)
+
+        report = client.convert_bulk(
+            inputs=args.file,
+            output_dir=args.output,
+            target_format=args.format,
+            organization_id=args.org,
+            max_workers=args.workers,
+            recursive=args.recursive
+        )
+
+        if "error" in report:
+            print(f"❌ Bulk conversion failed: {report['error']}")
+            sys.exit(1)
+
+        timing = report["timing"]
+        print(f"Converted {report['succeeded']}/{report['files']} files "
+              f"({report['structure_groups']} distinct structures) to {args.format}")
+        print(f"   Rows: {report['total_rows']}  Records: {report['total_records']}")
+        print(f"   Time: {timing['total_seconds']}s ({timing['rows_per_second']} rows/s, "
+              f"{report['workers']} workers)")
+        for result in report["results"]:
+            if not result.get("success"):
+                print(f"   ❌ {result['file']}: {result.get('error')}")
+        print(f"✅ Summary report: {report['summary_path']}")
+
+        if report["failed"]:
+            sys.exit(1)
+
+    finally:
+        client.stop()
+
+
 # Simple command-line interface
 def main():
     """Command-line interface for the Schedule Converter"""
     import argparse
 
     parser = argparse.ArgumentParser(description="Convert clinical trial schedules")
-    parser.add_argument("file", help="Path to schedule file")
+    parser.add_argument("file", nargs="+",
+                       help="Path to schedule file; several files or a directory run a bulk conversion")
     parser.add_argument("--type", default="csv", choices=["csv", "json", "text"],
                        help="File type (default: csv)")
     parser.add_argument("--format", default="CDISC_SDTM",
                        choices=["CDISC_SDTM", "FHIR_R4", "OMOP_CDM"],
                        help="Target format (default: CDISC_SDTM)")
     parser.add_argument("--org", help="Organization ID for caching")
-    parser.add_argument("--output", help="Output file (optional)")
+    parser.add_argument("--output", help="Output file (optional); output directory for bulk conversion")
+    parser.add_argument("--workers", type=int, help="Worker processes for bulk conversion (default: CPU count)")
+    parser.add_argument("--recursive", action="store_true", help="Include subdirectories in bulk conversion")
 
     args = parser.parse_args()
 
+    if len(args.file) > 1 or os.path.isdir(args.file[0]):
+        bulk_convert(args)
+        return
+
     # Read input file
-    with open(args.file, 'r') as f:
+    with open(args.file[0], 'r') as f:
         content = f.read()
 
     # Create client and convert
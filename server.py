@@ -15,6 +15,8 @@ if not hasattr(werkzeug.urls, "url_quote"):
 from flask import Flask, request, jsonify, render_template_string
 from dotenv import load_dotenv
 
+from lib.loadtest import capture_request
+
 # --- Configuration Loading ---
 # This logic dynamically loads secrets from Azure Key Vault if in production,
 # otherwise it falls back to a local .env file for development.
@@ -247,6 +249,9 @@ def run_tool(tool_name):
         app.logger.error("Request received with no JSON payload.")
         return jsonify({"error": "Request must contain a JSON payload."}), 400
 
+    # Record traffic for load-test replays when RUN_TOOL_CAPTURE_PATH is set
+    capture_request(tool_name, input_data)
+
     try:
         # Call the 'run' function within the tool's module
         result = tool_module.run(input_data)
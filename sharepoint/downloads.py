@@ -0,0 +1,227 @@
+"""
+Streaming, resumable file downloads for SharePoint.
+
+Downloads are streamed to a ``.part`` file in fixed-size chunks and
+atomically renamed into place, so memory use stays flat regardless of
+file size. Large files can optionally be fetched as several concurrent
+HTTP Range requests. Progress is recorded in a ``.part.json`` sidecar so
+an interrupted download resumes where it stopped as long as the remote
+item's eTag is unchanged.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Callable
+
+import requests
+from requests.exceptions import RequestException
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB streamed per iter_content chunk
+STATE_SAVE_INTERVAL = 8 * 1024 * 1024  # persist progress every 8 MiB per range
+
+Fetch = Callable[[Dict[str, str]], requests.Response]
+
+
+@dataclass
+class DownloadResult:
+    """Summary of a completed download."""
+    local_path: str
+    size: int
+    bytes_downloaded: int
+    resumed_bytes: int
+    elapsed_seconds: float
+    ranges: int = 1
+
+    @property
+    def throughput_mbps(self) -> float:
+        """Download throughput in megabytes per second."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.bytes_downloaded / self.elapsed_seconds / (1024 * 1024)
+
+
+class RangeDownloader:
+    """
+    Download one remote file to disk, optionally in parallel byte ranges.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetch,
+        local_path: str,
+        size: Optional[int] = None,
+        etag: Optional[str] = None,
+        parallel_ranges: int = 1,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        """
+        Initialize the downloader.
+
+        Args:
+            fetch: Callable sending a streaming GET with the given extra
+                headers and returning the response
+            local_path: Final destination path
+            size: Remote file size in bytes (enables ranges and resume)
+            etag: Remote eTag; a saved partial download is only resumed
+                if it was made from the same version
+            parallel_ranges: Number of concurrent Range requests
+            chunk_size: Bytes read per streamed chunk
+        """
+        self.fetch = fetch
+        self.local_path = local_path
+        self.part_path = f"{local_path}.part"
+        self.state_path = f"{local_path}.part.json"
+        self.size = size or 0
+        self.etag = etag
+        self.parallel_ranges = max(1, parallel_ranges) if self.size else 1
+        self.chunk_size = chunk_size
+        self._state_lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+
+    def _plan_ranges(self) -> List[List[int]]:
+        """Split the file into [start, end, done] ranges."""
+        if not self.size:
+            return [[0, -1, 0]]
+        count = min(self.parallel_ranges, max(1, self.size // self.chunk_size))
+        step = -(-self.size // count)  # ceil division
+        return [[start, min(start + step, self.size) - 1, 0] for start in range(0, self.size, step)]
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        """Load saved progress if it matches the remote file."""
+        if not (os.path.exists(self.state_path) and os.path.exists(self.part_path)):
+            return None
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not (self.etag and self.size) or state.get('etag') != self.etag or state.get('size') != self.size:
+            logger.info(f"Discarding stale partial download of {self.local_path}")
+            return None
+        return state
+
+    def _save_state(self):
+        """Persist progress atomically."""
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _prepare(self) -> int:
+        """Load or initialise state and the .part file; return resumed bytes."""
+        directory = os.path.dirname(self.local_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        state = self._load_state()
+        if state is not None:
+            self._state = state
+            resumed = sum(done for _, _, done in state['ranges'])
+            logger.info(f"Resuming download of {self.local_path} ({resumed} bytes already on disk)")
+            return resumed
+
+        self._state = {'etag': self.etag, 'size': self.size, 'ranges': self._plan_ranges()}
+        with open(self.part_path, 'wb') as f:
+            if self.size:
+                f.truncate(self.size)
+        self._save_state()
+        return 0
+
+    def _download_range(self, index: int):
+        """Stream one byte range into its slot in the .part file."""
+        start, end, done = self._state['ranges'][index]
+        if end >= 0 and start + done > end:
+            return
+
+        headers = {}
+        if self.size and (start + done > 0 or end < self.size - 1):
+            headers['Range'] = f"bytes={start + done}-{end}"
+        elif not self.size:
+            done = 0  # unknown size: no ranges, always fetch the whole file
+
+        response = self.fetch(headers)
+        try:
+            if response.status_code == 200 and headers:
+                if len(self._state['ranges']) > 1:
+                    raise RequestException("Server ignored Range request; parallel download not possible")
+                # Server sent the whole file: start this (only) range over
+                done = 0
+            elif response.status_code not in (200, 206):
+                raise RequestException(f"Failed to download file: {response.status_code}")
+
+            with open(self.part_path, 'r+b') as f:
+                f.seek(start + done)
+                unsaved = 0
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    done += len(chunk)
+                    unsaved += len(chunk)
+                    if unsaved >= STATE_SAVE_INTERVAL:
+                        f.flush()
+                        self._record(index, done)
+                        unsaved = 0
+                f.flush()
+                if end < 0:
+                    f.truncate(done)
+            self._record(index, done)
+        finally:
+            response.close()
+
+    def _record(self, index: int, done: int):
+        """Record progress of a range."""
+        with self._state_lock:
+            self._state['ranges'][index][2] = done
+            self._save_state()
+
+    def run(self) -> DownloadResult:
+        """
+        Download the file, resuming saved progress when possible.
+
+        Returns:
+            DownloadResult with size and throughput
+
+        Raises:
+            RequestException: If any range fails; progress is kept for resume
+        """
+        started = time.monotonic()
+        resumed = self._prepare()
+        ranges = self._state['ranges']
+
+        if len(ranges) == 1:
+            self._download_range(0)
+        else:
+            with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix='sharepoint-range') as executor:
+                futures = [executor.submit(self._download_range, i) for i in range(len(ranges))]
+                errors = [f.exception() for f in futures if f.exception() is not None]
+            if errors:
+                raise errors[0]
+
+        written = sum(done for _, _, done in self._state['ranges'])
+        if self.size and written != self.size:
+            raise RequestException(f"Incomplete download: got {written} of {self.size} bytes")
+
+        os.replace(self.part_path, self.local_path)
+        os.remove(self.state_path)
+
+        result = DownloadResult(
+            local_path=self.local_path,
+            size=written,
+            bytes_downloaded=written - resumed,
+            resumed_bytes=resumed,
+            elapsed_seconds=time.monotonic() - started,
+            ranges=len(ranges)
+        )
+        logger.info(
+            f"Downloaded {self.local_path}: {result.size} bytes in {result.elapsed_seconds:.2f}s "
+            f"({result.throughput_mbps:.2f} MB/s, {result.ranges} range(s), {resumed} bytes resumed)"
+        )
+        return result
@@ -0,0 +1,602 @@
+"""
+Incremental local mirror of a SharePoint document library.
+
+Follows the Microsoft Graph ``/delta`` feed of a drive and applies only the
+changes since the last run to a local SQLite metadata index (and, optionally,
+a local copy of file content). The delta token is persisted between runs so
+TMF and regulatory tools can query the library locally instead of
+re-listing it through Graph every time.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Union, Tuple
+
+from requests.exceptions import RequestException
+
+from sharepoint.sharepoint_client import SharePointClient, SharePointFile, SharePointFolder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "sharepoint_mirror.db"
+
+
+@dataclass
+class SyncResult:
+    """Summary of one mirror sync run."""
+    added: int = 0
+    updated: int = 0
+    deleted: int = 0
+    pages: int = 0
+    full_resync: bool = False
+    downloaded: int = 0
+    elapsed_seconds: float = 0.0
+
+
+class DriveMirror:
+    """
+    Local SQLite mirror of one drive, kept current with Graph delta queries.
+
+    Paths are relative to the drive root without a leading slash, matching
+    the paths accepted by SharePointClient.
+    """
+
+    DELTA_PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        client: SharePointClient,
+        drive_id: Optional[str] = None,
+        db_path: Optional[str] = None,
+        content_dir: Optional[str] = None,
+        content_workers: int = 4
+    ):
+        """
+        Initialize the mirror.
+
+        Args:
+            client: SharePointClient for the site owning the drive
+            drive_id: Drive ID (defaults to site's default drive)
+            db_path: SQLite database path (defaults to env var
+                SHAREPOINT_MIRROR_DB or sharepoint_mirror.db)
+            content_dir: Directory to mirror file content into; metadata
+                only when None
+            content_workers: Concurrent content downloads
+        """
+        self.client = client
+        self.drive_id = drive_id or client.get_default_drive_id()
+        self.db_path = db_path or os.getenv('SHAREPOINT_MIRROR_DB', DEFAULT_DB_PATH)
+        self.content_dir = content_dir
+        self.content_workers = max(1, content_workers)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize the SQLite schema."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    drive_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    parent_id TEXT,
+                    name TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    is_folder INTEGER NOT NULL DEFAULT 0,
+                    size INTEGER DEFAULT 0,
+                    mime_type TEXT,
+                    etag TEXT,
+                    ctag TEXT,
+                    created_datetime TEXT,
+                    last_modified_datetime TEXT,
+                    web_url TEXT,
+                    created_by TEXT,
+                    modified_by TEXT,
+                    child_count INTEGER DEFAULT 0,
+                    content_path TEXT,
+                    generation INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (drive_id, id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_path ON items(drive_id, path);
+                CREATE INDEX IF NOT EXISTS idx_items_parent ON items(drive_id, parent_id);
+                CREATE INDEX IF NOT EXISTS idx_items_name ON items(drive_id, name COLLATE NOCASE);
+                CREATE INDEX IF NOT EXISTS idx_items_modified ON items(drive_id, last_modified_datetime);
+
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    drive_id TEXT PRIMARY KEY,
+                    delta_link TEXT,
+                    generation INTEGER NOT NULL DEFAULT 0,
+                    last_sync TEXT
+                );
+            """)
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _delta_url(self) -> str:
+        """Build the Graph URL starting a full delta enumeration."""
+        return f"{self.client.GRAPH_BASE_URL}/sites/{self.client.site_id}/drives/{self.drive_id}/root/delta"
+
+    def _get_state(self) -> Tuple[Optional[str], int]:
+        """Return the stored delta link and generation."""
+        row = self._conn.execute(
+            "SELECT delta_link, generation FROM sync_state WHERE drive_id = ?", (self.drive_id,)
+        ).fetchone()
+        return (row['delta_link'], row['generation']) if row else (None, 0)
+
+    def _save_state(self, delta_link: Optional[str], generation: int):
+        """Persist the delta link after a completed run."""
+        self._conn.execute("""
+            INSERT INTO sync_state (drive_id, delta_link, generation, last_sync)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(drive_id) DO UPDATE SET
+                delta_link = excluded.delta_link,
+                generation = excluded.generation,
+                last_sync = excluded.last_sync
+        """, (self.drive_id, delta_link, generation, datetime.now(timezone.utc).isoformat()))
+
+    def _fetch_page(self, url: str, params: Optional[Dict[str, Any]]):
+        """Fetch one delta page; returns None when the token has expired."""
+        if params:
+            response = self.client.auth_client.make_graph_request(method='GET', url=url, params=params)
+        else:
+            response = self.client.auth_client.make_graph_request(method='GET', url=url)
+
+        if response.status_code == 410:
+            return None
+        if response.status_code != 200:
+            raise RequestException(f"Failed to get drive changes: {response.status_code} - {response.text}")
+        return response.json()
+
+    def sync(self, full: bool = False) -> SyncResult:
+        """
+        Apply changes since the last sync to the local mirror.
+
+        The first run (or ``full=True``, or an expired delta token) walks
+        the whole drive; items no longer present are then removed.
+
+        Args:
+            full: Ignore the stored delta token and re-enumerate the drive
+
+        Returns:
+            SyncResult with change counts
+
+        Raises:
+            RequestException: If Graph cannot be queried; the stored delta
+                token is left unchanged so the next run repeats the changes
+        """
+        started = time.monotonic()
+        with self._lock:
+            delta_link, generation = self._get_state()
+            result = SyncResult(full_resync=full or not delta_link)
+            generation += 1
+
+            url, params = (self._delta_url(), {'$top': self.DELTA_PAGE_SIZE}) if result.full_resync else (delta_link, None)
+            downloads: Dict[str, str] = {}
+            pending: List[Dict[str, Any]] = []
+
+            while url:
+                data = self._fetch_page(url, params)
+                if data is None:
+                    if result.full_resync:
+                        raise RequestException("Failed to get drive changes: delta enumeration expired")
+                    logger.info(f"Delta token for drive {self.drive_id} expired; re-enumerating")
+                    result = SyncResult(full_resync=True)
+                    url, params = self._delta_url(), {'$top': self.DELTA_PAGE_SIZE}
+                    pending.clear()
+                    continue
+
+                result.pages += 1
+                for item in data.get('value', []):
+                    self._apply(item, generation, result, pending, downloads)
+                self._retry_pending(generation, result, pending, downloads)
+                self._conn.commit()
+
+                url, params = data.get('@odata.nextLink'), None
+                delta_link = data.get('@odata.deltaLink', delta_link)
+
+            for item in pending:
+                logger.warning(f"Could not place item {item.get('id')} ({item.get('name')}): parent unknown")
+
+            if result.full_resync:
+                result.deleted += self._remove_stale(generation)
+            self._save_state(delta_link, generation)
+            self._conn.commit()
+
+        if self.content_dir and downloads:
+            result.downloaded = self._download_content(downloads)
+
+        result.elapsed_seconds = time.monotonic() - started
+        logger.info(
+            f"Synced drive {self.drive_id}: +{result.added} ~{result.updated} -{result.deleted} "
+            f"in {result.pages} page(s), {result.elapsed_seconds:.2f}s"
+        )
+        return result
+
+    def _parent_path(self, item: Dict[str, Any]) -> Optional[str]:
+        """Resolve the mirrored path of an item's parent folder."""
+        parent = item.get('parentReference') or {}
+        if parent.get('id'):
+            row = self._conn.execute(
+                "SELECT path FROM items WHERE drive_id = ? AND id = ?", (self.drive_id, parent['id'])
+            ).fetchone()
+            if row is not None:
+                return row['path']
+        # Some delta responses carry the parent path itself
+        graph_path = parent.get('path')
+        if graph_path and 'root:' in graph_path:
+            return graph_path.split('root:', 1)[1].strip('/')
+        return None
+
+    def _apply(
+        self,
+        item: Dict[str, Any],
+        generation: int,
+        result: SyncResult,
+        pending: List[Dict[str, Any]],
+        downloads: Dict[str, str]
+    ) -> bool:
+        """Apply one delta item; returns False if it had to be deferred."""
+        if 'deleted' in item:
+            result.deleted += self._delete(item['id'])
+            return True
+
+        if 'root' in item:
+            path = ''
+        else:
+            parent_path = self._parent_path(item)
+            if parent_path is None:
+                pending.append(item)
+                return False
+            path = f"{parent_path}/{item['name']}" if parent_path else item['name']
+
+        existing = self._conn.execute(
+            "SELECT path, is_folder, ctag, content_path FROM items WHERE drive_id = ? AND id = ?",
+            (self.drive_id, item['id'])
+        ).fetchone()
+
+        is_folder = 'folder' in item or 'root' in item
+        content_path = existing['content_path'] if existing else None
+        if existing is not None and existing['path'] != path:
+            if existing['is_folder']:
+                self._move_descendants(existing['path'], path)
+            if content_path and self.content_dir:
+                content_path = self._move_content(content_path, path)
+
+        self._conn.execute("""
+            INSERT INTO items (
+                drive_id, id, parent_id, name, path, is_folder, size, mime_type, etag, ctag,
+                created_datetime, last_modified_datetime, web_url, created_by, modified_by,
+                child_count, content_path, generation
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(drive_id, id) DO UPDATE SET
+                parent_id = excluded.parent_id, name = excluded.name, path = excluded.path,
+                is_folder = excluded.is_folder, size = excluded.size, mime_type = excluded.mime_type,
+                etag = excluded.etag, ctag = excluded.ctag,
+                created_datetime = excluded.created_datetime,
+                last_modified_datetime = excluded.last_modified_datetime,
+                web_url = excluded.web_url, created_by = excluded.created_by,
+                modified_by = excluded.modified_by, child_count = excluded.child_count,
+                content_path = excluded.content_path, generation = excluded.generation
+        """, (
+            self.drive_id, item['id'], (item.get('parentReference') or {}).get('id'),
+            item.get('name', ''), path, int(is_folder), item.get('size', 0),
+            (item.get('file') or {}).get('mimeType'), item.get('eTag'), item.get('cTag'),
+            item.get('createdDateTime'), item.get('lastModifiedDateTime'), item.get('webUrl'),
+            (item.get('createdBy') or {}).get('user', {}).get('displayName'),
+            (item.get('lastModifiedBy') or {}).get('user', {}).get('displayName'),
+            (item.get('folder') or {}).get('childCount', 0), content_path, generation
+        ))
+
+        if 'root' not in item:
+            if existing is None:
+                result.added += 1
+            else:
+                result.updated += 1
+
+        if 'file' in item and (existing is None or existing['ctag'] != item.get('cTag') or not content_path):
+            downloads[item['id']] = path
+        return True
+
+    def _retry_pending(
+        self,
+        generation: int,
+        result: SyncResult,
+        pending: List[Dict[str, Any]],
+        downloads: Dict[str, str]
+    ):
+        """Place items that arrived before their parent folder."""
+        while pending:
+            waiting, pending[:] = list(pending), []
+            placed = [self._apply(item, generation, result, pending, downloads) for item in waiting]
+            if not any(placed):
+                break
+
+    def _move_descendants(self, old_path: str, new_path: str):
+        """Rewrite the paths of a moved folder's descendants."""
+        prefix = f"{old_path}/"
+        rows = self._conn.execute(
+            "SELECT id, path, content_path FROM items WHERE drive_id = ? AND substr(path, 1, ?) = ?",
+            (self.drive_id, len(prefix), prefix)
+        ).fetchall()
+        for row in rows:
+            moved_path = new_path + row['path'][len(old_path):]
+            content_path = row['content_path']
+            if content_path and self.content_dir:
+                content_path = self._move_content(content_path, moved_path)
+            self._conn.execute(
+                "UPDATE items SET path = ?, content_path = ? WHERE drive_id = ? AND id = ?",
+                (moved_path, content_path, self.drive_id, row['id'])
+            )
+
+    def _delete(self, item_id: str) -> int:
+        """Remove an item (and any descendants) from the mirror."""
+        row = self._conn.execute(
+            "SELECT path, is_folder, content_path FROM items WHERE drive_id = ? AND id = ?", (self.drive_id, item_id)
+        ).fetchone()
+        if row is None:
+            return 0
+
+        rows = [(item_id, row['content_path'])]
+        if row['is_folder']:
+            prefix = f"{row['path']}/"
+            rows += [
+                (r['id'], r['content_path']) for r in self._conn.execute(
+                    "SELECT id, content_path FROM items WHERE drive_id = ? AND substr(path, 1, ?) = ?",
+                    (self.drive_id, len(prefix), prefix)
+                )
+            ]
+
+        for descendant_id, content_path in rows:
+            self._remove_content(content_path)
+            self._conn.execute("DELETE FROM items WHERE drive_id = ? AND id = ?", (self.drive_id, descendant_id))
+        return len(rows)
+
+    def _remove_stale(self, generation: int) -> int:
+        """Drop items not seen during a full enumeration."""
+        stale = self._conn.execute(
+            "SELECT id, content_path FROM items WHERE drive_id = ? AND generation < ?", (self.drive_id, generation)
+        ).fetchall()
+        for row in stale:
+            self._remove_content(row['content_path'])
+        self._conn.execute("DELETE FROM items WHERE drive_id = ? AND generation < ?", (self.drive_id, generation))
+        return len(stale)
+
+    # ------------------------------------------------------------------
+    # Content
+    # ------------------------------------------------------------------
+
+    def _local_path(self, path: str) -> str:
+        """Map a drive path to its location under content_dir."""
+        return os.path.join(self.content_dir, *path.split('/'))
+
+    def _move_content(self, content_path: str, new_path: str) -> Optional[str]:
+        """Move a mirrored file after its remote item was moved or renamed."""
+        target = self._local_path(new_path)
+        if not os.path.exists(content_path):
+            return None
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(content_path, target)
+        return target
+
+    def _remove_content(self, content_path: Optional[str]):
+        """Delete a mirrored file if present."""
+        if content_path and os.path.exists(content_path):
+            os.remove(content_path)
+
+    def _download_content(self, downloads: Dict[str, str]) -> int:
+        """Download new and changed files into content_dir."""
+        def fetch(item: Tuple[str, str]) -> Optional[Tuple[str, str]]:
+            item_id, path = item
+            local_path = self._local_path(path)
+            try:
+                self.client.download_to_file(path, local_path, drive_id=self.drive_id)
+            except (RequestException, OSError) as e:
+                logger.error(f"Failed to mirror content of {path}: {e}")
+                return None
+            return item_id, local_path
+
+        with ThreadPoolExecutor(max_workers=self.content_workers, thread_name_prefix='sharepoint-mirror') as executor:
+            completed = [entry for entry in executor.map(fetch, downloads.items()) if entry]
+
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE items SET content_path = ? WHERE drive_id = ? AND id = ?",
+                [(local_path, self.drive_id, item_id) for item_id, local_path in completed]
+            )
+            self._conn.commit()
+        return len(completed)
+
+    # ------------------------------------------------------------------
+    # Local queries
+    # ------------------------------------------------------------------
+
+    def _row_to_item(self, row: sqlite3.Row) -> Union[SharePointFile, SharePointFolder]:
+        """Convert a mirrored row into a SharePointFile or SharePointFolder."""
+        parent = row['path'].rpartition('/')[0]
+        common = dict(
+            id=row['id'],
+            name=row['name'],
+            created_datetime=_parse_datetime(row['created_datetime']),
+            last_modified_datetime=_parse_datetime(row['last_modified_datetime']),
+            web_url=row['web_url'] or '',
+            created_by=row['created_by'],
+            modified_by=row['modified_by'],
+            parent_path=f"/drive/root:/{parent}" if parent else "/drive/root:"
+        )
+        if row['is_folder']:
+            return SharePointFolder(child_count=row['child_count'] or 0, **common)
+        return SharePointFile(size=row['size'] or 0, mime_type=row['mime_type'], **common)
+
+    def get_item(self, path: str) -> Optional[Union[SharePointFile, SharePointFolder]]:
+        """
+        Look up an item by path.
+
+        Args:
+            path: Path relative to the drive root
+
+        Returns:
+            SharePointFile or SharePointFolder, or None if not mirrored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM items WHERE drive_id = ? AND path = ?", (self.drive_id, path.strip('/'))
+            ).fetchone()
+        return self._row_to_item(row) if row else None
+
+    def list_folder(
+        self,
+        folder_path: Optional[str] = None,
+        recursive: bool = False
+    ) -> Dict[str, List[Union[SharePointFile, SharePointFolder]]]:
+        """
+        List a folder from the mirror.
+
+        Args:
+            folder_path: Folder path (None for root)
+            recursive: Include all descendants, not just direct children
+
+        Returns:
+            Dictionary with 'files' and 'folders' lists, like
+            SharePointClient.list_drive_items
+        """
+        folder = (folder_path or '').strip('/')
+        with self._lock:
+            if recursive:
+                prefix = f"{folder}/" if folder else ''
+                rows = self._conn.execute(
+                    "SELECT * FROM items WHERE drive_id = ? AND path != '' AND substr(path, 1, ?) = ? ORDER BY path",
+                    (self.drive_id, len(prefix), prefix)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("""
+                    SELECT child.* FROM items child
+                    JOIN items parent ON parent.drive_id = child.drive_id AND parent.id = child.parent_id
+                    WHERE child.drive_id = ? AND parent.path = ?
+                    ORDER BY child.name
+                """, (self.drive_id, folder)).fetchall()
+
+        items = [self._row_to_item(row) for row in rows]
+        return {
+            'files': [item for item in items if isinstance(item, SharePointFile)],
+            'folders': [item for item in items if isinstance(item, SharePointFolder)]
+        }
+
+    def search(
+        self,
+        name_contains: Optional[str] = None,
+        folder_path: Optional[str] = None,
+        modified_since: Optional[datetime] = None,
+        mime_type: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[SharePointFile]:
+        """
+        Query mirrored files.
+
+        Args:
+            name_contains: Case-insensitive substring of the file name
+            folder_path: Restrict to files under this folder
+            modified_since: Only files modified at or after this time
+            mime_type: Exact MIME type
+            limit: Maximum number of results
+
+        Returns:
+            List of SharePointFile objects ordered by path
+        """
+        clauses = ["drive_id = ?", "is_folder = 0"]
+        params: List[Any] = [self.drive_id]
+        if name_contains:
+            clauses.append("instr(lower(name), ?) > 0")
+            params.append(name_contains.lower())
+        if folder_path:
+            prefix = f"{folder_path.strip('/')}/"
+            clauses.append("substr(path, 1, ?) = ?")
+            params += [len(prefix), prefix]
+        if modified_since:
+            if modified_since.tzinfo is None:
+                modified_since = modified_since.replace(tzinfo=timezone.utc)
+            clauses.append("last_modified_datetime >= ?")
+            params.append(modified_since.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S'))
+        if mime_type:
+            clauses.append("mime_type = ?")
+            params.append(mime_type)
+
+        query = f"SELECT * FROM items WHERE {' AND '.join(clauses)} ORDER BY path"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_item(row) for row in rows]
+
+    def get_content_path(self, path: str) -> Optional[str]:
+        """
+        Get the local copy of a mirrored file.
+
+        Args:
+            path: File path relative to the drive root
+
+        Returns:
+            Local file path, or None if content is not mirrored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_path FROM items WHERE drive_id = ? AND path = ?", (self.drive_id, path.strip('/'))
+            ).fetchone()
+        return row['content_path'] if row and row['content_path'] else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get mirror statistics.
+
+        Returns:
+            Dictionary with file and folder counts, total size and last sync time
+        """
+        with self._lock:
+            counts = self._conn.execute("""
+                SELECT SUM(is_folder = 0 AND path != '') AS files, SUM(is_folder = 1 AND path != '') AS folders,
+                       COALESCE(SUM(CASE WHEN is_folder = 0 THEN size END), 0) AS total_size
+                FROM items WHERE drive_id = ?
+            """, (self.drive_id,)).fetchone()
+            state = self._conn.execute(
+                "SELECT last_sync, delta_link IS NOT NULL AS has_token FROM sync_state WHERE drive_id = ?",
+                (self.drive_id,)
+            ).fetchone()
+        return {
+            'drive_id': self.drive_id,
+            'files': counts['files'] or 0,
+            'folders': counts['folders'] or 0,
+            'total_size': counts['total_size'],
+            'last_sync': state['last_sync'] if state else None,
+            'has_delta_token': bool(state['has_token']) if state else False
+        }
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Close on exit."""
+        self.close()
+
+
+def _parse_datetime(value: Optional[str]) -> datetime:
+    """Parse a Graph timestamp stored in the mirror."""
+    if not value:
+        return datetime.fromtimestamp(0, tz=timezone.utc)
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
@@ -0,0 +1,432 @@
+"""
+Recursive folder download and upload for SharePoint.
+
+Walks a remote or local folder tree and transfers files on a bounded
+thread pool, creating remote folders parent-first, skipping files that are
+unchanged since the last run, reporting progress, and writing a JSON
+manifest that summarizes the transfer and drives the next run's skip
+decisions.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+from requests.exceptions import RequestException
+
+from sharepoint.sharepoint_client import SharePointClient, SharePointFile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".sharepoint_manifest.json"
+DEFAULT_MAX_WORKERS = 8
+
+
+@dataclass
+class TransferProgress:
+    """Progress snapshot passed to progress callbacks."""
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
+    current_path: str
+    status: str  # 'transferred', 'skipped' or 'failed'
+
+
+@dataclass
+class FolderTransferResult:
+    """Summary of a folder download or upload."""
+    direction: str
+    transferred: int = 0
+    skipped: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    folders_created: int = 0
+    bytes_transferred: int = 0
+    elapsed_seconds: float = 0.0
+    manifest_path: Optional[str] = None
+
+
+ProgressCallback = Callable[[TransferProgress], None]
+
+
+class FolderTransfer:
+    """
+    Transfer a folder tree between SharePoint and the local filesystem.
+    """
+
+    def __init__(
+        self,
+        client: SharePointClient,
+        drive_id: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        skip_unchanged: bool = True,
+        progress_callback: Optional[ProgressCallback] = None
+    ):
+        """
+        Initialize the transfer.
+
+        Args:
+            client: SharePointClient to transfer through
+            drive_id: Drive ID (defaults to site's default drive)
+            max_workers: Maximum concurrent listings and file transfers
+            skip_unchanged: Skip files unchanged since the last transfer
+            progress_callback: Called with a TransferProgress after each file
+        """
+        self.client = client
+        self.drive_id = drive_id or client.get_default_drive_id()
+        self.max_workers = max(1, max_workers)
+        self.skip_unchanged = skip_unchanged
+        self.progress_callback = progress_callback
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Shared helpers
+    # ------------------------------------------------------------------
+
+    def _walk_remote(self, executor: ThreadPoolExecutor, root: str) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        List a remote tree one level at a time, folders in parallel.
+
+        Returns:
+            Tuple of (relative file path -> SharePointFile, relative folder paths)
+        """
+        files: Dict[str, Any] = {}
+        folders: List[str] = []
+        level = ['']
+
+        def list_folder(relative: str):
+            remote = f"{root}/{relative}" if relative else root
+            return relative, list(self.client.iter_drive_items(remote or None, drive_id=self.drive_id))
+
+        while level:
+            next_level = []
+            for relative, items in executor.map(list_folder, level):
+                for item in items:
+                    child = f"{relative}/{item.name}" if relative else item.name
+                    if isinstance(item, SharePointFile):
+                        files[child] = item
+                    else:
+                        folders.append(child)
+                        next_level.append(child)
+            level = next_level
+
+        return files, folders
+
+    def _load_manifest(self, manifest_path: str) -> Dict[str, Dict[str, Any]]:
+        """Load per-file entries from a previous manifest."""
+        if not self.skip_unchanged or not os.path.exists(manifest_path):
+            return {}
+        try:
+            with open(manifest_path) as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return {}
+
+    def _write_manifest(
+        self,
+        manifest_path: str,
+        result: FolderTransferResult,
+        local_dir: str,
+        remote_folder: str,
+        entries: Dict[str, Dict[str, Any]]
+    ):
+        """Write the transfer summary and per-file state atomically."""
+        directory = os.path.dirname(manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        manifest = {
+            'direction': result.direction,
+            'local_dir': os.path.abspath(local_dir),
+            'remote_folder': remote_folder,
+            'drive_id': self.drive_id,
+            'completed_at': datetime.now(timezone.utc).isoformat(),
+            'summary': {k: v for k, v in asdict(result).items() if k not in ('direction', 'manifest_path')},
+            'files': dict(sorted(entries.items()))
+        }
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def _run_files(
+        self,
+        executor: ThreadPoolExecutor,
+        jobs: List[Tuple[str, int, Callable[[], Dict[str, Any]]]],
+        result: FolderTransferResult,
+        entries: Dict[str, Dict[str, Any]],
+        files_total: int,
+        bytes_total: int
+    ):
+        """Run per-file jobs on the pool, recording results and progress."""
+        counters = {'files': files_total - len(jobs), 'bytes': bytes_total - sum(size for _, size, _ in jobs)}
+
+        def run(job):
+            path, size, transfer = job
+            try:
+                entry = transfer()
+                status = 'transferred'
+            except (RequestException, OSError) as e:
+                logger.error(f"Failed to transfer {path}: {e}")
+                entry, status = {'error': str(e)}, 'failed'
+
+            with self._lock:
+                entries[path] = dict(entry, status=status)
+                if status == 'failed':
+                    result.failed[path] = entry['error']
+                else:
+                    result.transferred += 1
+                    result.bytes_transferred += size
+                counters['files'] += 1
+                counters['bytes'] += size
+                progress = TransferProgress(
+                    files_done=counters['files'],
+                    files_total=files_total,
+                    bytes_done=counters['bytes'],
+                    bytes_total=bytes_total,
+                    current_path=path,
+                    status=status
+                )
+            self._report(progress)
+
+        list(executor.map(run, jobs))
+
+    def _report(self, progress: TransferProgress):
+        """Log progress and notify the callback."""
+        logger.info(
+            f"Transfer progress: {progress.files_done}/{progress.files_total} files, "
+            f"{progress.bytes_done}/{progress.bytes_total} bytes ({progress.status} {progress.current_path})"
+        )
+        if self.progress_callback:
+            self.progress_callback(progress)
+
+    def _skip(self, path: str, entries: Dict[str, Dict[str, Any]], entry: Dict[str, Any],
+              result: FolderTransferResult):
+        """Record a skipped file."""
+        entries[path] = dict(entry, status='skipped')
+        result.skipped += 1
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    def download(
+        self,
+        remote_folder: str,
+        local_dir: str,
+        manifest_path: Optional[str] = None
+    ) -> FolderTransferResult:
+        """
+        Download a remote folder tree into a local directory.
+
+        A file is skipped when the local copy has the remote size and either
+        the previous manifest recorded the same eTag or, without a manifest
+        entry, the local file is at least as new as the remote one.
+
+        Args:
+            remote_folder: Remote folder path ('' for the drive root)
+            local_dir: Local destination directory
+            manifest_path: Manifest location (defaults to a file in local_dir)
+
+        Returns:
+            FolderTransferResult summary
+        """
+        started = time.monotonic()
+        remote_folder = remote_folder.strip('/')
+        manifest_path = manifest_path or os.path.join(local_dir, MANIFEST_NAME)
+        previous = self._load_manifest(manifest_path)
+        result = FolderTransferResult(direction='download', manifest_path=manifest_path)
+        entries: Dict[str, Dict[str, Any]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sharepoint-folder') as executor:
+            files, folders = self._walk_remote(executor, remote_folder)
+
+            for relative in folders:
+                os.makedirs(os.path.join(local_dir, *relative.split('/')), exist_ok=True)
+
+            jobs = []
+            for relative, item in sorted(files.items()):
+                local_path = os.path.join(local_dir, *relative.split('/'))
+                modified = item.last_modified_datetime.timestamp()
+                entry = {'size': item.size, 'etag': item.etag, 'mtime': modified}
+                if self.skip_unchanged and self._download_unchanged(local_path, item, previous.get(relative)):
+                    self._skip(relative, entries, entry, result)
+                    continue
+                remote_path = f"{remote_folder}/{relative}" if remote_folder else relative
+                jobs.append((relative, item.size, self._download_job(item, remote_path, local_path, entry)))
+
+            self._run_files(
+                executor, jobs, result, entries,
+                files_total=len(files), bytes_total=sum(item.size for item in files.values())
+            )
+
+        result.elapsed_seconds = time.monotonic() - started
+        self._write_manifest(manifest_path, result, local_dir, remote_folder, entries)
+        logger.info(
+            f"Downloaded {remote_folder or 'root'}: {result.transferred} transferred, {result.skipped} skipped, "
+            f"{len(result.failed)} failed in {result.elapsed_seconds:.2f}s"
+        )
+        return result
+
+    def _download_unchanged(self, local_path: str, item: SharePointFile, previous: Optional[Dict[str, Any]]) -> bool:
+        """Check whether a local copy already matches the remote file."""
+        if not os.path.exists(local_path) or os.path.getsize(local_path) != item.size:
+            return False
+        if previous and previous.get('etag'):
+            return previous['etag'] == item.etag
+        return os.path.getmtime(local_path) >= item.last_modified_datetime.timestamp()
+
+    def _download_job(self, item: SharePointFile, remote_path: str, local_path: str, entry: Dict[str, Any]):
+        """Build the download callable for one file."""
+        def transfer() -> Dict[str, Any]:
+            try:
+                self.client.download_item_to_file(item, local_path, drive_id=self.drive_id)
+            except RequestException as e:
+                # Listing download URLs expire; fetch fresh metadata once
+                logger.info(f"Retrying {remote_path} with fresh metadata: {e}")
+                self.client.download_to_file(remote_path, local_path, drive_id=self.drive_id)
+            # Match the remote timestamp so mtime comparison works next run
+            os.utime(local_path, (entry['mtime'], entry['mtime']))
+            return entry
+        return transfer
+
+    # ------------------------------------------------------------------
+    # Upload
+    # ------------------------------------------------------------------
+
+    def upload(
+        self,
+        local_dir: str,
+        remote_folder: str,
+        conflict_behavior: str = 'replace',
+        manifest_path: Optional[str] = None
+    ) -> FolderTransferResult:
+        """
+        Upload a local directory tree into a remote folder.
+
+        Remote folders are created parent-first, one depth level at a time,
+        before any file is uploaded. A file is skipped when the remote copy
+        has the local size and either the previous manifest recorded the
+        same remote eTag and local mtime or, without a manifest entry, the
+        remote file is at least as new as the local one.
+
+        Args:
+            local_dir: Local source directory
+            remote_folder: Remote destination folder path ('' for the drive root)
+            conflict_behavior: 'rename', 'replace', or 'fail' for changed files
+            manifest_path: Manifest location (defaults to a file in local_dir)
+
+        Returns:
+            FolderTransferResult summary
+        """
+        started = time.monotonic()
+        remote_folder = remote_folder.strip('/')
+        manifest_path = manifest_path or os.path.join(local_dir, MANIFEST_NAME)
+        previous = self._load_manifest(manifest_path)
+        result = FolderTransferResult(direction='upload', manifest_path=manifest_path)
+        entries: Dict[str, Dict[str, Any]] = {}
+
+        manifest_abspath = os.path.abspath(manifest_path)
+        local_files, local_folders = self._walk_local(local_dir, exclude={manifest_abspath, f"{manifest_abspath}.tmp"})
+
+        # The destination and its parents, root first
+        segments = remote_folder.split('/') if remote_folder else []
+        for depth in range(1, len(segments) + 1):
+            if self.client.ensure_folder('/'.join(segments[:depth]), drive_id=self.drive_id):
+                result.folders_created += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sharepoint-folder') as executor:
+            remote_files, remote_folders = self._walk_remote(executor, remote_folder)
+            result.folders_created += self._create_folders(executor, remote_folder, local_folders, set(remote_folders))
+
+            jobs = []
+            for relative, (local_path, size, mtime) in sorted(local_files.items()):
+                remote_item = remote_files.get(relative)
+                entry = {'size': size, 'mtime': mtime}
+                if self.skip_unchanged and self._upload_unchanged(size, mtime, remote_item, previous.get(relative)):
+                    self._skip(relative, entries, dict(entry, etag=remote_item.etag), result)
+                    continue
+                remote_path = f"{remote_folder}/{relative}" if remote_folder else relative
+                jobs.append((relative, size, self._upload_job(local_path, remote_path, conflict_behavior, entry)))
+
+            self._run_files(
+                executor, jobs, result, entries,
+                files_total=len(local_files), bytes_total=sum(size for _, size, _ in local_files.values())
+            )
+
+        result.elapsed_seconds = time.monotonic() - started
+        self._write_manifest(manifest_path, result, local_dir, remote_folder, entries)
+        logger.info(
+            f"Uploaded {local_dir}: {result.transferred} transferred, {result.skipped} skipped, "
+            f"{len(result.failed)} failed, {result.folders_created} folders created in {result.elapsed_seconds:.2f}s"
+        )
+        return result
+
+    def _walk_local(self, local_dir: str, exclude: set) -> Tuple[Dict[str, Tuple[str, int, float]], List[str]]:
+        """
+        List a local tree.
+
+        Returns:
+            Tuple of (relative path -> (local path, size, mtime), relative folder paths)
+        """
+        files = {}
+        folders = []
+        for directory, subdirs, filenames in os.walk(local_dir):
+            subdirs.sort()
+            relative_dir = os.path.relpath(directory, local_dir).replace(os.sep, '/')
+            relative_dir = '' if relative_dir == '.' else relative_dir
+            if relative_dir:
+                folders.append(relative_dir)
+            for filename in sorted(filenames):
+                local_path = os.path.join(directory, filename)
+                if os.path.abspath(local_path) in exclude:
+                    continue
+                stat = os.stat(local_path)
+                relative = f"{relative_dir}/{filename}" if relative_dir else filename
+                files[relative] = (local_path, stat.st_size, stat.st_mtime)
+        return files, folders
+
+    def _create_folders(
+        self,
+        executor: ThreadPoolExecutor,
+        remote_folder: str,
+        local_folders: List[str],
+        existing: set
+    ) -> int:
+        """Create missing remote folders, parents before children."""
+        missing = [folder for folder in local_folders if folder not in existing]
+        by_depth: Dict[int, List[str]] = {}
+        for folder in missing:
+            by_depth.setdefault(folder.count('/'), []).append(folder)
+
+        def create(relative: str) -> bool:
+            remote = f"{remote_folder}/{relative}" if remote_folder else relative
+            return self.client.ensure_folder(remote, drive_id=self.drive_id)
+
+        created = 0
+        for depth in sorted(by_depth):
+            created += sum(executor.map(create, by_depth[depth]))
+        return created
+
+    def _upload_unchanged(self, size: int, mtime: float, remote_item: Optional[SharePointFile], previous: Optional[Dict[str, Any]]) -> bool:
+        """Check whether the remote copy already matches the local file."""
+        if remote_item is None or remote_item.size != size:
+            return False
+        if previous and previous.get('etag'):
+            return previous['etag'] == remote_item.etag and previous.get('mtime') == mtime
+        return remote_item.last_modified_datetime.timestamp() >= mtime
+
+    def _upload_job(self, local_path: str, remote_path: str, conflict_behavior: str, entry: Dict[str, Any]):
+        """Build the upload callable for one file."""
+        def transfer() -> Dict[str, Any]:
+            uploaded = self.client.upload_file(
+                local_path, remote_path, drive_id=self.drive_id, conflict_behavior=conflict_behavior
+            )
+            return dict(entry, etag=uploaded.etag)
+        return transfer
@@ -0,0 +1,233 @@
+"""
+Microsoft Graph JSON batching for DCRI MCP Tools.
+
+Packs up to 20 Graph sub-requests into a single $batch call, splits the
+responses back out to callers, and retries throttled sub-requests on
+their own so one busy item does not fail the whole batch.
+"""
+
+import json
+import time
+import logging
+from typing import Optional, List, Dict, Any
+from urllib.parse import urlencode
+from dataclasses import dataclass, field
+
+from requests.exceptions import RequestException
+
+from auth.graph_auth import GraphAuthClient, AdaptiveThrottle, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResponse:
+    """Container for one sub-response of a Graph $batch call."""
+    status_code: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Any = None
+
+    def json(self) -> Any:
+        """Return the decoded JSON body (mirrors requests.Response.json)."""
+        return self.body
+
+    @property
+    def text(self) -> str:
+        """Return the body as text for error messages."""
+        return self.body if isinstance(self.body, str) else json.dumps(self.body)
+
+
+@dataclass
+class BatchRequest:
+    """A Graph sub-request queued for batching."""
+    method: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Any = None
+    response: Optional[BatchResponse] = None
+
+
+class GraphBatcher:
+    """
+    Queue Graph requests and send them as JSON $batch calls.
+
+    Requests are added with ``add`` and sent on ``flush`` (or when the
+    batcher is used as a context manager); each ``BatchRequest`` then has
+    its ``response`` populated. ``execute`` does both in one call.
+    """
+
+    MAX_BATCH_SIZE = 20  # Graph limit per $batch request
+    MAX_RETRIES = 5
+    RETRY_STATUS_CODES = (429, 503, 504)
+    DEFAULT_RETRY_AFTER = 1  # seconds when the service does not say
+
+    def __init__(
+        self,
+        auth_client: GraphAuthClient,
+        base_url: str = "https://graph.microsoft.com/v1.0"
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            auth_client: GraphAuthClient used to send the $batch calls
+            base_url: Graph API version root that sub-request URLs are relative to
+        """
+        self.auth_client = auth_client
+        self.base_url = base_url.rstrip('/')
+        self._pending: List[BatchRequest] = []
+
+    def _relative_url(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Convert an absolute Graph URL into the relative form $batch expects."""
+        if url.startswith(self.base_url):
+            url = url[len(self.base_url):]
+        if params:
+            separator = '&' if '?' in url else '?'
+            url = f"{url}{separator}{urlencode(params, safe='$@')}"
+        return url if url.startswith('/') else f"/{url}"
+
+    def add(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        json_body: Any = None
+    ) -> BatchRequest:
+        """
+        Queue a request for the next batch.
+
+        Args:
+            method: HTTP method
+            url: Absolute or version-relative Graph URL
+            params: Query string parameters
+            headers: Sub-request headers
+            json_body: JSON body for POST/PATCH sub-requests
+
+        Returns:
+            BatchRequest whose response is set after flush()
+        """
+        request = BatchRequest(
+            method=method.upper(),
+            url=self._relative_url(url, params),
+            headers=dict(headers or {}),
+            body=json_body
+        )
+        if json_body is not None:
+            request.headers.setdefault('Content-Type', 'application/json')
+        self._pending.append(request)
+        return request
+
+    def flush(self) -> List[BatchRequest]:
+        """
+        Send all queued requests.
+
+        Returns:
+            The flushed requests, in the order they were added
+        """
+        requests_to_send, self._pending = self._pending, []
+        outstanding = list(requests_to_send)
+        attempt = 0
+
+        while outstanding:
+            throttled: List[BatchRequest] = []
+            retry_after = 0.0
+
+            for start in range(0, len(outstanding), self.MAX_BATCH_SIZE):
+                chunk = outstanding[start:start + self.MAX_BATCH_SIZE]
+                for request in self._send_batch(chunk):
+                    throttled.append(request)
+                    retry_after = max(retry_after, self._retry_after(request.response))
+
+            if not throttled:
+                break
+
+            attempt += 1
+            if attempt > self.MAX_RETRIES:
+                logger.error(f"Giving up on {len(throttled)} throttled batch sub-requests")
+                break
+
+            logger.info(
+                f"Retrying {len(throttled)} throttled sub-requests in {retry_after:.1f}s "
+                f"(attempt {attempt}/{self.MAX_RETRIES})"
+            )
+            # Let the shared throttle slow down other Graph traffic as well
+            throttle = getattr(self.auth_client, 'throttle', None)
+            if isinstance(throttle, AdaptiveThrottle):
+                throttle.on_throttle(retry_after)
+            time.sleep(retry_after)
+            outstanding = throttled
+
+        return requests_to_send
+
+    def execute(self, requests: List[BatchRequest]) -> List[BatchResponse]:
+        """
+        Send pre-built requests and return their responses in order.
+
+        Args:
+            requests: BatchRequest objects (URLs relative to the version root)
+
+        Returns:
+            List of BatchResponse objects
+        """
+        self._pending.extend(requests)
+        return [request.response for request in self.flush()]
+
+    def _send_batch(self, chunk: List[BatchRequest]) -> List[BatchRequest]:
+        """
+        Send up to MAX_BATCH_SIZE requests in one $batch call.
+
+        Returns:
+            Requests whose sub-responses were throttled
+        """
+        payload = {'requests': []}
+        for index, request in enumerate(chunk):
+            entry = {'id': str(index), 'method': request.method, 'url': request.url}
+            if request.headers:
+                entry['headers'] = request.headers
+            if request.body is not None:
+                entry['body'] = request.body
+            payload['requests'].append(entry)
+
+        response = self.auth_client.make_graph_request(
+            method='POST',
+            url=f"{self.base_url}/$batch",
+            json=payload,
+            headers={'Content-Type': 'application/json'}
+        )
+
+        if response.status_code != 200:
+            raise RequestException(f"Batch request failed: {response.status_code} - {response.text}")
+
+        throttled = []
+        for sub in response.json().get('responses', []):
+            request = chunk[int(sub['id'])]
+            request.response = BatchResponse(
+                status_code=sub.get('status', 500),
+                headers=sub.get('headers') or {},
+                body=sub.get('body')
+            )
+            if request.response.status_code in self.RETRY_STATUS_CODES:
+                throttled.append(request)
+
+        return throttled
+
+    def _retry_after(self, response: Optional[BatchResponse]) -> float:
+        """Read the Retry-After delay of a throttled sub-response."""
+        if response is None:
+            return self.DEFAULT_RETRY_AFTER
+        for name, value in response.headers.items():
+            if name.lower() == 'retry-after':
+                retry_after = parse_retry_after(value)
+                if retry_after is not None:
+                    return retry_after
+        return self.DEFAULT_RETRY_AFTER
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Send any queued requests on a clean exit."""
+        if exc_type is None:
+            self.flush()
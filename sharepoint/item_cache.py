@@ -0,0 +1,266 @@
+"""
+eTag-validated cache of SharePoint item metadata and content.
+
+Item JSON is cached per drive path together with its eTag, and small file
+content per item ID together with its cTag. Callers revalidate cached
+entries with ``If-None-Match`` so an unchanged document costs a 304 with no
+body, or no request at all when the metadata already shows the cached
+content is current. Entries live in an in-process LRU and, when Redis is
+available, in the CacheManager ``metadata`` and ``document`` namespaces.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+# Pre-authenticated download URLs expire after about an hour, so they are
+# never served from cache
+VOLATILE_FIELDS = ('@microsoft.graph.downloadUrl',)
+
+
+class ItemCache:
+    """
+    Two-level cache of item metadata and content with savings statistics.
+    """
+
+    METADATA_NAMESPACE = "metadata"
+    CONTENT_NAMESPACE = "document"
+    TTL = 86400  # entries are revalidated on every use, so they can live long
+    MAX_CONTENT_SIZE = 8 * 1024 * 1024  # larger files are streamed, not cached
+    MAX_ENTRIES = 5000
+    MAX_CONTENT_BYTES = 256 * 1024 * 1024
+
+    def __init__(
+        self,
+        cache_manager=None,
+        max_entries: int = MAX_ENTRIES,
+        max_content_bytes: int = MAX_CONTENT_BYTES
+    ):
+        """
+        Initialize the item cache.
+
+        Args:
+            cache_manager: Optional CacheManager shared across processes
+            max_entries: Maximum metadata entries kept in process
+            max_content_bytes: Maximum content bytes kept in process
+        """
+        self.cache_manager = cache_manager
+        self.max_entries = max_entries
+        self.max_content_bytes = max_content_bytes
+        self._metadata: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._content: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._content_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'conditional_requests': 0,
+            'not_modified': 0,
+            'content_hits': 0,
+            'bytes_saved': 0,
+            'round_trips_saved': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+
+    def get_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get cached item JSON for revalidation.
+
+        Args:
+            key: Cache key for the item path
+
+        Returns:
+            Item JSON (including its eTag) or None
+        """
+        with self._lock:
+            data = self._metadata.get(key)
+            if data is not None:
+                self._metadata.move_to_end(key)
+                return data
+
+        if self.cache_manager is not None:
+            data = self.cache_manager.get(key, namespace=self.METADATA_NAMESPACE)
+            if isinstance(data, dict) and data.get('eTag'):
+                self._store_metadata(key, data)
+                return data
+        return None
+
+    def _store_metadata(self, key: str, data: Dict[str, Any]):
+        """Store item JSON in the in-process LRU."""
+        with self._lock:
+            self._metadata[key] = data
+            self._metadata.move_to_end(key)
+            while len(self._metadata) > self.max_entries:
+                self._metadata.popitem(last=False)
+
+    def put_metadata(self, key: str, data: Dict[str, Any]):
+        """
+        Cache item JSON; items without an eTag cannot be revalidated and are skipped.
+
+        Args:
+            key: Cache key for the item path
+            data: Item JSON from Graph
+        """
+        if not isinstance(data, dict) or not data.get('eTag'):
+            return
+        data = {k: v for k, v in data.items() if k not in VOLATILE_FIELDS}
+        self._store_metadata(key, data)
+        if self.cache_manager is not None:
+            self.cache_manager.set(key, data, ttl=self.TTL, namespace=self.METADATA_NAMESPACE)
+
+    def record_not_modified(self, data: Dict[str, Any]):
+        """Count a 304 that let cached item JSON be reused."""
+        with self._lock:
+            self._stats['not_modified'] += 1
+            self._stats['bytes_saved'] += len(json.dumps(data))
+
+    def record_conditional_request(self):
+        """Count a request sent with If-None-Match."""
+        with self._lock:
+            self._stats['conditional_requests'] += 1
+
+    # ------------------------------------------------------------------
+    # Content
+    # ------------------------------------------------------------------
+
+    def get_content(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Get cached content and the tag it was cached under.
+
+        Args:
+            key: Cache key for the item ID
+
+        Returns:
+            Tuple of (tag, content) or None
+        """
+        with self._lock:
+            entry = self._content.get(key)
+            if entry is not None:
+                self._content.move_to_end(key)
+                return entry
+
+        if self.cache_manager is not None:
+            # Stored as a dict so CacheManager pickles it rather than
+            # guessing whether raw bytes are a pickle
+            shared = self.cache_manager.get(key, namespace=self.CONTENT_NAMESPACE)
+            if isinstance(shared, dict) and shared.get('tag') and shared.get('content') is not None:
+                self._store_content(key, shared['tag'], shared['content'])
+                return shared['tag'], shared['content']
+        return None
+
+    def _store_content(self, key: str, tag: str, content: bytes):
+        """Store content in the in-process LRU, evicting by total size."""
+        with self._lock:
+            previous = self._content.pop(key, None)
+            if previous is not None:
+                self._content_bytes -= len(previous[1])
+            self._content[key] = (tag, content)
+            self._content_bytes += len(content)
+            while self._content_bytes > self.max_content_bytes and self._content:
+                _, (_, evicted) = self._content.popitem(last=False)
+                self._content_bytes -= len(evicted)
+
+    def put_content(self, key: str, tag: Optional[str], content: bytes):
+        """
+        Cache file content under the tag that identifies its version.
+
+        Args:
+            key: Cache key for the item ID
+            tag: cTag or ETag of the content
+            content: File bytes
+        """
+        if not tag or len(content) > self.MAX_CONTENT_SIZE:
+            self.invalidate_content(key)
+            return
+        self._store_content(key, tag, content)
+        if self.cache_manager is not None:
+            self.cache_manager.set(
+                key, {'tag': tag, 'content': content}, ttl=self.TTL, namespace=self.CONTENT_NAMESPACE
+            )
+
+    def invalidate_content(self, key: str):
+        """
+        Drop cached content.
+
+        Args:
+            key: Cache key for the item ID
+        """
+        with self._lock:
+            previous = self._content.pop(key, None)
+            if previous is not None:
+                self._content_bytes -= len(previous[1])
+        if self.cache_manager is not None:
+            self.cache_manager.delete(key, namespace=self.CONTENT_NAMESPACE)
+
+    def record_content_hit(self, size: int, round_trip_saved: bool):
+        """Count content served from cache."""
+        with self._lock:
+            self._stats['content_hits'] += 1
+            self._stats['bytes_saved'] += size
+            if round_trip_saved:
+                self._stats['round_trips_saved'] += 1
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache savings statistics.
+
+        Returns:
+            Dictionary with conditional requests sent, 304s received,
+            content cache hits, bytes and round trips saved, and local
+            cache sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['metadata_entries'] = len(self._metadata)
+            stats['content_entries'] = len(self._content)
+            stats['content_bytes'] = self._content_bytes
+        return stats
+
+    def clear(self):
+        """Drop all in-process entries and reset statistics."""
+        with self._lock:
+            self._metadata.clear()
+            self._content.clear()
+            self._content_bytes = 0
+            for name in self._stats:
+                self._stats[name] = 0
+
+    @staticmethod
+    def metadata_key(base_url: str, drive_id: str, item_path: str) -> str:
+        """Key for the item JSON of a drive path."""
+        return f"{base_url}|{drive_id}|path|{item_path.strip('/')}"
+
+    @staticmethod
+    def content_key(base_url: str, drive_id: str, item_id: str) -> str:
+        """Key for the content of a drive item."""
+        return f"{base_url}|{drive_id}|content|{item_id}"
+
+
+# Shared by every SharePointClient in the process
+_default_item_cache: Optional[ItemCache] = None
+_default_item_cache_lock = threading.Lock()
+
+
+def get_item_cache() -> ItemCache:
+    """
+    Get or create the process-wide item cache.
+
+    Uses the default Redis CacheManager as a shared level when it is
+    reachable.
+
+    Returns:
+        ItemCache instance
+    """
+    global _default_item_cache
+
+    with _default_item_cache_lock:
+        if _default_item_cache is None:
+            from cache.redis_cache import get_default_cache
+            _default_item_cache = ItemCache(cache_manager=get_default_cache())
+    return _default_item_cache
@@ -0,0 +1,157 @@
+"""
+Memoized SharePoint ID resolution for DCRI MCP Tools.
+
+Site IDs, default drive IDs and path-to-item-ID lookups rarely change but
+each costs a Graph round trip. This cache keeps them in-process with a TTL
+and, when Redis is available, shares them across workers through the
+CacheManager ``resolution`` namespace.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class ResolutionCache:
+    """
+    TTL cache for site, drive and item ID lookups.
+
+    Entries live in a bounded in-process LRU; a CacheManager, if given,
+    acts as a shared second level.
+    """
+
+    NAMESPACE = "resolution"
+    SITE_TTL = 24 * 3600  # site IDs effectively never change
+    DRIVE_TTL = 24 * 3600
+    ITEM_TTL = 300  # items can be moved or renamed
+    MAX_ENTRIES = 10000
+
+    def __init__(self, cache_manager=None, max_entries: int = MAX_ENTRIES):
+        """
+        Initialize the resolution cache.
+
+        Args:
+            cache_manager: Optional CacheManager for cross-process sharing
+            max_entries: Maximum entries kept in process
+        """
+        self.cache_manager = cache_manager
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a resolved ID.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached ID or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.cache_manager is not None:
+            # Stored as a dict so CacheManager pickles it rather than
+            # guessing how to decode a bare string
+            shared = self.cache_manager.get(key, namespace=self.NAMESPACE)
+            if isinstance(shared, dict) and 'value' in shared:
+                self._store(key, shared['value'], shared.get('ttl', self.ITEM_TTL))
+                with self._lock:
+                    self.hits += 1
+                return shared['value']
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, value: str, ttl: int):
+        """Store an entry in the in-process LRU."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, value: str, ttl: int):
+        """
+        Store a resolved ID.
+
+        Args:
+            key: Cache key
+            value: Resolved ID
+            ttl: Time to live in seconds
+        """
+        self._store(key, value, ttl)
+        if self.cache_manager is not None:
+            self.cache_manager.set(key, {'value': value, 'ttl': ttl}, ttl=ttl, namespace=self.NAMESPACE)
+
+    def invalidate(self, key: str):
+        """
+        Drop a resolved ID, e.g. after a 404.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.cache_manager is not None:
+            self.cache_manager.delete(key, namespace=self.NAMESPACE)
+
+    def clear(self):
+        """Drop all in-process entries."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def site_key(base_url: str, site_url: str) -> str:
+        """Key for a site URL -> site ID lookup."""
+        return f"{base_url}|site|{site_url}"
+
+    @staticmethod
+    def drive_key(base_url: str, site_id: str) -> str:
+        """Key for a site ID -> default drive ID lookup."""
+        return f"{base_url}|drive|{site_id}"
+
+    @staticmethod
+    def item_key(base_url: str, drive_id: str, item_path: str) -> str:
+        """Key for a drive path -> item ID lookup."""
+        return f"{base_url}|item|{drive_id}|{item_path.strip('/')}"
+
+
+# Shared by every SharePointClient in the process
+_default_resolution_cache: Optional[ResolutionCache] = None
+_default_resolution_cache_lock = threading.Lock()
+
+
+def get_resolution_cache() -> ResolutionCache:
+    """
+    Get or create the process-wide resolution cache.
+
+    Uses the default Redis CacheManager as a shared level when it is
+    reachable.
+
+    Returns:
+        ResolutionCache instance
+    """
+    global _default_resolution_cache
+
+    with _default_resolution_cache_lock:
+        if _default_resolution_cache is None:
+            from cache.redis_cache import get_default_cache
+            _default_resolution_cache = ResolutionCache(cache_manager=get_default_cache())
+    return _default_resolution_cache
@@ -8,7 +8,9 @@ using the Microsoft Graph API for document management operations.
 import os
 import json
 import logging
-from typing import Optional, List, Dict, Any, BinaryIO, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Optional, List, Dict, Any, BinaryIO, Union, Iterator, Callable
 from urllib.parse import quote, urljoin, quote as url_quote
 from dataclasses import dataclass
 from datetime import datetime
@@ -16,6 +18,12 @@ import requests
 from requests.exceptions import RequestException
 
 from auth.graph_auth import GraphAuthClient
+from auth.http_pool import get_transfer_session, get_pool_stats
+from sharepoint.graph_batch import GraphBatcher
+from sharepoint.downloads import RangeDownloader, DownloadResult
+from sharepoint.uploads import ResumableUploader, INITIAL_CHUNK_SIZE
+from sharepoint.resolution_cache import ResolutionCache, get_resolution_cache
+from sharepoint.item_cache import ItemCache, get_item_cache
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +42,7 @@ class SharePointFile:
     created_by: Optional[str] = None
     modified_by: Optional[str] = None
     parent_path: Optional[str] = None
+    etag: Optional[str] = None
 
 
 @dataclass
@@ -60,12 +69,19 @@ class SharePointClient:
     
     GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
     MAX_FILE_SIZE = 4 * 1024 * 1024  # 4MB for simple upload
+    DEFAULT_PAGE_SIZE = 1000
+    PARALLEL_DOWNLOAD_THRESHOLD = 64 * 1024 * 1024  # 64MB before ranges pay off
+    UPLOAD_CHUNK_SIZE = INITIAL_CHUNK_SIZE  # starting size; adapts to throughput
+    # Fields _parse_file_item/_parse_folder_item need when $select is used
+    REQUIRED_SELECT_FIELDS = ('id', 'name', 'size', 'file', 'folder', 'createdDateTime', 'lastModifiedDateTime')
     
     def __init__(
         self,
         site_id: Optional[str] = None,
         auth_client: Optional[GraphAuthClient] = None,
-        site_url: Optional[str] = None
+        site_url: Optional[str] = None,
+        resolution_cache: Optional[ResolutionCache] = None,
+        item_cache: Optional[ItemCache] = None
     ):
         """
         Initialize the SharePoint client.
@@ -74,8 +90,17 @@ class SharePointClient:
             site_id: SharePoint site ID (defaults to env var SHAREPOINT_SITE_ID)
             auth_client: GraphAuthClient instance (creates new if not provided)
             site_url: SharePoint site URL (alternative to site_id)
+            resolution_cache: Cache for site, drive and item ID lookups
+                (defaults to the process-wide cache shared by all clients)
+            item_cache: eTag-validated cache for item metadata and content
+                (defaults to the process-wide cache shared by all clients)
         """
         self.auth_client = auth_client or GraphAuthClient()
+        self.resolution_cache = resolution_cache or get_resolution_cache()
+        self.item_cache = item_cache or get_item_cache()
+        # Pre-authenticated download/upload URLs bypass Graph auth but
+        # still reuse pooled keep-alive connections
+        self._transfer_session = get_transfer_session()
         self.site_id = site_id or os.getenv('SHAREPOINT_SITE_ID')
         self.site_url = site_url or os.getenv('SHAREPOINT_SITE_URL')
         
@@ -99,6 +124,11 @@ class SharePointClient:
         Returns:
             Site ID string
         """
+        cache_key = ResolutionCache.site_key(self.GRAPH_BASE_URL, site_url)
+        cached = self.resolution_cache.get(cache_key)
+        if cached:
+            return cached
+        
         # Parse the URL to get hostname and site path
         from urllib.parse import urlparse
         parsed = urlparse(site_url)
@@ -117,6 +147,7 @@ class SharePointClient:
             raise RequestException(f"Failed to get site ID: {response.status_code} - {response.text}")
         
         data = response.json()
+        self.resolution_cache.set(cache_key, data['id'], ResolutionCache.SITE_TTL)
         return data['id']
     
     def _parse_file_item(self, item: Dict[str, Any]) -> SharePointFile:
@@ -132,9 +163,92 @@ class SharePointClient:
             mime_type=item.get('file', {}).get('mimeType'),
             created_by=item.get('createdBy', {}).get('user', {}).get('displayName'),
             modified_by=item.get('lastModifiedBy', {}).get('user', {}).get('displayName'),
-            parent_path=item.get('parentReference', {}).get('path')
+            parent_path=item.get('parentReference', {}).get('path'),
+            etag=item.get('eTag')
         )
     
+    def _item_url(self, drive_id: str, item_path: str) -> str:
+        """Build the Graph URL addressing a drive item by path."""
+        encoded_path = quote(item_path, safe='')
+        return f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root:/{encoded_path}"
+    
+    def _item_id_url(self, drive_id: str, item_id: str) -> str:
+        """Build the Graph URL addressing a drive item by ID."""
+        return f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/items/{item_id}"
+    
+    def _remember_item(self, drive_id: str, item_path: str, item: Dict[str, Any]):
+        """Record the item ID of a path from a Graph item response."""
+        if item.get('id'):
+            key = ResolutionCache.item_key(self.GRAPH_BASE_URL, drive_id, item_path)
+            self.resolution_cache.set(key, item['id'], ResolutionCache.ITEM_TTL)
+    
+    def _forget_item(self, drive_id: str, item_path: str):
+        """Drop the cached item ID of a path."""
+        self.resolution_cache.invalidate(ResolutionCache.item_key(self.GRAPH_BASE_URL, drive_id, item_path))
+    
+    def _get_item_json(self, drive_id: str, item_path: str, error_prefix: str) -> Dict[str, Any]:
+        """
+        Fetch item JSON, revalidating a cached copy with If-None-Match.
+        
+        A 304 returns the cached JSON, which never includes a download URL.
+        """
+        key = ItemCache.metadata_key(self.GRAPH_BASE_URL, drive_id, item_path)
+        cached = self.item_cache.get_metadata(key)
+        api_url = self._item_url(drive_id, item_path)
+        
+        if cached:
+            self.item_cache.record_conditional_request()
+            response = self.auth_client.make_graph_request(
+                method='GET',
+                url=api_url,
+                headers={'If-None-Match': cached['eTag']}
+            )
+            if response.status_code == 304:
+                self.item_cache.record_not_modified(cached)
+                return cached
+        else:
+            response = self.auth_client.make_graph_request(
+                method='GET',
+                url=api_url
+            )
+        
+        if response.status_code != 200:
+            raise RequestException(f"{error_prefix}: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        self.item_cache.put_metadata(key, data)
+        self._remember_item(drive_id, item_path, data)
+        return data
+    
+    def _children_url(self, drive_id: str, folder_path: Optional[str] = None) -> str:
+        """Build the Graph URL listing the children of a folder."""
+        if folder_path:
+            return f"{self._item_url(drive_id, folder_path)}:/children"
+        return f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root/children"
+    
+    def _search_url(self, drive_id: str, query: str) -> str:
+        """Build the Graph URL for a drive search."""
+        return f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root/search(q='{quote(query, safe='')}')"
+    
+    def _parse_children(
+        self,
+        items: List[Dict[str, Any]]
+    ) -> Dict[str, List[Union[SharePointFile, SharePointFolder]]]:
+        """Split Graph drive items into parsed files and folders."""
+        files = []
+        folders = []
+        
+        for item in items:
+            if 'file' in item:
+                files.append(self._parse_file_item(item))
+            elif 'folder' in item:
+                folders.append(self._parse_folder_item(item))
+        
+        return {
+            'files': files,
+            'folders': folders
+        }
+    
     def _parse_folder_item(self, item: Dict[str, Any]) -> SharePointFolder:
         """Parse a folder item from Graph API response."""
         return SharePointFolder(
@@ -164,45 +278,162 @@ class SharePointClient:
         Returns:
             Dictionary with 'files' and 'folders' lists
         """
-        # Get drive ID if not provided
-        if not drive_id:
-            drive_id = self.get_default_drive_id()
-        
-        # Construct API URL
-        if folder_path:
-            # Encode the folder path
-            encoded_path = quote(folder_path, safe='')
-            api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root:/{encoded_path}:/children"
-        else:
-            api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root/children"
-        
-        # Make request
-        response = self.auth_client.make_graph_request(
-            method='GET',
-            url=api_url,
-            params={'$expand': 'thumbnails', '$top': 1000}
-        )
-        
-        if response.status_code != 200:
-            raise RequestException(f"Failed to list items: {response.status_code} - {response.text}")
-        
-        data = response.json()
-        
-        # Parse items
         files = []
         folders = []
         
-        for item in data.get('value', []):
-            if 'file' in item:
-                files.append(self._parse_file_item(item))
-            elif 'folder' in item:
-                folders.append(self._parse_folder_item(item))
+        for item in self.iter_drive_items(folder_path, drive_id=drive_id, expand='thumbnails'):
+            if isinstance(item, SharePointFile):
+                files.append(item)
+            else:
+                folders.append(item)
         
         return {
             'files': files,
             'folders': folders
         }
     
+    def _page_params(
+        self,
+        page_size: int,
+        select: Optional[List[str]] = None,
+        expand: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build query parameters for the first page of a listing."""
+        params: Dict[str, Any] = {}
+        if expand:
+            params['$expand'] = expand
+        params['$top'] = page_size
+        if select:
+            fields = list(self.REQUIRED_SELECT_FIELDS) + [f for f in select if f not in self.REQUIRED_SELECT_FIELDS]
+            params['$select'] = ','.join(fields)
+        return params
+    
+    def _get_page(self, url: str, params: Optional[Dict[str, Any]], error_prefix: str) -> Dict[str, Any]:
+        """Fetch one page of a Graph collection."""
+        if params:
+            response = self.auth_client.make_graph_request(method='GET', url=url, params=params)
+        else:
+            # nextLink URLs already carry the query string
+            response = self.auth_client.make_graph_request(method='GET', url=url)
+        
+        if response.status_code != 200:
+            raise RequestException(f"{error_prefix}: {response.status_code} - {response.text}")
+        
+        return response.json()
+    
+    def _iter_pages(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        error_prefix: str,
+        prefetch: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield pages of a Graph collection, following @odata.nextLink lazily.
+        
+        Args:
+            url: URL of the first page
+            params: Query parameters for the first page
+            error_prefix: Message prefix for RequestException on failure
+            prefetch: Fetch the next page on a background thread while the
+                caller processes the current one
+        """
+        if not prefetch:
+            next_url, next_params = url, params
+            while next_url:
+                data = self._get_page(next_url, next_params, error_prefix)
+                yield data
+                next_url, next_params = data.get('@odata.nextLink'), None
+            return
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='sharepoint-prefetch') as executor:
+            future = executor.submit(self._get_page, url, params, error_prefix)
+            while future is not None:
+                data = future.result()
+                next_link = data.get('@odata.nextLink')
+                future = executor.submit(self._get_page, next_link, None, error_prefix) if next_link else None
+                yield data
+    
+    def iter_drive_items(
+        self,
+        folder_path: Optional[str] = None,
+        drive_id: Optional[str] = None,
+        page_size: Optional[int] = None,
+        select: Optional[List[str]] = None,
+        expand: Optional[str] = None,
+        prefetch: bool = False
+    ) -> Iterator[Union[SharePointFile, SharePointFolder]]:
+        """
+        Lazily iterate over the files and folders in a folder.
+        
+        Pages are requested only as the iterator advances, so folders of
+        any size can be walked without truncation or holding every item.
+        
+        Args:
+            folder_path: Path to folder (None for root)
+            drive_id: Drive ID (defaults to site's default drive)
+            page_size: Items requested per page ($top, defaults to DEFAULT_PAGE_SIZE)
+            select: Extra item fields to return ($select); when given, only
+                these plus the fields needed for parsing are transferred
+            expand: Relationships to expand ($expand), e.g. 'thumbnails'
+            prefetch: Fetch the next page in the background
+            
+        Yields:
+            SharePointFile and SharePointFolder objects
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        pages = self._iter_pages(
+            self._children_url(drive_id, folder_path),
+            self._page_params(page_size or self.DEFAULT_PAGE_SIZE, select, expand),
+            "Failed to list items",
+            prefetch=prefetch
+        )
+        
+        for data in pages:
+            for item in data.get('value', []):
+                if 'file' in item:
+                    yield self._parse_file_item(item)
+                elif 'folder' in item:
+                    yield self._parse_folder_item(item)
+    
+    def iter_search_results(
+        self,
+        query: str,
+        drive_id: Optional[str] = None,
+        page_size: int = 200,
+        select: Optional[List[str]] = None,
+        prefetch: bool = False
+    ) -> Iterator[SharePointFile]:
+        """
+        Lazily iterate over files matching a search query.
+        
+        Args:
+            query: Search query string
+            drive_id: Drive ID (defaults to site's default drive)
+            page_size: Results requested per page ($top)
+            select: Extra item fields to return ($select)
+            prefetch: Fetch the next page in the background
+            
+        Yields:
+            SharePointFile objects
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        pages = self._iter_pages(
+            self._search_url(drive_id, query),
+            self._page_params(page_size, select),
+            "Failed to search files",
+            prefetch=prefetch
+        )
+        
+        for data in pages:
+            for item in data.get('value', []):
+                if 'file' in item:
+                    yield self._parse_file_item(item)
+    
     def get_default_drive_id(self) -> str:
         """
         Get the default document library drive ID for the site.
@@ -210,6 +441,11 @@ class SharePointClient:
         Returns:
             Drive ID string
         """
+        cache_key = ResolutionCache.drive_key(self.GRAPH_BASE_URL, self.site_id)
+        cached = self.resolution_cache.get(cache_key)
+        if cached:
+            return cached
+        
         api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drive"
         
         response = self.auth_client.make_graph_request(
@@ -221,45 +457,131 @@ class SharePointClient:
             raise RequestException(f"Failed to get default drive: {response.status_code} - {response.text}")
         
         data = response.json()
+        self.resolution_cache.set(cache_key, data['id'], ResolutionCache.DRIVE_TTL)
         return data['id']
     
+    def resolve_item_id(
+        self,
+        item_path: str,
+        drive_id: Optional[str] = None
+    ) -> str:
+        """
+        Resolve a drive path to its item ID, using the resolution cache.
+        
+        Args:
+            item_path: Path to the item in SharePoint
+            drive_id: Drive ID (defaults to site's default drive)
+            
+        Returns:
+            Item ID string
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        cached = self.resolution_cache.get(ResolutionCache.item_key(self.GRAPH_BASE_URL, drive_id, item_path))
+        if cached:
+            return cached
+        
+        response = self.auth_client.make_graph_request(
+            method='GET',
+            url=self._item_url(drive_id, item_path),
+            params={'$select': 'id'}
+        )
+        
+        if response.status_code != 200:
+            raise RequestException(f"Failed to resolve item: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        self._remember_item(drive_id, item_path, data)
+        return data['id']
+    
+    def _get_download_info(self, file_path: str, drive_id: Optional[str]) -> tuple:
+        """
+        Fetch the item metadata needed to download a file.
+        
+        Returns:
+            Tuple of (item API URL, item JSON)
+        """
+        # Get drive ID if not provided
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        # Get file metadata with download URL
+        data = self._get_item_json(drive_id, file_path, "Failed to get file info")
+        
+        # Address the item by ID so '/content' can be appended directly
+        if data.get('id'):
+            return self._item_id_url(drive_id, data['id']), data
+        return f"{self._item_url(drive_id, file_path)}:", data
+    
     def download_file(
         self,
         file_path: str,
         drive_id: Optional[str] = None,
-        local_path: Optional[str] = None
+        local_path: Optional[str] = None,
+        parallel_ranges: int = 1
     ) -> Union[bytes, str]:
         """
         Download a file from SharePoint.
         
+        When local_path is given the file is streamed to disk (see
+        download_to_file) rather than held in memory.
+        
         Args:
             file_path: Path to file in SharePoint
             drive_id: Drive ID (defaults to site's default drive)
             local_path: Local path to save file (if None, returns content)
+            parallel_ranges: Concurrent Range requests for large files
             
         Returns:
             File content as bytes if local_path is None, 
             otherwise the local file path
         """
-        # Get drive ID if not provided
+        if local_path:
+            return self.download_to_file(
+                file_path, local_path, drive_id=drive_id, parallel_ranges=parallel_ranges
+            ).local_path
+        
         if not drive_id:
             drive_id = self.get_default_drive_id()
         
-        # Encode the file path
-        encoded_path = quote(file_path, safe='')
-        
-        # Get file metadata with download URL
-        api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root:/{encoded_path}"
-        
-        response = self.auth_client.make_graph_request(
-            method='GET',
-            url=api_url
-        )
-        
-        if response.status_code != 200:
-            raise RequestException(f"Failed to get file info: {response.status_code} - {response.text}")
+        # A known item ID lets Graph redirect straight to the content,
+        # skipping the metadata round trip
+        item_id = self.resolution_cache.get(ResolutionCache.item_key(self.GRAPH_BASE_URL, drive_id, file_path))
+        if item_id:
+            content_key = ItemCache.content_key(self.GRAPH_BASE_URL, drive_id, item_id)
+            content_url = f"{self._item_id_url(drive_id, item_id)}/content"
+            cached = self.item_cache.get_content(content_key)
+            if cached:
+                self.item_cache.record_conditional_request()
+                response = self.auth_client.make_graph_request(
+                    method='GET',
+                    url=content_url,
+                    headers={'If-None-Match': cached[0]}
+                )
+            else:
+                response = self.auth_client.make_graph_request(
+                    method='GET',
+                    url=content_url
+                )
+            if response.status_code == 304 and cached:
+                self.item_cache.record_content_hit(len(cached[1]), round_trip_saved=False)
+                return cached[1]
+            if response.status_code == 200:
+                self.item_cache.put_content(content_key, response.headers.get('ETag'), response.content)
+                return response.content
+            # Moved, renamed or deleted since it was cached
+            self._forget_item(drive_id, file_path)
+        
+        api_url, data = self._get_download_info(file_path, drive_id)
+        
+        # Metadata shows whether cached content is still the current version
+        content_key = ItemCache.content_key(self.GRAPH_BASE_URL, drive_id, data.get('id', ''))
+        cached = self.item_cache.get_content(content_key)
+        if cached and data.get('cTag') and cached[0] == data['cTag']:
+            self.item_cache.record_content_hit(len(cached[1]), round_trip_saved=True)
+            return cached[1]
         
-        data = response.json()
         download_url = data.get('@microsoft.graph.downloadUrl')
         
         if not download_url:
@@ -271,22 +593,172 @@ class SharePointClient:
             )
         else:
             # Download from the download URL (doesn't need auth)
-            response = requests.get(download_url)
+            response = self._transfer_session.get(download_url, timeout=300)
         
         if response.status_code != 200:
             raise RequestException(f"Failed to download file: {response.status_code}")
         
-        content = response.content
+        self.item_cache.put_content(content_key, data.get('cTag'), response.content)
+        return response.content
+    
+    def download_to_file(
+        self,
+        file_path: str,
+        local_path: str,
+        drive_id: Optional[str] = None,
+        parallel_ranges: int = 1
+    ) -> DownloadResult:
+        """
+        Stream a file from SharePoint to disk.
         
-        if local_path:
-            # Save to local file
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            with open(local_path, 'wb') as f:
-                f.write(content)
-            logger.info(f"File downloaded to {local_path}")
-            return local_path
+        The file is written in fixed-size chunks to a .part file that is
+        renamed into place once complete. With parallel_ranges > 1, files
+        of at least PARALLEL_DOWNLOAD_THRESHOLD bytes are fetched as that
+        many concurrent Range requests. An interrupted download resumes
+        from its saved progress if the remote eTag has not changed.
+        
+        Args:
+            file_path: Path to file in SharePoint
+            local_path: Local path to save file
+            drive_id: Drive ID (defaults to site's default drive)
+            parallel_ranges: Concurrent Range requests for large files
+            
+        Returns:
+            DownloadResult with size and throughput
+        """
+        api_url, data = self._get_download_info(file_path, drive_id)
+        return self._download_to_file(api_url, data, local_path, parallel_ranges)
+    
+    def download_item_to_file(
+        self,
+        item: SharePointFile,
+        local_path: str,
+        drive_id: Optional[str] = None,
+        parallel_ranges: int = 1
+    ) -> DownloadResult:
+        """
+        Stream an already-listed file to disk without re-fetching its metadata.
+        
+        Uses the download URL, size and eTag returned by the listing, so
+        each file costs one request instead of two. Listing download URLs
+        expire after about an hour; callers walking large trees should fall
+        back to download_to_file if this fails.
+        
+        Args:
+            item: SharePointFile from a listing or search
+            local_path: Local path to save file
+            drive_id: Drive ID (defaults to site's default drive)
+            parallel_ranges: Concurrent Range requests for large files
+            
+        Returns:
+            DownloadResult with size and throughput
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        data = {'@microsoft.graph.downloadUrl': item.download_url, 'size': item.size, 'eTag': item.etag}
+        return self._download_to_file(self._item_id_url(drive_id, item.id), data, local_path, parallel_ranges)
+    
+    def _download_to_file(
+        self,
+        api_url: str,
+        data: Dict[str, Any],
+        local_path: str,
+        parallel_ranges: int
+    ) -> DownloadResult:
+        """Stream a file described by item JSON to disk."""
+        download_url = data.get('@microsoft.graph.downloadUrl')
+        
+        if download_url:
+            def fetch(headers: Dict[str, str]) -> requests.Response:
+                return self._transfer_session.get(download_url, headers=headers, stream=True, timeout=300)
         else:
-            return content
+            def fetch(headers: Dict[str, str]) -> requests.Response:
+                return self.auth_client.make_graph_request(
+                    method='GET',
+                    url=f"{api_url}/content",
+                    headers=dict(headers),
+                    stream=True
+                )
+        
+        size = data.get('size') or 0
+        ranges = parallel_ranges if size >= self.PARALLEL_DOWNLOAD_THRESHOLD else 1
+        
+        return RangeDownloader(
+            fetch,
+            local_path,
+            size=size,
+            etag=data.get('eTag'),
+            parallel_ranges=ranges
+        ).run()
+    
+    def download_folder(
+        self,
+        folder_path: str,
+        local_dir: str,
+        drive_id: Optional[str] = None,
+        max_workers: int = 8,
+        skip_unchanged: bool = True,
+        progress_callback: Optional[Callable] = None,
+        manifest_path: Optional[str] = None
+    ):
+        """
+        Download a folder tree, transferring files concurrently.
+        
+        Args:
+            folder_path: Remote folder path ('' for the drive root)
+            local_dir: Local destination directory
+            drive_id: Drive ID (defaults to site's default drive)
+            max_workers: Maximum concurrent listings and downloads
+            skip_unchanged: Skip files whose local copy matches by size and eTag or mtime
+            progress_callback: Called with a TransferProgress after each file
+            manifest_path: Summary manifest location (defaults to a file in local_dir)
+            
+        Returns:
+            FolderTransferResult summary
+        """
+        from sharepoint.folder_transfer import FolderTransfer
+        transfer = FolderTransfer(
+            self, drive_id=drive_id, max_workers=max_workers,
+            skip_unchanged=skip_unchanged, progress_callback=progress_callback
+        )
+        return transfer.download(folder_path, local_dir, manifest_path=manifest_path)
+    
+    def upload_folder(
+        self,
+        local_dir: str,
+        folder_path: str,
+        drive_id: Optional[str] = None,
+        max_workers: int = 8,
+        skip_unchanged: bool = True,
+        conflict_behavior: str = 'replace',
+        progress_callback: Optional[Callable] = None,
+        manifest_path: Optional[str] = None
+    ):
+        """
+        Upload a local directory tree, transferring files concurrently.
+        
+        Args:
+            local_dir: Local source directory
+            folder_path: Remote destination folder path ('' for the drive root)
+            drive_id: Drive ID (defaults to site's default drive)
+            max_workers: Maximum concurrent folder creations and uploads
+            skip_unchanged: Skip files whose remote copy matches by size and eTag or mtime
+            conflict_behavior: 'rename', 'replace', or 'fail' for changed files
+            progress_callback: Called with a TransferProgress after each file
+            manifest_path: Summary manifest location (defaults to a file in local_dir)
+            
+        Returns:
+            FolderTransferResult summary
+        """
+        from sharepoint.folder_transfer import FolderTransfer
+        transfer = FolderTransfer(
+            self, drive_id=drive_id, max_workers=max_workers,
+            skip_unchanged=skip_unchanged, progress_callback=progress_callback
+        )
+        return transfer.upload(
+            local_dir, folder_path, conflict_behavior=conflict_behavior, manifest_path=manifest_path
+        )
     
     def upload_file(
         self,
@@ -359,6 +831,7 @@ class SharePointClient:
             raise RequestException(f"Failed to upload file: {response.status_code} - {response.text}")
         
         data = response.json()
+        self._remember_item(drive_id, remote_path, data)
         return self._parse_file_item(data)
     
     def _resumable_upload(
@@ -368,63 +841,45 @@ class SharePointClient:
         drive_id: str,
         conflict_behavior: str
     ) -> SharePointFile:
-        """Resumable upload for large files (>4MB)."""
-        # Create upload session
-        encoded_path = quote(remote_path, safe='')
-        api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root:/{encoded_path}:/createUploadSession"
-        
-        session_data = {
-            'item': {
-                '@microsoft.graph.conflictBehavior': conflict_behavior
-            }
-        }
-        
-        response = self.auth_client.make_graph_request(
-            method='POST',
-            url=api_url,
-            json=session_data
-        )
-        
-        if response.status_code != 200:
-            raise RequestException(f"Failed to create upload session: {response.status_code} - {response.text}")
-        
-        session = response.json()
-        upload_url = session['uploadUrl']
-        
-        # Upload file in chunks
-        chunk_size = 10 * 1024 * 1024  # 10MB chunks
-        file_size = os.path.getsize(local_path)
+        """
+        Resumable upload for large files (>4MB).
         
-        with open(local_path, 'rb') as f:
-            start = 0
-            while start < file_size:
-                # Read chunk
-                chunk = f.read(chunk_size)
-                end = min(start + len(chunk), file_size)
-                
-                # Upload chunk
-                headers = {
-                    'Content-Length': str(len(chunk)),
-                    'Content-Range': f'bytes {start}-{end-1}/{file_size}'
+        The upload session is persisted so an interrupted upload of the
+        same, unmodified file continues where it stopped (see
+        sharepoint.uploads.ResumableUploader).
+        """
+        def create_session() -> Dict[str, Any]:
+            encoded_path = quote(remote_path, safe='')
+            api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root:/{encoded_path}:/createUploadSession"
+            
+            session_data = {
+                'item': {
+                    '@microsoft.graph.conflictBehavior': conflict_behavior
                 }
-                
-                response = requests.put(
-                    upload_url,
-                    data=chunk,
-                    headers=headers
-                )
-                
-                if response.status_code not in [200, 201, 202]:
-                    raise RequestException(f"Failed to upload chunk: {response.status_code} - {response.text}")
-                
-                start = end
-                
-                # Log progress
-                progress = (start / file_size) * 100
-                logger.info(f"Upload progress: {progress:.1f}%")
-        
-        # Parse final response
-        data = response.json()
+            }
+            
+            response = self.auth_client.make_graph_request(
+                method='POST',
+                url=api_url,
+                json=session_data
+            )
+            
+            if response.status_code != 200:
+                raise RequestException(f"Failed to create upload session: {response.status_code} - {response.text}")
+            
+            return response.json()
+        
+        state_key = f"{self.GRAPH_BASE_URL}|{self.site_id}|{drive_id}|{remote_path}|{os.path.abspath(local_path)}"
+        result = ResumableUploader(
+            self._transfer_session,
+            create_session,
+            local_path,
+            state_key,
+            chunk_size=self.UPLOAD_CHUNK_SIZE
+        ).run()
+        
+        data = result.item
+        self._remember_item(drive_id, remote_path, data)
         return self._parse_file_item(data)
     
     def create_folder(
@@ -474,6 +929,45 @@ class SharePointClient:
         data = response.json()
         return self._parse_folder_item(data)
     
+    def ensure_folder(
+        self,
+        folder_path: str,
+        drive_id: Optional[str] = None
+    ) -> bool:
+        """
+        Make sure a folder exists, creating it if needed.
+        
+        Unlike create_folder, an existing folder is left as is rather than
+        created again under a new name. The parent folder must exist.
+        
+        Args:
+            folder_path: Path of the folder
+            drive_id: Drive ID (defaults to site's default drive)
+            
+        Returns:
+            True if the folder was created, False if it already existed
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        parent_path, _, folder_name = folder_path.strip('/').rpartition('/')
+        response = self.auth_client.make_graph_request(
+            method='POST',
+            url=self._children_url(drive_id, parent_path or None),
+            json={
+                'name': folder_name,
+                'folder': {},
+                '@microsoft.graph.conflictBehavior': 'fail'
+            }
+        )
+        
+        if response.status_code in [200, 201]:
+            self._remember_item(drive_id, folder_path.strip('/'), response.json())
+            return True
+        if response.status_code == 409:
+            return False
+        raise RequestException(f"Failed to create folder: {response.status_code} - {response.text}")
+    
     def delete_item(
         self,
         item_path: str,
@@ -504,6 +998,9 @@ class SharePointClient:
             url=api_url
         )
         
+        if response.status_code in (204, 404):
+            self._forget_item(drive_id, item_path)
+        
         if response.status_code == 204:
             logger.info(f"Successfully deleted: {item_path}")
             return True
@@ -528,31 +1025,7 @@ class SharePointClient:
         Returns:
             List of SharePointFile objects
         """
-        # Get drive ID if not provided
-        if not drive_id:
-            drive_id = self.get_default_drive_id()
-        
-        # Construct API URL
-        api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root/search(q='{quote(query, safe='')}')"
-        
-        response = self.auth_client.make_graph_request(
-            method='GET',
-            url=api_url,
-            params={'$top': limit}
-        )
-        
-        if response.status_code != 200:
-            raise RequestException(f"Failed to search files: {response.status_code} - {response.text}")
-        
-        data = response.json()
-        
-        # Parse results
-        files = []
-        for item in data.get('value', []):
-            if 'file' in item:
-                files.append(self._parse_file_item(item))
-        
-        return files
+        return list(islice(self.iter_search_results(query, drive_id=drive_id, page_size=limit), limit))
     
     def get_file_metadata(
         self,
@@ -573,19 +1046,180 @@ class SharePointClient:
         if not drive_id:
             drive_id = self.get_default_drive_id()
         
-        # Encode the file path
-        encoded_path = quote(file_path, safe='')
+        data = self._get_item_json(drive_id, file_path, "Failed to get file metadata")
+        return self._parse_file_item(data)
+    
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get connection pool statistics for Graph and transfer requests.
         
-        # Construct API URL
-        api_url = f"{self.GRAPH_BASE_URL}/sites/{self.site_id}/drives/{drive_id}/root:/{encoded_path}"
+        Returns:
+            Dictionary with 'graph' and 'transfer' pool statistics
+        """
+        graph_stats = {}
+        if isinstance(self.auth_client, GraphAuthClient):
+            graph_stats = self.auth_client.get_pool_stats()
+        return {
+            'graph': graph_stats,
+            'transfer': get_pool_stats(self._transfer_session)
+        }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get savings from eTag-validated metadata and content caching.
         
-        response = self.auth_client.make_graph_request(
-            method='GET',
-            url=api_url
-        )
+        Returns:
+            Dictionary with conditional requests, 304s, content cache hits,
+            and bytes and round trips saved
+        """
+        return self.item_cache.get_stats()
+    
+    def _new_batcher(self) -> GraphBatcher:
+        """Create a $batch helper bound to this client's auth and base URL."""
+        return GraphBatcher(self.auth_client, base_url=self.GRAPH_BASE_URL)
+    
+    def get_files_metadata(
+        self,
+        file_paths: List[str],
+        drive_id: Optional[str] = None
+    ) -> Dict[str, Optional[SharePointFile]]:
+        """
+        Get metadata for many files using Graph $batch requests.
         
-        if response.status_code != 200:
-            raise RequestException(f"Failed to get file metadata: {response.status_code} - {response.text}")
+        Args:
+            file_paths: Paths to files in SharePoint
+            drive_id: Drive ID (defaults to site's default drive)
+            
+        Returns:
+            Dictionary mapping each path to its SharePointFile, or None if
+            the file could not be retrieved
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
         
-        data = response.json()
-        return self._parse_file_item(data)
\ No newline at end of file
+        cached = {}
+        with self._new_batcher() as batcher:
+            queued = {}
+            for path in file_paths:
+                cached[path] = self.item_cache.get_metadata(
+                    ItemCache.metadata_key(self.GRAPH_BASE_URL, drive_id, path)
+                )
+                headers = None
+                if cached[path]:
+                    self.item_cache.record_conditional_request()
+                    headers = {'If-None-Match': cached[path]['eTag']}
+                queued[path] = batcher.add('GET', self._item_url(drive_id, path), headers=headers)
+        
+        results = {}
+        for path, request in queued.items():
+            response = request.response
+            if response is not None and response.status_code == 304 and cached[path]:
+                self.item_cache.record_not_modified(cached[path])
+                results[path] = self._parse_file_item(cached[path])
+            elif response is not None and response.status_code == 200:
+                self.item_cache.put_metadata(
+                    ItemCache.metadata_key(self.GRAPH_BASE_URL, drive_id, path), response.json()
+                )
+                self._remember_item(drive_id, path, response.json())
+                results[path] = self._parse_file_item(response.json())
+            else:
+                status = response.status_code if response is not None else 'no response'
+                logger.warning(f"Failed to get file metadata for {path}: {status}")
+                results[path] = None
+        
+        return results
+    
+    def list_drive_items_batch(
+        self,
+        folder_paths: List[Optional[str]],
+        drive_id: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> Dict[Optional[str], Dict[str, List[Union[SharePointFile, SharePointFolder]]]]:
+        """
+        List several folders using Graph $batch requests.
+        
+        The first page of every folder comes from the batch; folders with
+        more children are completed by following their @odata.nextLink.
+        
+        Args:
+            folder_paths: Folder paths to list (None for root)
+            drive_id: Drive ID (defaults to site's default drive)
+            page_size: Items requested per page ($top, defaults to DEFAULT_PAGE_SIZE)
+            
+        Returns:
+            Dictionary mapping each folder path to its 'files' and 'folders'
+            
+        Raises:
+            RequestException: If any folder cannot be listed
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        with self._new_batcher() as batcher:
+            queued = {
+                path: batcher.add(
+                    'GET',
+                    self._children_url(drive_id, path),
+                    params={'$expand': 'thumbnails', '$top': page_size or self.DEFAULT_PAGE_SIZE}
+                )
+                for path in folder_paths
+            }
+        
+        results = {}
+        for path, request in queued.items():
+            response = request.response
+            if response is None or response.status_code != 200:
+                status = response.status_code if response is not None else 'no response'
+                raise RequestException(f"Failed to list items in {path or 'root'}: {status}")
+            data = response.json()
+            items = data.get('value', [])
+            next_link = data.get('@odata.nextLink')
+            if next_link:
+                for page in self._iter_pages(next_link, None, f"Failed to list items in {path or 'root'}"):
+                    items.extend(page.get('value', []))
+            results[path] = self._parse_children(items)
+        
+        return results
+    
+    def search_files_batch(
+        self,
+        queries: List[str],
+        drive_id: Optional[str] = None,
+        limit: int = 50
+    ) -> Dict[str, List[SharePointFile]]:
+        """
+        Run several file searches using Graph $batch requests.
+        
+        Args:
+            queries: Search query strings
+            drive_id: Drive ID (defaults to site's default drive)
+            limit: Maximum number of results per query
+            
+        Returns:
+            Dictionary mapping each query to its list of SharePointFile objects
+            
+        Raises:
+            RequestException: If any search fails
+        """
+        if not drive_id:
+            drive_id = self.get_default_drive_id()
+        
+        with self._new_batcher() as batcher:
+            queued = {
+                query: batcher.add('GET', self._search_url(drive_id, query), params={'$top': limit})
+                for query in queries
+            }
+        
+        results = {}
+        for query, request in queued.items():
+            response = request.response
+            if response is None or response.status_code != 200:
+                status = response.status_code if response is not None else 'no response'
+                raise RequestException(f"Failed to search files for '{query}': {status}")
+            results[query] = [
+                self._parse_file_item(item)
+                for item in response.json().get('value', [])
+                if 'file' in item
+            ]
+        
+        return results
\ No newline at end of file
@@ -0,0 +1,397 @@
+"""
+Resumable, persisted upload sessions for SharePoint.
+
+Large files are sent through a Graph upload session in chunks read from a
+memory-mapped view of the file, so no chunk is copied into Python bytes.
+The session URL is persisted to a small state file after every chunk; if
+the process or network fails part-way, the next attempt asks the session
+which ranges it still expects and continues from there. Chunk size adapts
+to the observed throughput while staying a multiple of 320 KiB, as Graph
+requires.
+"""
+
+import os
+import json
+import mmap
+import time
+import hashlib
+import logging
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Callable, Iterator
+
+import requests
+from requests.exceptions import RequestException, ConnectionError, Timeout
+
+logger = logging.getLogger(__name__)
+
+CHUNK_MULTIPLE = 320 * 1024  # Graph requires chunks in multiples of 320 KiB
+MIN_CHUNK_SIZE = CHUNK_MULTIPLE
+MAX_CHUNK_SIZE = 192 * CHUNK_MULTIPLE  # 60 MiB, Graph's per-request limit
+INITIAL_CHUNK_SIZE = 32 * CHUNK_MULTIPLE  # 10 MiB
+TARGET_CHUNK_SECONDS = 4.0  # aim for chunks that take a few seconds each
+SEND_BLOCK_SIZE = 256 * 1024
+
+
+@dataclass
+class UploadResult:
+    """Summary of a completed upload."""
+    item: Dict[str, Any]
+    size: int
+    bytes_uploaded: int
+    resumed_bytes: int
+    chunks: int
+    elapsed_seconds: float
+    final_chunk_size: int
+
+    @property
+    def throughput_mbps(self) -> float:
+        """Upload throughput in megabytes per second."""
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.bytes_uploaded / self.elapsed_seconds / (1024 * 1024)
+
+
+class ChunkSizer:
+    """
+    Pick upload chunk sizes from observed throughput.
+
+    Each chunk aims to take about ``target_seconds``; the size moves by at
+    most a factor of two per chunk and is always a multiple of 320 KiB.
+    """
+
+    def __init__(
+        self,
+        initial: int = INITIAL_CHUNK_SIZE,
+        minimum: int = MIN_CHUNK_SIZE,
+        maximum: int = MAX_CHUNK_SIZE,
+        target_seconds: float = TARGET_CHUNK_SECONDS
+    ):
+        self.minimum = self._align(minimum)
+        self.maximum = self._align(maximum)
+        self.target_seconds = target_seconds
+        self.size = self._clamp(initial)
+
+    @staticmethod
+    def _align(size: float) -> int:
+        """Round down to a positive multiple of 320 KiB."""
+        return max(CHUNK_MULTIPLE, int(size) // CHUNK_MULTIPLE * CHUNK_MULTIPLE)
+
+    def _clamp(self, size: float) -> int:
+        return min(self.maximum, max(self.minimum, self._align(size)))
+
+    def record(self, nbytes: int, seconds: float):
+        """
+        Adjust the chunk size after a chunk was sent.
+
+        Args:
+            nbytes: Bytes in the chunk
+            seconds: Time the chunk took
+        """
+        if seconds <= 0:
+            ideal = self.size * 2
+        else:
+            ideal = nbytes / seconds * self.target_seconds
+        self.size = self._clamp(min(max(ideal, self.size / 2), self.size * 2))
+
+    def shrink(self):
+        """Halve the chunk size after a failed chunk."""
+        self.size = self._clamp(self.size / 2)
+
+
+class _MappedChunk:
+    """
+    Zero-copy, file-like view of one chunk of a memory-mapped file.
+
+    requests sends objects with ``read`` as a streamed body and takes the
+    Content-Length from ``len``. Every view handed out is tracked so
+    ``release`` can drop them all before the map is closed.
+    """
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._position = 0
+        self._blocks = []
+
+    def __len__(self) -> int:
+        return len(self._view) - self._position
+
+    def read(self, amt: int = -1) -> memoryview:
+        end = len(self._view) if amt is None or amt < 0 else min(len(self._view), self._position + amt)
+        data = self._view[self._position:end]
+        self._blocks.append(data)
+        self._position = end
+        return data
+
+    def __iter__(self) -> Iterator[memoryview]:
+        while True:
+            block = self.read(SEND_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+
+    def release(self):
+        """Release the chunk and every block read from it."""
+        for block in self._blocks:
+            block.release()
+        self._blocks.clear()
+        self._view.release()
+
+
+def _default_state_dir() -> str:
+    """Directory for persisted upload sessions."""
+    return os.getenv(
+        'SHAREPOINT_UPLOAD_STATE_DIR',
+        os.path.join(tempfile.gettempdir(), 'dcri_sharepoint_uploads')
+    )
+
+
+class ResumableUploader:
+    """
+    Upload one local file through a Graph upload session, resuming if possible.
+    """
+
+    MAX_RETRIES = 5  # per chunk, and new sessions after the upload URL returns 404
+    RETRY_DELAY = 1.0  # seconds, doubled per consecutive failure or new session
+
+    def __init__(
+        self,
+        session: requests.Session,
+        create_session: Callable[[], Dict[str, Any]],
+        local_path: str,
+        state_key: str,
+        state_dir: Optional[str] = None,
+        chunk_size: int = INITIAL_CHUNK_SIZE
+    ):
+        """
+        Initialize the uploader.
+
+        Args:
+            session: Session used for the pre-authenticated upload URL
+            create_session: Callable creating a new Graph upload session and
+                returning its JSON (with 'uploadUrl')
+            local_path: File to upload
+            state_key: Identifies this upload (destination and source) so a
+                later attempt finds the persisted session
+            state_dir: Where session state is stored (defaults to env var
+                SHAREPOINT_UPLOAD_STATE_DIR or a directory under the system
+                temp dir)
+            chunk_size: Initial chunk size, rounded to a multiple of 320 KiB
+        """
+        self.session = session
+        self.create_session = create_session
+        self.local_path = local_path
+        self.state_dir = state_dir or _default_state_dir()
+        self.state_path = os.path.join(
+            self.state_dir, hashlib.sha256(state_key.encode()).hexdigest() + '.json'
+        )
+        self.sizer = ChunkSizer(initial=chunk_size)
+        stat = os.stat(local_path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._state: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Persisted state
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        """Load a saved session for this exact file version, if still valid."""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if state.get('size') != self.size or state.get('mtime_ns') != self.mtime_ns:
+            logger.info(f"Discarding upload session for changed file {self.local_path}")
+            return None
+
+        expiration = state.get('expiration')
+        if expiration:
+            try:
+                expires_at = datetime.fromisoformat(expiration.replace('Z', '+00:00'))
+                if expires_at <= datetime.now(timezone.utc):
+                    return None
+            except ValueError:
+                pass
+        return state
+
+    def _save_state(self):
+        """Persist the session atomically, readable by the owner only (it holds the upload URL)."""
+        os.makedirs(self.state_dir, mode=0o700, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _clear_state(self):
+        """Remove the persisted session."""
+        try:
+            os.remove(self.state_path)
+        except FileNotFoundError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Session handling
+    # ------------------------------------------------------------------
+
+    def _new_session(self):
+        """Create and persist a new upload session."""
+        session = self.create_session()
+        self._state = {
+            'upload_url': session['uploadUrl'],
+            'expiration': session.get('expirationDateTime'),
+            'local_path': os.path.abspath(self.local_path),
+            'size': self.size,
+            'mtime_ns': self.mtime_ns,
+            'offset': 0
+        }
+        self._save_state()
+
+    @staticmethod
+    def _next_offset(body: Dict[str, Any]) -> Optional[int]:
+        """Read the first expected byte from a session status body."""
+        ranges = body.get('nextExpectedRanges') or []
+        if not ranges:
+            return None
+        return int(str(ranges[0]).split('-')[0])
+
+    def _query_offset(self) -> Optional[int]:
+        """Ask the session which byte it expects next; None if it is gone."""
+        try:
+            response = self.session.get(self._state['upload_url'], timeout=60)
+        except (ConnectionError, Timeout) as e:
+            logger.warning(f"Could not query upload session: {e}")
+            return self._state.get('offset', 0)
+        if response.status_code != 200:
+            return None
+        return self._next_offset(response.json())
+
+    # ------------------------------------------------------------------
+    # Upload
+    # ------------------------------------------------------------------
+
+    def run(self) -> UploadResult:
+        """
+        Upload the file, resuming a persisted session when possible.
+
+        Returns:
+            UploadResult with the created item JSON
+
+        Raises:
+            RequestException: If the upload fails; the session is kept so
+                the next attempt resumes
+        """
+        started = time.monotonic()
+        offset = None
+
+        state = self._load_state()
+        if state is not None:
+            self._state = state
+            offset = self._query_offset()
+            if offset is not None:
+                logger.info(f"Resuming upload of {self.local_path} at byte {offset} of {self.size}")
+
+        if offset is None:
+            self._new_session()
+            offset = 0
+
+        resumed = offset
+        chunks = 0
+        failures = 0
+        restarts = 0
+        item = None
+
+        with open(self.local_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                while item is None:
+                    end = min(offset + self.sizer.size, self.size)
+                    chunk = _MappedChunk(view[offset:end])
+                    headers = {
+                        'Content-Length': str(end - offset),
+                        'Content-Range': f"bytes {offset}-{end - 1}/{self.size}"
+                    }
+
+                    chunk_started = time.monotonic()
+                    try:
+                        response = self.session.put(
+                            self._state['upload_url'], data=chunk, headers=headers, timeout=300
+                        )
+                        status = response.status_code
+                    except (ConnectionError, Timeout) as e:
+                        response, status = None, None
+                        logger.warning(f"Upload chunk at byte {offset} failed: {e}")
+                    finally:
+                        chunk.release()
+                    elapsed = time.monotonic() - chunk_started
+
+                    if status in (200, 201):
+                        item = response.json()
+                        chunks += 1
+                        offset = self.size
+                        break
+
+                    if status == 202:
+                        chunks += 1
+                        failures = 0
+                        self.sizer.record(end - offset, elapsed)
+                        next_offset = self._next_offset(response.json())
+                        offset = end if next_offset is None else next_offset
+                        self._state['offset'] = offset
+                        self._save_state()
+                        logger.info(
+                            f"Upload progress: {offset / self.size * 100:.1f}% "
+                            f"(next chunk {self.sizer.size // 1024} KiB)"
+                        )
+                        continue
+
+                    if status == 404:
+                        # Session expired or was cancelled: start a new one, a bounded number of times
+                        restarts += 1
+                        if restarts > self.MAX_RETRIES:
+                            raise RequestException(
+                                f"Upload session for {self.local_path} was lost {restarts} times; giving up"
+                            )
+                        logger.warning(f"Upload session for {self.local_path} is gone; starting over")
+                        time.sleep(self.RETRY_DELAY * (2 ** (restarts - 1)))
+                        self._new_session()
+                        offset = resumed = 0
+                        continue
+
+                    failures += 1
+                    if failures > self.MAX_RETRIES:
+                        detail = f"{status} - {response.text}" if response is not None else "connection failed"
+                        raise RequestException(f"Failed to upload chunk: {detail}")
+
+                    self.sizer.shrink()
+                    time.sleep(self.RETRY_DELAY * (2 ** (failures - 1)))
+                    queried = self._query_offset()
+                    if queried is None:
+                        self._new_session()
+                        offset = resumed = 0
+                    else:
+                        offset = queried
+            finally:
+                view.release()
+
+        self._clear_state()
+        result = UploadResult(
+            item=item,
+            size=self.size,
+            bytes_uploaded=self.size - resumed,
+            resumed_bytes=resumed,
+            chunks=chunks,
+            elapsed_seconds=time.monotonic() - started,
+            final_chunk_size=self.sizer.size
+        )
+        logger.info(
+            f"Uploaded {self.local_path}: {result.size} bytes in {result.chunks} chunk(s), "
+            f"{result.elapsed_seconds:.2f}s ({result.throughput_mbps:.2f} MB/s, {resumed} bytes resumed)"
+        )
+        return result
@@ -0,0 +1,536 @@
+"""
+Local HTTP stand-in for the Microsoft Graph drive endpoints.
+
+Serves an in-memory document library over real HTTP on 127.0.0.1 so that
+SharePointClient and GraphAuthClient can be exercised offline, including
+Graph JSON $batch requests and injected throttling.
+"""
+
+import re
+import json
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from unittest.mock import patch
+from urllib.parse import unquote, urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from auth.graph_auth import GraphAuthClient, TokenInfo, AdaptiveThrottle
+from sharepoint.item_cache import ItemCache
+from sharepoint.resolution_cache import ResolutionCache
+from sharepoint.sharepoint_client import SharePointClient
+
+
+SITE_ID = "stub-site"
+DRIVE_ID = "stub-drive"
+
+_ROUTES = [
+    ('GET', re.compile(r'^/sites/(?P<hostname>[^/:]+):(?P<site_path>/.*)$'), '_get_site'),
+    ('GET', re.compile(r'^/sites/(?P<site>[^/]+)/drive$'), '_get_drive'),
+    ('GET', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root/children$'), '_list_children'),
+    ('GET', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root:/(?P<path>.+?):/children$'), '_list_children'),
+    ('GET', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root/delta$'), '_delta'),
+    ('GET', re.compile(r"^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root/search\(q='(?P<q>.*)'\)$"), '_search'),
+    ('GET', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root:/(?P<path>[^:]+)$'), '_get_item'),
+    ('GET', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/items/(?P<item_id>[^/]+)/content$'),
+     '_get_content'),
+    ('PUT', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root:/(?P<path>.+?):/content$'), '_put_content'),
+    ('POST', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root/children$'), '_create_child'),
+    ('POST', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root:/(?P<path>.+?):/children$'),
+     '_create_child'),
+    ('POST', re.compile(r'^/sites/(?P<site>[^/]+)/drives/(?P<drive>[^/]+)/root:/(?P<path>.+?):/createUploadSession$'),
+     '_create_upload_session'),
+    ('PUT', re.compile(r'^/upload/(?P<session_id>[^/]+)$'), '_upload_chunk'),
+    ('GET', re.compile(r'^/upload/(?P<session_id>[^/]+)$'), '_upload_status'),
+    ('POST', re.compile(r'^/\$batch$'), '_batch'),
+    ('GET', re.compile(r'^/download/(?P<item_id>[^/]+)$'), '_download'),
+]
+
+
+class GraphStubServer:
+    """
+    In-memory Graph drive served over HTTP.
+
+    Use as a context manager; ``url`` is the replacement for
+    ``https://graph.microsoft.com/v1.0``.
+    """
+
+    def __init__(self):
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.contents: Dict[str, bytes] = {}
+        self.request_log: List[Tuple[str, str]] = []
+        self.throttle_remaining = 0
+        self.retry_after = 0
+        self.fail_range_starts: set = set()
+        # Delta feed: change sequence per item ID and tombstones of deleted items
+        self.root = {'id': 'item-root', 'name': 'root', 'root': {}, 'folder': {'childCount': 0}}
+        self._change_seq = 0
+        self._item_seq: Dict[str, int] = {}
+        self._tombstones: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self.delta_token_floor = 0
+        # Upload sessions: id -> {'path', 'size', 'received'}; chunk log of (start, length)
+        self.upload_sessions: Dict[str, Dict[str, Any]] = {}
+        self.upload_chunks: List[Tuple[int, int]] = []
+        self.fail_upload_puts = 0
+        self._upload_data: Dict[str, bytearray] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Library setup
+    # ------------------------------------------------------------------
+
+    def _new_item(self, path: str, extra: Dict[str, Any]) -> Dict[str, Any]:
+        parent, _, name = path.rpartition('/')
+        item_id = f"item-{self._next_id}"
+        self._next_id += 1
+        now = datetime(2024, 1, 1, 12, 0, 0).isoformat() + 'Z'
+        item = {
+            'id': item_id,
+            'name': name,
+            'createdDateTime': now,
+            'lastModifiedDateTime': now,
+            'webUrl': f"https://stub.sharepoint.com/{path}",
+            'eTag': f'"{{{item_id}}},1"',
+            'cTag': f'"c:{{{item_id}}},1"',
+            'parentReference': {
+                'driveId': DRIVE_ID,
+                'id': self.items[parent]['id'] if parent else self.root['id'],
+                'path': f"/drive/root:/{parent}" if parent else "/drive/root:"
+            },
+        }
+        item.update(extra)
+        self.items[path] = item
+        self._touch(item)
+        return item
+
+    def _touch(self, item: Dict[str, Any]):
+        """Record a change to an item in the delta feed."""
+        self._change_seq += 1
+        self._item_seq[item['id']] = self._change_seq
+
+    def add_folder(self, path: str) -> Dict[str, Any]:
+        """Add a folder (and any missing parents) to the library."""
+        path = path.strip('/')
+        parent = path.rpartition('/')[0]
+        if parent and parent not in self.items:
+            self.add_folder(parent)
+        if path in self.items:
+            return self.items[path]
+        return self._new_item(path, {'folder': {'childCount': 0}})
+
+    def add_file(self, path: str, content: bytes = b'', mime_type: str = 'application/octet-stream') -> Dict[str, Any]:
+        """Add a file (and any missing parent folders) to the library."""
+        path = path.strip('/')
+        parent = path.rpartition('/')[0]
+        if parent:
+            self.add_folder(parent)
+        item = self._new_item(path, {'size': len(content), 'file': {'mimeType': mime_type}})
+        self.contents[path] = content
+        return item
+
+    def update_file(self, path: str, content: bytes):
+        """Replace a file's content, bumping its eTag and cTag."""
+        item = self.items[path.strip('/')]
+        version = int(item['eTag'].rsplit(',', 1)[1].rstrip('"')) + 1
+        item.update({
+            'size': len(content),
+            'eTag': f'"{{{item["id"]}}},{version}"',
+            'cTag': f'"c:{{{item["id"]}}},{version}"',
+        })
+        self.contents[path.strip('/')] = content
+        self._touch(item)
+
+    def move_item(self, old_path: str, new_path: str):
+        """Move or rename an item; only the moved item appears in the delta feed."""
+        old_path, new_path = old_path.strip('/'), new_path.strip('/')
+        new_parent, _, new_name = new_path.rpartition('/')
+        if new_parent:
+            self.add_folder(new_parent)
+        for path in [p for p in self.items if p == old_path or p.startswith(f"{old_path}/")]:
+            moved_path = new_path + path[len(old_path):]
+            item = self.items.pop(path)
+            parent = moved_path.rpartition('/')[0]
+            item['parentReference'] = dict(item['parentReference'], path=f"/drive/root:/{parent}" if parent else "/drive/root:")
+            self.items[moved_path] = item
+            if path in self.contents:
+                self.contents[moved_path] = self.contents.pop(path)
+        moved = self.items[new_path]
+        moved['name'] = new_name
+        moved['parentReference']['id'] = self.items[new_parent]['id'] if new_parent else self.root['id']
+        self._touch(moved)
+
+    def remove_item(self, path: str):
+        """Delete an item and its descendants, leaving delta tombstones."""
+        path = path.strip('/')
+        for item_path in [p for p in self.items if p == path or p.startswith(f"{path}/")]:
+            item = self.items.pop(item_path)
+            self.contents.pop(item_path, None)
+            self._change_seq += 1
+            self._item_seq.pop(item['id'], None)
+            self._tombstones[item['id']] = (self._change_seq, {
+                'id': item['id'],
+                'deleted': {'state': 'deleted'},
+                'parentReference': {'driveId': DRIVE_ID, 'id': item['parentReference']['id']},
+            })
+
+    def expire_delta_tokens(self):
+        """Make every previously issued delta token answer 410 Gone."""
+        self.delta_token_floor = self._change_seq + 1
+
+    def throttle(self, count: int, retry_after: int = 0):
+        """Answer the next ``count`` drive requests with 429 Too Many Requests."""
+        self.throttle_remaining = count
+        self.retry_after = retry_after
+
+    def _children(self, folder: str) -> List[Dict[str, Any]]:
+        prefix = f"{folder}/" if folder else ""
+        return [
+            item for path, item in sorted(self.items.items())
+            if path.startswith(prefix) and '/' not in path[len(prefix):]
+        ]
+
+    # ------------------------------------------------------------------
+    # Request dispatch
+    # ------------------------------------------------------------------
+
+    def dispatch(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None
+    ) -> Tuple[int, Dict[str, str], Any]:
+        """
+        Route a Graph request relative to the API version root.
+
+        Returns:
+            Tuple of (status, headers, body) where body is JSON-able or bytes
+        """
+        parts = urlsplit(url)
+        path = parts.path
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+        with self._lock:
+            self.request_log.append((method, url))
+            if self.throttle_remaining > 0 and path != '/$batch':
+                self.throttle_remaining -= 1
+                return 429, {'Retry-After': str(self.retry_after)}, {
+                    'error': {'code': 'TooManyRequests', 'message': 'Throttled'}
+                }
+
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                params = {k: unquote(v) for k, v in match.groupdict().items()}
+                return getattr(self, handler)(
+                    query=query, headers=headers or {}, body=body, request_path=path, **params
+                )
+
+        return 404, {}, {'error': {'code': 'itemNotFound', 'message': path}}
+
+    def _get_site(self, hostname, site_path, **kwargs):
+        return 200, {}, {'id': SITE_ID, 'webUrl': f"https://{hostname}{site_path}"}
+
+    def _get_drive(self, site, **kwargs):
+        return 200, {}, {'id': DRIVE_ID, 'driveType': 'documentLibrary'}
+
+    def _with_download_url(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if 'file' not in item or self._server is None:
+            return item
+        host, port = self._server.server_address
+        return dict(item, **{'@microsoft.graph.downloadUrl': f"http://{host}:{port}/download/{item['id']}"})
+
+    def _path_for_id(self, item_id: str) -> Optional[str]:
+        for path, item in self.items.items():
+            if item['id'] == item_id:
+                return path
+        return None
+
+    @staticmethod
+    def _not_modified(item: Dict[str, Any], headers: Dict[str, str]) -> bool:
+        """Check If-None-Match against the item's eTag or cTag."""
+        tag = next((v for k, v in headers.items() if k.lower() == 'if-none-match'), None)
+        return tag is not None and tag in (item.get('eTag'), item.get('cTag'))
+
+    def _get_item(self, site, drive, path, headers, **kwargs):
+        item = self.items.get(path.strip('/'))
+        if item is None:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': path}}
+        if self._not_modified(item, headers):
+            return 304, {}, None
+        return 200, {}, self._with_download_url(item)
+
+    def _get_content(self, site, drive, item_id, headers, **kwargs):
+        path = self._path_for_id(item_id)
+        if path is None or path not in self.contents:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': item_id}}
+        if self._not_modified(self.items[path], headers):
+            return 304, {}, None
+        item = self._with_download_url(self.items[path])
+        return 302, {'Location': item['@microsoft.graph.downloadUrl']}, None
+
+    def _put_content(self, site, drive, path, body, query, **kwargs):
+        """Simple upload; creates missing parent folders like Graph does."""
+        path = path.strip('/')
+        with self._lock:
+            if path in self.items:
+                if query.get('@microsoft.graph.conflictBehavior') == 'fail':
+                    return 409, {}, {'error': {'code': 'nameAlreadyExists', 'message': path}}
+                self.update_file(path, body or b'')
+                return 200, {}, self.items[path]
+            return 201, {}, self.add_file(path, body or b'')
+
+    def _create_child(self, site, drive, body, path='', **kwargs):
+        """Create a folder, honouring conflictBehavior 'fail'."""
+        request = json.loads(body or b'{}')
+        folder = path.strip('/')
+        if folder and folder not in self.items:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': path}}
+        child = f"{folder}/{request['name']}" if folder else request['name']
+        with self._lock:
+            if child in self.items:
+                if request.get('@microsoft.graph.conflictBehavior') == 'fail':
+                    return 409, {}, {'error': {'code': 'nameAlreadyExists', 'message': child}}
+                return 200, {}, self.items[child]
+            return 201, {}, self.add_folder(child)
+
+    def _create_upload_session(self, site, drive, path, **kwargs):
+        with self._lock:
+            session_id = f"session-{len(self.upload_sessions) + 1}"
+            self.upload_sessions[session_id] = {'path': path.strip('/'), 'size': None, 'received': 0}
+            self._upload_data[session_id] = bytearray()
+        host, port = self._server.server_address
+        return 200, {}, {
+            'uploadUrl': f"http://{host}:{port}/upload/{session_id}",
+            'expirationDateTime': '2999-01-01T00:00:00Z'
+        }
+
+    def _upload_status(self, session_id, **kwargs):
+        session = self.upload_sessions.get(session_id)
+        if session is None:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': session_id}}
+        return 200, {}, {'nextExpectedRanges': [f"{session['received']}-"]}
+
+    def _upload_chunk(self, session_id, headers, body, **kwargs):
+        """Accept one chunk, enforcing order and the 320 KiB multiple rule."""
+        session = self.upload_sessions.get(session_id)
+        if session is None:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': session_id}}
+        with self._lock:
+            if self.fail_upload_puts > 0:
+                self.fail_upload_puts -= 1
+                return 503, {}, {'error': {'code': 'serviceNotAvailable', 'message': 'Injected failure'}}
+
+        content_range = next(v for k, v in headers.items() if k.lower() == 'content-range')
+        span, _, total = content_range.replace('bytes ', '').partition('/')
+        start, end = (int(x) for x in span.split('-'))
+        body = body or b''
+        if start != session['received'] or len(body) != end - start + 1:
+            return 416, {}, {'error': {'code': 'invalidRange', 'message': content_range}}
+        if end + 1 < int(total) and len(body) % (320 * 1024):
+            return 400, {}, {'error': {'code': 'invalidRequest', 'message': 'Chunk not a multiple of 320 KiB'}}
+
+        with self._lock:
+            self.upload_chunks.append((start, len(body)))
+            self._upload_data[session_id] += body
+            session['received'] = end + 1
+            if session['received'] < int(total):
+                return 202, {}, {'nextExpectedRanges': [f"{session['received']}-"]}
+            del self.upload_sessions[session_id]
+            content = bytes(self._upload_data.pop(session_id))
+            if session['path'] in self.items:
+                self.update_file(session['path'], content)
+                return 200, {}, self.items[session['path']]
+            return 201, {}, self.add_file(session['path'], content)
+
+    def _download(self, item_id, headers, **kwargs):
+        path = self._path_for_id(item_id)
+        if path is None or path not in self.contents:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': item_id}}
+        content = self.contents[path]
+
+        range_header = next((v for k, v in headers.items() if k.lower() == 'range'), None)
+        if not range_header:
+            return 200, {'ETag': self.items[path]['cTag']}, content
+
+        start_text, _, end_text = range_header.replace('bytes=', '').partition('-')
+        start = int(start_text)
+        end = int(end_text) if end_text else len(content) - 1
+        with self._lock:
+            if start in self.fail_range_starts:
+                # Fail each listed range once to emulate a dropped transfer
+                self.fail_range_starts.discard(start)
+                return 500, {}, {'error': {'code': 'generalException', 'message': 'Injected failure'}}
+        return 206, {'Content-Range': f"bytes {start}-{end}/{len(content)}"}, content[start:end + 1]
+
+    def _page(self, items: List[Dict[str, Any]], query: Dict[str, str], request_path: str,
+              default_top: int = 200) -> Dict[str, Any]:
+        """Return one page of items, honouring $top, $skiptoken and $select."""
+        top = int(query.get('$top', default_top))
+        skip = int(query.get('$skiptoken', 0))
+        page = [self._with_download_url(item) for item in items[skip:skip + top]]
+
+        if '$select' in query:
+            fields = query['$select'].split(',')
+            page = [{k: v for k, v in item.items() if k in fields} for item in page]
+
+        result = {'value': page}
+        if skip + top < len(items):
+            next_query = dict(query, **{'$skiptoken': str(skip + top)})
+            query_string = '&'.join(f"{k}={v}" for k, v in next_query.items())
+            result['@odata.nextLink'] = f"{self.url}{request_path}?{query_string}"
+        return result
+
+    def _list_children(self, site, drive, query, request_path, path='', **kwargs):
+        folder = path.strip('/')
+        if folder and folder not in self.items:
+            return 404, {}, {'error': {'code': 'itemNotFound', 'message': path}}
+        return 200, {}, self._page(self._children(folder), query, request_path)
+
+    def _search(self, site, drive, query, request_path, q, **kwargs):
+        term = q.lower()
+        hits = [item for _, item in sorted(self.items.items()) if term in item['name'].lower()]
+        return 200, {}, self._page(hits, query, request_path)
+
+    def _delta(self, site, drive, query, request_path, **kwargs):
+        """Emulate /root/delta: changes since ``token``, paged, ending in a deltaLink."""
+        token = query.get('token')
+        if token is not None and int(token) < self.delta_token_floor:
+            return 410, {}, {'error': {'code': 'resyncRequired', 'message': 'Delta token expired'}}
+
+        since = int(token or 0)
+        changes = [
+            (self._item_seq[item['id']], item) for item in self.items.values()
+            if self._item_seq[item['id']] > since
+        ]
+        if token is not None:
+            changes += [entry for entry in self._tombstones.values() if entry[0] > since]
+        ordered = [item for _, item in sorted(changes, key=lambda entry: entry[0])]
+        if token is None:
+            ordered.insert(0, self.root)
+
+        top = int(query.get('$top', 200))
+        skip = int(query.get('$skiptoken', 0))
+        result = {'value': ordered[skip:skip + top]}
+        if skip + top < len(ordered):
+            next_query = dict(query, **{'$skiptoken': str(skip + top)})
+            result['@odata.nextLink'] = f"{self.url}{request_path}?" + '&'.join(f"{k}={v}" for k, v in next_query.items())
+        else:
+            result['@odata.deltaLink'] = f"{self.url}{request_path}?token={self._change_seq}"
+        return 200, {}, result
+
+    def _batch(self, body, **kwargs):
+        payload = json.loads(body or b'{}')
+        sub_requests = payload.get('requests', [])
+        if len(sub_requests) > 20:
+            return 400, {}, {'error': {'code': 'invalidRequest', 'message': 'Too many requests in batch'}}
+
+        responses = []
+        for sub in sub_requests:
+            sub_body = sub.get('body')
+            raw = json.dumps(sub_body).encode() if sub_body is not None else None
+            status, headers, result = self.dispatch(sub['method'], sub['url'], sub.get('headers'), raw)
+            responses.append({'id': sub['id'], 'status': status, 'headers': headers, 'body': result})
+        return 200, {}, {'responses': responses}
+
+    # ------------------------------------------------------------------
+    # HTTP server lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        """Base URL replacing https://graph.microsoft.com/v1.0."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1.0"
+
+    def start(self):
+        """Start serving on an ephemeral localhost port."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else None
+                path = self.path[len('/v1.0'):] if self.path.startswith('/v1.0') else self.path
+                status, headers, result = stub.dispatch(self.command, path, dict(self.headers), body)
+
+                if isinstance(result, (bytes, bytearray)):
+                    data = bytes(result)
+                    content_type = 'application/octet-stream'
+                else:
+                    data = json.dumps(result).encode() if result is not None else b''
+                    content_type = 'application/json'
+
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the HTTP server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def make_stub_auth_client() -> GraphAuthClient:
+    """Create a GraphAuthClient holding a pre-issued token (no AAD calls).
+
+    Each client gets its own throttle so injected 429s do not slow down
+    unrelated tests through the process-wide default.
+    """
+    client = GraphAuthClient(
+        tenant_id="stub-tenant",
+        client_id="stub-client",
+        client_secret="stub-secret",
+        token_cache=None,
+        throttle=AdaptiveThrottle(rate=1000.0, max_rate=1000.0)
+    )
+    client._token_info = TokenInfo(access_token="stub-token", expires_at=datetime(2999, 1, 1))
+    return client
+
+
+def make_stub_sp_client(stub: GraphStubServer, **kwargs) -> SharePointClient:
+    """Create a SharePointClient for the stub with its own auth client and caches.
+
+    Keyword arguments override the client's constructor arguments; passing
+    site_url resolves the site ID against the stub instead of using SITE_ID.
+    """
+    options = {
+        'site_id': None if 'site_url' in kwargs else SITE_ID,
+        'auth_client': make_stub_auth_client(),
+        'resolution_cache': ResolutionCache(),
+        'item_cache': ItemCache()
+    }
+    options.update(kwargs)
+    with patch.object(SharePointClient, 'GRAPH_BASE_URL', stub.url):
+        sp_client = SharePointClient(**options)
+    sp_client.GRAPH_BASE_URL = stub.url
+    return sp_client
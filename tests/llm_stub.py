@@ -0,0 +1,155 @@
+"""
+Local HTTP stand-in for the Azure OpenAI chat completions endpoint.
+
+Serves completions over real HTTP on 127.0.0.1 so the shared LLM client can
+be exercised offline, including slow responses, injected throttling and
+server errors.
+"""
+
+import re
+import json
+import time
+import threading
+from typing import Optional, Dict, Any, List, Callable
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from auth.graph_auth import AdaptiveThrottle
+from llm.azure_openai import AzureOpenAIClient, LLMResponseCache
+
+DEPLOYMENT = "stub-deployment"
+API_VERSION = "2024-02-01"
+
+_COMPLETIONS = re.compile(r'^/openai/deployments/(?P<deployment>[^/]+)/chat/completions\?api-version=.+$')
+
+
+def echo_responder(messages: List[Dict[str, str]]) -> str:
+    """Answer with the last user message."""
+    return f"echo: {messages[-1]['content']}"
+
+
+class AzureOpenAIStubServer:
+    """
+    Chat completions served over HTTP.
+
+    Use as a context manager; ``endpoint`` replaces AZURE_OPENAI_ENDPOINT.
+    """
+
+    def __init__(self, responder: Callable[[List[Dict[str, str]]], str] = echo_responder):
+        self.responder = responder
+        self.requests: List[Dict[str, Any]] = []
+        self.delay = 0.0
+        self.throttle_remaining = 0
+        self.retry_after = 0
+        self.fail_remaining = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def dispatch(self, method: str, path: str, body: Optional[bytes]):
+        """Route a request; returns (status, headers, JSON body)."""
+        match = _COMPLETIONS.match(path)
+        if method != 'POST' or not match:
+            return 404, {}, {'error': {'code': 'NotFound'}}
+
+        payload = json.loads(body or b'{}')
+        with self._lock:
+            self.requests.append(payload)
+            if self.throttle_remaining > 0:
+                self.throttle_remaining -= 1
+                return 429, {'Retry-After': str(self.retry_after)}, {'error': {'code': '429'}}
+            if self.fail_remaining > 0:
+                self.fail_remaining -= 1
+                return 500, {}, {'error': {'code': 'InternalServerError'}}
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            content = self.responder(payload['messages'])
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        return 200, {}, {
+            'id': f"chatcmpl-{len(self.requests)}",
+            'object': 'chat.completion',
+            'model': match.group('deployment'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15}
+        }
+
+    # ------------------------------------------------------------------
+    # Server lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def endpoint(self) -> str:
+        """Replacement for AZURE_OPENAI_ENDPOINT (with trailing slash)."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        """Start serving on an ephemeral localhost port."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else None
+                status, headers, result = stub.dispatch(self.command, self.path, body)
+
+                data = json.dumps(result).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the HTTP server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def make_stub_llm_client(stub: AzureOpenAIStubServer, **kwargs) -> AzureOpenAIClient:
+    """Create a client for the stub with its own in-memory cache and throttle.
+
+    Keyword arguments override the client's constructor arguments.
+    """
+    options = {
+        'api_key': "stub-key",
+        'endpoint': stub.endpoint,
+        'deployment': DEPLOYMENT,
+        'api_version': API_VERSION,
+        'cache': LLMResponseCache(db_path=":memory:"),
+        'throttle': AdaptiveThrottle(rate=1000.0, max_rate=1000.0, concurrency=8, max_concurrency=8)
+    }
+    options.update(kwargs)
+    return AzureOpenAIClient(**options)
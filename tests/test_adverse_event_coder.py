@@ -1,3 +1,4 @@
+import os
 import pytest
 from tools.adverse_event_coder import run
 
@@ -155,4 +156,28 @@ def test_adverse_event_coder_missing_verbatim():
     
     assert "error" not in result
     assert len(result["coded_events"]) == 1
-    assert len(result["warnings"]) > 0
\ No newline at end of file
+    assert len(result["warnings"]) > 0
+
+def test_adverse_event_coder_meddra_distribution(tmp_path, monkeypatch):
+    """Test coding against a MedDRA ASCII distribution from MEDDRA_ASCII_DIR."""
+    import tools.adverse_event_coder as adverse_event_coder
+    from tests.test_meddra import write_meddra_distribution
+
+    monkeypatch.setenv("MEDDRA_ASCII_DIR", write_meddra_distribution(tmp_path))
+    monkeypatch.setenv("MEDDRA_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(adverse_event_coder, "_meddra_coder", None)
+
+    result = run({"events": [
+        {"verbatim_term": "Head pain", "subject_id": "001"},
+        {"verbatim_term": "nausia", "subject_id": "002"},
+        {"verbatim_term": "Head pain", "subject_id": "003"}
+    ]})
+
+    head_pain = result["coded_events"][0]
+    assert head_pain["lower_level_term"] == "Head pain"
+    assert head_pain["llt_code"] == "10019198"
+    assert head_pain["meddra_code"] == "10019211"
+    assert head_pain["coding_version"] == "27.0"
+    assert result["coded_events"][1]["preferred_term"] == "Nausea"
+    assert result["summary"]["soc_distribution"] == {"Nervous system disorders": 2, "Gastrointestinal disorders": 1}
+    assert os.listdir(tmp_path / "index")
@@ -2,7 +2,9 @@
 Tests for the Microsoft Graph API authentication module.
 """
 
+import io
 import os
+import time
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
@@ -12,6 +14,12 @@ from requests.exceptions import RequestException, HTTPError
 from auth.graph_auth import (
     GraphAuthClient,
     TokenInfo,
+    TokenCache,
+    FileTokenCache,
+    RedisTokenCache,
+    AdaptiveThrottle,
+    get_default_token_cache,
+    parse_retry_after,
     get_default_client,
     get_access_token,
     get_authorization_header
@@ -346,6 +354,344 @@ class TestGraphAuthClient:
         mock_session.close.assert_called_once()
 
 
+class TestTokenCache:
+    """Test the token cache base class."""
+
+    def test_subclasses_must_implement_load_and_save(self):
+        """Test a cache missing load or save cannot be created."""
+        class LoadOnlyCache(TokenCache):
+            def load(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            TokenCache()
+        with pytest.raises(TypeError):
+            LoadOnlyCache()
+
+
+class TestFileTokenCache:
+    """Test the encrypted, file-backed shared token cache."""
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Create a file token cache in a temporary directory."""
+        return FileTokenCache(cache_dir=str(tmp_path), secret="shared-secret")
+    
+    def _make_client(self, cache):
+        return GraphAuthClient(
+            tenant_id="test-tenant",
+            client_id="test-client",
+            client_secret="shared-secret",
+            token_cache=cache
+        )
+    
+    def test_save_and_load_roundtrip(self, cache):
+        """Test a token survives the encrypted round trip."""
+        expires_at = datetime.now().replace(microsecond=0) + timedelta(hours=1)
+        cache.save("key", TokenInfo(access_token="abc", expires_at=expires_at, scope="s"))
+        
+        loaded = cache.load("key")
+        
+        assert loaded.access_token == "abc"
+        assert loaded.expires_at == expires_at
+        assert loaded.scope == "s"
+    
+    def test_token_encrypted_at_rest(self, cache, tmp_path):
+        """Test the access token is not stored in plain text."""
+        cache.save("key", TokenInfo(access_token="plain-token-value",
+                                    expires_at=datetime.now() + timedelta(hours=1)))
+        
+        raw = (tmp_path / "key.token").read_bytes()
+        assert b"plain-token-value" not in raw
+    
+    def test_wrong_secret_is_cache_miss(self, cache, tmp_path):
+        """Test a cache written with another secret cannot be read."""
+        cache.save("key", TokenInfo(access_token="abc",
+                                    expires_at=datetime.now() + timedelta(hours=1)))
+        other = FileTokenCache(cache_dir=str(tmp_path), secret="other-secret")
+        
+        assert other.load("key") is None
+    
+    def test_load_missing_key(self, cache):
+        """Test loading a key that was never written."""
+        assert cache.load("missing") is None
+    
+    @patch.object(GraphAuthClient, '_request_token')
+    def test_token_shared_between_clients(self, mock_request_token, cache):
+        """Test a second client reuses the token fetched by the first."""
+        mock_request_token.return_value = TokenInfo(
+            access_token="shared_token",
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        
+        first = self._make_client(cache)
+        second = self._make_client(cache)
+        
+        assert first.get_access_token() == "shared_token"
+        assert second.get_access_token() == "shared_token"
+        mock_request_token.assert_called_once()
+    
+    @patch.object(GraphAuthClient, '_request_token')
+    def test_expired_shared_token_is_refreshed(self, mock_request_token, cache):
+        """Test an expired cached token triggers a new request."""
+        client = self._make_client(cache)
+        cache.save(client._cache_key, TokenInfo(
+            access_token="expired_token",
+            expires_at=datetime.now() - timedelta(minutes=1)
+        ))
+        mock_request_token.return_value = TokenInfo(
+            access_token="new_token",
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        
+        assert client.get_access_token() == "new_token"
+        assert cache.load(client._cache_key).access_token == "new_token"
+    
+    @patch.object(GraphAuthClient, '_request_token')
+    def test_force_refresh_adopts_token_refreshed_elsewhere(self, mock_request_token, cache):
+        """Test a 401 refresh reuses a newer token written by another process."""
+        client = self._make_client(cache)
+        client._token_info = TokenInfo(
+            access_token="rejected_token",
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        cache.save(client._cache_key, TokenInfo(
+            access_token="refreshed_elsewhere",
+            expires_at=datetime.now() + timedelta(hours=1)
+        ))
+        
+        assert client.get_access_token(force_refresh=True) == "refreshed_elsewhere"
+        mock_request_token.assert_not_called()
+    
+    @patch.object(GraphAuthClient, '_request_token')
+    def test_force_refresh_replaces_rejected_cached_token(self, mock_request_token, cache):
+        """Test a 401 refresh does not reuse the token that was rejected."""
+        client = self._make_client(cache)
+        rejected = TokenInfo(
+            access_token="rejected_token",
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        client._token_info = rejected
+        cache.save(client._cache_key, rejected)
+        mock_request_token.return_value = TokenInfo(
+            access_token="new_token",
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        
+        assert client.get_access_token(force_refresh=True) == "new_token"
+        mock_request_token.assert_called_once()
+
+
+class TestRedisTokenCache:
+    """Test the Redis-backed shared token cache."""
+    
+    def test_save_and_load_through_cache_manager(self):
+        """Test tokens are stored encrypted in the token namespace."""
+        store = {}
+        cache_manager = Mock()
+        cache_manager.set.side_effect = lambda key, value, ttl, namespace: store.__setitem__((namespace, key), value)
+        cache_manager.get.side_effect = lambda key, namespace: store.get((namespace, key))
+        
+        cache = RedisTokenCache(cache_manager=cache_manager, secret="secret")
+        cache.save("key", TokenInfo(access_token="redis_token",
+                                    expires_at=datetime.now() + timedelta(hours=1)))
+        
+        assert ("token", "key") in store
+        assert b"redis_token" not in store[("token", "key")]['ciphertext']
+        assert cache.load("key").access_token == "redis_token"
+        assert 0 < cache_manager.set.call_args[1]['ttl'] <= 3600
+    
+    def test_expired_token_not_saved(self):
+        """Test an already expired token is not written to Redis."""
+        cache_manager = Mock()
+        cache = RedisTokenCache(cache_manager=cache_manager, secret="secret")
+        
+        cache.save("key", TokenInfo(access_token="old",
+                                    expires_at=datetime.now() - timedelta(seconds=1)))
+        
+        cache_manager.set.assert_not_called()
+
+
+class TestDefaultTokenCache:
+    """Test selection of the token cache backend from the environment."""
+    
+    def test_disabled_by_default(self, monkeypatch):
+        """Test no shared cache is used unless configured."""
+        monkeypatch.delenv('GRAPH_TOKEN_CACHE', raising=False)
+        assert get_default_token_cache() is None
+    
+    def test_file_backend(self, monkeypatch, tmp_path):
+        """Test selecting the file backend."""
+        monkeypatch.setenv('GRAPH_TOKEN_CACHE', 'file')
+        monkeypatch.setenv('GRAPH_TOKEN_CACHE_DIR', str(tmp_path))
+        
+        cache = get_default_token_cache()
+        
+        assert isinstance(cache, FileTokenCache)
+        assert cache.cache_dir == str(tmp_path)
+
+
+class TestRetryAndThrottling:
+    """Test Retry-After-aware retries and the adaptive throttle."""
+    
+    @pytest.fixture
+    def client(self):
+        """Create a client with its own fast throttle and a valid token.
+        
+        on_throttle is wrapped so the shared pause it sets does not make
+        the test wait for real; time.sleep is patched in each test instead.
+        """
+        client = GraphAuthClient(
+            tenant_id="test-tenant",
+            client_id="test-client",
+            client_secret="test-secret",
+            throttle=AdaptiveThrottle(rate=1000.0, max_rate=1000.0)
+        )
+        client._token_info = TokenInfo(
+            access_token="token",
+            expires_at=datetime.now() + timedelta(hours=1)
+        )
+        real_on_throttle = client.throttle.on_throttle
+        client.throttle.on_throttle = Mock(side_effect=lambda retry_after: real_on_throttle(0))
+        return client
+    
+    def _response(self, status_code, headers=None):
+        response = Mock()
+        response.status_code = status_code
+        response.headers = headers or {}
+        return response
+    
+    @patch('auth.graph_auth.time.sleep')
+    def test_retries_429_honouring_retry_after(self, mock_sleep, client):
+        """Test a 429 is retried after the Retry-After delay."""
+        responses = [self._response(429, {'Retry-After': '7'}), self._response(200)]
+        
+        with patch.object(client._session, 'request', side_effect=responses):
+            response = client.make_graph_request(method='GET', url='https://graph.microsoft.com/v1.0/x')
+        
+        assert response.status_code == 200
+        delay = mock_sleep.call_args[0][0]
+        assert 7 <= delay <= 7.7
+        client.throttle.on_throttle.assert_called_once_with(delay)
+        assert client.throttle.throttled_count == 1
+    
+    @patch('auth.graph_auth.time.sleep')
+    def test_retries_503_with_backoff(self, mock_sleep, client):
+        """Test 503 without Retry-After uses bounded exponential backoff."""
+        responses = [self._response(503), self._response(503), self._response(200)]
+        
+        with patch.object(client._session, 'request', side_effect=responses):
+            response = client.make_graph_request(method='GET', url='https://graph.microsoft.com/v1.0/x')
+        
+        assert response.status_code == 200
+        assert mock_sleep.call_count == 2
+        assert mock_sleep.call_args_list[0][0][0] <= client.BACKOFF_BASE
+        assert mock_sleep.call_args_list[1][0][0] <= client.BACKOFF_BASE * 2
+    
+    @patch('auth.graph_auth.time.sleep')
+    def test_gives_up_after_max_retries(self, mock_sleep, client):
+        """Test the last throttled response is returned once retries run out."""
+        responses = [self._response(429, {'Retry-After': '0'})] * (client.MAX_RETRIES + 1)
+        
+        with patch.object(client._session, 'request', side_effect=responses) as mock_request:
+            response = client.make_graph_request(method='GET', url='https://graph.microsoft.com/v1.0/x')
+        
+        assert response.status_code == 429
+        assert mock_request.call_count == client.MAX_RETRIES + 1
+    
+    @patch('auth.graph_auth.time.sleep')
+    def test_retries_connection_errors(self, mock_sleep, client):
+        """Test transient connection errors are retried."""
+        side_effect = [requests.exceptions.ConnectionError("reset"), self._response(200)]
+        
+        with patch.object(client._session, 'request', side_effect=side_effect):
+            response = client.make_graph_request(method='GET', url='https://graph.microsoft.com/v1.0/x')
+        
+        assert response.status_code == 200
+        mock_sleep.assert_called_once()
+    
+    @patch('auth.graph_auth.time.sleep')
+    def test_non_idempotent_connection_errors_not_retried(self, mock_sleep, client):
+        """Test a POST or streamed PUT that may have reached Graph is not sent twice."""
+        stream = io.BytesIO(b"chunk")
+        for method, data in (('POST', None), ('PUT', stream)):
+            with patch.object(client._session, 'request',
+                              side_effect=[requests.exceptions.ReadTimeout("read"), self._response(201)]) as mock_request:
+                with pytest.raises(requests.exceptions.ReadTimeout):
+                    client.make_graph_request(method=method, url='https://graph.microsoft.com/v1.0/x', data=data)
+            assert mock_request.call_count == 1
+        mock_sleep.assert_not_called()
+    
+    @patch('auth.graph_auth.time.sleep')
+    def test_post_retried_after_connect_timeout(self, mock_sleep, client):
+        """Test a POST is resent when the connection was never established."""
+        side_effect = [requests.exceptions.ConnectTimeout("connect"), self._response(201)]
+        
+        with patch.object(client._session, 'request', side_effect=side_effect):
+            response = client.make_graph_request(method='POST', url='https://graph.microsoft.com/v1.0/x', json={})
+        
+        assert response.status_code == 201
+        mock_sleep.assert_called_once()
+    
+    def test_parse_retry_after(self):
+        """Test Retry-After parsing for seconds, dates and junk."""
+        assert parse_retry_after('12') == 12.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after('soon') is None
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    
+    def test_throttle_shrinks_and_recovers(self):
+        """Test the throttle halves on 429 and grows back on success."""
+        throttle = AdaptiveThrottle(rate=20.0, concurrency=8, max_concurrency=8)
+        
+        throttle.on_throttle(0)
+        assert throttle.rate == 10.0
+        assert throttle.concurrency == 4
+        
+        for _ in range(4):
+            throttle.on_success()
+        assert throttle.rate == 12.0
+        assert throttle.concurrency == 5
+    
+    def test_throttle_limits_concurrency(self):
+        """Test no more than the allowed number of requests run at once."""
+        import threading
+        
+        throttle = AdaptiveThrottle(rate=1000.0, concurrency=2, max_concurrency=2)
+        peak = []
+        active = [0]
+        lock = threading.Lock()
+        
+        def worker():
+            with throttle.slot():
+                with lock:
+                    active[0] += 1
+                    peak.append(active[0])
+                time.sleep(0.01)
+                with lock:
+                    active[0] -= 1
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert max(peak) <= 2
+    
+    def test_throttle_rate_limit(self):
+        """Test the token bucket spaces requests at the configured rate."""
+        throttle = AdaptiveThrottle(rate=50.0, max_rate=50.0)
+        throttle._tokens = 0.0
+        
+        start = time.monotonic()
+        for _ in range(5):
+            with throttle.slot():
+                pass
+        
+        assert time.monotonic() - start >= 0.08
+
+
 class TestModuleFunctions:
     """Test module-level convenience functions."""
     
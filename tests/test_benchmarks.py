@@ -0,0 +1,146 @@
+"""
+Tests for the tool benchmark suite.
+"""
+
+import csv
+from io import StringIO
+
+import pytest
+
+from lib.benchmarks import (
+    FORMAT_VERSION, compare, examples_from_tests, format_report, list_tools, load_results, measure,
+    record_field, save_results, scale_input
+)
+
+
+def results(measurements):
+    """Results document with the given {tool: {size: measurement}}."""
+    return {"format_version": FORMAT_VERSION, "created": "2024-01-01T00:00:00",
+            "environment": {"python": "3", "platform": "test"}, "settings": {}, "results": measurements}
+
+
+def ok(seconds, rss=50.0, output=100):
+    return {"status": "ok", "scaled": "list", "seconds": seconds, "peak_rss_mb": rss, "output_bytes": output}
+
+
+class TestScaling:
+    """Test growing seed inputs to a number of records."""
+
+    def test_lists_tiled_with_unique_ids(self):
+        """Test records repeat with ID fields suffixed and linked lists grow together."""
+        seed = {
+            "edc_saes": [{"subject_id": "S1", "term": "Rash"}, {"subject_id": "S2", "term": "Fever"}],
+            "safety_db_saes": [{"subject_id": "S1", "term": "Rash"}],
+            "options": {"tolerance": 3}
+        }
+
+        scaled, kind = scale_input(seed, 6)
+
+        assert kind == "list"
+        assert [record["subject_id"] for record in scaled["edc_saes"]] == ["S1", "S2", "S1-1", "S2-1", "S1-2", "S2-2"]
+        assert [record["subject_id"] for record in scaled["safety_db_saes"]] == ["S1", "S1-1", "S1-2"]
+        assert scaled["options"] == {"tolerance": 3}
+        assert len(seed["edc_saes"]) == 2
+
+    def test_csv_rows_tiled(self):
+        """Test CSV inputs grow by rows and keep their header."""
+        seed = {"data": "subject_id,age\n001,40\n002,55\n", "level": "standard"}
+
+        scaled, kind = scale_input(seed, 3)
+        rows = list(csv.DictReader(StringIO(scaled["data"])))
+
+        assert kind == "csv"
+        assert rows == [{"subject_id": "001", "age": "40"}, {"subject_id": "002", "age": "55"},
+                        {"subject_id": "001-1", "age": "40"}]
+
+    def test_field_choice(self):
+        """Test records beat long text, which beats option lists; scalars are fixed."""
+        text = {"text": "Patient John Smith was seen on 01/02/2024 at the clinic.", "modes": ["names", "dates"]}
+
+        assert record_field(text) == (("text",), "text")
+        assert scale_input(text, 3)[0]["text"].count("John Smith") == 3
+        assert record_field({"items": [{"a": 1}], "text": text["text"]}) == (("items",), "list")
+        assert record_field({"alpha": 0.05, "power": 0.8}) is None
+        assert scale_input({"alpha": 0.05}, 100) == ({"alpha": 0.05}, None)
+        assert record_field({"n_subjects": 10}, "randomization_generator") == (("n_subjects",), "count")
+
+
+class TestSeedInputs:
+    """Test finding seed inputs for tools."""
+
+    def test_examples_from_tests(self, tmp_path):
+        """Test run() inputs are found inline, assigned to results and via variables."""
+        (tmp_path / "test_demo.py").write_text(
+            "SHARED = {'rows': [1, 2]}\n"
+            "def test_inline():\n"
+            "    result = run({'items': [{'id': 'A'}]})\n"
+            "def test_variable():\n"
+            "    payload = {'text': 'hello'}\n"
+            "    assert run(payload)\n"
+            "def test_module_level():\n"
+            "    run(SHARED)\n"
+        )
+
+        assert examples_from_tests("demo", str(tmp_path)) == [
+            {"items": [{"id": "A"}]}, {"text": "hello"}, {"rows": [1, 2]}
+        ]
+
+    def test_offline_tools_listed(self):
+        """Test tools that need Azure OpenAI are left out."""
+        tools = list_tools()
+
+        assert "adverse_event_coder" in tools
+        assert "schedule_converter_azure" not in tools
+        assert "test_echo" not in tools
+
+
+class TestMeasure:
+    """Test measuring a tool in its own process."""
+
+    def test_measure_tool(self):
+        """Test a measurement records time, memory and output size."""
+        measurement = measure("adverse_event_coder", 50, timeout=60, repeats=1)
+
+        assert measurement["status"] == "ok"
+        assert measurement["records"] == 50
+        assert measurement["seconds"] > 0
+        assert measurement["peak_rss_mb"] > 0
+        assert measurement["output_bytes"] > 0
+
+
+class TestCompare:
+    """Test flagging regressions against a baseline."""
+
+    def test_regressions_flagged(self):
+        """Test slowdowns, memory growth and new failures beyond tolerance are regressions."""
+        baseline = results({
+            "steady": {"100": ok(1.0)}, "slower": {"100": ok(1.0)}, "hungrier": {"100": ok(1.0, rss=50)},
+            "faster": {"100": ok(1.0)}, "broken": {"100": ok(1.0)}, "noise": {"100": ok(0.001)}
+        })
+        current = results({
+            "steady": {"100": ok(1.1)}, "slower": {"100": ok(1.5)}, "hungrier": {"100": ok(1.0, rss=80)},
+            "faster": {"100": ok(0.5)}, "broken": {"100": {"status": "timeout", "seconds": 60}},
+            "noise": {"100": ok(0.004)}, "added": {"100": ok(1.0)}
+        })
+
+        verdicts = {row["tool"]: row["verdict"] for row in compare(baseline, current)}
+
+        assert verdicts == {
+            "steady": "ok", "slower": "regression", "hungrier": "regression", "faster": "improved",
+            "broken": "regression", "noise": "ok", "added": "new"
+        }
+
+    def test_report_and_round_trip(self, tmp_path):
+        """Test results save and load, and the report summarises verdicts."""
+        path = str(tmp_path / "baseline.json")
+        save_results(results({"tool": {"100": ok(1.0)}}), path)
+        baseline = load_results(path)
+
+        report = format_report(compare(baseline, results({"tool": {"100": ok(2.0)}})))
+
+        assert "regression" in report
+        assert "time x2.00" in report
+        assert report.endswith("Summary: 1 regression")
+        with pytest.raises(ValueError):
+            save_results({"format_version": 0}, path)
+            load_results(path)
@@ -408,6 +408,32 @@ class TestComplianceKnowledgeBase:
         assert "available_schemas" in result["metadata"]
         assert "generic" in result["metadata"]["available_schemas"]
 
+    def test_batch_mode(self):
+        """Test checking several studies' schedules in one call."""
+        def schedule(study_id, date):
+            return {
+                "study_id": study_id,
+                "schedule_data": {"visits": [{
+                    "id": "V1", "day": 0, "date": date, "type": "Screening",
+                    "site": "SITE-001", "procedures": ["informed_consent", "blood_draw"]
+                }]}
+            }
+
+        result = run({
+            "schedules": [schedule("TRIAL-A", "2024-02-05"), schedule("TRIAL-A", "2024-02-06"),
+                          schedule("TRIAL-B", "2024-02-03")],
+            "schema_type": "generic"
+        })
+
+        assert result["status"] == "success"
+        assert result["mode"] == "batch"
+        assert result["compliance_status"] == "FAIL"
+        assert result["summary"]["schedules"] == 3
+        assert result["summary"]["visits_analyzed"] == 3
+        assert result["studies"]["TRIAL-A"]["compliance_status"] == "PASS"
+        assert result["studies"]["TRIAL-B"]["findings_by_rule"] == {"SITE-001": 1}
+        assert "weekend" in result["studies"]["TRIAL-B"]["sample_findings"][0]["description"].lower()
+
 
 if __name__ == "__main__":
     # Run tests
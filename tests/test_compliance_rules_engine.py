@@ -0,0 +1,355 @@
+"""
+Tests for the compiled compliance rules engine and schema adapter.
+"""
+
+import os
+import json
+import random
+import pytest
+from collections import Counter
+from datetime import date, timedelta
+
+from lib.compliance.rules_engine import (
+    RulesEngine, RulePlan, Visit, get_rule_plan, parse_business_hours, DEFAULT_RULES_PATH
+)
+from lib.compliance.schema_adapter import SchemaAdapter, ExtractionPlan, compile_extraction, evaluate_path
+from lib.compliance.batch import VisitColumns, evaluate_columns
+
+
+def write_rules(path, rules):
+    """Write a rules file and return its path as a string."""
+    path.write_text(json.dumps(rules))
+    return str(path)
+
+
+BLACKOUT_RULE = {
+    "rule_id": "SITE-002",
+    "rule_type": "logistics",
+    "description": "Holiday blackout dates must be respected",
+    "applies_to": {"data_type": "visits"},
+    "validation": {"type": "blackout_dates", "parameters": {"holidays": ["2024-12-25"]}},
+    "severity": "error"
+}
+
+ORDER_RULE = {
+    "rule_id": "SEQ-001",
+    "rule_type": "logistics",
+    "description": "Visits must be in chronological order",
+    "applies_to": {"data_type": "visit_sequence"},
+    "validation": {"type": "visit_order", "parameters": {}},
+    "severity": "error"
+}
+
+
+class TestRulePlan:
+    """Test compiling and caching rule plans."""
+
+    def test_default_rules_compile(self):
+        """Test every bundled rule compiles to a check."""
+        with open(DEFAULT_RULES_PATH) as f:
+            definitions = json.load(f)
+
+        plan = get_rule_plan(DEFAULT_RULES_PATH)
+
+        assert [rule.rule_id for rule in plan.rules] == [d["rule_id"] for d in definitions]
+        assert set(plan.by_data_type) == {"visits", "visit_sequence"}
+
+    def test_plan_cached_until_file_changes(self, tmp_path):
+        """Test the plan is reused while the file is unchanged and rebuilt after."""
+        path = write_rules(tmp_path / "rules.json", [BLACKOUT_RULE])
+        first = get_rule_plan(path)
+
+        assert get_rule_plan(path) is first
+
+        write_rules(tmp_path / "rules.json", [BLACKOUT_RULE, ORDER_RULE])
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        second = get_rule_plan(path)
+
+        assert second is not first
+        assert [rule.rule_id for rule in second.rules] == ["SITE-002", "SEQ-001"]
+
+    def test_invalid_rules_skipped(self):
+        """Test unknown validation types and bad parameters don't break the plan."""
+        plan = RulePlan.compile([
+            {"rule_id": "X-1", "validation": {"type": "does_not_exist"}},
+            {"rule_id": "X-2", "validation": {"type": "procedure_timing",
+                                               "parameters": {"required_time_range": "morning"}}},
+            BLACKOUT_RULE
+        ])
+
+        assert [rule.rule_id for rule in plan.rules] == ["SITE-002"]
+
+    def test_category_selection_memoised(self):
+        """Test category selections are filtered once per plan."""
+        plan = get_rule_plan(DEFAULT_RULES_PATH)
+
+        logistics = plan.select(["logistics"])
+
+        assert {rule.rule_type for rule in logistics} == {"logistics"}
+        assert plan.select(["logistics"]) is logistics
+        assert plan.select(None) == plan.rules
+
+    def test_parse_business_hours(self):
+        """Test business hours strings parse to weekdays and minutes."""
+        assert parse_business_hours("M-F 8:00-17:00") == (frozenset(range(5)), 480, 1020)
+        assert parse_business_hours("M-Sa 07:30-12:00") == (frozenset(range(6)), 450, 720)
+
+
+class TestRulesEngine:
+    """Test applying compiled rules."""
+
+    def test_visit_rules_only_see_visits(self, tmp_path):
+        """Test visit rules run per visit and sequence rules once per schedule."""
+        path = write_rules(tmp_path / "rules.json", [BLACKOUT_RULE, ORDER_RULE])
+        engine = RulesEngine(rules_path=path)
+        engine.load_rules()
+        visits = [
+            {"visit_id": "V1", "visit_day": 0, "visit_date": "2024-12-25", "procedures": []},
+            {"visit_id": "V2", "visit_day": 7, "visit_date": "2024-12-20", "procedures": []}
+        ]
+
+        findings = engine.apply_rules({}, {"visits": visits})
+
+        assert [(f.rule_id, f.affected_items) for f in findings] == [
+            ("SITE-002", ["V1"]),
+            ("SEQ-001", ["V1", "V2"])
+        ]
+
+    def test_rules_loaded_on_demand(self, tmp_path):
+        """Test apply_rules loads all rules if load_rules was not called."""
+        engine = RulesEngine(rules_path=write_rules(tmp_path / "rules.json", [BLACKOUT_RULE]))
+
+        findings = engine.apply_rules({}, {"visits": [{"visit_id": "V1", "visit_date": "2024-12-25"}]})
+
+        assert len(findings) == 1
+        assert findings[0].to_dict()["details"]["rule_description"] == BLACKOUT_RULE["description"]
+
+    def test_consent_timing(self):
+        """Test study procedures before consent are flagged, exempt ones are not."""
+        engine = RulesEngine()
+        engine.load_rules(["regulatory"])
+        visits = [
+            {"visit_id": "V0", "visit_day": -7, "procedures": ["phone_screen"]},
+            {"visit_id": "V1", "visit_day": -3, "procedures": ["Blood Draw"]},
+            {"visit_id": "V2", "visit_day": 0, "procedures": ["Informed Consent", "ecg"]},
+        ]
+
+        findings = [f for f in engine.apply_rules({}, {"visits": visits}) if f.rule_id == "REG-002"]
+
+        assert [f.affected_items for f in findings] == [["V1", "V2"]]
+
+    def test_visit_window_uses_study_start(self):
+        """Test windows are measured from study_start_date and strict types."""
+        engine = RulesEngine()
+        engine.load_rules(["regulatory"])
+        visits = [
+            {"visit_id": "V1", "visit_day": 0, "visit_date": "2024-02-06", "visit_type": "Baseline"},
+            {"visit_id": "V2", "visit_day": 14, "visit_date": "2024-02-21", "visit_type": "Treatment"}
+        ]
+
+        findings = engine.apply_rules({"study_start_date": "2024-02-05"}, {"visits": visits})
+
+        assert [f.affected_items for f in findings if f.rule_id == "WIN-001"] == [["V1"]]
+
+    def test_visit_record_parsing(self):
+        """Test visits are parsed once into dates, times and procedure keys."""
+        visit = Visit.from_record({
+            "visit_id": "V1", "visit_day": "7", "visit_date": "2024-02-05T09:30",
+            "visit_time": "09:30", "visit_type": "Follow-up", "procedures": ["PET Scan"]
+        }, 0)
+
+        assert visit.day == 7
+        assert visit.date == date(2024, 2, 5)
+        assert visit.time == 570
+        assert visit.visit_type == "follow_up"
+        assert visit.procedure_keys == frozenset({"pet_scan"})
+
+
+def random_schedules(count, seed=7):
+    """Schedules with random weekends, holidays, gaps, sites and missing values."""
+    rng = random.Random(seed)
+    procedures = ["blood_draw", "MRI", "biopsy", "contrast_imaging", "informed_consent",
+                  "phone_screen", "fasting_labs", "Surgery", "X-Ray"]
+    schedules = []
+    for index in range(count):
+        start = date(2024, 11, 15) + timedelta(days=rng.randrange(60))
+        visits = []
+        for number in range(rng.randrange(0, 25)):
+            day = rng.choice([None, rng.randrange(-10, 120)])
+            visit_date = start + timedelta(days=(day or 0) + rng.choice((0, 0, 3, -4)))
+            visits.append({
+                "visit_id": f"V{number}",
+                "visit_day": day,
+                "visit_date": rng.choice([visit_date.isoformat(), visit_date.isoformat(), None, "bad"]),
+                "visit_time": rng.choice([None, "07:00", "09:30", "18:00"]),
+                "visit_type": rng.choice(["Screening", "Baseline", "Treatment", "Final"]),
+                "site_id": rng.choice([None, "SITE-001", "SITE-002", "SITE-999"]),
+                "procedures": rng.sample(procedures, rng.randrange(0, 3))
+            })
+        schedules.append({
+            "study_id": f"S{index % 3}",
+            "schedule_id": index,
+            "study_start_date": rng.choice([start.isoformat(), None]),
+            "visits": visits
+        })
+    return schedules
+
+
+class TestBatchEvaluation:
+    """Test columnar evaluation across many schedules."""
+
+    def test_counts_match_per_schedule_engine(self):
+        """Test every rule reports the same violations as the per-schedule engine."""
+        engine = RulesEngine()
+        engine.load_rules()
+        schedules = random_schedules(200)
+
+        expected = Counter()
+        for schedule in schedules:
+            findings = engine.apply_rules(
+                {"study_start_date": schedule["study_start_date"]}, {"visits": schedule["visits"]}
+            )
+            expected.update((schedule["study_id"], finding.rule_id) for finding in findings)
+
+        columns = VisitColumns.from_schedules(schedules)
+        counts, _ = evaluate_columns(engine.rules, columns)
+        actual = Counter({
+            (study_id, rule_id): int(rule_counts[index])
+            for rule_id, rule_counts in counts.items()
+            for index, study_id in enumerate(columns.studies)
+            if rule_counts[index]
+        })
+
+        assert len(columns) == sum(len(schedule["visits"]) for schedule in schedules)
+        assert actual == expected
+
+    def test_results_aggregated_per_study(self):
+        """Test per-study summaries, warning filtering and example findings."""
+        engine = RulesEngine()
+        engine.load_rules()
+        schedules = [
+            {"study_id": "A", "study_start_date": "2024-02-05", "visits": [
+                {"visit_id": "V1", "visit_day": 0, "visit_date": "2024-02-05",
+                 "procedures": ["informed_consent"], "site_id": "SITE-001"},
+                {"visit_id": "V2", "visit_day": 3, "visit_date": "2024-02-14",
+                 "procedures": ["blood_draw"], "site_id": "SITE-001"}
+            ]},
+            {"study_id": "B", "visits": [
+                {"visit_id": "V1", "visit_day": 0, "visit_date": "2024-12-25",
+                 "procedures": ["informed_consent"], "site_id": "SITE-001"}
+            ]},
+            {"study_id": "B", "visits": [
+                {"visit_id": "V1", "visit_day": 0, "visit_date": "2024-02-06",
+                 "procedures": ["informed_consent"], "site_id": "SITE-001"}
+            ]}
+        ]
+        columns = VisitColumns.from_schedules(schedules)
+
+        results = engine.apply_rules_batch(columns, max_findings_per_study=1)
+        errors_only = engine.apply_rules_batch(columns, include_warnings=False, max_findings_per_study=0)
+
+        assert results["A"]["compliance_status"] == "WARNING"
+        assert results["A"]["findings_by_rule"] == {"WIN-001": 1}
+        assert results["B"]["compliance_status"] == "FAIL"
+        assert results["B"]["schedules"] == 2
+        assert results["B"]["schedules_with_findings"] == 1
+        assert results["B"]["findings_by_rule"] == {"SITE-002": 1}
+        assert len(results["B"]["sample_findings"]) == 1
+        assert results["B"]["sample_findings"][0]["rule_id"] == "SITE-002"
+        assert errors_only["A"]["compliance_status"] == "PASS"
+        assert errors_only["B"]["sample_findings"] == []
+
+    def test_columns_encode_dates_and_procedures(self):
+        """Test dates become day ordinals and procedures integer codes."""
+        columns = VisitColumns.from_schedules([{"study_id": "A", "visits": [
+            {"visit_date": "2024-02-05", "procedures": ["MRI", "mri", "Blood Draw"]},
+            {"visit_date": "not a date", "procedures": []}
+        ]}])
+
+        assert columns.ordinal.tolist() == [date(2024, 2, 5).toordinal(), 0]
+        assert columns.weekday[0] == 0
+        assert columns.procedure_keys == ["mri", "blood_draw"]
+        assert columns.proc_codes.tolist() == [0, 0, 1]
+        assert columns.has_any(frozenset({"mri"})).tolist() == [True, False]
+
+
+class TestSchemaAdapter:
+    """Test extracting standard records from schema mappings."""
+
+    def test_redcap_extraction(self):
+        """Test REDCap exports map fields, dates and delimited procedures."""
+        adapter = SchemaAdapter("redcap")
+        data = {
+            "data": [
+                {"record_id": "001", "redcap_event_name": "enrollment_arm_1", "visit_date": "02/05/2024",
+                 "study_day": "0", "site_number": "SITE-001", "procedures_performed": "blood_draw|ecg"},
+                {"record_id": "001", "redcap_event_name": "week_1_arm_1", "visit_date": "02/12/2024",
+                 "study_day": "7", "site_number": "SITE-001", "procedures_performed": ""}
+            ],
+            "metadata": {"sites": [{"id": "SITE-001", "name": "Site A"}]}
+        }
+
+        visits = adapter.extract_visits(data)
+
+        assert visits[0]["visit_id"] == "enrollment_arm_1"
+        assert visits[0]["visit_date"] == "2024-02-05"
+        assert visits[0]["procedures"] == ["blood_draw", "ecg"]
+        assert visits[1]["procedures"] == []
+        assert adapter.extract_participants(data) == [{"participant_id": "001", "site_id": "SITE-001"}]
+        assert adapter.extract_sites(data)[0]["site_id"] == "SITE-001"
+        assert adapter.extract_all(data) == {
+            "visits": visits,
+            "participants": adapter.extract_participants(data),
+            "sites": adapter.extract_sites(data)
+        }
+
+    def test_unknown_schema(self):
+        """Test an unknown schema type lists the available ones."""
+        with pytest.raises(ValueError, match="generic"):
+            SchemaAdapter("nope")
+
+    def test_evaluate_path(self):
+        """Test the supported JSONPath subset."""
+        document = {"a": {"b": [{"k": "x", "v": 1}, {"k": "y", "v": 2}]}}
+
+        assert evaluate_path(document, "$.a.b[*]") == document["a"]["b"]
+        assert evaluate_path(document, "$.a.b[-1]") == [{"k": "y", "v": 2}]
+        assert evaluate_path(document, "$.a.b[?(@.k=='x')]") == [{"k": "x", "v": 1}]
+        assert evaluate_path(document, "$.missing[*]") == []
+        with pytest.raises(ValueError):
+            evaluate_path(document, "$..b")
+
+    def test_extraction_plan_matches_each_expression(self):
+        """Test one traversal gives every expression's matches in document order."""
+        document = {
+            "data": [{"event": "enrol", "id": 1, "tags": [{"k": "a"}]}, {"event": "week_1", "id": 1},
+                     "not a record", {"event": "enrol", "id": 2, "tags": [{"k": "b"}, {"k": "a"}]}],
+            "metadata": {"sites": {"one": {"id": "S1"}, "two": {"id": "S2"}}, "lead": {"k": "a"}}
+        }
+        expressions = {
+            "rows": "$.data[*]",
+            "enrolled": "$.data[?(@.event=='enrol')]",
+            "follow_up": "$.data[?(@.event!='enrol')]",
+            "tags": "$.data[*].tags[?(@.k=='a')]",
+            "first": "$.data[0].id",
+            "sites": "$.metadata.sites[*]",
+            "lead": "$.metadata.lead[?(@.k=='a')]",
+            "missing": "$.nothing[*]",
+            "unused": ""
+        }
+
+        plan = ExtractionPlan(expressions)
+
+        assert plan(document) == {
+            name: evaluate_path(document, expression) if expression else []
+            for name, expression in expressions.items()
+        }
+        assert plan(document)["tags"] == [{"k": "a"}, {"k": "a"}]
+
+    def test_extraction_plans_cached(self):
+        """Test adapters for the same mapping share one compiled plan."""
+        assert SchemaAdapter("redcap").extraction_plan is SchemaAdapter("redcap").extraction_plan
+        assert compile_extraction({"v": "$.a[*]"}) is compile_extraction({"v": "$.a[*]"})
+        with pytest.raises(ValueError):
+            ExtractionPlan({"v": "$..a"})
@@ -198,4 +198,34 @@ def test_concomitant_med_coder_fuzzy_matching():
     assert result["coded_medications"][0]["drug_name"] == "ASPIRIN"
     assert result["coded_medications"][1]["drug_name"] == "IBUPROFEN"
     assert result["coded_medications"][0]["match_confidence"] < 1.0
-    assert result["coded_medications"][1]["match_confidence"] < 1.0
\ No newline at end of file
+    assert result["coded_medications"][1]["match_confidence"] < 1.0
+
+def test_concomitant_med_coder_whodrug_extract(tmp_path, monkeypatch):
+    """Test coding against WHODRUG_DICTIONARY_PATH with class-level interactions checked per subject."""
+    import tools.concomitant_med_coder as concomitant_med_coder
+    from tests.test_whodrug import write_extract
+
+    interactions = tmp_path / "interactions.csv"
+    interactions.write_text("drug1,drug2,interaction_type,severity\nB01A,M01AE,Increased bleeding risk,major\n")
+    monkeypatch.setenv("WHODRUG_DICTIONARY_PATH", write_extract(tmp_path / "whodrug.csv"))
+    monkeypatch.setenv("WHODRUG_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("DRUG_INTERACTIONS_PATH", str(interactions))
+    monkeypatch.setattr(concomitant_med_coder, "_whodrug_coder", None)
+    monkeypatch.setattr(concomitant_med_coder, "_interaction_graph", None)
+
+    result = run({
+        "medications": [
+            {"verbatim_name": "Coumadin 5 mg", "subject_id": "001"},
+            {"verbatim_name": "naproxen", "subject_id": "001"},
+            {"verbatim_name": "ibuprofen", "subject_id": "002", "route": "topical"}
+        ],
+        "include_interactions": True
+    })
+
+    assert [med["drug_name"] for med in result["coded_medications"]] == ["WARFARIN", "NAPROXEN", "IBUPROFEN"]
+    assert result["coded_medications"][0]["atc_code"] == "B01AA03"
+    assert result["potential_interactions"] == [{
+        "drug1": "WARFARIN", "drug2": "NAPROXEN", "interaction_type": "Increased bleeding risk",
+        "severity": "major", "recommendation": "Monitor closely", "subject_id": "001"
+    }]
+    assert result["warnings"] == []
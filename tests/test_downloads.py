@@ -0,0 +1,131 @@
+"""
+Tests for streaming, range-parallel and resumable downloads.
+"""
+
+import os
+import json
+import pytest
+from requests.exceptions import RequestException
+
+from sharepoint.downloads import RangeDownloader, DownloadResult
+from tests.graph_stub import GraphStubServer, make_stub_sp_client, DRIVE_ID
+
+
+CONTENT = bytes(range(256)) * (18 * 1024)  # 4.5 MiB
+
+
+@pytest.fixture
+def stub():
+    """Start a Graph stand-in holding one large transport file."""
+    with GraphStubServer() as server:
+        server.add_file("SAS/adsl.xpt", CONTENT)
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    """Create a client pointed at the stand-in with ranges always enabled."""
+    sp_client = make_stub_sp_client(stub)
+    sp_client.PARALLEL_DOWNLOAD_THRESHOLD = 0
+    return sp_client
+
+
+def _range_requests(stub):
+    return [url for _, url in stub.request_log if url.startswith('/download/')]
+
+
+class TestDownloadResult:
+    """Test the DownloadResult dataclass."""
+
+    def test_throughput(self):
+        """Test throughput is reported in MB/s."""
+        result = DownloadResult('/tmp/x', size=4 * 1024 * 1024, bytes_downloaded=4 * 1024 * 1024,
+                                resumed_bytes=0, elapsed_seconds=2.0)
+        assert result.throughput_mbps == 2.0
+
+    def test_zero_elapsed(self):
+        """Test an instantaneous download does not divide by zero."""
+        result = DownloadResult('/tmp/x', size=1, bytes_downloaded=1, resumed_bytes=0, elapsed_seconds=0)
+        assert result.throughput_mbps == 0.0
+
+
+class TestStreamingDownloads:
+    """Test downloads to disk against the local Graph stand-in."""
+
+    def test_sequential_stream(self, client, tmp_path):
+        """Test a single streamed download is written atomically."""
+        local_path = str(tmp_path / "adsl.xpt")
+
+        result = client.download_to_file("SAS/adsl.xpt", local_path, drive_id=DRIVE_ID)
+
+        assert open(local_path, 'rb').read() == CONTENT
+        assert result.ranges == 1
+        assert result.size == len(CONTENT)
+        assert os.listdir(tmp_path) == ["adsl.xpt"]
+
+    def test_parallel_ranges(self, client, stub, tmp_path):
+        """Test a large file is fetched as concurrent Range requests."""
+        local_path = str(tmp_path / "adsl.xpt")
+
+        result = client.download_to_file("SAS/adsl.xpt", local_path, drive_id=DRIVE_ID, parallel_ranges=4)
+
+        assert open(local_path, 'rb').read() == CONTENT
+        assert result.ranges == 4
+        assert len(_range_requests(stub)) == 4
+
+    def test_below_threshold_is_sequential(self, client, tmp_path):
+        """Test small files ignore parallel_ranges."""
+        client.PARALLEL_DOWNLOAD_THRESHOLD = len(CONTENT) + 1
+
+        result = client.download_to_file("SAS/adsl.xpt", str(tmp_path / "a.xpt"),
+                                         drive_id=DRIVE_ID, parallel_ranges=4)
+
+        assert result.ranges == 1
+
+    def test_resume_after_partial_failure(self, client, stub, tmp_path):
+        """Test only the failed range is fetched again on the next attempt."""
+        local_path = str(tmp_path / "adsl.xpt")
+        range_size = -(-len(CONTENT) // 4)
+        stub.fail_range_starts = {2 * range_size}
+
+        with pytest.raises(RequestException):
+            client.download_to_file("SAS/adsl.xpt", local_path, drive_id=DRIVE_ID, parallel_ranges=4)
+
+        assert not os.path.exists(local_path)
+        state = json.load(open(local_path + ".part.json"))
+        assert [done > 0 for _, _, done in state['ranges']] == [True, True, False, True]
+
+        before = len(_range_requests(stub))
+        result = client.download_to_file("SAS/adsl.xpt", local_path, drive_id=DRIVE_ID, parallel_ranges=4)
+
+        assert open(local_path, 'rb').read() == CONTENT
+        assert len(_range_requests(stub)) - before == 1
+        assert result.resumed_bytes == len(CONTENT) - range_size
+        assert result.bytes_downloaded == range_size
+        assert not os.path.exists(local_path + ".part.json")
+
+    def test_stale_partial_download_discarded(self, tmp_path):
+        """Test saved progress for another eTag is not reused."""
+        local_path = str(tmp_path / "file.bin")
+        open(local_path + ".part", 'wb').write(b"old")
+        json.dump({'etag': '"v1"', 'size': 3, 'ranges': [[0, 2, 3]]}, open(local_path + ".part.json", 'w'))
+        calls = []
+
+        class Response:
+            status_code = 200
+
+            def iter_content(self, chunk_size):
+                return [b"new"]
+
+            def close(self):
+                pass
+
+        def fetch(headers):
+            calls.append(headers)
+            return Response()
+
+        result = RangeDownloader(fetch, local_path, size=3, etag='"v2"').run()
+
+        assert open(local_path, 'rb').read() == b"new"
+        assert calls == [{}]
+        assert result.resumed_bytes == 0
@@ -0,0 +1,177 @@
+"""
+Tests for the delta-query drive mirror, run against the local Graph stand-in.
+"""
+
+import os
+import pytest
+from datetime import datetime
+
+from sharepoint.drive_mirror import DriveMirror
+from sharepoint.sharepoint_client import SharePointFile, SharePointFolder
+from tests.graph_stub import GraphStubServer, make_stub_sp_client, DRIVE_ID
+
+
+@pytest.fixture
+def stub():
+    """Start a Graph stand-in with a small TMF library."""
+    with GraphStubServer() as server:
+        server.add_file("TMF/Zone01/protocol_v1.pdf", b"%PDF-protocol", mime_type="application/pdf")
+        server.add_file("TMF/Zone01/ib.pdf", b"%PDF-ib", mime_type="application/pdf")
+        server.add_file("TMF/Zone02/site_list.xlsx", b"sites")
+        server.add_file("Regulatory/1572.pdf", b"%PDF-1572", mime_type="application/pdf")
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    """Create a client pointed at the stand-in."""
+    return make_stub_sp_client(stub)
+
+
+@pytest.fixture
+def mirror(client, tmp_path):
+    """Create a metadata-only mirror in a temporary database."""
+    with DriveMirror(client, drive_id=DRIVE_ID, db_path=str(tmp_path / "mirror.db")) as drive_mirror:
+        yield drive_mirror
+
+
+def _delta_calls(stub):
+    return [url for _, url in stub.request_log if '/root/delta' in url]
+
+
+class TestInitialSync:
+    """Test the first, full enumeration."""
+
+    def test_full_sync_indexes_library(self, mirror, stub):
+        """Test every item is mirrored across several delta pages."""
+        mirror.DELTA_PAGE_SIZE = 3
+
+        result = mirror.sync()
+
+        assert result.full_resync
+        assert result.added == 8  # 4 folders + 4 files
+        assert result.pages == 3
+        assert mirror.get_stats()['files'] == 4
+        assert mirror.get_stats()['has_delta_token']
+        item = mirror.get_item("TMF/Zone01/ib.pdf")
+        assert isinstance(item, SharePointFile)
+        assert item.size == 7
+        assert item.parent_path == "/drive/root:/TMF/Zone01"
+
+    def test_list_folder(self, mirror):
+        """Test folder listings match the Graph listing shape."""
+        mirror.sync()
+
+        root = mirror.list_folder()
+        zone01 = mirror.list_folder("TMF/Zone01")
+        everything = mirror.list_folder("TMF", recursive=True)
+
+        assert [f.name for f in root['folders']] == ["Regulatory", "TMF"]
+        assert [f.name for f in zone01['files']] == ["ib.pdf", "protocol_v1.pdf"]
+        assert len(everything['files']) == 3
+        assert all(isinstance(f, SharePointFolder) for f in everything['folders'])
+
+    def test_search(self, mirror):
+        """Test local queries by name, folder, type and modification time."""
+        mirror.sync()
+
+        assert [f.name for f in mirror.search(name_contains="PROTOCOL")] == ["protocol_v1.pdf"]
+        assert len(mirror.search(folder_path="TMF")) == 3
+        assert len(mirror.search(mime_type="application/pdf")) == 3
+        assert mirror.search(modified_since=datetime(2030, 1, 1)) == []
+        assert len(mirror.search(limit=2)) == 2
+
+
+class TestIncrementalSync:
+    """Test applying only changes on later runs."""
+
+    def test_no_changes(self, mirror, stub):
+        """Test a second run fetches one page and changes nothing."""
+        mirror.sync()
+        stub.request_log.clear()
+
+        result = mirror.sync()
+
+        assert not result.full_resync
+        assert (result.added, result.updated, result.deleted) == (0, 0, 0)
+        assert len(_delta_calls(stub)) == 1
+        assert 'token=' in _delta_calls(stub)[0]
+
+    def test_add_update_delete(self, mirror, stub):
+        """Test additions, content changes and deletions are applied."""
+        mirror.sync()
+        stub.add_file("TMF/Zone03/monitoring_plan.docx", b"plan")
+        stub.update_file("TMF/Zone01/ib.pdf", b"%PDF-ib-v2")
+        stub.remove_item("Regulatory")
+
+        result = mirror.sync()
+
+        assert result.added == 2
+        assert result.updated == 1
+        assert result.deleted == 2
+        assert mirror.get_item("TMF/Zone03/monitoring_plan.docx") is not None
+        assert mirror.get_item("TMF/Zone01/ib.pdf").size == 10
+        assert mirror.get_item("Regulatory/1572.pdf") is None
+
+    def test_folder_move_updates_descendants(self, mirror, stub):
+        """Test renaming a folder re-paths items Graph does not report again."""
+        mirror.sync()
+        stub.move_item("TMF/Zone01", "TMF/Zone01_Archive")
+
+        result = mirror.sync()
+
+        assert result.updated == 1
+        assert mirror.get_item("TMF/Zone01/ib.pdf") is None
+        assert mirror.get_item("TMF/Zone01_Archive/ib.pdf") is not None
+
+    def test_expired_token_triggers_resync(self, mirror, stub):
+        """Test a 410 restarts enumeration and prunes vanished items."""
+        mirror.sync()
+        stub.remove_item("TMF/Zone02")
+        stub.expire_delta_tokens()
+
+        result = mirror.sync()
+
+        assert result.full_resync
+        assert result.deleted == 2
+        assert mirror.get_item("TMF/Zone02/site_list.xlsx") is None
+        assert mirror.get_stats()['files'] == 3
+
+    def test_token_persists_across_instances(self, client, stub, tmp_path):
+        """Test a new mirror on the same database resumes from the saved token."""
+        db_path = str(tmp_path / "mirror.db")
+        with DriveMirror(client, drive_id=DRIVE_ID, db_path=db_path) as first:
+            first.sync()
+        stub.request_log.clear()
+
+        with DriveMirror(client, drive_id=DRIVE_ID, db_path=db_path) as second:
+            result = second.sync()
+            assert second.get_item("TMF/Zone01/ib.pdf") is not None
+
+        assert not result.full_resync
+        assert len(stub.request_log) == 1
+
+
+class TestContentMirror:
+    """Test optional mirroring of file content."""
+
+    def test_content_follows_changes(self, client, stub, tmp_path):
+        """Test content is downloaded, refreshed, moved and removed with the index."""
+        content_dir = tmp_path / "content"
+        with DriveMirror(client, drive_id=DRIVE_ID, db_path=str(tmp_path / "m.db"),
+                         content_dir=str(content_dir)) as drive_mirror:
+            result = drive_mirror.sync()
+            assert result.downloaded == 4
+            local = drive_mirror.get_content_path("TMF/Zone01/ib.pdf")
+            assert open(local, 'rb').read() == b"%PDF-ib"
+
+            stub.update_file("TMF/Zone01/ib.pdf", b"%PDF-ib-v2")
+            stub.move_item("TMF/Zone02", "TMF/Sites")
+            stub.remove_item("Regulatory/1572.pdf")
+            result = drive_mirror.sync()
+
+            assert result.downloaded == 1
+            assert open(drive_mirror.get_content_path("TMF/Zone01/ib.pdf"), 'rb').read() == b"%PDF-ib-v2"
+            assert open(drive_mirror.get_content_path("TMF/Sites/site_list.xlsx"), 'rb').read() == b"sites"
+            assert not os.path.exists(content_dir / "Regulatory" / "1572.pdf")
+            assert not os.path.exists(content_dir / "TMF" / "Zone02" / "site_list.xlsx")
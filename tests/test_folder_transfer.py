@@ -0,0 +1,151 @@
+"""
+Tests for concurrent folder download and upload, run against the local Graph stand-in.
+"""
+
+import os
+import json
+import pytest
+
+from sharepoint.folder_transfer import MANIFEST_NAME
+from tests.graph_stub import GraphStubServer, make_stub_sp_client, DRIVE_ID
+
+
+@pytest.fixture
+def stub():
+    """Start a Graph stand-in holding a site regulatory binder."""
+    with GraphStubServer() as server:
+        server.add_file("Binder/1572.pdf", b"%PDF-1572")
+        server.add_file("Binder/CVs/pi_cv.pdf", b"%PDF-cv-pi")
+        server.add_file("Binder/CVs/subi_cv.pdf", b"%PDF-cv-subi")
+        server.add_file("Binder/Licenses/Expired/old.pdf", b"%PDF-old")
+        server.add_folder("Binder/Empty")
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    """Create a client pointed at the stand-in."""
+    return make_stub_sp_client(stub)
+
+
+def _content_requests(stub):
+    return [url for method, url in stub.request_log if url.startswith('/download/') or method == 'PUT']
+
+
+class TestDownloadFolder:
+    """Test download_folder."""
+
+    def test_downloads_tree(self, client, stub, tmp_path):
+        """Test every file and folder is recreated locally with one request per file."""
+        progress = []
+
+        result = client.download_folder("Binder", str(tmp_path), drive_id=DRIVE_ID,
+                                        max_workers=4, progress_callback=progress.append)
+
+        assert result.transferred == 4
+        assert result.failed == {}
+        assert result.bytes_transferred == sum(len(c) for c in stub.contents.values())
+        assert (tmp_path / "CVs" / "pi_cv.pdf").read_bytes() == b"%PDF-cv-pi"
+        assert (tmp_path / "Licenses" / "Expired" / "old.pdf").read_bytes() == b"%PDF-old"
+        assert (tmp_path / "Empty").is_dir()
+        assert len(_content_requests(stub)) == 4
+        assert not [url for _, url in stub.request_log if url.endswith('.pdf')]  # no per-file metadata GETs
+        assert [p.files_done for p in sorted(progress, key=lambda p: p.files_done)] == [1, 2, 3, 4]
+        assert progress[-1].files_total == 4
+
+    def test_manifest_written(self, client, tmp_path):
+        """Test the manifest records a summary and per-file eTags."""
+        result = client.download_folder("Binder", str(tmp_path), drive_id=DRIVE_ID)
+
+        manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+        assert result.manifest_path == str(tmp_path / MANIFEST_NAME)
+        assert manifest['summary']['transferred'] == 4
+        assert manifest['files']['CVs/pi_cv.pdf']['status'] == 'transferred'
+        assert manifest['files']['CVs/pi_cv.pdf']['etag']
+
+    def test_second_run_skips_unchanged(self, client, stub, tmp_path):
+        """Test only files whose eTag changed are downloaded again."""
+        client.download_folder("Binder", str(tmp_path), drive_id=DRIVE_ID)
+        stub.update_file("Binder/CVs/pi_cv.pdf", b"%PDF-cv-pi-v2")
+        stub.request_log.clear()
+
+        result = client.download_folder("Binder", str(tmp_path), drive_id=DRIVE_ID)
+
+        assert result.transferred == 1
+        assert result.skipped == 3
+        assert (tmp_path / "CVs" / "pi_cv.pdf").read_bytes() == b"%PDF-cv-pi-v2"
+        assert len(_content_requests(stub)) == 1
+
+    def test_skip_by_mtime_without_manifest(self, client, stub, tmp_path):
+        """Test downloaded files carry the remote mtime so they are skipped without a manifest."""
+        client.download_folder("Binder", str(tmp_path), drive_id=DRIVE_ID)
+        os.remove(tmp_path / MANIFEST_NAME)
+
+        result = client.download_folder("Binder", str(tmp_path), drive_id=DRIVE_ID)
+
+        assert result.skipped == 4
+
+
+class TestUploadFolder:
+    """Test upload_folder."""
+
+    @pytest.fixture
+    def package(self, tmp_path):
+        """Create a local DSMB package tree."""
+        root = tmp_path / "dsmb"
+        (root / "Tables" / "Safety").mkdir(parents=True)
+        (root / "Listings").mkdir()
+        (root / "Figures").mkdir()
+        (root / "cover_letter.docx").write_bytes(b"cover")
+        (root / "Tables" / "t14_1.rtf").write_bytes(b"table 14.1")
+        (root / "Tables" / "Safety" / "t14_3.rtf").write_bytes(b"table 14.3")
+        (root / "Listings" / "l16_2.rtf").write_bytes(b"listing 16.2")
+        return root
+
+    def test_uploads_tree(self, client, stub, package):
+        """Test folders are created parent-first and every file is uploaded."""
+        result = client.upload_folder(str(package), "DSMB/2024-Q1", drive_id=DRIVE_ID, max_workers=4)
+
+        assert result.transferred == 4
+        assert result.failed == {}
+        assert stub.contents["DSMB/2024-Q1/Tables/Safety/t14_3.rtf"] == b"table 14.3"
+        assert "DSMB/2024-Q1/Figures" in stub.items
+        assert result.folders_created == 6  # DSMB, 2024-Q1, Figures, Listings, Tables, Safety
+        creations = [url for method, url in stub.request_log if method == 'POST' and 'children' in url]
+        tables = next(i for i, url in enumerate(creations) if url.endswith('2024-Q1:/children'))
+        safety = next(i for i, url in enumerate(creations) if 'Tables:/children' in url)
+        assert tables < safety
+        assert not any(name.endswith(MANIFEST_NAME) for name in stub.contents)
+
+    def test_second_run_skips_unchanged(self, client, stub, package):
+        """Test only locally modified files are uploaded again."""
+        client.upload_folder(str(package), "DSMB", drive_id=DRIVE_ID)
+        changed = package / "Tables" / "t14_1.rtf"
+        changed.write_bytes(b"table 14.1 v2")
+        stub.request_log.clear()
+
+        result = client.upload_folder(str(package), "DSMB", drive_id=DRIVE_ID)
+
+        assert result.transferred == 1
+        assert result.skipped == 3
+        assert result.folders_created == 0
+        assert stub.contents["DSMB/Tables/t14_1.rtf"] == b"table 14.1 v2"
+        assert len([1 for method, _ in stub.request_log if method == 'PUT']) == 1
+
+    def test_failures_recorded(self, client, stub, package, monkeypatch):
+        """Test a failing file is reported without stopping the others."""
+        original = client.upload_file
+
+        def flaky(local_path, remote_path, **kwargs):
+            if remote_path.endswith("l16_2.rtf"):
+                raise OSError("disk error")
+            return original(local_path, remote_path, **kwargs)
+
+        monkeypatch.setattr(client, 'upload_file', flaky)
+
+        result = client.upload_folder(str(package), "DSMB", drive_id=DRIVE_ID)
+
+        assert result.transferred == 3
+        assert list(result.failed) == ["Listings/l16_2.rtf"]
+        manifest = json.loads(open(result.manifest_path).read())
+        assert manifest['files']["Listings/l16_2.rtf"]['status'] == 'failed'
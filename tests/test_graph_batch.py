@@ -0,0 +1,146 @@
+"""
+Tests for Microsoft Graph $batch support, run against the local Graph stand-in.
+"""
+
+import pytest
+from unittest.mock import Mock
+from requests.exceptions import RequestException
+
+from sharepoint.graph_batch import GraphBatcher, BatchRequest
+from tests.graph_stub import GraphStubServer, make_stub_auth_client, make_stub_sp_client, SITE_ID, DRIVE_ID
+
+
+@pytest.fixture
+def stub():
+    """Start a Graph stand-in with a small TMF folder tree."""
+    with GraphStubServer() as server:
+        for i in range(45):
+            server.add_file(f"TMF/Zone01/doc_{i:02d}.pdf", b"%PDF" + bytes([i]))
+        server.add_file("TMF/Zone02/protocol.docx", b"protocol")
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    """Create a SharePoint client pointed at the stand-in."""
+    return make_stub_sp_client(stub)
+
+
+def _batch_calls(stub):
+    return [entry for entry in stub.request_log if entry[1] == '/$batch']
+
+
+class TestGraphBatcher:
+    """Test the GraphBatcher class."""
+
+    def test_relative_url(self):
+        """Test absolute URLs are converted to version-relative URLs."""
+        batcher = GraphBatcher(Mock())
+
+        request = batcher.add(
+            'get',
+            'https://graph.microsoft.com/v1.0/sites/s/drive',
+            params={'$top': 10}
+        )
+
+        assert request.method == 'GET'
+        assert request.url == '/sites/s/drive?$top=10'
+
+    def test_splits_into_batches_of_twenty(self, stub):
+        """Test more than 20 requests are sent as several $batch calls."""
+        batcher = GraphBatcher(make_stub_auth_client(), base_url=stub.url)
+        requests = [
+            BatchRequest(method='GET', url=f'/sites/{SITE_ID}/drive')
+            for _ in range(41)
+        ]
+
+        responses = batcher.execute(requests)
+
+        assert len(responses) == 41
+        assert all(r.status_code == 200 for r in responses)
+        assert responses[0].json()['id'] == DRIVE_ID
+        assert len(_batch_calls(stub)) == 3
+
+    def test_throttled_sub_requests_retried(self, stub):
+        """Test only the throttled sub-requests are sent again."""
+        batcher = GraphBatcher(make_stub_auth_client(), base_url=stub.url)
+        stub.throttle(3, retry_after=0)
+
+        responses = batcher.execute([
+            BatchRequest(method='GET', url=f'/sites/{SITE_ID}/drive')
+            for _ in range(10)
+        ])
+
+        assert all(r.status_code == 200 for r in responses)
+        assert len(_batch_calls(stub)) == 2
+        drive_calls = [entry for entry in stub.request_log if entry[1].endswith('/drive')]
+        assert len(drive_calls) == 13
+
+    def test_gives_up_after_max_retries(self, stub):
+        """Test persistent throttling is surfaced as 429 sub-responses."""
+        batcher = GraphBatcher(make_stub_auth_client(), base_url=stub.url)
+        batcher.MAX_RETRIES = 1
+        stub.throttle(100, retry_after=0)
+
+        responses = batcher.execute([BatchRequest(method='GET', url=f'/sites/{SITE_ID}/drive')])
+
+        assert responses[0].status_code == 429
+
+    def test_failed_batch_raises(self):
+        """Test a failed $batch call raises RequestException."""
+        auth_client = Mock()
+        auth_client.make_graph_request.return_value = Mock(status_code=400, text='Bad request')
+        batcher = GraphBatcher(auth_client)
+        batcher.add('GET', '/sites/s/drive')
+
+        with pytest.raises(RequestException) as exc_info:
+            batcher.flush()
+
+        assert 'Batch request failed: 400' in str(exc_info.value)
+
+
+class TestSharePointClientBatching:
+    """Test the batched SharePointClient methods."""
+
+    def test_get_files_metadata(self, client, stub):
+        """Test metadata for many files is fetched in $batch calls."""
+        paths = [f"TMF/Zone01/doc_{i:02d}.pdf" for i in range(45)] + ["TMF/missing.pdf"]
+
+        results = client.get_files_metadata(paths, drive_id=DRIVE_ID)
+
+        assert results["TMF/Zone01/doc_07.pdf"].name == "doc_07.pdf"
+        assert results["TMF/Zone01/doc_07.pdf"].size == 5
+        assert results["TMF/missing.pdf"] is None
+        assert len(stub.request_log) == len(_batch_calls(stub)) + len(paths)
+        assert len(_batch_calls(stub)) == 3
+
+    def test_list_drive_items_batch(self, client, stub):
+        """Test several folders are listed in one $batch call."""
+        results = client.list_drive_items_batch([None, "TMF", "TMF/Zone02"], drive_id=DRIVE_ID)
+
+        assert [f.name for f in results[None]['folders']] == ["TMF"]
+        assert sorted(f.name for f in results["TMF"]['folders']) == ["Zone01", "Zone02"]
+        assert [f.name for f in results["TMF/Zone02"]['files']] == ["protocol.docx"]
+        assert len(_batch_calls(stub)) == 1
+
+    def test_list_drive_items_batch_follows_next_links(self, client, stub):
+        """Test folders larger than one page are listed completely."""
+        results = client.list_drive_items_batch(["TMF/Zone01", "TMF/Zone02"], drive_id=DRIVE_ID, page_size=10)
+
+        assert sorted(f.name for f in results["TMF/Zone01"]['files']) == [f"doc_{i:02d}.pdf" for i in range(45)]
+        assert [f.name for f in results["TMF/Zone02"]['files']] == ["protocol.docx"]
+        assert len(_batch_calls(stub)) == 1
+        assert len([entry for entry in stub.request_log if '$skiptoken' in entry[1]]) == 4
+
+    def test_list_drive_items_batch_missing_folder(self, client):
+        """Test listing a missing folder raises RequestException."""
+        with pytest.raises(RequestException):
+            client.list_drive_items_batch(["Nope"], drive_id=DRIVE_ID)
+
+    def test_search_files_batch(self, client, stub):
+        """Test several searches are run in one $batch call."""
+        results = client.search_files_batch(["protocol", "doc_1"], drive_id=DRIVE_ID, limit=5)
+
+        assert [f.name for f in results["protocol"]] == ["protocol.docx"]
+        assert len(results["doc_1"]) == 5
+        assert len(_batch_calls(stub)) == 1
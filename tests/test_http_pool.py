@@ -0,0 +1,71 @@
+"""
+Tests for pooled HTTP sessions.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from auth.http_pool import (
+    KeepAliveHTTPAdapter,
+    create_session,
+    get_pool_stats,
+    get_transfer_session
+)
+from sharepoint.sharepoint_client import SharePointClient
+from tests.graph_stub import GraphStubServer, make_stub_auth_client, SITE_ID, DRIVE_ID
+
+
+class TestCreateSession:
+    """Test session construction."""
+
+    def test_mounts_keep_alive_adapter(self):
+        """Test both schemes use the tuned keep-alive adapter."""
+        session = create_session(pool_maxsize=7, http2=False)
+
+        adapter = session.get_adapter('https://graph.microsoft.com')
+        assert isinstance(adapter, KeepAliveHTTPAdapter)
+        assert adapter._pool_maxsize == 7
+        assert session.get_adapter('http://localhost') is adapter
+
+    def test_http2_falls_back_without_httpx(self):
+        """Test HTTP/2 requests fall back to HTTP/1.1 when httpx is missing."""
+        with patch.dict('sys.modules', {'httpx': None}):
+            session = create_session(http2=True)
+
+        assert isinstance(session.get_adapter('https://graph.microsoft.com'), KeepAliveHTTPAdapter)
+
+    def test_transfer_session_is_shared(self):
+        """Test every client gets the same transfer session."""
+        assert get_transfer_session() is get_transfer_session()
+
+    def test_empty_stats(self):
+        """Test statistics for an unused session."""
+        stats = get_pool_stats(create_session(http2=False))
+
+        assert stats['requests'] == 0
+        assert stats['reuse_ratio'] is None
+
+
+class TestConnectionReuse:
+    """Test connections are reused across SharePoint downloads."""
+
+    def test_downloads_reuse_one_connection(self):
+        """Test sequential downloads share one keep-alive connection."""
+        with GraphStubServer() as stub:
+            for i in range(20):
+                stub.add_file(f"Binder/doc_{i}.pdf", b"x" * 1000)
+
+            client = SharePointClient(site_id=SITE_ID, auth_client=make_stub_auth_client())
+            client.GRAPH_BASE_URL = stub.url
+            client._transfer_session = create_session(http2=False)
+
+            for i in range(20):
+                assert client.download_file(f"Binder/doc_{i}.pdf", drive_id=DRIVE_ID) == b"x" * 1000
+
+            stats = client.get_pool_stats()
+
+        assert stats['transfer']['requests'] == 20
+        assert stats['transfer']['connections_opened'] == 1
+        assert stats['transfer']['reuse_ratio'] == 0.95
+        assert stats['graph']['requests'] == 20
+        assert stats['graph']['connections_opened'] == 1
@@ -0,0 +1,142 @@
+"""
+Tests for eTag-validated item metadata and content caching.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from sharepoint.item_cache import ItemCache
+from tests.graph_stub import GraphStubServer, make_stub_sp_client, DRIVE_ID
+
+
+def _shared_manager():
+    """Create a CacheManager stand-in backed by a dict."""
+    store = {}
+    manager = Mock()
+    manager.set.side_effect = lambda key, value, ttl, namespace: store.__setitem__((namespace, key), value)
+    manager.get.side_effect = lambda key, namespace: store.get((namespace, key))
+    manager.delete.side_effect = lambda key, namespace: store.pop((namespace, key), None)
+    return manager, store
+
+
+class TestItemCache:
+    """Test the ItemCache class."""
+
+    def test_metadata_without_etag_not_cached(self):
+        """Test items that cannot be revalidated are not stored."""
+        cache = ItemCache()
+        cache.put_metadata('k', {'id': '1'})
+
+        assert cache.get_metadata('k') is None
+
+    def test_download_url_never_cached(self):
+        """Test expiring pre-authenticated URLs are stripped."""
+        cache = ItemCache()
+        cache.put_metadata('k', {'id': '1', 'eTag': '"a"', '@microsoft.graph.downloadUrl': 'https://x'})
+
+        assert cache.get_metadata('k') == {'id': '1', 'eTag': '"a"'}
+
+    def test_content_evicted_by_size(self):
+        """Test the in-process content cache stays within its byte budget."""
+        cache = ItemCache(max_content_bytes=10)
+        cache.put_content('a', 't1', b'123456')
+        cache.put_content('b', 't2', b'123456')
+
+        assert cache.get_content('a') is None
+        assert cache.get_content('b') == ('t2', b'123456')
+        assert cache.get_stats()['content_bytes'] == 6
+
+    def test_large_content_not_cached(self):
+        """Test files above MAX_CONTENT_SIZE are left to streaming downloads."""
+        cache = ItemCache()
+        cache.MAX_CONTENT_SIZE = 4
+        cache.put_content('a', 't1', b'12345')
+
+        assert cache.get_content('a') is None
+
+    def test_shared_document_namespace(self):
+        """Test content is shared through the CacheManager document namespace."""
+        manager, store = _shared_manager()
+        ItemCache(cache_manager=manager).put_content('k', '"c:1"', b'%PDF')
+
+        assert store[('document', 'k')] == {'tag': '"c:1"', 'content': b'%PDF'}
+        assert ItemCache(cache_manager=manager).get_content('k') == ('"c:1"', b'%PDF')
+
+
+class TestConditionalRequests:
+    """Test SharePointClient revalidation against the local Graph stand-in."""
+
+    @pytest.fixture
+    def stub(self):
+        """Start a Graph stand-in with a few documents."""
+        with GraphStubServer() as server:
+            server.add_file("TMF/protocol.pdf", b"%PDF-protocol-v1" * 100)
+            server.add_file("TMF/ib.pdf", b"%PDF-ib")
+            yield server
+
+    @pytest.fixture
+    def item_cache(self):
+        """Create an item cache shared by the clients in a test."""
+        return ItemCache()
+
+    def test_metadata_not_modified(self, stub, item_cache):
+        """Test an unchanged item is revalidated with a 304."""
+        sp_client = make_stub_sp_client(stub, item_cache=item_cache)
+        first = sp_client.get_file_metadata("TMF/ib.pdf", drive_id=DRIVE_ID)
+
+        second = sp_client.get_file_metadata("TMF/ib.pdf", drive_id=DRIVE_ID)
+
+        assert second.id == first.id
+        assert second.etag == first.etag
+        stats = sp_client.get_cache_stats()
+        assert stats['conditional_requests'] == 1
+        assert stats['not_modified'] == 1
+        assert stats['bytes_saved'] > 0
+
+    def test_metadata_changed(self, stub, item_cache):
+        """Test a changed item is fetched again."""
+        sp_client = make_stub_sp_client(stub, item_cache=item_cache)
+        sp_client.get_file_metadata("TMF/ib.pdf", drive_id=DRIVE_ID)
+        stub.update_file("TMF/ib.pdf", b"%PDF-ib-v2")
+
+        updated = sp_client.get_file_metadata("TMF/ib.pdf", drive_id=DRIVE_ID)
+
+        assert updated.size == 10
+        assert sp_client.get_cache_stats()['not_modified'] == 0
+
+    def test_unchanged_download_skips_content_request(self, stub, item_cache):
+        """Test a 304 on metadata serves content from cache without downloading it."""
+        make_stub_sp_client(stub, item_cache=item_cache).download_file("TMF/protocol.pdf", drive_id=DRIVE_ID)
+        stub.request_log.clear()
+
+        content = make_stub_sp_client(stub, item_cache=item_cache).download_file("TMF/protocol.pdf", drive_id=DRIVE_ID)
+
+        assert content == b"%PDF-protocol-v1" * 100
+        assert len(stub.request_log) == 1
+        stats = item_cache.get_stats()
+        assert stats['round_trips_saved'] == 1
+        assert stats['bytes_saved'] > 1600
+
+    def test_download_by_cached_id_revalidates(self, stub, item_cache):
+        """Test the item-ID fast path sends If-None-Match and honours 304."""
+        sp_client = make_stub_sp_client(stub, item_cache=item_cache)
+        sp_client.download_file("TMF/protocol.pdf", drive_id=DRIVE_ID)
+        stub.request_log.clear()
+
+        assert sp_client.download_file("TMF/protocol.pdf", drive_id=DRIVE_ID) == b"%PDF-protocol-v1" * 100
+        assert [url for _, url in stub.request_log if '/download/' in url] == []
+
+        stub.update_file("TMF/protocol.pdf", b"%PDF-protocol-v2")
+        assert sp_client.download_file("TMF/protocol.pdf", drive_id=DRIVE_ID) == b"%PDF-protocol-v2"
+        assert item_cache.get_stats()['content_hits'] == 1
+
+    def test_batch_metadata_revalidated(self, stub, item_cache):
+        """Test batched metadata lookups send If-None-Match per sub-request."""
+        sp_client = make_stub_sp_client(stub, item_cache=item_cache)
+        paths = ["TMF/protocol.pdf", "TMF/ib.pdf"]
+        sp_client.get_files_metadata(paths, drive_id=DRIVE_ID)
+
+        results = sp_client.get_files_metadata(paths, drive_id=DRIVE_ID)
+
+        assert results["TMF/ib.pdf"].name == "ib.pdf"
+        assert sp_client.get_cache_stats()['not_modified'] == 2
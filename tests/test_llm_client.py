@@ -0,0 +1,224 @@
+"""
+Tests for the shared Azure OpenAI client, run against the local stand-in.
+"""
+
+import os
+import json
+import stat
+import threading
+import pytest
+from unittest.mock import patch
+from requests.exceptions import HTTPError
+
+from auth.graph_auth import AdaptiveThrottle
+from llm.azure_openai import AzureOpenAIClient, LLMResponseCache
+from tests.llm_stub import AzureOpenAIStubServer, make_stub_llm_client, DEPLOYMENT
+
+MESSAGES = [
+    {"role": "system", "content": "You map clinical schedule columns."},
+    {"role": "user", "content": "Visit, Day, Procedure"}
+]
+
+
+@pytest.fixture
+def stub():
+    """Start the Azure OpenAI stand-in."""
+    with AzureOpenAIStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    """Create a client for the stand-in with an in-memory cache."""
+    llm_client = make_stub_llm_client(stub)
+    yield llm_client
+    llm_client.close()
+
+
+@pytest.fixture
+def no_sleep():
+    """Skip retry delays."""
+    with patch('llm.azure_openai.time.sleep'):
+        yield
+
+
+class TestLLMResponseCache:
+    """Test the LLMResponseCache class."""
+
+    def test_key_covers_deployment_prompt_and_temperature(self):
+        """Test requests differing in any keyed field get different keys."""
+        base = LLMResponseCache.make_key(DEPLOYMENT, MESSAGES, 0.2, 500)
+
+        assert base == LLMResponseCache.make_key(DEPLOYMENT, [dict(m) for m in MESSAGES], 0.2, 500)
+        assert base != LLMResponseCache.make_key("other", MESSAGES, 0.2, 500)
+        assert base != LLMResponseCache.make_key(DEPLOYMENT, MESSAGES, 0.3, 500)
+        assert base != LLMResponseCache.make_key(DEPLOYMENT, MESSAGES[:1], 0.2, 500)
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test responses survive a new cache on the same file."""
+        db_path = str(tmp_path / "llm.db")
+        LLMResponseCache(db_path=db_path).set("key", {"choices": []})
+
+        assert LLMResponseCache(db_path=db_path).get("key") == {"choices": []}
+
+    def test_in_memory_unless_configured(self, tmp_path, monkeypatch):
+        """Test no file is written without LLM_CACHE_DB, and a configured file is owner-only."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv("LLM_CACHE_DB", raising=False)
+        LLMResponseCache().set("key", {"choices": []})
+
+        assert LLMResponseCache().db_path == ":memory:"
+        assert os.listdir(tmp_path) == []
+
+        monkeypatch.setenv("LLM_CACHE_DB", str(tmp_path / "llm.db"))
+        LLMResponseCache().set("key", {"choices": []})
+
+        assert stat.S_IMODE(os.stat(tmp_path / "llm.db").st_mode) == 0o600
+
+    def test_expired_entries_are_ignored(self, tmp_path):
+        """Test entries older than the TTL are not served."""
+        db_path = str(tmp_path / "llm.db")
+        LLMResponseCache(db_path=db_path).set("key", {"choices": []})
+
+        assert LLMResponseCache(db_path=db_path, ttl=0).get("key") is None
+
+
+class TestAzureOpenAIClient:
+    """Test the AzureOpenAIClient class."""
+
+    def test_chat(self, client, stub):
+        """Test a completion is returned with usage."""
+        result = client.chat(MESSAGES, temperature=0.2)
+
+        assert result['choices'][0]['message']['content'] == "echo: Visit, Day, Procedure"
+        assert stub.requests[0]['temperature'] == 0.2
+
+    def test_repeated_prompt_served_from_cache(self, client, stub):
+        """Test an identical request is answered without calling the API."""
+        first = client.chat(MESSAGES)
+        second = client.chat(MESSAGES)
+        client.chat(MESSAGES, temperature=0.9)
+
+        assert first == second
+        assert len(stub.requests) == 2
+        assert client.get_stats()['cache_hits'] == 1
+
+    def test_use_cache_false_always_sends(self, client, stub):
+        """Test use_cache=False bypasses the cache."""
+        client.chat(MESSAGES)
+        client.chat(MESSAGES, use_cache=False)
+
+        assert len(stub.requests) == 2
+
+    def test_identical_in_flight_requests_coalesced(self, client, stub):
+        """Test concurrent identical prompts share one API call."""
+        stub.delay = 0.3
+        results = []
+
+        def call():
+            results.append(client.chat(MESSAGES))
+
+        threads = [threading.Thread(target=call) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(stub.requests) == 1
+        assert len(results) == 6 and all(result == results[0] for result in results)
+        assert client.get_stats()['coalesced'] + client.get_stats()['cache_hits'] == 5
+
+    def test_concurrency_limited(self, stub):
+        """Test no more requests are in flight than the throttle allows."""
+        stub.delay = 0.1
+        client = make_stub_llm_client(
+            stub, throttle=AdaptiveThrottle(rate=1000.0, max_rate=1000.0, concurrency=2, max_concurrency=2)
+        )
+        prompts = [[{"role": "user", "content": f"prompt {n}"}] for n in range(8)]
+
+        threads = [threading.Thread(target=client.chat, args=(messages,)) for messages in prompts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(stub.requests) == 8
+        assert stub.max_in_flight <= 2
+
+    def test_throttled_request_retried(self, client, stub, no_sleep):
+        """Test a 429 is retried after Retry-After and slows the throttle."""
+        stub.throttle_remaining = 2
+        stub.retry_after = 3
+
+        result = client.chat(MESSAGES)
+
+        assert result['choices']
+        assert len(stub.requests) == 3
+        assert client.throttle.throttled_count == 2
+        assert client.get_stats()['retries'] == 2
+
+    def test_server_errors_exhaust_retries(self, client, stub, no_sleep):
+        """Test persistent failures raise, are not cached, and call_llm returns None."""
+        stub.fail_remaining = 100
+
+        with pytest.raises(HTTPError, match="Azure OpenAI API error: 500"):
+            client.chat(MESSAGES)
+        assert client.call_llm("system", "user") is None
+
+        stub.fail_remaining = 0
+        assert client.chat(MESSAGES)['choices']
+
+    def test_not_configured(self, monkeypatch):
+        """Test a client without credentials reports it and call_llm returns None."""
+        for name in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT",
+                     "AZURE_OPENAI_DEPLOYMENT_NAME", "AZURE_OPENAI_API_VERSION"):
+            monkeypatch.delenv(name, raising=False)
+        client = AzureOpenAIClient(cache=LLMResponseCache(db_path=":memory:"))
+
+        assert client.configured is False
+        assert client.call_llm("system", "user") is None
+        with pytest.raises(ValueError):
+            client.chat(MESSAGES)
+
+
+class TestToolsUseSharedClient:
+    """Test tools calling Azure OpenAI through the shared client."""
+
+    def test_clinical_text_summarizer(self, client, stub):
+        """Test the summarizer returns the completion and never caches clinical text."""
+        from tools import clinical_text_summarizer
+
+        with patch.object(clinical_text_summarizer, 'get_llm_client', return_value=client):
+            first = clinical_text_summarizer.run({'text': 'Patient presented with chest pain.'})
+            second = clinical_text_summarizer.run({'text': 'Patient presented with chest pain.'})
+
+        assert first['summary'] == "echo: Patient presented with chest pain."
+        assert first['tokens_used'] == 15
+        assert second == first
+        assert len(stub.requests) == 2
+
+    def test_clinical_text_summarizer_api_error(self, client, stub, no_sleep):
+        """Test an API failure is reported as before."""
+        from tools import clinical_text_summarizer
+        stub.fail_remaining = 100
+
+        with patch.object(clinical_text_summarizer, 'get_llm_client', return_value=client):
+            result = clinical_text_summarizer.run({'text': 'Some text'})
+
+        assert result == {"error": "Azure OpenAI API error: 500"}
+
+    def test_schedule_analyzer(self, stub):
+        """Test the Azure schedule analyzer parses the LLM's JSON answer."""
+        from tools import schedule_converter_azure
+
+        stub.responder = lambda messages: json.dumps(
+            {"mappings": {"Visit": "visit_name", "Day": "visit_day"}, "confidence": 92, "reasoning": "clear"}
+        )
+        client = make_stub_llm_client(stub)
+        with patch.object(schedule_converter_azure, 'get_llm_client', return_value=client):
+            analyzer = schedule_converter_azure.LLMAnalyzer()
+
+        result = analyzer.analyze_structure({"columns": ["Visit", "Day"], "rows": []})
+
+        assert result["method"] == "azure_openai_llm"
+        assert result["mappings"] == {"Visit": "visit_name", "Day": "visit_day"}
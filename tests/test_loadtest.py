@@ -0,0 +1,151 @@
+"""
+Tests for the HTTP load and replay harness.
+"""
+
+import os
+import json
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+from lib.benchmarks import record_field
+from lib.loadtest import (
+    CAPTURE_PATH_ENV, ResourceSampler, ToolRequest, capture_request, format_report, parse_mix, percentile,
+    read_capture, run_load, schedule, summarize, synthetic_mix, write_capture
+)
+from server import app
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    """The tool server on a local port in a background thread."""
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+class TestTraffic:
+    """Test capturing, reading and generating traffic."""
+
+    def test_capture_round_trip(self, tmp_path, monkeypatch):
+        """Test captured calls replay in time order with relative offsets."""
+        path = str(tmp_path / "traffic.jsonl")
+        monkeypatch.setenv(CAPTURE_PATH_ENV, path)
+        capture_request("test_echo", {"text": "first"})
+        capture_request("test_echo", {"text": "second"})
+
+        replay = read_capture(path)
+
+        assert [request.payload["text"] for request in replay] == ["first", "second"]
+        assert replay[0].offset == 0.0
+        assert replay[1].offset >= 0.0
+
+        write_capture([ToolRequest("b", {"x": 1}, 2.0), ToolRequest("a", {"x": 2}, 0.5)], path, start=100.0)
+        assert [(request.tool, request.offset) for request in read_capture(path)] == [("a", 0.0), ("b", 1.5)]
+
+    def test_capture_disabled_and_bad_records(self, tmp_path, monkeypatch):
+        """Test nothing is written without the env var and malformed lines are rejected."""
+        monkeypatch.delenv(CAPTURE_PATH_ENV, raising=False)
+        capture_request("test_echo", {"text": "ignored"})
+        assert os.listdir(tmp_path) == []
+
+        bad = tmp_path / "bad.jsonl"
+        bad.write_text(json.dumps({"request_id": "user-001", "title": "Not traffic"}) + "\n")
+        with pytest.raises(ValueError):
+            read_capture(str(bad))
+
+    def test_capture_unwritable_path(self, tmp_path, caplog):
+        """Test a capture file that cannot be written is logged instead of raising."""
+        path = str(tmp_path / "missing" / "traffic.jsonl")
+
+        capture_request("test_echo", {"text": "lost"}, path)
+
+        assert not os.path.exists(path)
+        assert "Could not capture /run_tool/test_echo" in caplog.text
+
+    def test_synthetic_mix(self):
+        """Test the mix is repeatable, weighted and uses scaled seed inputs."""
+        weights = parse_mix(["adverse_event_coder=3", "concomitant_med_coder"])
+        first = synthetic_mix(weights, 200, records=20, seed=1)
+        second = synthetic_mix(weights, 200, records=20, seed=1)
+
+        tools = [request.tool for request in first]
+        assert tools == [request.tool for request in second]
+        assert tools.count("adverse_event_coder") > tools.count("concomitant_med_coder") > 0
+        for request in first[:2]:
+            (field,), _ = record_field(request.payload, request.tool)
+            assert len(request.payload[field]) == 20
+        with pytest.raises(ValueError):
+            parse_mix(["adverse_event_coder=0"])
+
+    def test_schedule(self):
+        """Test rates give Poisson arrivals, captures keep their spacing and neither means a closed loop."""
+        requests_ = [ToolRequest("t", {}, offset) for offset in (0.0, 1.0, 3.0)]
+
+        assert [due for due, _ in schedule(requests_, speed=2.0)] == [0.0, 0.5, 1.5]
+        arrivals = [due for due, _ in schedule([ToolRequest("t", {})] * 2000, rate=100.0)]
+        assert arrivals == sorted(arrivals)
+        assert 18 < arrivals[-1] < 22
+        assert {due for due, _ in schedule([ToolRequest("t", {})] * 3)} == {None}
+
+
+class TestRunLoad:
+    """Test driving a live server."""
+
+    def test_closed_loop(self, server_url):
+        """Test every request is sent and errors are counted per tool."""
+        requests_ = [ToolRequest("test_echo", {"text": str(i)}) for i in range(30)]
+        requests_ += [ToolRequest("no_such_tool", {"text": "x"}) for _ in range(10)]
+
+        report = run_load(server_url, requests_, concurrency=4, server_pid=os.getpid())
+
+        assert report["overall"]["requests"] == 40
+        assert report["tools"]["test_echo"]["errors"] == 0
+        assert report["tools"]["no_such_tool"]["error_rate"] == 1.0
+        assert report["errors"] == {"HTTP 404": 10}
+        assert report["settings"]["model"] == "closed"
+        assert report["server"]["rss_mb_peak"] > 0
+        assert "test_echo" in format_report(report)
+
+    def test_open_loop_duration(self, server_url):
+        """Test arrivals follow the rate and stop at the duration."""
+        requests_ = [ToolRequest("test_echo", {"text": "x"})] * 1000
+
+        report = run_load(server_url, requests_, concurrency=4, rate=50.0, duration=1.0)
+
+        assert 25 <= report["overall"]["requests"] <= 80
+        assert report["settings"]["model"] == "open"
+        assert report["overall"]["p50_ms"] <= report["overall"]["p99_ms"]
+
+
+class TestReporting:
+    """Test latency statistics."""
+
+    def test_percentiles_and_summary(self):
+        """Test interpolated percentiles and per-tool error rates."""
+        values = [i / 1000 for i in range(1, 101)]
+        samples = [{"tool": "a", "status": 200, "error": None, "latency": value, "service": value} for value in values]
+        samples.append({"tool": "b", "status": None, "error": "ConnectTimeout", "latency": 1.0, "service": 1.0})
+
+        report = summarize(samples, wall=10.0)
+
+        assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+        assert percentile([], 99) == 0.0
+        assert report["tools"]["a"]["p50_ms"] == 50.5
+        assert report["tools"]["a"]["p99_ms"] == pytest.approx(99.01)
+        assert report["tools"]["b"]["error_rate"] == 1.0
+        assert report["overall"]["throughput_rps"] == 10.1
+
+    def test_resource_sampler(self):
+        """Test sampling this process reports CPU and memory."""
+        sampler = ResourceSampler(os.getpid(), interval=0.05).start()
+        sum(i * i for i in range(200_000))
+
+        summary = sampler.stop()
+
+        assert summary["rss_mb_peak"] > 0
+        assert summary["cpu_seconds"] >= 0
+        assert summary["samples"] >= 2
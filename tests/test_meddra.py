@@ -0,0 +1,148 @@
+"""
+Tests for the MedDRA term index and coder.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from lib.coding.meddra import MeddraCoder, MeddraDictionary, load_meddra
+from lib.coding.term_index import TermIndex
+
+MDHIER = [
+    # pt_code, hlt_code, hlgt_code, soc_code, pt, hlt, hlgt, soc, soc_abbrev, null, pt_soc_code, primary_soc_fg
+    "10019211$10019233$10019231$10029205$Headache$Headaches NEC$Headaches$Nervous system disorders$Nerv$$10029205$Y$",
+    "10019211$10019233$10019231$10037175$Headache$Headaches NEC$Headaches$Psychiatric disorders$Psych$$10029205$N$",
+    "10028813$10028817$10017969$10017947$Nausea$Nausea and vomiting symptoms$Gastrointestinal signs and symptoms"
+    "$Gastrointestinal disorders$Gastr$$10017947$Y$",
+    "10047700$10047708$10017969$10017947$Vomiting$Vomiting symptoms$Gastrointestinal signs and symptoms"
+    "$Gastrointestinal disorders$Gastr$$10017947$Y$",
+]
+LLT = [
+    # llt_code, llt_name, pt_code, ..., llt_currency (field 10)
+    "10019211$Headache$10019211$$$$$$$Y$$",
+    "10019198$Head pain$10019211$$$$$$$Y$$",
+    "10008151$Cephalgia$10019211$$$$$$$N$$",
+    "10028813$Nausea$10028813$$$$$$$Y$$",
+    "10016347$Feeling queasy$10028813$$$$$$$Y$$",
+    "10047700$Vomiting$10047700$$$$$$$Y$$",
+    "10014196$Emesis$10047700$$$$$$$Y$$",
+    "10099999$Orphan term$11111111$$$$$$$Y$$",
+]
+
+
+def write_meddra_distribution(directory, version="27.0"):
+    """A small MedDRA ASCII distribution (MedAscii folder) in directory."""
+    with open(os.path.join(directory, "mdhier.asc"), "w", encoding="utf-8") as f:
+        f.write("\n".join(MDHIER) + "\n")
+    with open(os.path.join(directory, "LLT.ASC"), "w", encoding="utf-8") as f:
+        f.write("\r\n".join(LLT) + "\r\n")
+    with open(os.path.join(directory, "meddra_release.asc"), "w", encoding="utf-8") as f:
+        f.write(f"{version}$English$$$$\n")
+    return str(directory)
+
+
+class TestTermIndex:
+    """Test exact, phrase and fuzzy lookups."""
+
+    @pytest.fixture
+    def index(self):
+        return TermIndex.build(["Headache", "Head pain", "Pain", "Blood pressure increased", "Nausea", "Back pain"])
+
+    def test_match_methods(self, index):
+        """Test each lookup step and its confidence."""
+        def matched(text, threshold=0.7):
+            match = index.match(text, threshold)
+            return (index.names[match.term_id], match.method) if match else None
+
+        assert matched("HEADACHE") == ("Headache", "exact")
+        assert matched("severe head pain, left side") == ("Head pain", "contains")
+        assert matched("blood pressure") == ("Blood pressure increased", "partial")
+        assert matched("nausia") == ("Nausea", "fuzzy")
+        assert index.match("nausia").confidence == pytest.approx(0.8333, abs=1e-4)
+        assert matched("nausia", threshold=0.9) is None
+        assert matched("insomnia") is None
+        assert matched("") is None
+
+    def test_candidates_ranked_by_overlap(self, index):
+        """Test fuzzy candidates share trigrams with the text and come best first."""
+        candidates = [index.names[term] for term in index.candidates("head pian")]
+
+        assert candidates[0] == "Head pain"
+        assert "Nausea" not in candidates
+        assert len(index.candidates("pain", limit=2)) == 2
+
+    def test_arrays_round_trip(self, index, tmp_path):
+        """Test an index saved with np.savez matches the same way when loaded."""
+        path = tmp_path / "index.npz"
+        np.savez(path, **index.to_arrays("x_"))
+        with np.load(path, allow_pickle=False) as data:
+            loaded = TermIndex.from_arrays(data, "x_")
+
+        assert loaded.names == index.names
+        for text in ("headache", "severe back pain", "nausia", "blood pressure"):
+            assert loaded.match(text) == index.match(text)
+
+
+class TestMeddraDictionary:
+    """Test loading MedDRA distributions."""
+
+    def test_from_ascii(self, tmp_path):
+        """Test LLTs get their primary SOC path, and non-current and orphan LLTs are left out."""
+        dictionary = MeddraDictionary.from_ascii(write_meddra_distribution(tmp_path))
+        coder = MeddraCoder(dictionary)
+
+        assert dictionary.version == "27.0"
+        assert len(dictionary) == 6
+        assert coder.code("head pain") == {
+            "llt": "Head pain", "llt_code": "10019198", "pt": "Headache", "pt_code": "10019211",
+            "hlt": "Headaches NEC", "hlt_code": "10019233", "hlgt": "Headaches", "hlgt_code": "10019231",
+            "soc": "Nervous system disorders", "soc_code": "10029205", "confidence": 1.0, "match_method": "exact",
+        }
+        assert coder.code("cephalgia") is None
+        assert coder.code("orphan term") is None
+
+    def test_saved_index_reused_until_files_change(self, tmp_path):
+        """Test the built index is saved, loaded on the next call and rebuilt for a new release."""
+        (tmp_path / "medascii").mkdir()
+        directory = write_meddra_distribution(tmp_path / "medascii")
+        index_dir = str(tmp_path / "index")
+
+        first = load_meddra(directory, index_dir)
+        saved = os.listdir(index_dir)
+        second = load_meddra(directory, index_dir)
+        write_meddra_distribution(directory, version="27.1")
+        third = load_meddra(directory, index_dir)
+
+        assert len(saved) == 1 and saved[0].endswith(".npz")
+        assert second.digest == first.digest
+        assert second.index.names == first.index.names
+        assert second.term(0) == first.term(0)
+        assert third.version == "27.1"
+        assert len(os.listdir(index_dir)) == 2
+
+    def test_missing_files(self, tmp_path):
+        """Test a directory without llt.asc is rejected."""
+        with pytest.raises(FileNotFoundError):
+            MeddraDictionary.from_ascii(str(tmp_path))
+
+
+class TestMeddraCoder:
+    """Test batch coding and the verbatim memo."""
+
+    def test_batch_codes_each_verbatim_once(self, tmp_path):
+        """Test repeated verbatims reuse one result and later calls hit the memo."""
+        coder = MeddraCoder(MeddraDictionary.from_ascii(write_meddra_distribution(tmp_path)))
+        listing = ["Headache", "headache ", "mild nausea", "vomitting", "", None, "unknown xyz"] * 50
+
+        coded = coder.code_batch(listing)
+
+        assert [result and result["pt"] for result in coded[:7]] == [
+            "Headache", "Headache", "Nausea", "Vomiting", None, None, None
+        ]
+        assert coded[0] is coded[1] is coded[7]
+        assert coded[3]["match_method"] == "fuzzy"
+        assert coder.cache_info().misses == 4
+        coder.code_batch(["HEADACHE"])
+        assert coder.cache_info().hits == 1
@@ -0,0 +1,131 @@
+"""
+Tests for memoized site, drive and item ID resolution.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from sharepoint.resolution_cache import ResolutionCache
+from tests.graph_stub import GraphStubServer, make_stub_sp_client, SITE_ID, DRIVE_ID
+
+
+class TestResolutionCache:
+    """Test the ResolutionCache class."""
+
+    def test_set_and_get(self):
+        """Test a stored ID is returned until it expires."""
+        cache = ResolutionCache()
+        cache.set('k', 'v', ttl=60)
+
+        assert cache.get('k') == 'v'
+        assert cache.hits == 1
+
+    def test_expired_entry_is_a_miss(self):
+        """Test entries past their TTL are dropped."""
+        cache = ResolutionCache()
+        with patch('sharepoint.resolution_cache.time.monotonic', return_value=1000.0):
+            cache.set('k', 'v', ttl=10)
+        with patch('sharepoint.resolution_cache.time.monotonic', return_value=1011.0):
+            assert cache.get('k') is None
+        assert cache.misses == 1
+
+    def test_lru_bound(self):
+        """Test the least recently used entry is evicted past max_entries."""
+        cache = ResolutionCache(max_entries=2)
+        cache.set('a', '1', ttl=60)
+        cache.set('b', '2', ttl=60)
+        cache.get('a')
+        cache.set('c', '3', ttl=60)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == '1'
+        assert cache.get('c') == '3'
+
+    def test_shared_level(self):
+        """Test the CacheManager level is written through and read back."""
+        store = {}
+        manager = Mock()
+        manager.set.side_effect = lambda key, value, ttl, namespace: store.__setitem__((namespace, key), value)
+        manager.get.side_effect = lambda key, namespace: store.get((namespace, key))
+
+        ResolutionCache(cache_manager=manager).set('k', 'v', ttl=60)
+        other_process = ResolutionCache(cache_manager=manager)
+
+        assert store[('resolution', 'k')] == {'value': 'v', 'ttl': 60}
+        assert other_process.get('k') == 'v'
+
+    def test_invalidate(self):
+        """Test invalidation removes the entry from both levels."""
+        manager = Mock()
+        manager.get.return_value = None
+        cache = ResolutionCache(cache_manager=manager)
+        cache.set('k', 'v', ttl=60)
+
+        cache.invalidate('k')
+
+        assert cache.get('k') is None
+        manager.delete.assert_called_once_with('k', namespace='resolution')
+
+
+class TestClientResolution:
+    """Test SharePointClient memoizes lookups against the local Graph stand-in."""
+
+    @pytest.fixture
+    def stub(self):
+        """Start a Graph stand-in with one document."""
+        with GraphStubServer() as server:
+            server.add_file("TMF/protocol.pdf", b"%PDF-protocol")
+            yield server
+
+    @pytest.fixture
+    def cache(self):
+        """Create a resolution cache shared by the clients in a test."""
+        return ResolutionCache()
+
+    def _graph_calls(self, stub):
+        return [url for _, url in stub.request_log if not url.startswith('/download/')]
+
+    def test_site_and_drive_shared_across_instances(self, stub, cache):
+        """Test a second client resolves site and drive without Graph calls."""
+        site_url = "https://stub.sharepoint.com/sites/trial"
+        first = make_stub_sp_client(stub, resolution_cache=cache, site_url=site_url)
+        assert first.site_id == SITE_ID
+        assert first.get_default_drive_id() == DRIVE_ID
+        calls_after_first = len(stub.request_log)
+
+        second = make_stub_sp_client(stub, resolution_cache=cache, site_url=site_url)
+
+        assert second.site_id == SITE_ID
+        assert second.get_default_drive_id() == DRIVE_ID
+        assert len(stub.request_log) == calls_after_first == 2
+
+    def test_repeat_download_is_one_round_trip(self, stub, cache):
+        """Test a cached item ID lets a download skip the metadata lookup."""
+        sp_client = make_stub_sp_client(stub, resolution_cache=cache)
+        assert sp_client.download_file("TMF/protocol.pdf") == b"%PDF-protocol"
+        assert len(self._graph_calls(stub)) == 2  # drive + item metadata
+        stub.request_log.clear()
+
+        assert sp_client.download_file("TMF/protocol.pdf") == b"%PDF-protocol"
+
+        assert len(self._graph_calls(stub)) == 1
+        assert self._graph_calls(stub)[0].endswith('/content')
+
+    def test_stale_item_id_falls_back(self, stub, cache):
+        """Test a replaced file is re-resolved after its cached ID 404s."""
+        sp_client = make_stub_sp_client(stub, resolution_cache=cache)
+        old_id = sp_client.resolve_item_id("TMF/protocol.pdf", drive_id=DRIVE_ID)
+        stub.add_file("TMF/protocol.pdf", b"%PDF-amended")
+
+        assert sp_client.download_file("TMF/protocol.pdf", drive_id=DRIVE_ID) == b"%PDF-amended"
+        assert sp_client.resolve_item_id("TMF/protocol.pdf", drive_id=DRIVE_ID) != old_id
+
+    def test_resolve_item_id_cached(self, stub, cache):
+        """Test path to item ID lookups hit Graph once."""
+        sp_client = make_stub_sp_client(stub, resolution_cache=cache)
+
+        first = sp_client.resolve_item_id("TMF/protocol.pdf", drive_id=DRIVE_ID)
+        second = sp_client.resolve_item_id("/TMF/protocol.pdf", drive_id=DRIVE_ID)
+
+        assert first == second == stub.items["TMF/protocol.pdf"]['id']
+        assert len(stub.request_log) == 1
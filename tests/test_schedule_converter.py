@@ -3,13 +3,19 @@ Tests for Schedule Converter Tool
 """
 
 import pytest
+import io
 import json
 import os
+import stat
+import base64
 import sqlite3
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 from tools.schedule_converter import (
     ScheduleConverter, PatternMatcher, FuzzyMatcher,
-    LLMAnalyzer, LLMJudge, MappingCache, run
+    LLMAnalyzer, LLMJudge, MappingCache, SynonymIndex, get_converter, get_synonym_index,
+    load_synonyms, resolve_under, run, _iter_json_array, DEFAULT_SYNONYMS_PATH
 )
 
 
@@ -175,6 +181,15 @@ class TestPatternMatcher:
         assert "Visit Name" in result["mappings"]
         assert result["mappings"]["Visit Name"] == "visit_name"
 
+    def test_match_later_group_wins(self):
+        """Test a column matching several groups maps to the last one, counting each match"""
+        matcher = PatternMatcher()
+
+        result = matcher.match({"columns": ["Visit Day", "Timepoint"], "rows": []})
+
+        assert result["mappings"] == {"Visit Day": "visit_day", "Timepoint": "visit_name"}
+        assert result["confidence"] == 150
+
     def test_detect_patterns(self):
         """Test pattern detection"""
         matcher = PatternMatcher()
@@ -243,6 +258,104 @@ class TestFuzzyMatcher:
         assert score < 0.5
 
 
+class TestSynonymIndex:
+    """Test the n-gram TF-IDF synonym index"""
+
+    SYNONYMS = {
+        "visit_name": ["visit", "timepoint", "encounter"],
+        "visit_day": ["day", "study day", "VISITDY"],
+        "procedures": ["procedure", "assessment", "lab tests"]
+    }
+
+    def test_normalizes_column_names(self):
+        """Test case, camelCase and punctuation variants score as the synonym"""
+        index = SynonymIndex.build(self.SYNONYMS)
+
+        matches = index.match(["StudyDay", "STUDY_DAY", "study-day", "Lab Tests"])
+
+        assert [m["field"] for m in matches] == ["visit_day", "visit_day", "visit_day", "procedures"]
+        assert all(m["score"] == pytest.approx(1.0) for m in matches)
+
+    def test_scores_all_columns_against_all_synonyms(self):
+        """Test score() returns one row per column and one column per synonym"""
+        index = SynonymIndex.build(self.SYNONYMS)
+
+        scores = index.score(["Visit", "Assessments", "Unrelated"])
+
+        assert scores.shape == (3, len(index.synonyms))
+        assert scores[0].max() == pytest.approx(1.0)
+        assert 0.5 < scores[1].max() < 1.0
+        assert scores[2].max() < 0.5
+
+    def test_min_score_filters_matches(self):
+        """Test columns below min_score are left unmapped"""
+        index = SynonymIndex.build(self.SYNONYMS)
+
+        matches = index.match(["Visit", "Zzz"], min_score=0.5)
+
+        assert [m["column"] for m in matches] == ["Visit"]
+
+    def test_persisted_index_is_reused(self, tmp_path):
+        """Test a saved index is loaded instead of rebuilt and its directory is owner-only"""
+        index_dir = tmp_path / "index"
+        built = SynonymIndex.from_dictionary(self.SYNONYMS, str(index_dir))
+        saved = list(index_dir.glob("synonym_index-*.npz"))
+
+        with patch.object(SynonymIndex, 'build', side_effect=AssertionError("rebuilt")):
+            loaded = SynonymIndex.from_dictionary(self.SYNONYMS, str(index_dir))
+
+        assert len(saved) == 1
+        assert stat.S_IMODE(os.stat(index_dir).st_mode) == 0o700
+        assert loaded.digest == built.digest
+        assert loaded.synonyms == built.synonyms
+        assert (loaded.score(["Study Day"]) == built.score(["Study Day"])).all()
+
+    def test_changed_dictionary_builds_new_index(self, tmp_path):
+        """Test editing the dictionary produces a separate index file"""
+        SynonymIndex.from_dictionary(self.SYNONYMS, str(tmp_path))
+        extended = dict(self.SYNONYMS, visit_date=["visit date", "SVSTDTC"])
+
+        index = SynonymIndex.from_dictionary(extended, str(tmp_path))
+
+        assert len(list(tmp_path.glob("synonym_index-*.npz"))) == 2
+        assert index.match(["SVSTDTC"])[0]["field"] == "visit_date"
+
+    def test_corrupt_index_file_is_rebuilt(self, tmp_path):
+        """Test an unreadable saved index is replaced"""
+        digest = SynonymIndex.digest_for(self.SYNONYMS)
+        (tmp_path / f"synonym_index-{digest[:16]}.npz").write_bytes(b"not an index")
+
+        index = SynonymIndex.from_dictionary(self.SYNONYMS, str(tmp_path))
+
+        assert index.match(["Visit"])[0]["field"] == "visit_name"
+        assert SynonymIndex.load(str(tmp_path / f"synonym_index-{digest[:16]}.npz")).digest == digest
+
+    def test_default_dictionary(self):
+        """Test the shipped dictionary covers the fields the converters use"""
+        synonyms = load_synonyms(DEFAULT_SYNONYMS_PATH)
+        index = get_synonym_index()
+
+        assert {"visit_name", "visit_day", "procedures"} <= set(synonyms)
+        assert sum(len(names) for names in synonyms.values()) > 300
+        assert index is get_synonym_index()
+
+    def test_fuzzy_matcher_uses_index(self):
+        """Test FuzzyMatcher maps standard vocabulary names through the index"""
+        fuzzy = FuzzyMatcher(index=SynonymIndex.build(load_synonyms(DEFAULT_SYNONYMS_PATH)))
+        parsed_data = {"columns": ["VISIT", "VISITDY", "VISITNUM", "PRTRT", "SVSTDTC", "Xyz"], "rows": []}
+
+        result = fuzzy.validate({}, parsed_data)
+
+        assert result["mappings"] == {
+            "VISIT": "visit_name",
+            "VISITDY": "visit_day",
+            "VISITNUM": "visit_number",
+            "PRTRT": "procedures",
+            "SVSTDTC": "visit_date"
+        }
+        assert result["confidence"] == pytest.approx(5 / 6 * 100)
+
+
 class TestLLMAnalyzer:
     """Test the LLM Analyzer (simulated)"""
 
@@ -375,6 +488,302 @@ class TestMappingCache:
         assert stats["total_mappings"] == 2
         assert stats["average_confidence"] == 85.0
 
+    def test_store_is_upsert(self, temp_db):
+        """Test storing the same fingerprint updates one row and bumps success_count"""
+        cache = MappingCache(db_path=temp_db)
+
+        cache.store_mapping("org1", {"mappings": {"Visit": "visit_name"}, "confidence": 80, "fingerprint": "fp1"})
+        cache.store_mapping("org1", {"mappings": {"Visit": "visit"}, "confidence": 95, "fingerprint": "fp1"})
+
+        all_mappings = cache.get_all_mappings("org1")
+        assert len(all_mappings) == 1
+        assert all_mappings[0]["success_count"] == 2
+        assert cache.get_org_mappings("org1", "fp1") == {"mappings": {"Visit": "visit"}, "confidence": 95}
+
+    def test_uses_wal_and_unique_index(self, temp_db):
+        """Test the database is in WAL mode with a unique (org_id, fingerprint) key"""
+        cache = MappingCache(db_path=temp_db)
+
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT mappings FROM mappings WHERE org_id = ? AND fingerprint = ?",
+            ("org1", "fp1")
+        ).fetchall()
+        conn.close()
+        assert "idx_mappings_org_fingerprint" in str(plan)
+        cache.close()
+
+    def test_migrates_duplicate_rows(self, temp_db):
+        """Test a database from the old append-only schema is deduplicated"""
+        conn = sqlite3.connect(temp_db)
+        conn.execute("""
+            CREATE TABLE mappings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, org_id TEXT, fingerprint TEXT,
+                mappings TEXT, confidence REAL, success_count INTEGER DEFAULT 1,
+                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for confidence in (70, 92, 85):
+            conn.execute(
+                "INSERT INTO mappings (org_id, fingerprint, mappings, confidence) VALUES (?, ?, ?, ?)",
+                ("org1", "fp1", json.dumps({"Day": str(confidence)}), confidence)
+            )
+        conn.commit()
+        conn.close()
+
+        cache = MappingCache(db_path=temp_db)
+
+        all_mappings = cache.get_all_mappings("org1")
+        assert len(all_mappings) == 1
+        assert all_mappings[0]["confidence"] == 92
+        assert all_mappings[0]["success_count"] == 3
+
+    def test_lookups_served_from_memory(self, temp_db):
+        """Test repeated lookups hit the in-process LRU and results are copies"""
+        cache = MappingCache(db_path=temp_db, max_entries=1)
+        cache.store_mapping("org1", {"mappings": {"Visit": "visit_name"}, "confidence": 90, "fingerprint": "fp1"})
+        cache.store_mapping("org1", {"mappings": {"Day": "visit_day"}, "confidence": 90, "fingerprint": "fp2"})
+
+        first = cache.get_org_mappings("org1", "fp1")
+        first["mappings"]["Visit"] = "changed"
+        second = cache.get_org_mappings("org1", "fp1")
+
+        assert second["mappings"] == {"Visit": "visit_name"}
+        assert (cache.misses, cache.hits) == (1, 1)
+
+        cache.clear("org1")
+        assert cache.get_org_mappings("org1", "fp1") is None
+
+    def test_sees_changes_from_other_connections(self, temp_db):
+        """Test the LRU is dropped when another cache on the same file stores or clears mappings"""
+        cache = MappingCache(db_path=temp_db)
+        other = MappingCache(db_path=temp_db)
+        cache.store_mapping("org1", {"mappings": {"Visit": "visit_name"}, "confidence": 90, "fingerprint": "fp1"})
+        assert cache.get_org_mappings("org1", "fp1")["mappings"] == {"Visit": "visit_name"}
+
+        other.store_mapping("org1", {"mappings": {"Visit": "visit"}, "confidence": 95, "fingerprint": "fp1"})
+        assert cache.get_org_mappings("org1", "fp1")["mappings"] == {"Visit": "visit"}
+
+        other.clear("all")
+        assert cache.get_org_mappings("org1", "fp1") is None
+
+        cache.close()
+        other.close()
+
+    def test_shared_between_threads(self, temp_db):
+        """Test one cache can be used from several threads"""
+        cache = MappingCache(db_path=temp_db)
+
+        def store(n):
+            cache.store_mapping("org1", {"mappings": {}, "confidence": 90, "fingerprint": f"fp{n % 10}"})
+            return cache.get_org_mappings("org1", f"fp{n % 10}")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(store, range(100)))
+
+        assert all(results)
+        stats = cache.get_statistics("org1")
+        assert stats["total_mappings"] == 10
+        assert stats["max_success_count"] == 10
+
+
+class TestStreamingConversion:
+    """Test constant-memory conversion of large schedules"""
+
+    @pytest.fixture
+    def converter(self, tmp_path):
+        """Create a converter with a private mapping cache"""
+        return ScheduleConverter(mapping_cache=MappingCache(db_path=str(tmp_path / "mappings.db")))
+
+    @staticmethod
+    def read_ndjson(path):
+        with open(path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_stream_matches_in_memory_conversion(self, converter, tmp_path):
+        """Test streamed records equal those of convert()"""
+        content = "Visit,Day,Procedure\nScreening,-14,\"Consent, Labs\"\nBaseline,0,ECG\nWeek 4,28,\n"
+        source = tmp_path / "schedule.csv"
+        source.write_text(content)
+
+        for target_format in ("CDISC_SDTM", "FHIR_R4", "OMOP_CDM"):
+            output = tmp_path / f"{target_format}.ndjson"
+            summary = converter.convert_stream(str(source), "csv", target_format, str(output))
+            expected = converter.convert(content, "csv", target_format)["data"]
+            records = self.read_ndjson(output)
+
+            assert summary["row_count"] == 3
+            assert summary["records_written"] == len(records)
+            if target_format == "CDISC_SDTM":
+                assert [r for r in records if r["DOMAIN"] == "TV"] == expected["TV"]
+                assert [r for r in records if r["DOMAIN"] == "PR"] == expected["PR"]
+            elif target_format == "FHIR_R4":
+                assert records == expected["activity"]
+            else:
+                assert records == expected["visit_occurrence"]
+
+    def test_stream_json_array_in_small_reads(self):
+        """Test JSON array items are parsed correctly across read boundaries"""
+        items = [{"visit": "V[1]", "day": 12345}, {"visit": "V,2", "day": -7.5}, [1, 2], "x", 99]
+        stream = io.StringIO(json.dumps(items, indent=1))
+
+        assert list(_iter_json_array(stream, read_size=3)) == items
+        assert list(_iter_json_array(io.StringIO('{"visit": "V1"}'))) == [{"visit": "V1"}]
+        assert list(_iter_json_array(io.StringIO("[]"))) == []
+
+    def test_stream_base64_json_to_stream(self, converter):
+        """Test base64 JSON input from a file object converts to a text stream"""
+        rows = [{"Visit": f"V{n}", "Day": n} for n in range(50)]
+        source = io.BytesIO(base64.b64encode(json.dumps(rows).encode()))
+        output = io.StringIO()
+
+        summary = converter.convert_stream(source, "json", "OMOP_CDM", output, base64_encoded=True)
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert summary["row_count"] == 50
+        assert summary["output_files"] == []
+        assert [r["visit_start_date"] for r in records] == list(range(50))
+
+    def test_stream_split_into_part_files(self, converter, tmp_path):
+        """Test records_per_file writes numbered part files"""
+        source = tmp_path / "schedule.csv"
+        source.write_text("Visit,Day\n" + "".join(f"V{n},{n}\n" for n in range(25)))
+
+        summary = converter.convert_stream(
+            str(source), "csv", "OMOP_CDM", str(tmp_path / "out" / "visits.ndjson"), records_per_file=10
+        )
+
+        assert [os.path.basename(path) for path in summary["output_files"]] == [
+            "visits-00001.ndjson", "visits-00002.ndjson", "visits-00003.ndjson"
+        ]
+        assert [len(self.read_ndjson(path)) for path in summary["output_files"]] == [10, 10, 5]
+
+    def test_stream_uses_constant_memory(self, converter, tmp_path):
+        """Test memory use does not grow with the number of rows"""
+        source = tmp_path / "large.csv"
+        with open(source, "w") as f:
+            f.write("Visit,Day,Procedure\n")
+            for n in range(20000):
+                f.write(f"Visit {n},{n},Labs\n")
+
+        tracemalloc.start()
+        summary = converter.convert_stream(str(source), "csv", "CDISC_SDTM", str(tmp_path / "out.ndjson"))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert summary["row_count"] == 20000
+        assert summary["records_written"] == 40000
+        assert peak < 2 * 1024 * 1024
+
+    def test_run_rejects_paths(self, tmp_path):
+        """Test run() does not read or write files named in the request"""
+        source = tmp_path / "schedule.ndjson"
+        source.write_text('{"Visit": "V1", "Day": 1}\n')
+        output = tmp_path / "out.ndjson"
+
+        rejected = run({"input_path": str(source), "file_type": "ndjson", "output_path": str(output)})
+        output_only = run({"file_content": "Visit,Day\nV1,1\n", "file_type": "csv", "output_path": str(output)})
+
+        assert rejected["success"] is False
+        assert "input_path" in rejected["error"]
+        assert output_only["success"] is False
+        assert not output.exists()
+
+
+class TestBulkConversion:
+    """Test parallel conversion of many schedule files"""
+
+    @pytest.fixture
+    def converter(self, tmp_path):
+        """Create a converter with a private mapping cache"""
+        return ScheduleConverter(mapping_cache=MappingCache(db_path=str(tmp_path / "mappings.db")))
+
+    @pytest.fixture
+    def schedules(self, tmp_path):
+        """Write schedules in three distinct structures, plus a file to ignore"""
+        source = tmp_path / "schedules"
+        (source / "nested").mkdir(parents=True)
+        for n in range(4):
+            (source / f"sponsor_a_{n}.csv").write_text(f"Visit,Day\nScreening,-{n}\nBaseline,0\n")
+        for n in range(2):
+            (source / f"sponsor_b_{n}.csv").write_text("Timepoint,Study Day,Procedure\nV1,1,Labs\n")
+        (source / "nested" / "legacy.json").write_text(json.dumps([{"visit": "V1", "day": 1}]))
+        (source / "README.md").write_text("not a schedule")
+        return source
+
+    def test_bulk_groups_by_structure(self, converter, schedules, tmp_path):
+        """Test each structure is mapped once and every file is converted in worker processes"""
+        output_dir = tmp_path / "out"
+
+        with patch.object(converter, "_resolve_mappings", wraps=converter._resolve_mappings) as resolve:
+            report = converter.convert_bulk(str(schedules), str(output_dir), max_workers=2, recursive=True)
+
+        assert resolve.call_count == 3
+        assert report["success"] is True
+        assert (report["files"], report["structure_groups"], report["workers"]) == (7, 3, 2)
+        assert report["total_rows"] == 4 * 2 + 2 + 1
+        assert set(report["timing"]) >= {"detect_seconds", "resolve_seconds", "convert_seconds", "total_seconds"}
+        for result in report["results"]:
+            assert os.path.exists(result["output_files"][0])
+        with open(output_dir / "conversion_summary.json") as f:
+            assert json.load(f)["succeeded"] == 7
+
+    def test_bulk_reports_failed_files(self, converter, schedules, tmp_path):
+        """Test an unreadable file is reported without stopping the others"""
+        broken = schedules / "broken.json"
+        broken.write_text('[{"visit": "V1"}, {"visit": ')
+
+        report = converter.convert_bulk([str(schedules)], str(tmp_path / "out"), max_workers=1)
+
+        failed = [result for result in report["results"] if not result["success"]]
+        assert report["success"] is False
+        assert [result["file"] for result in failed] == [str(broken)]
+        assert report["succeeded"] == 6
+
+    def test_bulk_output_names_are_unique(self, converter, tmp_path):
+        """Test inputs with the same file name do not overwrite each other"""
+        for folder in ("site1", "site2"):
+            (tmp_path / folder).mkdir()
+            (tmp_path / folder / "schedule.csv").write_text("Visit,Day\nV1,1\n")
+
+        report = converter.convert_bulk(
+            [str(tmp_path / "site1" / "schedule.csv"), str(tmp_path / "site2" / "schedule.csv")],
+            str(tmp_path / "out"), max_workers=1
+        )
+
+        names = sorted(os.path.basename(r["output_files"][0]) for r in report["results"])
+        assert names == ["schedule-2.ndjson", "schedule.ndjson"]
+
+    def test_resolve_under(self, tmp_path):
+        """Test paths are confined to the base directory, including through symlinks"""
+        base = tmp_path / "base"
+        (base / "in").mkdir(parents=True)
+        (base / "escape").symlink_to(tmp_path)
+
+        assert resolve_under(str(base), "in") == os.path.realpath(base / "in")
+        for path in ("/etc/hostname", "../outside", "in/../../outside", "escape/secret.csv", ""):
+            with pytest.raises(ValueError):
+                resolve_under(str(base), path)
+
+    def test_bulk_base_dir(self, converter, tmp_path):
+        """Test base_dir confines inputs, outputs and symlinked files found in input directories"""
+        base = tmp_path / "base"
+        (base / "in").mkdir(parents=True)
+        (base / "in" / "schedule.csv").write_text("Visit,Day\nV1,1\n")
+        (tmp_path / "secret.csv").write_text("Visit,Day\nV9,9\n")
+
+        report = converter.convert_bulk(["in"], "out", max_workers=1, base_dir=str(base))
+
+        assert report["succeeded"] == 1
+        assert (base / "out" / "schedule.ndjson").exists()
+        with pytest.raises(ValueError):
+            converter.convert_bulk(["in"], str(tmp_path / "elsewhere"), max_workers=1, base_dir=str(base))
+        assert not (tmp_path / "elsewhere").exists()
+        (base / "in" / "linked.csv").symlink_to(tmp_path / "secret.csv")
+        with pytest.raises(ValueError, match="outside"):
+            converter.convert_bulk(["in"], "out", max_workers=1, base_dir=str(base))
+
 
 class TestRunFunction:
     """Test the main run function"""
@@ -434,6 +843,28 @@ class TestRunFunction:
         result2 = run(input_data)
         assert result2["success"] is True
 
+    def test_run_reuses_converter(self):
+        """Test run() shares one converter, and its cache connection, across calls"""
+        converter = get_converter()
+
+        run({"file_content": "Visit,Day\nScreening,-14", "file_type": "csv"})
+
+        assert get_converter() is converter
+
+    def test_run_concurrently(self):
+        """Test the shared converter can serve concurrent calls"""
+        inputs = [
+            {"file_content": f"Visit,Day,Procedure\nV{n},{n},Labs", "file_type": "csv",
+             "organization_id": "test_org_threads"}
+            for n in range(40)
+        ]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(run, inputs))
+
+        assert all(result["success"] for result in results)
+        assert [result["data"]["TV"][0]["VISIT"] for result in results] == [f"V{n}" for n in range(40)]
+
 
 @pytest.mark.integration
 class TestIntegration:
@@ -0,0 +1,54 @@
+"""
+Tests for the schedule converter MCP server handlers
+"""
+
+import pytest
+
+from scripts.schedule_converter_mcp import BULK_BASE_DIR_ENV, ScheduleConverterMCPServer
+
+
+class TestConvertBulkHandler:
+    """Test argument validation and path confinement for convert_bulk"""
+
+    @pytest.fixture
+    def server(self, tmp_path, monkeypatch):
+        """Create a server whose bulk base directory holds one schedule"""
+        (tmp_path / "in").mkdir()
+        (tmp_path / "in" / "schedule.csv").write_text("Visit,Day\nV1,1\n")
+        monkeypatch.setenv(BULK_BASE_DIR_ENV, str(tmp_path))
+        return ScheduleConverterMCPServer()
+
+    @pytest.mark.parametrize("args", [
+        {"inputs": 5, "output_dir": "out"},
+        {"inputs": "in", "output_dir": "out"},
+        {"inputs": ["in", 3], "output_dir": "out"},
+        {"inputs": [], "output_dir": "out"},
+        {"inputs": ["in"]},
+    ])
+    def test_invalid_arguments(self, server, args):
+        """Test malformed arguments return a tool error"""
+        result = server._handle_convert_bulk(args)
+
+        assert result["success"] is False
+        assert "must be" in result["error"]
+
+    def test_paths_confined_to_base_dir(self, server, tmp_path):
+        """Test paths outside the base directory are refused and relative ones convert"""
+        outside = server._handle_convert_bulk({"inputs": ["/etc"], "output_dir": "out"})
+        escaping = server._handle_convert_bulk({"inputs": ["in"], "output_dir": "../out"})
+        report = server._handle_convert_bulk({"inputs": ["in"], "output_dir": "out", "max_workers": 1})
+
+        assert outside["success"] is False
+        assert escaping["success"] is False
+        assert not (tmp_path.parent / "out").exists()
+        assert report["succeeded"] == 1
+        assert (tmp_path / "out" / "schedule.ndjson").exists()
+
+    def test_disabled_without_base_dir(self, server, monkeypatch):
+        """Test bulk conversion is refused when no base directory is configured"""
+        monkeypatch.delenv(BULK_BASE_DIR_ENV)
+
+        result = server._handle_convert_bulk({"inputs": ["in"], "output_dir": "out"})
+
+        assert result["success"] is False
+        assert BULK_BASE_DIR_ENV in result["error"]
@@ -6,6 +6,7 @@ import os
 import pytest
 from unittest.mock import Mock, patch, MagicMock, mock_open
 from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
 from requests.exceptions import RequestException
 
 from sharepoint.sharepoint_client import (
@@ -13,6 +14,17 @@ from sharepoint.sharepoint_client import (
     SharePointFile,
     SharePointFolder
 )
+from sharepoint.resolution_cache import ResolutionCache
+from sharepoint.item_cache import ItemCache
+from tests.graph_stub import GraphStubServer, make_stub_auth_client, SITE_ID, DRIVE_ID
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches():
+    """Give each test its own resolution and item caches instead of the shared ones."""
+    with patch('sharepoint.sharepoint_client.get_resolution_cache', side_effect=ResolutionCache), \
+            patch('sharepoint.sharepoint_client.get_item_cache', side_effect=ItemCache):
+        yield
 
 
 class TestSharePointFile:
@@ -278,8 +290,7 @@ class TestSharePointClient:
         )
     
     @patch.object(SharePointClient, 'get_default_drive_id')
-    @patch('sharepoint.sharepoint_client.requests.get')
-    def test_download_file_with_download_url(self, mock_requests_get, mock_get_drive, client):
+    def test_download_file_with_download_url(self, mock_get_drive, client):
         """Test downloading a file using download URL."""
         mock_get_drive.return_value = 'drive123'
         
@@ -296,12 +307,12 @@ class TestSharePointClient:
         mock_download_response = Mock()
         mock_download_response.status_code = 200
         mock_download_response.content = b'File content'
-        mock_requests_get.return_value = mock_download_response
         
-        content = client.download_file('Documents/file.txt')
+        with patch.object(client._transfer_session, 'get', return_value=mock_download_response) as mock_get:
+            content = client.download_file('Documents/file.txt')
         
         assert content == b'File content'
-        mock_requests_get.assert_called_once_with('https://download.url/file.txt')
+        mock_get.assert_called_once_with('https://download.url/file.txt', timeout=300)
     
     @patch.object(SharePointClient, 'get_default_drive_id')
     def test_download_file_without_download_url(self, mock_get_drive, client):
@@ -329,33 +340,38 @@ class TestSharePointClient:
         assert client.auth_client.make_graph_request.call_count == 2
     
     @patch.object(SharePointClient, 'get_default_drive_id')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('os.makedirs')
-    @patch('sharepoint.sharepoint_client.requests.get')
-    def test_download_file_to_local_path(self, mock_requests_get, mock_makedirs, mock_file, mock_get_drive, client):
-        """Test downloading a file to local path."""
+    def test_download_file_to_local_path(self, mock_get_drive, client, tmp_path):
+        """Test downloading a file to local path streams it to disk."""
         mock_get_drive.return_value = 'drive123'
         
         # Mock metadata response
         mock_metadata_response = Mock()
         mock_metadata_response.status_code = 200
         mock_metadata_response.json.return_value = {
-            '@microsoft.graph.downloadUrl': 'https://download.url/file.txt'
+            '@microsoft.graph.downloadUrl': 'https://download.url/file.txt',
+            'size': 12,
+            'eTag': '"etag-1"'
         }
         
         client.auth_client.make_graph_request.return_value = mock_metadata_response
         
-        # Mock download response
+        # Mock streamed download response
         mock_download_response = Mock()
         mock_download_response.status_code = 200
-        mock_download_response.content = b'File content'
-        mock_requests_get.return_value = mock_download_response
-        
-        result = client.download_file('Documents/file.txt', local_path='/tmp/file.txt')
-        
-        assert result == '/tmp/file.txt'
-        mock_makedirs.assert_called_once_with('/tmp', exist_ok=True)
-        mock_file().write.assert_called_once_with(b'File content')
+        mock_download_response.iter_content.return_value = [b'File ', b'content']
+        client._transfer_session = Mock()
+        client._transfer_session.get.return_value = mock_download_response
+        
+        local_path = str(tmp_path / 'nested' / 'file.txt')
+        result = client.download_file('Documents/file.txt', local_path=local_path)
+        
+        assert result == local_path
+        assert open(local_path, 'rb').read() == b'File content'
+        assert not os.path.exists(local_path + '.part')
+        assert not os.path.exists(local_path + '.part.json')
+        client._transfer_session.get.assert_called_once_with(
+            'https://download.url/file.txt', headers={}, stream=True, timeout=300
+        )
     
     @patch.object(SharePointClient, 'get_default_drive_id')
     @patch.object(SharePointClient, '_simple_upload')
@@ -619,4 +635,77 @@ class TestErrorHandling:
                 with pytest.raises(RequestException) as exc_info:
                     client._simple_upload('/local/file.txt', 'remote/file.txt', 'drive123', 'rename')
         
-        assert 'Failed to upload file: 507' in str(exc_info.value)
\ No newline at end of file
+        assert 'Failed to upload file: 507' in str(exc_info.value)
+
+class TestPagination:
+    """Test lazy, paginated iteration against the local Graph stand-in."""
+    
+    @pytest.fixture
+    def stub(self):
+        """Start a Graph stand-in with a folder larger than one page."""
+        with GraphStubServer() as server:
+            for i in range(25):
+                server.add_file(f"Big/file_{i:03d}.txt", b"data")
+            server.add_folder("Big/Sub")
+            yield server
+    
+    @pytest.fixture
+    def client(self, stub):
+        """Create a client pointed at the stand-in."""
+        sp_client = SharePointClient(site_id=SITE_ID, auth_client=make_stub_auth_client())
+        sp_client.GRAPH_BASE_URL = stub.url
+        return sp_client
+    
+    def _page_requests(self, stub):
+        return [url for _, url in stub.request_log if '/children' in url]
+    
+    def test_iter_drive_items_follows_next_link(self, client, stub):
+        """Test every page is fetched and no items are lost."""
+        items = list(client.iter_drive_items("Big", drive_id=DRIVE_ID, page_size=10))
+        
+        assert len(items) == 26
+        assert sum(isinstance(item, SharePointFolder) for item in items) == 1
+        assert len(self._page_requests(stub)) == 3
+    
+    def test_iter_drive_items_is_lazy(self, client, stub):
+        """Test pages are only requested as the iterator advances."""
+        iterator = client.iter_drive_items("Big", drive_id=DRIVE_ID, page_size=10)
+        
+        assert len(self._page_requests(stub)) == 0
+        first = [next(iterator) for _ in range(10)]
+        assert len(first) == 10
+        assert len(self._page_requests(stub)) == 1
+    
+    def test_iter_drive_items_prefetch(self, client, stub):
+        """Test background prefetching yields the same items."""
+        plain = [item.name for item in client.iter_drive_items("Big", drive_id=DRIVE_ID, page_size=7)]
+        prefetched = [
+            item.name
+            for item in client.iter_drive_items("Big", drive_id=DRIVE_ID, page_size=7, prefetch=True)
+        ]
+        
+        assert prefetched == plain
+    
+    def test_iter_drive_items_select(self, client, stub):
+        """Test $select projects items down to the requested fields."""
+        items = list(client.iter_drive_items("Big", drive_id=DRIVE_ID, select=['webUrl']))
+        
+        files = [item for item in items if isinstance(item, SharePointFile)]
+        assert files[0].web_url.endswith("Big/file_000.txt")
+        assert files[0].parent_path is None
+        query = parse_qs(urlsplit(self._page_requests(stub)[0]).query)
+        assert query['$select'][0].startswith('id,name,')
+        assert '$expand' not in query
+    
+    def test_list_drive_items_returns_all_pages(self, client):
+        """Test the list wrapper is no longer truncated at one page."""
+        client.DEFAULT_PAGE_SIZE = 10
+        result = client.list_drive_items("Big", drive_id=DRIVE_ID)
+        
+        assert len(result['files']) == 25
+        assert len(result['folders']) == 1
+    
+    def test_search_files_respects_limit_across_pages(self, client):
+        """Test search results are paged and capped at the limit."""
+        assert len(list(client.iter_search_results("file_", drive_id=DRIVE_ID, page_size=4))) == 25
+        assert len(client.search_files("file_", drive_id=DRIVE_ID, limit=6)) == 6
@@ -0,0 +1,76 @@
+"""
+Tests for the synthetic clinical trial dataset generator.
+"""
+
+import csv
+import importlib
+from io import StringIO
+
+import pytest
+
+from lib.synthetic import VISIT_SCHEDULE, generate_study
+
+
+class TestGenerateStudy:
+    """Test generating linked synthetic studies."""
+
+    def test_same_seed_same_study(self):
+        """Test generation is deterministic per seed."""
+        first = generate_study(subjects=30, sites=4, seed=3)
+        second = generate_study(subjects=30, sites=4, seed=3)
+        other = generate_study(subjects=30, sites=4, seed=4)
+
+        assert first == second
+        assert first.edc_csv() == second.edc_csv()
+        assert first.visits != other.visits
+
+    def test_domains_draw_independently(self):
+        """Test changing one domain's size leaves the others unchanged."""
+        short = generate_study(subjects=20, seed=1, diary_days=7)
+        long = generate_study(subjects=20, seed=1, diary_days=30)
+
+        assert short.labs == long.labs
+        assert short.adverse_events == long.adverse_events
+        assert len(short.diary_entries) < len(long.diary_entries)
+
+    def test_records_linked_to_subjects_and_sites(self):
+        """Test every record refers to a generated subject at its site."""
+        study = generate_study(subjects=50, sites=5, seed=2)
+        site_of = {subject["subject_id"]: subject["site_id"] for subject in study.subjects}
+
+        assert {site["site_id"] for site in study.sites} >= set(site_of.values())
+        assert all(site_of[visit["subject_id"]] == visit["site_id"] for visit in study.visits)
+        assert all(site_of[query["subject_id"]] == query["site_id"] for query in study.queries)
+        for records, key in ((study.labs, "subject_id"), (study.adverse_events, "subject_id"),
+                             (study.medications, "subject_id"), (study.edc_saes, "subject_id"),
+                             (study.diary_entries, "patient_id")):
+            assert {record[key] for record in records} <= set(site_of)
+        assert {sae["sae_number"] for sae in study.safety_db_saes} <= {sae["sae_number"] for sae in study.edc_saes}
+        assert len(study.edc_saes) == sum(1 for event in study.adverse_events if event["serious"])
+
+    def test_scale_and_shapes(self):
+        """Test record volumes follow the arguments and CSV exports parse."""
+        study = generate_study(subjects=40, seed=5, visits_per_subject=4)
+        edc_rows = list(csv.DictReader(StringIO(study.edc_csv())))
+        lab_rows = list(csv.DictReader(StringIO(study.lab_csv())))
+
+        assert len(study.subjects) == 40
+        assert {visit["visit_name"] for visit in study.visits} <= {name for name, _, _ in VISIT_SCHEDULE[:4]}
+        assert len(edc_rows) == len(study.subjects) + len(study.visits)
+        assert len(lab_rows) == len(study.visits)
+        assert study.record_counts()["audit_trail"] >= len(study.visits)
+        with pytest.raises(ValueError):
+            generate_study(subjects=0)
+
+    @pytest.mark.parametrize("tool", [
+        "edc_data_validator", "lab_range_validator", "sae_reconciliation", "audit_trail_reviewer",
+        "adverse_event_coder", "concomitant_med_coder", "patient_diary_checker", "query_response_analyzer"
+    ])
+    def test_tools_accept_inputs(self, tool):
+        """Test each tool runs on its generated input without reporting an error."""
+        study = generate_study(subjects=25, sites=3, seed=11)
+
+        result = importlib.import_module(f"tools.{tool}").run(study.tool_inputs()[tool])
+
+        assert "error" not in result
+        assert result.get("success", True) is True
@@ -0,0 +1,167 @@
+"""
+Tests for resumable upload sessions, run against the local Graph stand-in.
+"""
+
+import os
+import stat
+import pytest
+from unittest.mock import Mock
+from requests.exceptions import RequestException
+
+from sharepoint.uploads import ChunkSizer, ResumableUploader, CHUNK_MULTIPLE, MAX_CHUNK_SIZE
+from tests.graph_stub import GraphStubServer, make_stub_sp_client, DRIVE_ID
+
+CONTENT = bytes(range(256)) * (5 * 4096 + 123)  # ~5 MiB, not a 320 KiB multiple
+
+
+@pytest.fixture
+def stub():
+    """Start an empty Graph stand-in."""
+    with GraphStubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub, tmp_path, monkeypatch):
+    """Create a client with small starting chunks and a private state dir."""
+    monkeypatch.setenv('SHAREPOINT_UPLOAD_STATE_DIR', str(tmp_path / "state"))
+    monkeypatch.setattr(ResumableUploader, 'RETRY_DELAY', 0)
+    sp_client = make_stub_sp_client(stub)
+    sp_client.UPLOAD_CHUNK_SIZE = 2 * CHUNK_MULTIPLE
+    return sp_client
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    """Write the file to upload."""
+    path = tmp_path / "adae.xpt"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+class TestChunkSizer:
+    """Test the ChunkSizer class."""
+
+    def test_sizes_are_320k_multiples(self):
+        """Test every size chosen is a multiple of 320 KiB within bounds."""
+        sizer = ChunkSizer(initial=1000000)
+        sizes = [sizer.size]
+        for seconds in (0.1, 0.1, 10.0, 0.5, 100.0, 0.0):
+            sizer.record(sizer.size, seconds)
+            sizes.append(sizer.size)
+
+        assert all(size % CHUNK_MULTIPLE == 0 and CHUNK_MULTIPLE <= size <= MAX_CHUNK_SIZE for size in sizes)
+
+    def test_grows_on_fast_link_and_shrinks_on_slow(self):
+        """Test the size tracks throughput, at most doubling or halving per chunk."""
+        sizer = ChunkSizer(initial=10 * CHUNK_MULTIPLE, target_seconds=4.0)
+        sizer.record(sizer.size, 0.5)
+        assert sizer.size == 20 * CHUNK_MULTIPLE
+
+        sizer.record(sizer.size, 40.0)
+        assert sizer.size == 10 * CHUNK_MULTIPLE
+
+    def test_clamped_to_graph_limit(self):
+        """Test the size never exceeds 60 MiB."""
+        sizer = ChunkSizer(initial=MAX_CHUNK_SIZE)
+        sizer.record(sizer.size, 0.001)
+
+        assert sizer.size == MAX_CHUNK_SIZE
+
+
+class TestResumableUpload:
+    """Test large-file uploads through SharePointClient."""
+
+    def test_upload_large_file(self, client, stub, local_file, tmp_path):
+        """Test the file arrives intact in 320 KiB-multiple chunks and state is cleaned up."""
+        uploaded = client.upload_file(local_file, "SAS/adae.xpt", drive_id=DRIVE_ID)
+
+        assert uploaded.size == len(CONTENT)
+        assert stub.contents["SAS/adae.xpt"] == CONTENT
+        assert all(length % CHUNK_MULTIPLE == 0 for _, length in stub.upload_chunks[:-1])
+        assert len(stub.upload_chunks) > 1
+        assert os.listdir(tmp_path / "state") == []
+
+    def test_recovers_from_transient_failures(self, client, stub, local_file):
+        """Test failed chunks are retried from the offset the session reports."""
+        stub.fail_upload_puts = 2
+
+        client.upload_file(local_file, "SAS/adae.xpt", drive_id=DRIVE_ID)
+
+        assert stub.contents["SAS/adae.xpt"] == CONTENT
+        starts = [start for start, _ in stub.upload_chunks]
+        assert starts == sorted(set(starts))
+
+    def test_resumes_after_process_restart(self, client, stub, local_file, monkeypatch, tmp_path):
+        """Test a new attempt continues a persisted session, kept private, instead of starting over."""
+        original_put = client._transfer_session.put
+        calls = {'count': 0}
+
+        def failing_after_two(*args, **kwargs):
+            calls['count'] += 1
+            if calls['count'] > 2:
+                raise RequestException("network down")
+            return original_put(*args, **kwargs)
+
+        monkeypatch.setattr(client._transfer_session, 'put', failing_after_two)
+        with pytest.raises(RequestException):
+            client.upload_file(local_file, "SAS/adae.xpt", drive_id=DRIVE_ID)
+        monkeypatch.setattr(client._transfer_session, 'put', original_put)
+        received = sum(length for _, length in stub.upload_chunks)
+        assert received > 0
+        state_dir = tmp_path / "state"
+        assert stat.S_IMODE(os.stat(state_dir).st_mode) == 0o700
+        assert [stat.S_IMODE(os.stat(state_dir / name).st_mode) for name in os.listdir(state_dir)] == [0o600]
+
+        client.upload_file(local_file, "SAS/adae.xpt", drive_id=DRIVE_ID)
+
+        assert stub.contents["SAS/adae.xpt"] == CONTENT
+        assert stub.upload_chunks[2][0] == received  # continued, not restarted
+        sessions = [url for method, url in stub.request_log if url.endswith('createUploadSession')]
+        assert len(sessions) == 1
+
+    def test_modified_file_starts_new_session(self, client, stub, local_file, monkeypatch):
+        """Test a saved session is not reused once the source file changed."""
+        stub.fail_upload_puts = 100
+        monkeypatch.setattr(ResumableUploader, 'MAX_RETRIES', 0)
+        with pytest.raises(RequestException):
+            client.upload_file(local_file, "SAS/adae.xpt", drive_id=DRIVE_ID)
+        stub.fail_upload_puts = 0
+        with open(local_file, 'ab') as f:
+            f.write(b"appended")
+
+        client.upload_file(local_file, "SAS/adae.xpt", drive_id=DRIVE_ID)
+
+        assert stub.contents["SAS/adae.xpt"] == CONTENT + b"appended"
+        sessions = [url for method, url in stub.request_log if url.endswith('createUploadSession')]
+        assert len(sessions) == 2
+
+    def test_lost_session_restarts_are_bounded(self, local_file, tmp_path, monkeypatch):
+        """Test an upload URL that always returns 404 gives up after MAX_RETRIES new sessions."""
+        monkeypatch.setattr(ResumableUploader, 'RETRY_DELAY', 0)
+        session = Mock()
+        session.put.return_value = Mock(status_code=404, text="itemNotFound")
+        create_session = Mock(return_value={'uploadUrl': "https://upload.example/session"})
+        uploader = ResumableUploader(session, create_session, local_file, "adae", state_dir=str(tmp_path / "state"))
+
+        with pytest.raises(RequestException, match="lost"):
+            uploader.run()
+
+        assert create_session.call_count == ResumableUploader.MAX_RETRIES + 1
+
+    def test_next_expected_range_of_zero_is_resent(self, local_file, tmp_path):
+        """Test a 202 asking for byte 0 again resends from the start instead of skipping ahead."""
+        session = Mock()
+        session.put.side_effect = [
+            Mock(status_code=202, json=Mock(return_value={'nextExpectedRanges': ["0-"]})),
+            Mock(status_code=201, json=Mock(return_value={'id': "item-1"})),
+        ]
+        create_session = Mock(return_value={'uploadUrl': "https://upload.example/session"})
+        uploader = ResumableUploader(session, create_session, local_file, "adae", state_dir=str(tmp_path / "state"),
+                                     chunk_size=CHUNK_MULTIPLE)
+
+        result = uploader.run()
+
+        ranges = [call.kwargs['headers']['Content-Range'] for call in session.put.call_args_list]
+        assert [r.split('-')[0] for r in ranges] == ["bytes 0", "bytes 0"]
+        assert result.item == {'id': "item-1"}
@@ -0,0 +1,124 @@
+"""
+Tests for the WHO Drug dictionary, coder and interaction graph.
+"""
+
+import os
+
+import pytest
+
+from lib.coding.whodrug import (
+    Interaction, InteractionGraph, WhoDrugCoder, WhoDrugDictionary, interaction_key, load_whodrug, medication_keys
+)
+
+EXTRACT = [
+    "name,drug_name,drug_code,atc_code,atc_text,therapeutic_class,anatomical_class,routes,ingredients",
+    "Warfarin,WARFARIN,000090,B01AA03,Warfarin,Antithrombotic agents,Blood,oral,WARFARIN",
+    "Coumadin,WARFARIN,000090,B01AA03,Warfarin,Antithrombotic agents,Blood,oral,WARFARIN",
+    "Apixaban,APIXABAN,014723,B01AF02,Apixaban,Antithrombotic agents,Blood,oral,APIXABAN",
+    "Ibuprofen,IBUPROFEN,000042,M01AE01,Ibuprofen,Anti-inflammatory products,Musculo-skeletal,oral;topical,IBUPROFEN",
+    "Naproxen,NAPROXEN,000171,M01AE02,Naproxen,Anti-inflammatory products,Musculo-skeletal,oral,NAPROXEN",
+    "Zestoretic,LISINOPRIL W/HYDROCHLOROTHIAZIDE,012345,C09BA03,Lisinopril and diuretics,ACE inhibitors,"
+    "Cardiovascular,oral,LISINOPRIL;HYDROCHLOROTHIAZIDE",
+]
+
+
+def write_extract(path, rows=EXTRACT):
+    """A small WHO Drug CSV extract at path."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(rows) + "\n")
+    return str(path)
+
+
+class TestWhoDrugDictionary:
+    """Test loading WHO Drug extracts and coding against them."""
+
+    def test_from_csv(self, tmp_path):
+        """Test trade names share their drug's record and lists are split."""
+        dictionary = WhoDrugDictionary.from_csv(write_extract(tmp_path / "whodrug.csv"))
+        coder = WhoDrugCoder(dictionary)
+
+        assert len(dictionary) == 6
+        assert len(dictionary.drugs["drug_name"]) == 5
+        assert coder.code("coumadin 5mg") == {
+            "drug_name": "WARFARIN", "drug_code": "000090", "atc_code": "B01AA03", "atc_text": "Warfarin",
+            "therapeutic_class": "Antithrombotic agents", "anatomical_class": "Blood", "route": ["oral"],
+            "ingredients": ["WARFARIN"], "matched_name": "Coumadin", "confidence": 0.95, "match_method": "contains",
+        }
+        assert coder.code("ibuprofen")["route"] == ["oral", "topical"]
+        assert coder.code("zestoretic")["ingredients"] == ["LISINOPRIL", "HYDROCHLOROTHIAZIDE"]
+        assert coder.code("naproxin")["match_method"] == "fuzzy"
+        assert coder.code("unknown xyz") is None
+
+    def test_missing_columns(self, tmp_path):
+        """Test an extract without a drug_name column is rejected."""
+        with pytest.raises(ValueError, match="drug_name"):
+            WhoDrugDictionary.from_csv(write_extract(tmp_path / "bad.csv", ["name,atc_code", "Warfarin,B01AA03"]))
+
+    def test_saved_index_reused_until_file_changes(self, tmp_path):
+        """Test the built index is saved, loaded on the next call and rebuilt for a new extract."""
+        path = write_extract(tmp_path / "whodrug.csv")
+        index_dir = str(tmp_path / "index")
+
+        first = load_whodrug(path, index_dir)
+        second = load_whodrug(path, index_dir)
+        write_extract(path, EXTRACT + ["Eliquis,APIXABAN,014723,B01AF02,Apixaban,Antithrombotic agents,Blood,oral,APIXABAN"])
+        third = load_whodrug(path, index_dir)
+
+        assert second.digest == first.digest
+        assert second.index.names == first.index.names
+        assert second.term(1) == first.term(1)
+        assert len(third) == 7
+        assert len(os.listdir(index_dir)) == 2
+
+
+class TestInteractionGraph:
+    """Test interaction lookups by ingredient and ATC class."""
+
+    @pytest.fixture
+    def medications(self, tmp_path):
+        coder = WhoDrugCoder(WhoDrugDictionary.from_csv(write_extract(tmp_path / "whodrug.csv")))
+        return [coder.code(name) for name in ("coumadin", "ibuprofen", "naproxen", "zestoretic")]
+
+    def test_keys(self):
+        """Test ATC codes are told apart from names and medications get every ATC level."""
+        assert interaction_key("b01a") == ("atc", "B01A")
+        assert interaction_key(" Warfarin ") == ("name", "warfarin")
+        assert medication_keys({"drug_name": "WARFARIN", "atc_code": "B01AA03", "ingredients": ["WARFARIN"]}) == {
+            ("name", "warfarin"), ("atc", "B"), ("atc", "B01"), ("atc", "B01A"), ("atc", "B01AA"),
+            ("atc", "B01AA03"),
+        }
+
+    def test_check(self, medications):
+        """Test class-level and ingredient-level interactions are each reported once per drug pair."""
+        graph = InteractionGraph.from_records([
+            ("B01A", "M01AE", "Increased bleeding risk", "major", "Avoid combination"),
+            {"drug1": "IBUPROFEN", "drug2": "LISINOPRIL", "interaction_type": "May reduce antihypertensive effect"},
+            ("M01A", "M01A", "Duplicate NSAID therapy"),
+            ("APIXABAN", "NAPROXEN", "Increased bleeding risk"),
+        ])
+
+        found = graph.check(medications)
+
+        assert len(graph) == 4
+        assert sorted((item["drug1"], item["drug2"], item["interaction_type"]) for item in found) == [
+            ("IBUPROFEN", "LISINOPRIL W/HYDROCHLOROTHIAZIDE", "May reduce antihypertensive effect"),
+            ("IBUPROFEN", "NAPROXEN", "Duplicate NSAID therapy"),
+            ("WARFARIN", "IBUPROFEN", "Increased bleeding risk"),
+            ("WARFARIN", "NAPROXEN", "Increased bleeding risk"),
+        ]
+        assert {item["severity"] for item in found if item["drug1"] == "WARFARIN"} == {"major"}
+        assert graph.check(medications[:1] + medications[:1]) == []
+
+    def test_from_file(self, tmp_path, medications):
+        """Test interaction tables load from CSV and JSON."""
+        csv_path = tmp_path / "interactions.csv"
+        csv_path.write_text("drug1,drug2,interaction_type,severity,recommendation\n"
+                            "WARFARIN,IBUPROFEN,Increased bleeding risk,major,\n")
+        json_path = tmp_path / "interactions.json"
+        json_path.write_text('[{"drug1": "WARFARIN", "drug2": "IBUPROFEN", "interaction_type": "Increased bleeding risk",'
+                             ' "severity": "major"}]')
+
+        for path in (csv_path, json_path):
+            graph = InteractionGraph.from_file(str(path))
+            assert graph.interactions == [Interaction("WARFARIN", "IBUPROFEN", "Increased bleeding risk", "major")]
+            assert [item["recommendation"] for item in graph.check(medications)] == ["Monitor closely"]
@@ -1,7 +1,11 @@
 from typing import Dict, List, Optional, Any
+import os
 import re
+import tempfile
+import threading
 from datetime import datetime
-import difflib
+
+from lib.coding.meddra import MeddraCoder, MeddraDictionary, load_meddra
 
 
 MEDDRA_TERMS = {
@@ -145,7 +149,7 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         events : list
             List of adverse event dictionaries with verbatim terms and severity
         coding_version : str, optional
-            MedDRA version (default: "24.0")
+            MedDRA version (default: the release in MEDDRA_ASCII_DIR, else "24.0")
         match_threshold : float, optional
             Similarity threshold 0-1 (default: 0.7)
     """
@@ -160,8 +164,10 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
                 "warnings": []
             }
         
-        coding_version = input_data.get("coding_version", "24.0")
+        coder = get_meddra_coder()
+        coding_version = input_data.get("coding_version") or coder.dictionary.version or "24.0"
         match_threshold = input_data.get("match_threshold", 0.7)
+        matches = coder.code_batch([event.get("verbatim_term") or "" for event in events], match_threshold)
         
         coded_events = []
         uncoded_terms = []
@@ -169,8 +175,8 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         soc_counts = {}
         severity_counts = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
         
-        for event in events:
-            verbatim_term = event.get("verbatim_term", "").lower().strip()
+        for event, meddra_match in zip(events, matches):
+            verbatim_term = (event.get("verbatim_term") or "").lower().strip()
             if not verbatim_term:
                 warnings.append(f"Empty verbatim term for event: {event}")
                 continue
@@ -183,19 +189,19 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
                 "outcome": event.get("outcome")
             }
             
-            meddra_match = find_meddra_term(verbatim_term, match_threshold)
-            
             if meddra_match:
                 coded_event.update({
                     "preferred_term": meddra_match["pt"],
-                    "lower_level_term": meddra_match["llt"][0],
+                    "lower_level_term": meddra_match["llt"],
                     "system_organ_class": meddra_match["soc"],
                     "high_level_group_term": meddra_match["hlgt"],
                     "high_level_term": meddra_match["hlt"],
-                    "meddra_code": meddra_match["code"],
+                    "meddra_code": meddra_match["pt_code"],
                     "coding_version": coding_version,
-                    "match_confidence": meddra_match.get("confidence", 1.0)
+                    "match_confidence": meddra_match["confidence"]
                 })
+                if meddra_match["llt_code"]:
+                    coded_event["llt_code"] = meddra_match["llt_code"]
                 
                 soc = meddra_match["soc"]
                 soc_counts[soc] = soc_counts.get(soc, 0) + 1
@@ -257,29 +263,42 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+# Shared by every run() call in the process; built from the MedDRA
+# distribution in MEDDRA_ASCII_DIR, else from the embedded MEDDRA_TERMS
+_meddra_coder: Optional[MeddraCoder] = None
+_meddra_coder_lock = threading.Lock()
+
+
+def get_meddra_coder() -> MeddraCoder:
+    """Get the process-wide MedDRA coder, loading its dictionary on first use."""
+    global _meddra_coder
+
+    with _meddra_coder_lock:
+        if _meddra_coder is None:
+            ascii_dir = os.getenv("MEDDRA_ASCII_DIR")
+            if ascii_dir:
+                index_dir = os.getenv("MEDDRA_INDEX_DIR", os.path.join(tempfile.gettempdir(), "dcri_meddra_index"))
+                dictionary = load_meddra(ascii_dir, index_dir)
+            else:
+                dictionary = MeddraDictionary.from_terms(MEDDRA_TERMS)
+            _meddra_coder = MeddraCoder(dictionary)
+    return _meddra_coder
+
+
 def find_meddra_term(verbatim: str, threshold: float) -> Optional[Dict]:
     """Find best matching MedDRA term for verbatim text."""
-    verbatim_lower = verbatim.lower()
-    
-    for term_key, term_data in MEDDRA_TERMS.items():
-        if term_key in verbatim_lower:
-            return dict(term_data, confidence=1.0)
-        
-        for llt in term_data["llt"]:
-            if llt.lower() in verbatim_lower or verbatim_lower in llt.lower():
-                return dict(term_data, confidence=0.95)
-    
-    best_match = None
-    best_score = 0
-    
-    for term_key, term_data in MEDDRA_TERMS.items():
-        for llt in term_data["llt"]:
-            score = difflib.SequenceMatcher(None, verbatim_lower, llt.lower()).ratio()
-            if score > best_score and score >= threshold:
-                best_score = score
-                best_match = dict(term_data, confidence=score)
-    
-    return best_match
+    match = get_meddra_coder().code(verbatim, threshold)
+    if match is None:
+        return None
+    return {
+        "pt": match["pt"],
+        "llt": [match["llt"]],
+        "soc": match["soc"],
+        "hlgt": match["hlgt"],
+        "hlt": match["hlt"],
+        "code": match["pt_code"],
+        "confidence": match["confidence"]
+    }
 
 
 def determine_severity(description: str) -> Dict:
@@ -4,12 +4,13 @@ Clinical Text Summarizer Tool
 Uses Azure OpenAI to summarize clinical text
 """
 
-import os
 import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from llm.azure_openai import get_llm_client
+
 def run(input_data: dict) -> dict:
     """
     Summarizes clinical text using AI to preserve key medical findings and diagnostic information.
@@ -27,46 +28,28 @@ def run(input_data: dict) -> dict:
     if not text:
         return {"error": "No text provided to summarize"}
     
-    # Get Azure OpenAI configuration
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-    api_version = os.getenv("AZURE_OPENAI_API_VERSION")
-    
-    if not all([api_key, endpoint, deployment, api_version]):
+    # Shared client: pooled connections, response cache and rate limiting
+    client = get_llm_client()
+    if not client.configured:
         return {"error": "Azure OpenAI credentials not configured"}
     
-    # Prepare the API request
-    url = f"{endpoint}openai/deployments/{deployment}/chat/completions?api-version={api_version}"
-    
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": api_key
-    }
-    
-    data = {
-        "messages": [
-            {"role": "system", "content": "You are a clinical research assistant. Summarize the following clinical text concisely, preserving key medical information."},
-            {"role": "user", "content": text}
-        ],
-        "max_tokens": 200,
-        "temperature": 0.3
-    }
+    messages = [
+        {"role": "system", "content": "You are a clinical research assistant. Summarize the following clinical text concisely, preserving key medical information."},
+        {"role": "user", "content": text}
+    ]
     
     try:
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            result = response.json()
-            summary = result['choices'][0]['message']['content']
-            return {
-                "summary": summary,
-                "original_length": len(text),
-                "summary_length": len(summary),
-                "tokens_used": result.get('usage', {}).get('total_tokens', 0)
-            }
-        else:
-            return {"error": f"Azure OpenAI API error: {response.status_code}"}
-            
+        # Clinical text may contain PHI, so its summaries are never cached
+        result = client.chat(messages, temperature=0.3, max_tokens=200, use_cache=False)
+        summary = result['choices'][0]['message']['content']
+        return {
+            "summary": summary,
+            "original_length": len(text),
+            "summary_length": len(summary),
+            "tokens_used": result.get('usage', {}).get('total_tokens', 0)
+        }
+    
+    except requests.exceptions.HTTPError as e:
+        return {"error": str(e)}
     except Exception as e:
         return {"error": f"Failed to summarize text: {str(e)}"}
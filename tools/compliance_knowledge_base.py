@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from lib.compliance.schema_adapter import SchemaAdapter
 from lib.compliance.rules_engine import RulesEngine
+from lib.compliance.batch import VisitColumns
 
 
 def run(input_data: Dict) -> Dict:
@@ -33,9 +34,18 @@ def run(input_data: Dict) -> Dict:
             Include warning-level findings in results (default: True)
         study_start_date : str, optional
             ISO format date for study start, used for visit window calculations
+        schedules : list, optional
+            Batch mode, instead of schedule_data: schedules to check in one pass, each a dict with
+            study_id, schedule_data and optional schedule_id, schema_type and study_start_date.
+            Results are aggregated per study.
+        max_findings_per_study : int, optional
+            Batch mode: example findings to include per study (default: 10)
     """
     
     try:
+        if input_data.get("schedules") is not None:
+            return _run_batch(input_data)
+
         # Extract parameters
         schedule_data = input_data.get("schedule_data")
         if not schedule_data:
@@ -57,11 +67,7 @@ def run(input_data: Dict) -> Dict:
         engine.load_rules(rule_categories)
         
         # Extract data using schema adapter
-        extracted_data = {
-            "visits": adapter.extract_visits(schedule_data),
-            "participants": adapter.extract_participants(schedule_data),
-            "sites": adapter.extract_sites(schedule_data)
-        }
+        extracted_data = adapter.extract_all(schedule_data)
         
         # Add study start date if provided
         if study_start_date:
@@ -119,6 +125,60 @@ def run(input_data: Dict) -> Dict:
         }
 
 
+def _run_batch(input_data: Dict) -> Dict:
+    """Check many schedules in one columnar pass and summarise per study."""
+    schedules = input_data["schedules"]
+    schema_type = input_data.get("schema_type", "generic")
+    rule_categories = input_data.get("rule_categories", None)
+    include_warnings = input_data.get("include_warnings", True)
+
+    adapters = {schema_type: SchemaAdapter(schema_type)}
+    extracted = []
+    for index, schedule in enumerate(schedules):
+        schedule_schema = schedule.get("schema_type", schema_type)
+        if schedule_schema not in adapters:
+            adapters[schedule_schema] = SchemaAdapter(schedule_schema)
+        extracted.append({
+            "study_id": schedule.get("study_id", "UNKNOWN"),
+            "schedule_id": schedule.get("schedule_id", index),
+            "study_start_date": schedule.get("study_start_date", input_data.get("study_start_date")),
+            "visits": adapters[schedule_schema].extract_visits(schedule.get("schedule_data") or {})
+        })
+
+    engine = RulesEngine()
+    engine.load_rules(rule_categories)
+    studies = engine.apply_rules_batch(
+        VisitColumns.from_schedules(extracted),
+        include_warnings=include_warnings,
+        max_findings_per_study=input_data.get("max_findings_per_study", 10)
+    )
+
+    errors = sum(study["errors"] for study in studies.values())
+    warnings = sum(study["warnings"] for study in studies.values())
+    return {
+        "status": "success",
+        "mode": "batch",
+        "compliance_status": "FAIL" if errors > 0 else ("WARNING" if warnings > 0 else "PASS"),
+        "summary": {
+            "studies": len(studies),
+            "schedules": len(extracted),
+            "studies_failing": sum(1 for study in studies.values() if study["compliance_status"] == "FAIL"),
+            "total_findings": sum(study["total_findings"] for study in studies.values()),
+            "errors": errors,
+            "warnings": warnings,
+            "info": sum(study["info"] for study in studies.values()),
+            "visits_analyzed": sum(study["visits_analyzed"] for study in studies.values()),
+            "rules_applied": len(engine.rules)
+        },
+        "studies": studies,
+        "metadata": {
+            "schema_type": schema_type,
+            "rule_categories": rule_categories or "all",
+            "available_schemas": adapters[schema_type].get_available_schemas()
+        }
+    }
+
+
 # Example usage for testing
 if __name__ == "__main__":
     # Example schedule data in generic format
@@ -1,6 +1,9 @@
 from typing import Dict, List, Optional, Any
-import re
-import difflib
+import os
+import tempfile
+import threading
+
+from lib.coding.whodrug import InteractionGraph, WhoDrugCoder, WhoDrugDictionary, load_whodrug
 
 
 WHO_DRUG_DICTIONARY = {
@@ -131,6 +134,17 @@ BRAND_TO_GENERIC = {
 }
 
 
+# (drug1, drug2, interaction_type, severity, recommendation); either side may be
+# an ingredient name or an ATC code at any level
+DRUG_INTERACTIONS = [
+    ("WARFARIN", "ASPIRIN", "Increased bleeding risk", "moderate", "Monitor closely"),
+    ("WARFARIN", "IBUPROFEN", "Increased bleeding risk", "moderate", "Monitor closely"),
+    ("METFORMIN", "PREDNISONE", "May affect glucose control", "moderate", "Monitor closely"),
+    ("LISINOPRIL", "IBUPROFEN", "May reduce antihypertensive effect", "moderate", "Monitor closely"),
+    ("ATORVASTATIN", "WARFARIN", "May increase INR", "moderate", "Monitor closely")
+]
+
+
 def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Maps concomitant medications to WHO Drug Dictionary codes with ATC classification and interaction checking.
@@ -171,8 +185,11 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         therapeutic_classes = {}
         anatomical_classes = {}
         
-        for med in medications:
-            verbatim_name = med.get("verbatim_name", "").lower().strip()
+        coder = get_whodrug_coder()
+        matches = coder.code_batch([med.get("verbatim_name") or "" for med in medications], match_threshold)
+        
+        for med, who_match in zip(medications, matches):
+            verbatim_name = (med.get("verbatim_name") or "").lower().strip()
             if not verbatim_name:
                 warnings.append(f"Empty medication name for entry: {med}")
                 continue
@@ -189,18 +206,17 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
                 "stop_date": med.get("stop_date")
             }
             
-            who_match = find_who_drug(verbatim_name, match_threshold)
-            
             if who_match:
                 coded_med.update({
                     "drug_name": who_match["drug_name"],
                     "atc_code": who_match["atc_code"],
                     "atc_text": who_match["atc_text"],
                     "drug_code": who_match["drug_code"],
+                    "ingredients": who_match["ingredients"],
                     "therapeutic_class": who_match["therapeutic_class"],
                     "anatomical_class": who_match["anatomical_class"],
                     "coding_version": coding_version,
-                    "match_confidence": who_match.get("confidence", 1.0)
+                    "match_confidence": who_match["confidence"]
                 })
                 
                 if med.get("route") and med["route"].lower() not in who_match["route"]:
@@ -263,61 +279,60 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+# Process-wide coder and interaction graph, built on first use from the files in
+# WHODRUG_DICTIONARY_PATH / DRUG_INTERACTIONS_PATH, else from the embedded tables
+_whodrug_coder: Optional[WhoDrugCoder] = None
+_whodrug_coder_lock = threading.Lock()
+_interaction_graph: Optional[InteractionGraph] = None
+_interaction_graph_lock = threading.Lock()
+
+
+def get_whodrug_coder() -> WhoDrugCoder:
+    """Get the process-wide WHO Drug coder, loading its dictionary on first use."""
+    global _whodrug_coder
+
+    with _whodrug_coder_lock:
+        if _whodrug_coder is None:
+            dictionary_path = os.getenv("WHODRUG_DICTIONARY_PATH")
+            if dictionary_path:
+                index_dir = os.getenv("WHODRUG_INDEX_DIR", os.path.join(tempfile.gettempdir(), "dcri_whodrug_index"))
+                dictionary = load_whodrug(dictionary_path, index_dir)
+            else:
+                dictionary = WhoDrugDictionary.from_entries(WHO_DRUG_DICTIONARY, BRAND_TO_GENERIC)
+            _whodrug_coder = WhoDrugCoder(dictionary)
+    return _whodrug_coder
+
+
+def get_interaction_graph() -> InteractionGraph:
+    """Get the process-wide drug interaction graph, loading it on first use."""
+    global _interaction_graph
+
+    with _interaction_graph_lock:
+        if _interaction_graph is None:
+            interactions_path = os.getenv("DRUG_INTERACTIONS_PATH")
+            if interactions_path:
+                _interaction_graph = InteractionGraph.from_file(interactions_path)
+            else:
+                _interaction_graph = InteractionGraph.from_records(DRUG_INTERACTIONS)
+    return _interaction_graph
+
+
 def find_who_drug(verbatim: str, threshold: float) -> Optional[Dict]:
     """Find best matching WHO Drug entry for verbatim text."""
-    verbatim_lower = verbatim.lower()
-    
-    if verbatim_lower in BRAND_TO_GENERIC:
-        generic_name = BRAND_TO_GENERIC[verbatim_lower]
-        if generic_name in WHO_DRUG_DICTIONARY:
-            return dict(WHO_DRUG_DICTIONARY[generic_name], confidence=0.95)
-    
-    for drug_key, drug_data in WHO_DRUG_DICTIONARY.items():
-        if drug_key in verbatim_lower or verbatim_lower in drug_key:
-            return dict(drug_data, confidence=1.0)
-        
-        if drug_data["drug_name"].lower() in verbatim_lower:
-            return dict(drug_data, confidence=0.95)
-    
-    best_match = None
-    best_score = 0
-    
-    for drug_key, drug_data in WHO_DRUG_DICTIONARY.items():
-        score = difflib.SequenceMatcher(None, verbatim_lower, drug_key).ratio()
-        if score > best_score and score >= threshold:
-            best_score = score
-            best_match = dict(drug_data, confidence=score)
-        
-        score = difflib.SequenceMatcher(None, verbatim_lower, drug_data["drug_name"].lower()).ratio()
-        if score > best_score and score >= threshold:
-            best_score = score
-            best_match = dict(drug_data, confidence=score)
-    
-    return best_match
+    return get_whodrug_coder().code(verbatim, threshold)
 
 
 def check_drug_interactions(coded_medications: List[Dict]) -> List[Dict]:
-    """Check for potential drug interactions."""
-    interactions = []
+    """Check for potential drug interactions between each subject's medications."""
+    graph = get_interaction_graph()
+    by_subject: Dict[Any, List[Dict]] = {}
+    for med in coded_medications:
+        if med.get("drug_name"):
+            by_subject.setdefault(med.get("subject_id"), []).append(med)
     
-    interaction_pairs = [
-        ("WARFARIN", "ASPIRIN", "Increased bleeding risk"),
-        ("WARFARIN", "IBUPROFEN", "Increased bleeding risk"),
-        ("METFORMIN", "PREDNISONE", "May affect glucose control"),
-        ("LISINOPRIL", "IBUPROFEN", "May reduce antihypertensive effect"),
-        ("ATORVASTATIN", "WARFARIN", "May increase INR")
-    ]
-    
-    drug_names = [m.get("drug_name", "") for m in coded_medications if m.get("drug_name")]
-    
-    for drug1, drug2, interaction_type in interaction_pairs:
-        if drug1 in drug_names and drug2 in drug_names:
-            interactions.append({
-                "drug1": drug1,
-                "drug2": drug2,
-                "interaction_type": interaction_type,
-                "severity": "moderate",
-                "recommendation": "Monitor closely"
-            })
+    interactions = []
+    for subject_id, subject_medications in by_subject.items():
+        for interaction in graph.check(subject_medications):
+            interactions.append(dict(interaction, subject_id=subject_id))
     
-    return interactions
\ No newline at end of file
+    return interactions
@@ -8,11 +8,25 @@ import base64
 import csv
 import io
 import re
+import time
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+import math
+import hashlib
+import tempfile
+import itertools
+import contextlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Union, IO
 from datetime import datetime
 import sqlite3
 import os
+import threading
+from collections import OrderedDict, Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from lib.coding.term_index import load_or_build, save_npz
 
 # For the mock implementation, we'll simulate LLM responses
 # In production, these would be replaced with actual Azure OpenAI calls
@@ -20,13 +34,152 @@ import os
 logger = logging.getLogger(__name__)
 
 
+class _Base64Reader(io.RawIOBase):
+    """Decode a base64 text or byte stream incrementally"""
+
+    def __init__(self, stream: IO, read_size: int = 1 << 16):
+        self._stream = stream
+        self._read_size = read_size
+        self._pending = b""
+        self._decoded = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._decoded and not self._eof:
+            chunk = self._stream.read(self._read_size)
+            if isinstance(chunk, str):
+                chunk = chunk.encode("ascii")
+            if not chunk:
+                self._eof = True
+                data = self._pending
+                usable = len(data)
+            else:
+                data = self._pending + b"".join(chunk.split())
+                usable = len(data) - len(data) % 4
+            self._pending = data[usable:]
+            self._decoded = base64.b64decode(data[:usable])
+
+        count = min(len(buffer), len(self._decoded))
+        buffer[:count] = self._decoded[:count]
+        self._decoded = self._decoded[count:]
+        return count
+
+
+def _iter_json_array(stream: IO[str], read_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the items of a top-level JSON array one at a time
+
+    A document that is not an array is parsed whole and yielded as a
+    single item, matching how the in-memory parser treats it.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    in_array = False
+
+    while True:
+        # Skip whitespace, and commas between items
+        while pos < len(buffer) and (buffer[pos].isspace() or (in_array and buffer[pos] == ",")):
+            pos += 1
+        if pos >= len(buffer):
+            chunk = stream.read(read_size)
+            if not chunk:
+                return
+            buffer, pos = chunk, 0
+            continue
+
+        if not in_array:
+            if buffer[pos] != "[":
+                yield json.loads(buffer[pos:] + stream.read())
+                return
+            in_array = True
+            pos += 1
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            item, end = None, None
+        # An item ending exactly at the buffer end may be cut short (e.g. a number)
+        if end is None or end >= len(buffer):
+            chunk = stream.read(read_size)
+            if chunk:
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            if end is None:
+                raise ValueError("Truncated JSON array in schedule input")
+        yield item
+        pos = end
+
+
+class _NDJSONWriter:
+    """Write records as NDJSON, optionally split into numbered part files"""
+
+    def __init__(self, output: Union[str, IO[str]], records_per_file: Optional[int] = None):
+        self.output = output
+        self.records_per_file = records_per_file
+        self.files: List[str] = []
+        self.records = 0
+        self._handle: Optional[IO[str]] = None
+        self._in_file = 0
+
+        if records_per_file and not isinstance(output, (str, os.PathLike)):
+            raise ValueError("records_per_file requires an output path")
+        if isinstance(output, (str, os.PathLike)):
+            directory = os.path.dirname(os.fspath(output))
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def _next_file(self):
+        """Close the current part and open the next one"""
+        self.close()
+        path = os.fspath(self.output)
+        if self.records_per_file:
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{len(self.files) + 1:05d}{ext or '.ndjson'}"
+        self._handle = open(path, "w", encoding="utf-8")
+        self.files.append(path)
+        self._in_file = 0
+
+    def write(self, record: Dict[str, Any]):
+        if isinstance(self.output, (str, os.PathLike)):
+            if self._handle is None or (self.records_per_file and self._in_file >= self.records_per_file):
+                self._next_file()
+            handle = self._handle
+        else:
+            handle = self.output
+        handle.write(json.dumps(record))
+        handle.write("\n")
+        self.records += 1
+        self._in_file += 1
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
 class ScheduleConverter:
     """Main converter class with autonomous arbitration"""
 
-    def __init__(self):
+    # Per-row record builders used by convert_stream
+    RECORD_GENERATORS = {
+        "CDISC_SDTM": "_cdisc_sdtm_records",
+        "FHIR_R4": "_fhir_r4_records",
+        "OMOP_CDM": "_omop_cdm_records"
+    }
+    STREAM_SAMPLE_ROWS = 100
+
+    def __init__(self, mapping_cache: Optional["MappingCache"] = None):
         self.pattern_matcher = PatternMatcher()
         self.fuzzy_matcher = FuzzyMatcher()
-        self.mapping_cache = MappingCache()
+        self.mapping_cache = mapping_cache or MappingCache()
         self.llm_analyzer = LLMAnalyzer()
         self.llm_judge = LLMJudge()
         self.format_converters = {
@@ -60,6 +213,276 @@ class ScheduleConverter:
         # Parse the input file
         parsed_data = self._parse_input(file_content, file_type)
 
+        resolved = self._resolve_mappings(parsed_data, organization_id, confidence_threshold)
+        result = self._apply_conversion(parsed_data, resolved["mappings"], target_format)
+        if resolved.get("arbitration_used"):
+            result["arbitration_used"] = True
+            result["judge_reasoning"] = resolved.get("judge_reasoning", "")
+
+        return result
+
+    def convert_stream(self, source: Union[str, IO], file_type: str, target_format: str,
+                       output: Union[str, IO[str]], organization_id: Optional[str] = None,
+                       confidence_threshold: float = 85, base64_encoded: bool = False,
+                       sample_rows: int = STREAM_SAMPLE_ROWS,
+                       records_per_file: Optional[int] = None,
+                       mappings: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Convert a large schedule with constant memory
+
+        Structure is detected from the header and the first ``sample_rows``
+        rows, then every row is read, converted and written one at a time
+        as NDJSON: one TV/PR record (CDISC_SDTM), CarePlan activity
+        (FHIR_R4) or visit_occurrence row (OMOP_CDM) per line.
+
+        Example:
+            Input: Path to a CSV with millions of visit rows
+            Output: Summary with the NDJSON part files written
+
+        Parameters:
+            source : str or file object
+                Path to the input file, or a text or binary file object
+            file_type : str
+                Type of file (csv, json array, ndjson, text)
+            target_format : str
+                Target format (CDISC_SDTM, FHIR_R4, OMOP_CDM)
+            output : str or file object
+                Output path, or a writable text stream
+            organization_id : str, optional
+                Organization ID for cached mappings
+            confidence_threshold : float, optional
+                Minimum confidence for autonomous conversion (default: 85)
+            base64_encoded : bool, optional
+                Whether the input is base64 encoded (default: False)
+            sample_rows : int, optional
+                Rows used to detect the structure (default: 100)
+            records_per_file : int, optional
+                Split the output into numbered part files of this many records
+            mappings : dict, optional
+                Column mappings to use instead of detecting them
+        """
+        if target_format not in self.RECORD_GENERATORS:
+            raise ValueError(f"Unknown target format: {target_format}")
+
+        started = time.perf_counter()
+        writer = _NDJSONWriter(output, records_per_file)
+        with contextlib.ExitStack() as stack:
+            stack.callback(writer.close)
+            parsed_sample, rows = self._sample_structure(source, file_type, base64_encoded, sample_rows, stack)
+            sample = parsed_sample["rows"]
+
+            if mappings is not None:
+                resolved = {"mappings": mappings, "method": "provided"}
+            else:
+                resolved = self._resolve_mappings(parsed_sample, organization_id, confidence_threshold)
+            sources = self._field_sources(resolved["mappings"])
+            records = getattr(self, self.RECORD_GENERATORS[target_format])
+
+            row_count = 0
+            for idx, row in enumerate(itertools.chain(sample, rows)):
+                for record in records(row, idx, sources):
+                    writer.write(record)
+                row_count += 1
+
+        result = {
+            "success": True,
+            "format": target_format,
+            "row_count": row_count,
+            "records_written": writer.records,
+            "output_files": writer.files,
+            "mappings_used": resolved["mappings"],
+            "method": resolved["method"],
+            "elapsed_seconds": round(time.perf_counter() - started, 3)
+        }
+        if resolved.get("arbitration_used"):
+            result["arbitration_used"] = True
+            result["judge_reasoning"] = resolved.get("judge_reasoning", "")
+        return result
+
+    def convert_bulk(self, inputs: Union[str, List[str]], output_dir: str,
+                     target_format: str = "CDISC_SDTM", organization_id: Optional[str] = None,
+                     confidence_threshold: float = 85, max_workers: Optional[int] = None,
+                     recursive: bool = False, sample_rows: int = STREAM_SAMPLE_ROWS,
+                     base_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convert many schedule files in parallel
+
+        Files are grouped by structural fingerprint so each distinct layout
+        is mapped once (cache, patterns, LLM + fuzzy, judge), then every
+        file is streamed to NDJSON in worker processes using its group's
+        mapping. A summary report is written next to the outputs.
+
+        Example:
+            Input: Directory of 300 legacy sponsor schedules
+            Output: One NDJSON file per schedule plus conversion_summary.json
+
+        Parameters:
+            inputs : str or list
+                A directory, or a list of files and directories
+            output_dir : str
+                Directory for the NDJSON outputs and the summary report
+            target_format : str, optional
+                Target format (default: CDISC_SDTM)
+            organization_id : str, optional
+                Organization ID for cached mappings
+            confidence_threshold : float, optional
+                Minimum confidence for autonomous conversion (default: 85)
+            max_workers : int, optional
+                Worker processes (default: CPU count; 1 converts in process)
+            recursive : bool, optional
+                Include files in subdirectories (default: False)
+            sample_rows : int, optional
+                Rows per file used to detect the structure (default: 100)
+            base_dir : str, optional
+                Confine inputs and output_dir to this directory; they must
+                then be relative paths (see resolve_under)
+        """
+        if target_format not in self.RECORD_GENERATORS:
+            raise ValueError(f"Unknown target format: {target_format}")
+
+        started = time.perf_counter()
+        if base_dir is not None:
+            inputs = [resolve_under(base_dir, entry) for entry in ([inputs] if isinstance(inputs, str) else inputs)]
+            output_dir = resolve_under(base_dir, output_dir)
+        files = _collect_schedule_files(inputs, recursive)
+        if base_dir is not None:
+            # Files found in input directories may be symlinks to elsewhere
+            files = [(resolve_under(base_dir, os.path.relpath(path, os.path.realpath(base_dir))), file_type)
+                     for path, file_type in files]
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Detect each file's structure and group files that share one
+        results: Dict[str, Dict[str, Any]] = {}
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        samples: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for path, file_type in files:
+            try:
+                with contextlib.ExitStack() as stack:
+                    parsed_sample, _ = self._sample_structure(path, file_type, False, sample_rows, stack)
+            except Exception as e:
+                results[path] = {"file": path, "success": False, "error": f"Could not read structure: {e}"}
+                continue
+            key = (file_type, parsed_sample["fingerprint"])
+            groups.setdefault(key, []).append(path)
+            samples.setdefault(key, parsed_sample)
+            results[path] = {"file": path, "file_type": file_type, "fingerprint": parsed_sample["fingerprint"]}
+        detect_seconds = time.perf_counter() - started
+
+        # Resolve each distinct structure once
+        jobs = []
+        output_names = set()
+        for key, paths in groups.items():
+            try:
+                resolved = self._resolve_mappings(samples[key], organization_id, confidence_threshold)
+            except Exception as e:
+                for path in paths:
+                    results[path].update({"success": False, "error": f"Could not resolve mappings: {e}"})
+                continue
+            for path in paths:
+                results[path]["method"] = resolved["method"]
+                jobs.append({
+                    "path": path,
+                    "file_type": key[0],
+                    "target_format": target_format,
+                    "output": os.path.join(output_dir, _unique_output_name(path, output_names)),
+                    "mappings": resolved["mappings"]
+                })
+        resolve_seconds = time.perf_counter() - started - detect_seconds
+
+        workers = max_workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            outcomes = map(_convert_bulk_file, jobs)
+            for job, outcome in zip(jobs, outcomes):
+                results[job["path"]].update(outcome)
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                futures = {pool.submit(_convert_bulk_file, job): job for job in jobs}
+                for future in as_completed(futures):
+                    results[futures[future]["path"]].update(future.result())
+
+        elapsed = time.perf_counter() - started
+        file_results = [results[path] for path, _ in files]
+        succeeded = [r for r in file_results if r.get("success")]
+        total_rows = sum(r.get("row_count", 0) for r in succeeded)
+        report = {
+            "success": len(succeeded) == len(file_results),
+            "target_format": target_format,
+            "files": len(file_results),
+            "succeeded": len(succeeded),
+            "failed": len(file_results) - len(succeeded),
+            "structure_groups": len(groups),
+            "total_rows": total_rows,
+            "total_records": sum(r.get("records_written", 0) for r in succeeded),
+            "workers": 1 if workers == 1 or len(jobs) <= 1 else min(workers, len(jobs)),
+            "timing": {
+                "detect_seconds": round(detect_seconds, 3),
+                "resolve_seconds": round(resolve_seconds, 3),
+                "convert_seconds": round(elapsed - detect_seconds - resolve_seconds, 3),
+                "total_seconds": round(elapsed, 3),
+                "rows_per_second": round(total_rows / elapsed, 1) if elapsed > 0 else 0
+            },
+            "results": file_results
+        }
+
+        report_path = os.path.join(output_dir, BULK_SUMMARY_NAME)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        report["summary_path"] = report_path
+
+        logger.info(
+            f"Bulk conversion: {report['succeeded']}/{report['files']} files, "
+            f"{report['structure_groups']} structures, {elapsed:.2f}s"
+        )
+        return report
+
+    def _sample_structure(self, source: Union[str, IO], file_type: str, base64_encoded: bool,
+                          sample_rows: int, stack: contextlib.ExitStack) -> Tuple[Dict[str, Any], Iterator[Any]]:
+        """Read the header and a bounded sample; return parsed sample data and the remaining rows"""
+        stream = self._open_stream(source, base64_encoded, stack)
+        columns, rows = self._stream_rows(stream, file_type)
+
+        sample = list(itertools.islice(rows, sample_rows))
+        if columns is None:
+            columns = list(sample[0].keys()) if sample and isinstance(sample[0], dict) else []
+        parsed_sample = {
+            "columns": columns,
+            "rows": sample,
+            "row_count": len(sample),
+            "fingerprint": self._generate_fingerprint(columns)
+        }
+        return parsed_sample, rows
+
+    @staticmethod
+    def _open_stream(source: Union[str, IO], base64_encoded: bool,
+                     stack: contextlib.ExitStack) -> IO[str]:
+        """Open the input as a text stream, decoding base64 on the fly"""
+        if isinstance(source, (str, os.PathLike)):
+            source = stack.enter_context(open(source, "rb"))
+        elif isinstance(source, io.TextIOBase) and not base64_encoded:
+            return source
+
+        raw = io.BufferedReader(_Base64Reader(source)) if base64_encoded else source
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        # Detach rather than close, so a caller's stream stays open
+        stack.callback(text.detach)
+        return text
+
+    def _stream_rows(self, stream: IO[str], file_type: str) -> Tuple[Optional[List[str]], Iterator[Any]]:
+        """Return the columns (None if taken from the first row) and a lazy row iterator"""
+        if file_type == "csv":
+            reader = csv.DictReader(stream)
+            return reader.fieldnames or [], reader
+        if file_type == "json":
+            return None, _iter_json_array(stream)
+        if file_type == "ndjson":
+            return None, (json.loads(line) for line in stream if line.strip())
+        if file_type == "text":
+            return ["text"], ({"text": line.rstrip("\r\n")} for line in stream)
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+    def _resolve_mappings(self, parsed_data: Dict[str, Any], organization_id: Optional[str],
+                          confidence_threshold: float) -> Dict[str, Any]:
+        """Choose column mappings for parsed data (cache, patterns, LLM + fuzzy, judge)"""
         # Step 1: Check cache for organization mappings
         if organization_id:
             cached_result = self.mapping_cache.get_org_mappings(
@@ -67,14 +490,14 @@ class ScheduleConverter:
             )
             if cached_result and cached_result["confidence"] > 90:
                 logger.info(f"Using cached mapping with confidence {cached_result['confidence']}")
-                return self._apply_conversion(parsed_data, cached_result["mappings"], target_format)
+                return {"mappings": cached_result["mappings"], "method": "cache"}
 
         # Step 2: Try pattern matching (fast path)
         pattern_result = self.pattern_matcher.match(parsed_data)
         if pattern_result["confidence"] > confidence_threshold:
             logger.info(f"Pattern matching succeeded with confidence {pattern_result['confidence']}")
             self.mapping_cache.store_mapping(organization_id, pattern_result)
-            return self._apply_conversion(parsed_data, pattern_result["mappings"], target_format)
+            return {"mappings": pattern_result["mappings"], "method": "pattern_matching"}
 
         # Step 3: LLM analysis (simulated for now)
         llm_result = self.llm_analyzer.analyze_structure(parsed_data)
@@ -88,7 +511,7 @@ class ScheduleConverter:
             logger.info(f"LLM and Fuzzy agree with confidence {agreement}")
             final_result = self._merge_results(llm_result, fuzzy_result)
             self.mapping_cache.store_mapping(organization_id, final_result)
-            return self._apply_conversion(parsed_data, final_result["mappings"], target_format)
+            return {"mappings": final_result["mappings"], "method": "merged"}
 
         # Step 6: Autonomous arbitration - Judge decides
         logger.info("Disagreement detected, invoking LLM judge for arbitration")
@@ -97,11 +520,12 @@ class ScheduleConverter:
         # Store decision for learning
         self.mapping_cache.store_mapping(organization_id, judge_decision)
 
-        result = self._apply_conversion(parsed_data, judge_decision["mappings"], target_format)
-        result["arbitration_used"] = True
-        result["judge_reasoning"] = judge_decision.get("reasoning", "")
-
-        return result
+        return {
+            "mappings": judge_decision["mappings"],
+            "method": "arbitration",
+            "arbitration_used": True,
+            "judge_reasoning": judge_decision.get("reasoning", "")
+        }
 
     def analyze_structure(self, file_content: str, file_type: str) -> Dict[str, Any]:
         """Analyze file structure without converting"""
@@ -280,30 +704,10 @@ class ScheduleConverter:
         tv_domain = []  # Trial Visits
         pr_domain = []  # Procedures
 
-        rows = parsed_data.get("rows", [])
-        for idx, row in enumerate(rows):
-            # Map visit information
-            tv_record = {
-                "STUDYID": "STUDY001",  # Default study ID
-                "DOMAIN": "TV",
-                "VISITNUM": idx + 1,
-                "VISIT": self._get_mapped_value(row, mappings, "visit_name"),
-                "VISITDY": self._get_mapped_value(row, mappings, "visit_day"),
-            }
-            tv_domain.append(tv_record)
-
-            # Map procedures if present
-            procedures = self._get_mapped_value(row, mappings, "procedures")
-            if procedures:
-                proc_list = procedures.split(",") if isinstance(procedures, str) else [procedures]
-                for proc in proc_list:
-                    pr_record = {
-                        "STUDYID": "STUDY001",
-                        "DOMAIN": "PR",
-                        "VISITNUM": idx + 1,
-                        "PRTRT": proc.strip()
-                    }
-                    pr_domain.append(pr_record)
+        sources = self._field_sources(mappings)
+        for idx, row in enumerate(parsed_data.get("rows", [])):
+            for record in self._cdisc_sdtm_records(row, idx, sources):
+                (tv_domain if record["DOMAIN"] == "TV" else pr_domain).append(record)
 
         return {
             "TV": tv_domain,
@@ -312,6 +716,29 @@ class ScheduleConverter:
             "version": "3.3"
         }
 
+    def _cdisc_sdtm_records(self, row: Dict, idx: int, sources: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+        """Yield the TV record and any PR records for one schedule row"""
+        # Map visit information
+        yield {
+            "STUDYID": "STUDY001",  # Default study ID
+            "DOMAIN": "TV",
+            "VISITNUM": idx + 1,
+            "VISIT": self._mapped_value(row, sources, "visit_name"),
+            "VISITDY": self._mapped_value(row, sources, "visit_day"),
+        }
+
+        # Map procedures if present
+        procedures = self._mapped_value(row, sources, "procedures")
+        if procedures:
+            proc_list = procedures.split(",") if isinstance(procedures, str) else [procedures]
+            for proc in proc_list:
+                yield {
+                    "STUDYID": "STUDY001",
+                    "DOMAIN": "PR",
+                    "VISITNUM": idx + 1,
+                    "PRTRT": proc.strip()
+                }
+
     def to_fhir_r4(self, parsed_data: Dict, mappings: Dict) -> Dict[str, Any]:
         """Convert to FHIR R4 format"""
         care_plan = {
@@ -322,34 +749,31 @@ class ScheduleConverter:
             "activity": []
         }
 
-        rows = parsed_data.get("rows", [])
-        for row in rows:
-            activity = {
-                "detail": {
-                    "kind": "Appointment",
-                    "code": {
-                        "text": self._get_mapped_value(row, mappings, "visit_name")
-                    },
-                    "scheduledString": f"Day {self._get_mapped_value(row, mappings, 'visit_day')}"
-                }
-            }
-            care_plan["activity"].append(activity)
+        sources = self._field_sources(mappings)
+        for idx, row in enumerate(parsed_data.get("rows", [])):
+            care_plan["activity"].extend(self._fhir_r4_records(row, idx, sources))
 
         return care_plan
 
+    def _fhir_r4_records(self, row: Dict, idx: int, sources: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+        """Yield the CarePlan activity for one schedule row"""
+        yield {
+            "detail": {
+                "kind": "Appointment",
+                "code": {
+                    "text": self._mapped_value(row, sources, "visit_name")
+                },
+                "scheduledString": f"Day {self._mapped_value(row, sources, 'visit_day')}"
+            }
+        }
+
     def to_omop_cdm(self, parsed_data: Dict, mappings: Dict) -> Dict[str, Any]:
         """Convert to OMOP CDM format"""
         visit_occurrences = []
 
-        rows = parsed_data.get("rows", [])
-        for idx, row in enumerate(rows):
-            visit = {
-                "visit_occurrence_id": idx + 1,
-                "visit_concept_id": 32810,  # Clinical trial visit
-                "visit_start_date": self._get_mapped_value(row, mappings, "visit_day"),
-                "visit_type_concept_id": 32810
-            }
-            visit_occurrences.append(visit)
+        sources = self._field_sources(mappings)
+        for idx, row in enumerate(parsed_data.get("rows", [])):
+            visit_occurrences.extend(self._omop_cdm_records(row, idx, sources))
 
         return {
             "visit_occurrence": visit_occurrences,
@@ -357,16 +781,31 @@ class ScheduleConverter:
             "version": "5.3"
         }
 
-    def _get_mapped_value(self, row: Dict, mappings: Dict, target_field: str) -> Any:
-        """Get value from row using mappings"""
-        mapping_dict = mappings.get("mappings", mappings)
+    def _omop_cdm_records(self, row: Dict, idx: int, sources: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+        """Yield the visit_occurrence row for one schedule row"""
+        yield {
+            "visit_occurrence_id": idx + 1,
+            "visit_concept_id": 32810,  # Clinical trial visit
+            "visit_start_date": self._mapped_value(row, sources, "visit_day"),
+            "visit_type_concept_id": 32810
+        }
 
-        # Find source column for target field
+    @staticmethod
+    def _field_sources(mappings: Dict) -> Dict[str, str]:
+        """Invert mappings to target field -> first source column mapped to it"""
+        mapping_dict = mappings.get("mappings", mappings)
+        sources = {}
         for source, target in mapping_dict.items():
-            if target == target_field:
-                return row.get(source, "")
-
-        # Try direct field access
+            if isinstance(target, str):
+                sources.setdefault(target, source)
+        return sources
+
+    @staticmethod
+    def _mapped_value(row: Dict, sources: Dict[str, str], target_field: str) -> Any:
+        """Get value from row using inverted mappings, falling back to direct field access"""
+        source = sources.get(target_field)
+        if source is not None:
+            return row.get(source, "")
         return row.get(target_field, "")
 
     def _validate_cdisc_sdtm(self, data: Dict) -> Dict[str, Any]:
@@ -428,24 +867,37 @@ class ScheduleConverter:
 class PatternMatcher:
     """Pattern matching for fast conversion"""
 
+    PATTERNS = {
+        "visit_patterns": [
+            (r"visit", "visit_name"),
+            (r"timepoint", "visit_name"),
+            (r"study.*visit", "visit_name")
+        ],
+        "day_patterns": [
+            (r"day", "visit_day"),
+            (r"study.*day", "visit_day"),
+            (r"visit.*day", "visit_day")
+        ],
+        "procedure_patterns": [
+            (r"procedure", "procedures"),
+            (r"assessment", "procedures"),
+            (r"test", "procedures")
+        ]
+    }
+
+    # Every pattern in a group maps to the same field, so each group is
+    # compiled once into a single alternation
+    GROUP_REGEXES = [
+        (re.compile("|".join(pattern for pattern, _ in group)), group[0][1])
+        for group in PATTERNS.values()
+    ]
+
+    DATE_REGEX = re.compile(r"day|date")
+    VISIT_REGEX = re.compile(r"visit")
+    PROCEDURE_REGEX = re.compile(r"procedure|assessment")
+
     def __init__(self):
-        self.patterns = {
-            "visit_patterns": [
-                (r"visit", "visit_name"),
-                (r"timepoint", "visit_name"),
-                (r"study.*visit", "visit_name")
-            ],
-            "day_patterns": [
-                (r"day", "visit_day"),
-                (r"study.*day", "visit_day"),
-                (r"visit.*day", "visit_day")
-            ],
-            "procedure_patterns": [
-                (r"procedure", "procedures"),
-                (r"assessment", "procedures"),
-                (r"test", "procedures")
-            ]
-        }
+        self.patterns = self.PATTERNS
 
     def match(self, parsed_data: Dict) -> Dict[str, Any]:
         """Match columns to standard fields using patterns"""
@@ -456,12 +908,10 @@ class PatternMatcher:
 
         for col in columns:
             col_lower = col.lower()
-            for pattern_group in self.patterns.values():
-                for pattern, target in pattern_group:
-                    if re.search(pattern, col_lower):
-                        mappings[col] = target
-                        matches += 1
-                        break
+            for regex, target in self.GROUP_REGEXES:
+                if regex.search(col_lower):
+                    mappings[col] = target
+                    matches += 1
 
         if columns:
             confidence = (matches / len(columns)) * 100
@@ -479,11 +929,11 @@ class PatternMatcher:
 
         for col in columns:
             col_lower = col.lower()
-            if re.search(r"day|date", col_lower):
+            if self.DATE_REGEX.search(col_lower):
                 detected.append(f"Date pattern in column: {col}")
-            if re.search(r"visit", col_lower):
+            if self.VISIT_REGEX.search(col_lower):
                 detected.append(f"Visit pattern in column: {col}")
-            if re.search(r"procedure|assessment", col_lower):
+            if self.PROCEDURE_REGEX.search(col_lower):
                 detected.append(f"Procedure pattern in column: {col}")
 
         return detected
@@ -494,28 +944,230 @@ class PatternMatcher:
         return result.get("mappings", {})
 
 
+class SynonymIndex:
+    """
+    Character n-gram TF-IDF index over a synonym dictionary
+
+    The dictionary maps each target field to the column names that mean it.
+    Every synonym is stored as an L2-normalised TF-IDF vector of character
+    n-grams in an inverted index (n-gram -> synonyms, weights), so a whole
+    set of columns is scored against every synonym in one pass of array
+    operations. Built indexes are saved as .npz files named by a digest of
+    the dictionary, so later processes load them instead of rebuilding.
+    """
+
+    NGRAM_SIZE = 3
+    FORMAT_VERSION = 1
+
+    _CAMEL_CASE = re.compile(r"([a-z0-9])([A-Z])")
+    _NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+    def __init__(self, fields: List[str], synonyms: List[str], synonym_fields: np.ndarray,
+                 vocabulary: List[str], idf: np.ndarray, postings_ptr: np.ndarray,
+                 postings_synonym: np.ndarray, postings_weight: np.ndarray, digest: str):
+        self.fields = fields
+        self.synonyms = synonyms
+        self.synonym_fields = synonym_fields
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.postings_ptr = postings_ptr
+        self.postings_synonym = postings_synonym
+        self.postings_weight = postings_weight
+        self.digest = digest
+        self._gram_ids = {gram: i for i, gram in enumerate(vocabulary)}
+        # IDF of an n-gram no synonym contains; it still counts toward a column's norm
+        self._unseen_idf = math.log(1 + len(synonyms)) + 1
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """Lower-case, split camelCase and collapse punctuation/underscores to single spaces"""
+        text = cls._CAMEL_CASE.sub(r"\1 \2", str(text)).replace("#", " number ").replace("+", " plus ")
+        return cls._NON_ALNUM.sub(" ", text.lower()).strip()
+
+    @classmethod
+    def ngrams(cls, text: str) -> Counter:
+        """Character n-gram counts of the normalised text, padded at word boundaries"""
+        padded = f" {cls.normalize(text)} "
+        size = cls.NGRAM_SIZE
+        return Counter(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+
+    @classmethod
+    def digest_for(cls, dictionary: Dict[str, List[str]]) -> str:
+        """Digest identifying an index built from this dictionary"""
+        payload = json.dumps(
+            {"version": cls.FORMAT_VERSION, "ngram_size": cls.NGRAM_SIZE, "synonyms": dictionary},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def build(cls, dictionary: Dict[str, List[str]]) -> "SynonymIndex":
+        """Build the index from {target_field: [synonym, ...]}"""
+        fields = sorted(dictionary)
+        synonyms: List[str] = []
+        synonym_fields: List[int] = []
+        for field_idx, field in enumerate(fields):
+            seen = set()
+            for synonym in [field] + list(dictionary[field]):
+                normalized = cls.normalize(synonym)
+                if normalized and normalized not in seen:
+                    seen.add(normalized)
+                    synonyms.append(normalized)
+                    synonym_fields.append(field_idx)
+
+        grams = [cls.ngrams(synonym) for synonym in synonyms]
+        vocabulary = sorted(set().union(*grams)) if grams else []
+        gram_ids = {gram: i for i, gram in enumerate(vocabulary)}
+
+        entry_gram, entry_synonym, entry_tf = [], [], []
+        for synonym_idx, counts in enumerate(grams):
+            for gram, tf in counts.items():
+                entry_gram.append(gram_ids[gram])
+                entry_synonym.append(synonym_idx)
+                entry_tf.append(tf)
+        entry_gram = np.asarray(entry_gram, dtype=np.int64)
+        entry_synonym = np.asarray(entry_synonym, dtype=np.int64)
+
+        # Smoothed IDF and sublinear TF, as in scikit-learn's TfidfVectorizer
+        df = np.bincount(entry_gram, minlength=len(vocabulary))
+        idf = np.log((1 + len(synonyms)) / (1 + df)) + 1
+        weights = (1 + np.log(np.asarray(entry_tf, dtype=np.float64))) * idf[entry_gram]
+        norms = np.sqrt(np.bincount(entry_synonym, weights=weights ** 2, minlength=len(synonyms)))
+        weights /= norms[entry_synonym]
+
+        # Group entries by n-gram for the inverted index
+        order = np.argsort(entry_gram, kind="stable")
+        postings_ptr = np.concatenate(([0], np.cumsum(df)))
+
+        return cls(
+            fields=fields,
+            synonyms=synonyms,
+            synonym_fields=np.asarray(synonym_fields, dtype=np.int64),
+            vocabulary=vocabulary,
+            idf=idf,
+            postings_ptr=postings_ptr.astype(np.int64),
+            postings_synonym=entry_synonym[order],
+            postings_weight=weights[order],
+            digest=cls.digest_for(dictionary)
+        )
+
+    def score(self, columns: List[str]) -> np.ndarray:
+        """Cosine similarity of every column (rows) to every synonym (columns)"""
+        query_column, query_gram, query_weight = [], [], []
+        for column_idx, column in enumerate(columns):
+            counts = self.ngrams(column)
+            gram_ids = [self._gram_ids.get(gram) for gram in counts]
+            weights = [
+                (1 + math.log(tf)) * (self.idf[gram_id] if gram_id is not None else self._unseen_idf)
+                for gram_id, tf in zip(gram_ids, counts.values())
+            ]
+            norm = math.sqrt(sum(weight * weight for weight in weights))
+            for gram_id, weight in zip(gram_ids, weights):
+                if gram_id is not None:
+                    query_column.append(column_idx)
+                    query_gram.append(gram_id)
+                    query_weight.append(weight / norm)
+
+        synonym_count = len(self.synonyms)
+        if not query_gram:
+            return np.zeros((len(columns), synonym_count))
+
+        # Expand each query n-gram into its posting list and accumulate the
+        # products into a flat (column, synonym) score array
+        query_gram = np.asarray(query_gram, dtype=np.int64)
+        starts = self.postings_ptr[query_gram]
+        lengths = self.postings_ptr[query_gram + 1] - starts
+        entry = np.repeat(np.arange(len(query_gram)), lengths)
+        offsets = np.arange(len(entry)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = starts[entry] + offsets
+
+        flat = np.asarray(query_column, dtype=np.int64)[entry] * synonym_count + self.postings_synonym[positions]
+        products = np.asarray(query_weight)[entry] * self.postings_weight[positions]
+        scores = np.bincount(flat, weights=products, minlength=len(columns) * synonym_count)
+        return scores.reshape(len(columns), synonym_count)
+
+    def match(self, columns: List[str], min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """Best target field for each column scoring at least min_score"""
+        if not columns or not self.synonyms:
+            return []
+        scores = self.score(columns)
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(columns)), best]
+
+        matches = []
+        for column, synonym_idx, best_score in zip(columns, best, best_scores):
+            if best_score >= min_score:
+                matches.append({
+                    "column": column,
+                    "field": self.fields[self.synonym_fields[synonym_idx]],
+                    "synonym": self.synonyms[synonym_idx],
+                    "score": min(float(best_score), 1.0)
+                })
+        return matches
+
+    @classmethod
+    def from_dictionary(cls, dictionary: Dict[str, List[str]],
+                        index_dir: Optional[str] = None) -> "SynonymIndex":
+        """Load the saved index for this dictionary from index_dir, building and saving it if missing"""
+        return load_or_build("synonym", cls.digest_for(dictionary), index_dir, cls.load,
+                             lambda: cls.build(dictionary))
+
+    def save(self, path: str):
+        """Write the index to an .npz file (atomically replaced)"""
+        save_npz(
+            path,
+            digest=np.array(self.digest),
+            fields=np.array(self.fields, dtype=str),
+            synonyms=np.array(self.synonyms, dtype=str),
+            synonym_fields=self.synonym_fields,
+            vocabulary=np.array(self.vocabulary, dtype=str),
+            idf=self.idf,
+            postings_ptr=self.postings_ptr,
+            postings_synonym=self.postings_synonym,
+            postings_weight=self.postings_weight
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "SynonymIndex":
+        """Read an index written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                fields=data["fields"].tolist(),
+                synonyms=data["synonyms"].tolist(),
+                synonym_fields=data["synonym_fields"],
+                vocabulary=data["vocabulary"].tolist(),
+                idf=data["idf"],
+                postings_ptr=data["postings_ptr"],
+                postings_synonym=data["postings_synonym"],
+                postings_weight=data["postings_weight"],
+                digest=str(data["digest"])
+            )
+
+
 class FuzzyMatcher:
-    """Fuzzy logic validation"""
+    """Fuzzy logic validation against the synonym index"""
+
+    MIN_SCORE = 0.5
+
+    def __init__(self, index: Optional[SynonymIndex] = None):
+        self._index = index
+
+    @property
+    def index(self) -> SynonymIndex:
+        """Synonym index (the shared process-wide one unless given)"""
+        if self._index is None:
+            self._index = get_synonym_index()
+        return self._index
 
     def validate(self, llm_result: Dict, parsed_data: Dict) -> Dict[str, Any]:
         """Validate LLM results using fuzzy logic"""
-        mappings = {}
         columns = parsed_data.get("columns", [])
 
-        # Simple fuzzy matching simulation
-        for col in columns:
-            col_lower = col.lower()
-
-            # Score-based matching
-            scores = {
-                "visit_name": self._calculate_similarity(col_lower, "visit"),
-                "visit_day": self._calculate_similarity(col_lower, "day"),
-                "procedures": self._calculate_similarity(col_lower, "procedure")
-            }
-
-            best_match = max(scores, key=scores.get)
-            if scores[best_match] > 0.5:
-                mappings[col] = best_match
+        # Every column is scored against every synonym in one pass
+        mappings = {
+            match["column"]: match["field"]
+            for match in self.index.match(columns, self.MIN_SCORE)
+        }
 
         confidence = len(mappings) / len(columns) * 100 if columns else 0
 
@@ -587,87 +1239,183 @@ class LLMJudge:
 
 
 class MappingCache:
-    """Cache for learned mappings"""
+    """
+    Cache for learned mappings
+
+    One SQLite connection is opened per cache and reused by every call
+    (serialised by a lock, so the cache can be shared between threads).
+    File databases use WAL journaling so readers in other processes are not
+    blocked by writes. Each (org_id, fingerprint) pair has exactly one row:
+    storing it again updates the mapping and bumps success_count and
+    last_used. Lookups go through an in-process LRU first; before serving
+    from it the cache reads SQLite's data_version, which changes whenever
+    another connection (in this or another process) commits to the file, and
+    drops the LRU if it has, so stores and clears made elsewhere are seen.
+    """
+
+    MAX_ENTRIES = 4096
 
-    def __init__(self, db_path: str = "schedule_mappings.db"):
+    def __init__(self, db_path: str = "schedule_mappings.db", max_entries: int = MAX_ENTRIES):
         self.db_path = db_path
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.hits = 0
+        self.misses = 0
         self._init_db()
+        self._data_version = self._read_data_version()
 
     def _init_db(self):
-        """Initialize the database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Initialize the database, migrating tables created without a unique key"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            if self.db_path != ":memory:":
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS mappings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    org_id TEXT,
+                    fingerprint TEXT,
+                    mappings TEXT,
+                    confidence REAL,
+                    success_count INTEGER DEFAULT 1,
+                    last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            cursor.execute("""
+                SELECT 1 FROM sqlite_master
+                WHERE type = 'index' AND name = 'idx_mappings_org_fingerprint'
+            """)
+            if cursor.fetchone() is None:
+                self._deduplicate(cursor)
+                cursor.execute("""
+                    CREATE UNIQUE INDEX idx_mappings_org_fingerprint
+                    ON mappings (org_id, fingerprint)
+                """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_mappings_org_last_used
+                ON mappings (org_id, last_used)
+            """)
+
+            self._conn.commit()
+
+    @staticmethod
+    def _deduplicate(cursor):
+        """
+        Collapse duplicate rows left by the old append-only schema
 
+        The row the old lookup would have returned is kept, with the
+        success counts of its duplicates added to it.
+        """
+        totals = cursor.execute("""
+            SELECT org_id, fingerprint, SUM(COALESCE(success_count, 1)) FROM mappings
+            GROUP BY org_id, fingerprint
+            HAVING COUNT(*) > 1
+        """).fetchall()
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS mappings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                org_id TEXT,
-                fingerprint TEXT,
-                mappings TEXT,
-                confidence REAL,
-                success_count INTEGER DEFAULT 1,
-                last_used TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            DELETE FROM mappings WHERE id NOT IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY org_id, fingerprint
+                        ORDER BY confidence DESC, success_count DESC, id DESC
+                    ) AS rank
+                    FROM mappings
+                ) WHERE rank = 1
             )
         """)
-
-        conn.commit()
-        conn.close()
+        removed = cursor.rowcount
+        cursor.executemany("""
+            UPDATE mappings SET success_count = ?
+            WHERE org_id IS ? AND fingerprint IS ?
+        """, [(total, org_id, fingerprint) for org_id, fingerprint, total in totals])
+        if removed > 0:
+            logger.info(f"Removed {removed} duplicate cached mappings")
+
+    def _read_data_version(self) -> int:
+        """SQLite's counter of commits made to the database by other connections"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _check_data_version(self):
+        """Drop the LRU if another connection has changed the database since it was filled"""
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._lru.clear()
+            self._data_version = version
+
+    def _remember(self, key: Tuple[str, str], entry: Dict):
+        """Add an entry to the in-process LRU"""
+        if self.max_entries <= 0:
+            return
+        self._lru[key] = entry
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
 
     def store_mapping(self, org_id: Optional[str], result: Dict):
-        """Store successful mapping"""
+        """Store successful mapping, bumping success_count if it is already known"""
         if not org_id:
             return
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        mappings_json = json.dumps(result.get("mappings", {}))
+        fingerprint = result.get("fingerprint", "")
+        mappings = result.get("mappings", {})
         confidence = result.get("confidence", 0)
 
-        cursor.execute("""
-            INSERT OR REPLACE INTO mappings (org_id, fingerprint, mappings, confidence)
-            VALUES (?, ?, ?, ?)
-        """, (org_id, result.get("fingerprint", ""), mappings_json, confidence))
-
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO mappings (org_id, fingerprint, mappings, confidence)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (org_id, fingerprint) DO UPDATE SET
+                    mappings = excluded.mappings,
+                    confidence = excluded.confidence,
+                    success_count = success_count + 1,
+                    last_used = CURRENT_TIMESTAMP
+            """, (org_id, fingerprint, json.dumps(mappings), confidence))
+            self._conn.commit()
+            self._remember((org_id, fingerprint), {
+                "mappings": dict(mappings),
+                "confidence": confidence
+            })
 
     def get_org_mappings(self, org_id: str, fingerprint: str) -> Optional[Dict]:
         """Get cached mappings for organization"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT mappings, confidence FROM mappings
-            WHERE org_id = ? AND fingerprint = ?
-            ORDER BY confidence DESC, success_count DESC
-            LIMIT 1
-        """, (org_id, fingerprint))
-
-        result = cursor.fetchone()
-        conn.close()
-
-        if result:
-            return {
-                "mappings": json.loads(result[0]),
-                "confidence": result[1]
-            }
-        return None
+        key = (org_id, fingerprint)
+        with self._lock:
+            self._check_data_version()
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                row = self._conn.execute("""
+                    SELECT mappings, confidence FROM mappings
+                    WHERE org_id = ? AND fingerprint = ?
+                """, key).fetchone()
+                if row is None:
+                    return None
+                entry = {"mappings": json.loads(row[0]), "confidence": row[1]}
+                self._remember(key, entry)
+
+        # Callers may modify the result, so never hand out the cached dict
+        return {"mappings": dict(entry["mappings"]), "confidence": entry["confidence"]}
 
     def get_all_mappings(self, org_id: str) -> List[Dict]:
         """Get all mappings for an organization"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT fingerprint, mappings, confidence, success_count, last_used
-            FROM mappings
-            WHERE org_id = ?
-            ORDER BY last_used DESC
-        """, (org_id,))
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT fingerprint, mappings, confidence, success_count, last_used
+                FROM mappings
+                WHERE org_id = ?
+                ORDER BY last_used DESC
+            """, (org_id,)).fetchall()
 
         results = []
-        for row in cursor.fetchall():
+        for row in rows:
             results.append({
                 "fingerprint": row[0],
                 "mappings": json.loads(row[1]),
@@ -676,44 +1424,38 @@ class MappingCache:
                 "last_used": row[4]
             })
 
-        conn.close()
         return results
 
     def clear(self, org_id: str) -> int:
         """Clear cache for organization"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        if org_id == "all":
-            cursor.execute("DELETE FROM mappings")
-        else:
-            cursor.execute("DELETE FROM mappings WHERE org_id = ?", (org_id,))
+        with self._lock:
+            if org_id == "all":
+                cursor = self._conn.execute("DELETE FROM mappings")
+                self._lru.clear()
+            else:
+                cursor = self._conn.execute("DELETE FROM mappings WHERE org_id = ?", (org_id,))
+                for key in [key for key in self._lru if key[0] == org_id]:
+                    del self._lru[key]
 
-        count = cursor.rowcount
-        conn.commit()
-        conn.close()
+            count = cursor.rowcount
+            self._conn.commit()
 
         return count
 
     def get_statistics(self, org_id: Optional[str] = None) -> Dict[str, Any]:
         """Get usage statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        if org_id:
-            cursor.execute("""
-                SELECT COUNT(*), AVG(confidence), MAX(success_count)
-                FROM mappings
-                WHERE org_id = ?
-            """, (org_id,))
-        else:
-            cursor.execute("""
-                SELECT COUNT(*), AVG(confidence), MAX(success_count)
-                FROM mappings
-            """)
-
-        result = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            if org_id:
+                result = self._conn.execute("""
+                    SELECT COUNT(*), AVG(confidence), MAX(success_count)
+                    FROM mappings
+                    WHERE org_id = ?
+                """, (org_id,)).fetchone()
+            else:
+                result = self._conn.execute("""
+                    SELECT COUNT(*), AVG(confidence), MAX(success_count)
+                    FROM mappings
+                """).fetchone()
 
         return {
             "total_mappings": result[0] or 0,
@@ -721,6 +1463,152 @@ class MappingCache:
             "max_success_count": result[2] or 0
         }
 
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+            self._lru.clear()
+
+
+BULK_SUMMARY_NAME = "conversion_summary.json"
+
+# Input file extensions recognised by bulk conversion
+BULK_FILE_TYPES = {
+    ".csv": "csv",
+    ".json": "json",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".txt": "text"
+}
+
+
+def resolve_under(base_dir: str, path: str) -> str:
+    """
+    Resolve a relative path inside base_dir, rejecting anything outside it
+
+    Absolute paths and ".." components are refused, and symlinks are resolved
+    before checking, so a link inside base_dir cannot point elsewhere.
+    """
+    if not isinstance(path, str) or not path.strip():
+        raise ValueError("Path must be a non-empty string")
+    if os.path.isabs(path) or ".." in path.replace("\\", "/").split("/"):
+        raise ValueError(f"Path must be relative to the base directory: {path}")
+    base = os.path.realpath(base_dir)
+    resolved = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, resolved]) != base:
+        raise ValueError(f"Path is outside the base directory: {path}")
+    return resolved
+
+
+def _collect_schedule_files(inputs: Union[str, List[str]], recursive: bool) -> List[Tuple[str, str]]:
+    """Expand files and directories into (path, file_type) pairs"""
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+
+    files = []
+    for entry in inputs:
+        entry = os.fspath(entry)
+        if os.path.isdir(entry):
+            if recursive:
+                paths = [os.path.join(root, name) for root, _, names in os.walk(entry) for name in names]
+            else:
+                paths = [os.path.join(entry, name) for name in os.listdir(entry)]
+            for path in sorted(paths):
+                file_type = BULK_FILE_TYPES.get(os.path.splitext(path)[1].lower())
+                if file_type and os.path.isfile(path):
+                    files.append((path, file_type))
+        elif os.path.isfile(entry):
+            files.append((entry, BULK_FILE_TYPES.get(os.path.splitext(entry)[1].lower(), "csv")))
+        else:
+            raise ValueError(f"Input not found: {entry}")
+    return files
+
+
+def _unique_output_name(path: str, used: set) -> str:
+    """NDJSON output name for an input file, unique within one bulk run"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name, suffix = f"{stem}.ndjson", 1
+    while name in used:
+        suffix += 1
+        name = f"{stem}-{suffix}.ndjson"
+    used.add(name)
+    return name
+
+
+# Converter used by bulk worker processes; mappings are always supplied, so
+# its cache is never consulted and lives in memory
+_worker_converter: Optional["ScheduleConverter"] = None
+
+
+def _convert_bulk_file(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one file with an already resolved mapping"""
+    global _worker_converter
+
+    if _worker_converter is None:
+        _worker_converter = ScheduleConverter(mapping_cache=MappingCache(db_path=":memory:"))
+
+    started = time.perf_counter()
+    try:
+        summary = _worker_converter.convert_stream(
+            job["path"], job["file_type"], job["target_format"], job["output"], mappings=job["mappings"]
+        )
+    except Exception as e:
+        return {"success": False, "error": str(e), "elapsed_seconds": round(time.perf_counter() - started, 3)}
+
+    return {
+        "success": True,
+        "output_files": summary["output_files"],
+        "row_count": summary["row_count"],
+        "records_written": summary["records_written"],
+        "elapsed_seconds": summary["elapsed_seconds"]
+    }
+
+
+DEFAULT_SYNONYMS_PATH = str(Path(__file__).resolve().parent.parent / "data" / "schedule_synonyms.json")
+
+# The synonym index is read-only once built, so one instance is shared by
+# every converter in the process
+_synonym_index: Optional[SynonymIndex] = None
+_synonym_index_lock = threading.Lock()
+
+
+def load_synonyms(path: str) -> Dict[str, List[str]]:
+    """Read a synonym dictionary file ({"synonyms": {target_field: [names]}})"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("synonyms", data)
+
+
+def get_synonym_index() -> SynonymIndex:
+    """Get the process-wide synonym index, loading or building it on first use"""
+    global _synonym_index
+
+    with _synonym_index_lock:
+        if _synonym_index is None:
+            synonyms_path = os.getenv("SCHEDULE_SYNONYMS_PATH", DEFAULT_SYNONYMS_PATH)
+            index_dir = os.getenv(
+                "SCHEDULE_SYNONYM_INDEX_DIR",
+                os.path.join(tempfile.gettempdir(), "dcri_schedule_index")
+            )
+            _synonym_index = SynonymIndex.from_dictionary(load_synonyms(synonyms_path), index_dir)
+    return _synonym_index
+
+
+# Shared by every run() call in the process; the converter holds no
+# per-call state and its MappingCache is lock-guarded
+_default_converter: Optional[ScheduleConverter] = None
+_default_converter_lock = threading.Lock()
+
+
+def get_converter() -> ScheduleConverter:
+    """Get the process-wide converter, creating it on first use"""
+    global _default_converter
+
+    with _default_converter_lock:
+        if _default_converter is None:
+            _default_converter = ScheduleConverter()
+    return _default_converter
+
 
 def run(input_data: Dict) -> Dict:
     """
@@ -739,10 +1627,20 @@ def run(input_data: Dict) -> Dict:
             Target format: CDISC_SDTM, FHIR_R4, or OMOP_CDM (default: CDISC_SDTM)
         organization_id : str, optional
             Organization ID for cached mappings
+        confidence_threshold : int, optional
+            Minimum mapping confidence 0-100 (default: 85)
+
+    Streaming conversion of files on disk is only available through
+    ScheduleConverter.convert_stream and convert_bulk; paths in the request
+    body are rejected so HTTP callers cannot read or write server files.
     """
-    converter = ScheduleConverter()
+    if input_data.get("input_path") or input_data.get("output_path"):
+        return {
+            "success": False,
+            "error": "input_path and output_path are not accepted; send the schedule as file_content"
+        }
 
-    return converter.convert(
+    return get_converter().convert(
         file_content=input_data.get("file_content", ""),
         file_type=input_data.get("file_type", "text"),
         target_format=input_data.get("target_format", "CDISC_SDTM"),
@@ -10,70 +10,26 @@ import io
 import re
 import logging
 import os
-import requests
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import sqlite3
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-logger = logging.getLogger(__name__)
-
-
-class AzureOpenAIClient:
-    """Client for Azure OpenAI API calls"""
-
-    def __init__(self):
-        self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
-        self.endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        self.deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        self.api_version = os.getenv("AZURE_OPENAI_API_VERSION")
-
-        if not all([self.api_key, self.endpoint, self.deployment, self.api_version]):
-            logger.warning("Azure OpenAI credentials not fully configured - will use fallback mode")
-            self.configured = False
-        else:
-            self.configured = True
-            self.url = f"{self.endpoint}openai/deployments/{self.deployment}/chat/completions?api-version={self.api_version}"
-            self.headers = {
-                "Content-Type": "application/json",
-                "api-key": self.api_key
-            }
-
-    def call_llm(self, system_prompt: str, user_prompt: str, temperature: float = 0.3, max_tokens: int = 500) -> Optional[str]:
-        """Make a call to Azure OpenAI"""
-        if not self.configured:
-            return None
-
-        data = {
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
+# Re-exported so existing imports from this module keep working
+from llm.azure_openai import AzureOpenAIClient, get_llm_client
 
-        try:
-            response = requests.post(self.url, headers=self.headers, json=data)
-            if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content']
-            else:
-                logger.error(f"Azure OpenAI API error: {response.status_code}")
-                return None
-        except Exception as e:
-            logger.error(f"Azure OpenAI call failed: {e}")
-            return None
+logger = logging.getLogger(__name__)
 
 
 class LLMAnalyzer:
     """Real LLM analyzer using Azure OpenAI"""
 
     def __init__(self):
-        self.client = AzureOpenAIClient()
+        self.client = get_llm_client()
         self.fallback_mode = not self.client.configured
 
     def analyze_structure(self, parsed_data: Dict) -> Dict[str, Any]:
@@ -156,7 +112,7 @@ class LLMJudge:
     """Autonomous judge using Azure OpenAI for disagreement resolution"""
 
     def __init__(self):
-        self.client = AzureOpenAIClient()
+        self.client = get_llm_client()
         self.fallback_mode = not self.client.configured
 
     def arbitrate(self, llm_result: Dict, fuzzy_result: Dict, parsed_data: Dict) -> Dict[str, Any]:
@@ -249,11 +205,11 @@ from tools.schedule_converter import (
 class ScheduleConverterWithAzure(BaseScheduleConverter):
     """Enhanced Schedule Converter with real Azure OpenAI integration"""
 
-    def __init__(self):
+    def __init__(self, mapping_cache: Optional[MappingCache] = None):
         """Initialize with Azure OpenAI components"""
         self.pattern_matcher = PatternMatcher()
         self.fuzzy_matcher = FuzzyMatcher()
-        self.mapping_cache = MappingCache()
+        self.mapping_cache = mapping_cache or MappingCache()
         self.llm_analyzer = LLMAnalyzer()  # Now uses Azure OpenAI
         self.llm_judge = LLMJudge()  # Now uses Azure OpenAI
         self.format_converters = {
@@ -269,6 +225,22 @@ class ScheduleConverterWithAzure(BaseScheduleConverter):
             logger.warning("Azure OpenAI not configured - using fallback mode")
 
 
+# Shared by every run() call in the process, so the Azure OpenAI
+# configuration is read and logged once
+_default_converter: Optional[ScheduleConverterWithAzure] = None
+_default_converter_lock = threading.Lock()
+
+
+def get_converter() -> ScheduleConverterWithAzure:
+    """Get the process-wide Azure converter, creating it on first use"""
+    global _default_converter
+
+    with _default_converter_lock:
+        if _default_converter is None:
+            _default_converter = ScheduleConverterWithAzure()
+    return _default_converter
+
+
 def run(input_data: Dict) -> Dict:
     """
     Convert clinical trial schedule to standard format using Azure OpenAI
@@ -287,7 +259,7 @@ def run(input_data: Dict) -> Dict:
         organization_id : str, optional
             Organization ID for cached mappings
     """
-    converter = ScheduleConverterWithAzure()
+    converter = get_converter()
 
     result = converter.convert(
         file_content=input_data.get("file_content", ""),